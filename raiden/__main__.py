@@ -1,7 +1,19 @@
 # make it possible to run raiden with 'python -m raiden'
+import sys
 
 
 def main():
+    import_profiler = None
+    if "--import-profile" in sys.argv[1:]:
+        # Installed before anything else is imported, the option itself is
+        # declared by the CLI
+        import atexit
+        from raiden.ui.import_profile import ImportProfiler
+
+        import_profiler = ImportProfiler()
+        import_profiler.install()
+        atexit.register(lambda: print(import_profiler.report(), file=sys.stderr))
+
     import gevent.monkey
 
     gevent.monkey.patch_all()
@@ -5,6 +5,7 @@ from gevent import Greenlet
 
 import raiden.blockchain.events as blockchain_events
 from raiden import waiting
+from raiden.api.read_model import ReadModel
 from raiden.constants import (
     GENESIS_BLOCK_NUMBER,
     RED_EYES_PER_TOKEN_NETWORK_LIMIT,
@@ -21,6 +22,7 @@ from raiden.exceptions import (
     InsufficientGasReserve,
     InvalidAddress,
     InvalidAmount,
+    InvalidNumberInput,
     InvalidSecret,
     InvalidSecretHash,
     InvalidSettleTimeout,
@@ -30,6 +32,7 @@ from raiden.exceptions import (
 )
 from raiden.messages import RequestMonitoring
 from raiden.settings import DEFAULT_RETRY_TIMEOUT, DEVELOPMENT_CONTRACT_VERSION
+from raiden.storage.utils import TimestampedEvent
 from raiden.transfer import architecture, views
 from raiden.transfer.architecture import TransferTask
 from raiden.transfer.events import (
@@ -47,8 +50,10 @@ from raiden.utils.typing import (
     Any,
     BlockSpecification,
     BlockTimeout,
+    Callable,
     ChannelID,
     Dict,
+    Iterator,
     List,
     LockedTransferType,
     NetworkTimeout,
@@ -165,6 +170,7 @@ class RaidenAPI:
 
     def __init__(self, raiden):
         self.raiden = raiden
+        self.read_model = ReadModel(raiden)
 
     @property
     def address(self):
@@ -637,6 +643,17 @@ class RaidenAPI:
             if not token_address:
                 raise UnknownTokenAddress("Provided a partner address but no token address")
 
+        return self.read_model.get(
+            key=("channel_list", registry_address, token_address, partner_address),
+            compute=lambda: self._list_channels(registry_address, token_address, partner_address),
+        )
+
+    def _list_channels(
+        self,
+        registry_address: PaymentNetworkAddress,
+        token_address: Optional[TokenAddress],
+        partner_address: Optional[Address],
+    ) -> List[NettingChannelState]:
         if token_address and partner_address:
             channel_state = views.get_channelstate_for(
                 chain_state=views.state_from_raiden(self.raiden),
@@ -789,6 +806,27 @@ class RaidenAPI:
         limit: int = None,
         offset: int = None,
     ):
+        return list(
+            self.iterate_raiden_events_payment_history_with_timestamps(
+                token_address=token_address,
+                target_address=target_address,
+                limit=limit,
+                offset=offset,
+            )
+        )
+
+    def iterate_raiden_events_payment_history_with_timestamps(
+        self,
+        token_address: TokenAddress = None,
+        target_address: Address = None,
+        limit: int = None,
+        offset: int = None,
+    ) -> Iterator[TimestampedEvent]:
+        """ Return an iterator over the payment history.
+
+        The arguments are validated right away, the events are read from the
+        database while the iterator is consumed.
+        """
         if token_address and not is_binary_address(token_address):
             raise InvalidAddress(
                 "Expected binary address format for token in get_raiden_events_payment_history"
@@ -808,19 +846,17 @@ class RaidenAPI:
                 token_address=token_address,
             )
 
-        events = [
+        events = self.raiden.wal.storage.iterate_events_with_timestamps(limit=limit, offset=offset)
+
+        return (
             event
-            for event in self.raiden.wal.storage.get_events_with_timestamps(
-                limit=limit, offset=offset
-            )
+            for event in events
             if event_filter_for_payments(
                 event=event.wrapped_event,
                 token_network_address=token_network_address,
                 partner_address=target_address,
             )
-        ]
-
-        return events
+        )
 
     def get_raiden_events_payment_history(
         self,
@@ -840,28 +876,111 @@ class RaidenAPI:
 
     transfer = transfer_and_wait
 
+    def _get_blockchain_events(
+        self,
+        contract_address: Address,
+        query_events: Callable[[BlockSpecification, BlockSpecification], List[Dict]],
+        from_block: BlockSpecification,
+        to_block: BlockSpecification,
+        channel_identifiers: List[ChannelID] = None,
+        limit: int = None,
+        offset: int = None,
+    ) -> List[Dict[str, Any]]:
+        """ Return the events of the contract at `contract_address` in the
+        given block range, newest first.
+
+        The events of the blocks which were already polled by the node are read
+        from the database, only the other blocks are queried from the ethereum
+        node with `query_events`.
+        """
+        blockchain_events.verify_block_number(from_block, "from_block")
+        blockchain_events.verify_block_number(to_block, "to_block")
+
+        if limit is not None and limit < 0:
+            raise InvalidNumberInput("limit must be a positive integer")
+        if offset is not None and offset < 0:
+            raise InvalidNumberInput("offset must be a positive integer")
+        offset = offset or 0
+
+        storage = self.raiden.wal.storage
+        checksum_address = to_checksum_address(contract_address)
+        synced_range = storage.get_blockchain_events_synced_range(checksum_address)
+
+        is_synced = (
+            synced_range is not None
+            and isinstance(from_block, int)
+            and from_block >= synced_range.from_block
+            and (isinstance(to_block, int) or to_block == "latest")
+        )
+        if not is_synced:
+            events = query_events(from_block, to_block)
+            events.sort(key=lambda event: (event["block_number"], event["logIndex"]), reverse=True)
+            return events[offset:] if limit is None else events[offset : offset + limit]
+
+        assert synced_range, "is_synced requires a synced range"
+
+        newer_events: List[Dict] = list()
+        if to_block == "latest" or to_block > synced_range.to_block:
+            newer_events = query_events(max(from_block, synced_range.to_block + 1), to_block)
+            newer_events.sort(
+                key=lambda event: (event["block_number"], event["logIndex"]), reverse=True
+            )
+
+        events = newer_events[offset:] if limit is None else newer_events[offset : offset + limit]
+        stored_limit = None if limit is None else limit - len(events)
+
+        if stored_limit != 0:
+            local_to_block = synced_range.to_block
+            if to_block != "latest":
+                local_to_block = min(to_block, local_to_block)
+
+            events.extend(
+                storage.get_blockchain_events(
+                    contract_address=checksum_address,
+                    from_block=from_block,
+                    to_block=local_to_block,
+                    channel_identifiers=channel_identifiers,
+                    limit=stored_limit,
+                    offset=max(0, offset - len(newer_events)),
+                )
+            )
+
+        return events
+
     def get_blockchain_events_network(
         self,
         registry_address: PaymentNetworkAddress,
         from_block: BlockSpecification = GENESIS_BLOCK_NUMBER,
         to_block: BlockSpecification = "latest",
+        limit: int = None,
+        offset: int = None,
     ):
-        events = blockchain_events.get_token_network_registry_events(
-            chain=self.raiden.chain,
-            token_network_registry_address=registry_address,
-            contract_manager=self.raiden.contract_manager,
-            events=blockchain_events.ALL_EVENTS,
+        def query_events(from_block, to_block):
+            return blockchain_events.get_token_network_registry_events(
+                chain=self.raiden.chain,
+                token_network_registry_address=registry_address,
+                contract_manager=self.raiden.contract_manager,
+                events=blockchain_events.ALL_EVENTS,
+                from_block=from_block,
+                to_block=to_block,
+            )
+
+        return self._get_blockchain_events(
+            contract_address=Address(registry_address),
+            query_events=query_events,
             from_block=from_block,
             to_block=to_block,
+            limit=limit,
+            offset=offset,
         )
 
-        return sorted(events, key=lambda evt: evt.get("block_number"), reverse=True)
-
     def get_blockchain_events_token_network(
         self,
         token_address: TokenAddress,
         from_block: BlockSpecification = GENESIS_BLOCK_NUMBER,
         to_block: BlockSpecification = "latest",
+        limit: int = None,
+        offset: int = None,
     ):
         """Returns a list of blockchain events coresponding to the token_address."""
 
@@ -875,28 +994,33 @@ class RaidenAPI:
         if token_network_address is None:
             raise UnknownTokenAddress("Token address is not known.")
 
-        returned_events = blockchain_events.get_token_network_events(
-            chain=self.raiden.chain,
-            token_network_address=token_network_address,
-            contract_manager=self.raiden.contract_manager,
-            events=blockchain_events.ALL_EVENTS,
+        def query_events(from_block, to_block):
+            return blockchain_events.get_token_network_events(
+                chain=self.raiden.chain,
+                token_network_address=token_network_address,
+                contract_manager=self.raiden.contract_manager,
+                events=blockchain_events.ALL_EVENTS,
+                from_block=from_block,
+                to_block=to_block,
+            )
+
+        return self._get_blockchain_events(
+            contract_address=token_network_address,
+            query_events=query_events,
             from_block=from_block,
             to_block=to_block,
+            limit=limit,
+            offset=offset,
         )
 
-        for event in returned_events:
-            if event.get("args"):
-                event["args"] = dict(event["args"])
-
-        returned_events.sort(key=lambda evt: evt.get("block_number"), reverse=True)
-        return returned_events
-
     def get_blockchain_events_channel(
         self,
         token_address: TokenAddress,
         partner_address: Address = None,
         from_block: BlockSpecification = GENESIS_BLOCK_NUMBER,
         to_block: BlockSpecification = "latest",
+        limit: int = None,
+        offset: int = None,
     ):
         if not is_binary_address(token_address):
             raise InvalidAddress(
@@ -911,20 +1035,33 @@ class RaidenAPI:
             token_address=token_address,
             partner_address=partner_address,
         )
-        returned_events = []
-        for channel in channel_list:
-            returned_events.extend(
-                blockchain_events.get_all_netting_channel_events(
-                    chain=self.raiden.chain,
-                    token_network_address=token_network_address,
-                    netting_channel_identifier=channel.identifier,
-                    contract_manager=self.raiden.contract_manager,
-                    from_block=from_block,
-                    to_block=to_block,
+        if not channel_list:
+            return []
+
+        def query_events(from_block, to_block):
+            returned_events = []
+            for channel in channel_list:
+                returned_events.extend(
+                    blockchain_events.get_all_netting_channel_events(
+                        chain=self.raiden.chain,
+                        token_network_address=token_network_address,
+                        netting_channel_identifier=channel.identifier,
+                        contract_manager=self.raiden.contract_manager,
+                        from_block=from_block,
+                        to_block=to_block,
+                    )
                 )
-            )
-        returned_events.sort(key=lambda evt: evt.get("block_number"), reverse=True)
-        return returned_events
+            return returned_events
+
+        return self._get_blockchain_events(
+            contract_address=token_network_address,
+            query_events=query_events,
+            from_block=from_block,
+            to_block=to_block,
+            channel_identifiers=[channel.identifier for channel in channel_list],
+            limit=limit,
+            offset=offset,
+        )
 
     def create_monitoring_request(
         self, balance_proof: BalanceProofSignedState, reward_amount: TokenAmount
@@ -946,8 +1083,6 @@ class RaidenAPI:
     def get_pending_transfers(
         self, token_address: TokenAddress = None, partner_address: Address = None
     ) -> List[Dict[str, Any]]:
-        chain_state = views.state_from_raiden(self.raiden)
-        transfer_tasks = views.get_all_transfer_tasks(chain_state)
         channel_id = None
 
         if token_address is not None:
@@ -961,4 +1096,11 @@ class RaidenAPI:
                 )
                 channel_id = partner_channel.identifier
 
-        return transfer_tasks_view(transfer_tasks, token_address, channel_id)
+        def pending_transfers() -> List[Dict[str, Any]]:
+            chain_state = views.state_from_raiden(self.raiden)
+            transfer_tasks = views.get_all_transfer_tasks(chain_state)
+            return transfer_tasks_view(transfer_tasks, token_address, channel_id)
+
+        return self.read_model.get(
+            key=("pending_transfers", token_address, channel_id), compute=pending_transfers
+        )
@@ -0,0 +1,35 @@
+from raiden.utils.typing import Any, Callable, Dict, Hashable, Optional
+
+
+class ReadModel:
+    """ Cache for projections of the node state which are served by the API.
+
+    The state only changes when a state change is dispatched, so the entries
+    are versioned by the identifier of the last state change written to the
+    write-ahead log. All entries are dropped when it changes, until then
+    repeated requests are answered without walking the `ChainState`.
+
+    The cached values are shared between the callers and must not be
+    modified.
+    """
+
+    def __init__(self, raiden) -> None:
+        self.raiden = raiden
+        self.version: Optional[int] = None
+        self._entries: Dict[Hashable, Any] = dict()
+
+    def get(self, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """ Return the value for `key`, calling `compute` if it is not cached
+        for the current state.
+
+        Exceptions raised by `compute` are propagated and nothing is cached.
+        """
+        version = self.raiden.wal.state_change_id
+        if version != self.version:
+            self._entries.clear()
+            self.version = version
+
+        if key not in self._entries:
+            self._entries[key] = compute()
+
+        return self._entries[key]
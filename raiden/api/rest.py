@@ -3,13 +3,21 @@ import json
 import logging
 import socket
 from http import HTTPStatus
-from typing import Dict
+from typing import Any, Dict, Iterable, Iterator, List
 
 import gevent
 import gevent.pool
 import structlog
 from eth_utils import encode_hex, to_checksum_address
-from flask import Flask, make_response, request, send_from_directory, url_for
+from flask import (
+    Flask,
+    Response,
+    make_response,
+    request,
+    send_from_directory,
+    stream_with_context,
+    url_for,
+)
 from flask.json import jsonify
 from flask_cors import CORS
 from flask_restful import Api, abort
@@ -76,6 +84,7 @@ from raiden.exceptions import (
     TransactionThrew,
     UnknownTokenAddress,
 )
+from raiden.storage.utils import TimestampedEvent
 from raiden.transfer import channel, views
 from raiden.transfer.events import (
     EventPaymentReceivedSuccess,
@@ -91,6 +100,7 @@ from raiden.utils import (
     split_endpoint,
     typing,
 )
+from raiden.utils.metrics import PROMETHEUS_CONTENT_TYPE, REGISTRY
 from raiden.utils.runnable import Runnable
 
 log = structlog.get_logger(__name__)
@@ -105,6 +115,12 @@ ERROR_STATUS_CODES = [
     HTTPStatus.INTERNAL_SERVER_ERROR,
 ]
 
+JSON_MIMETYPE = "application/json"
+NDJSON_MIMETYPE = "application/x-ndjson"
+
+# Number of rows sent in a single chunk of a streamed response
+STREAM_CHUNK_ROWS = 100
+
 
 URLS_V1 = [
     ("/address", AddressResource),
@@ -169,6 +185,55 @@ def api_response(result, status_code=HTTPStatus.OK):
     return response
 
 
+def api_stream_response(rows: Iterable[Any]):
+    """ Stream `rows` with chunked transfer encoding.
+
+    The rows are sent as newline delimited JSON if the client accepts
+    `application/x-ndjson`, otherwise as a JSON array. `rows` is consumed
+    while the response is written and the hub is yielded to after every
+    chunk, so neither the memory nor the time to the first byte depend on the
+    number of rows.
+    """
+    if request.accept_mimetypes.best_match([JSON_MIMETYPE, NDJSON_MIMETYPE]) == NDJSON_MIMETYPE:
+        mimetype = NDJSON_MIMETYPE
+        chunks = ndjson_chunks(rows)
+    else:
+        mimetype = JSON_MIMETYPE
+        chunks = json_array_chunks(rows)
+
+    log.debug("Streaming response", mimetype=mimetype)
+    return Response(stream_with_context(chunks), status=HTTPStatus.OK, mimetype=mimetype)
+
+
+def _chunked(rows: Iterable[Any]) -> Iterator[List[str]]:
+    chunk: List[str] = list()
+    for row in rows:
+        chunk.append(json.dumps(row))
+
+        if len(chunk) == STREAM_CHUNK_ROWS:
+            yield chunk
+            chunk = list()
+            gevent.sleep(0)
+
+    if chunk:
+        yield chunk
+
+
+def ndjson_chunks(rows: Iterable[Any]) -> Iterator[str]:
+    for chunk in _chunked(rows):
+        yield "".join(f"{row}\n" for row in chunk)
+
+
+def json_array_chunks(rows: Iterable[Any]) -> Iterator[str]:
+    """ Produce the same document as `json.dumps(list(rows))` in chunks. """
+    separator = ""
+    yield "["
+    for chunk in _chunked(rows):
+        yield separator + ", ".join(chunk)
+        separator = ", "
+    yield "]"
+
+
 def api_error(errors, status_code):
     assert status_code in ERROR_STATUS_CODES, "Programming error, unexpected error status code"
     log.error("Error processing request", errors=errors, status_code=status_code)
@@ -196,6 +261,11 @@ def endpoint_not_found(e):
     return api_error(errors, HTTPStatus.NOT_FOUND)
 
 
+def serve_metrics():
+    """ The process metrics, in the Prometheus text format. """
+    return Response(REGISTRY.render(), content_type=PROMETHEUS_CONTENT_TYPE)
+
+
 def hexbytes_to_str(map_: Dict):
     """ Converts values that are of type `HexBytes` to strings. """
     for k, v in map_.items():
@@ -221,7 +291,11 @@ def encode_object_to_str(map_: Dict):
 def normalize_events_list(old_list):
     """Internally the `event_type` key is prefixed with underscore but the API
     returns an object without that prefix"""
-    new_list = []
+    return list(iterate_normalized_events(old_list))
+
+
+def iterate_normalized_events(old_list: Iterable[Dict]) -> Iterator[Dict]:
+    """ Lazy version of `normalize_events_list`. """
     for _event in old_list:
         new_event = dict(_event)
         if new_event.get("args"):
@@ -242,8 +316,7 @@ def normalize_events_list(old_list):
         encode_byte_values(new_event)
         # encode unserializable objects
         encode_object_to_str(new_event)
-        new_list.append(new_event)
-    return new_list
+        yield new_event
 
 
 def convert_to_serializable(event_list):
@@ -298,13 +371,22 @@ class APIServer(Runnable):
     _api_prefix = "/api/1"
 
     def __init__(
-        self, rest_api, config, cors_domain_list=None, web_ui=False, eth_rpc_endpoint=None
+        self,
+        rest_api,
+        config,
+        cors_domain_list=None,
+        web_ui=False,
+        eth_rpc_endpoint=None,
+        stream_responses=False,
     ):
         super().__init__()
         if rest_api.version != 1:
             raise ValueError("Invalid api version: {}".format(rest_api.version))
         self._api_prefix = f"/api/v{rest_api.version}"
 
+        # The event and history endpoints stream their results, see `api_stream_response`
+        rest_api.stream_responses = stream_responses
+
         flask_app = Flask(__name__)
         if cors_domain_list:
             CORS(flask_app, origins=cors_domain_list)
@@ -346,6 +428,10 @@ class APIServer(Runnable):
                     route, route, view_func=self._serve_webui, methods=("GET",)
                 )
 
+        self.flask_app.add_url_rule(
+            "/metrics", "metrics", view_func=serve_metrics, methods=("GET",)
+        )
+
         self._is_raiden_running()
 
     def _is_raiden_running(self):
@@ -493,6 +579,13 @@ class RestAPI:
         self.sent_success_payment_schema = EventPaymentSentSuccessSchema()
         self.received_success_payment_schema = EventPaymentReceivedSuccessSchema()
         self.failed_payment_schema = EventPaymentSentFailedSchema()
+        self.stream_responses = False
+
+    def _rows_response(self, rows: Iterable[Any]):
+        if self.stream_responses:
+            return api_stream_response(rows)
+
+        return api_response(result=list(rows))
 
     def get_our_address(self):
         return api_response(result=dict(our_address=to_checksum_address(self.raiden_api.address)))
@@ -715,13 +808,21 @@ class RestAPI:
             token_address=optional_address_to_string(token_address),
             partner_address=optional_address_to_string(partner_address),
         )
-        raiden_service_result = self.raiden_api.get_channel_list(
-            registry_address, token_address, partner_address
+
+        def serialized_channel_list():
+            raiden_service_result = self.raiden_api.get_channel_list(
+                registry_address, token_address, partner_address
+            )
+            assert isinstance(raiden_service_result, list)
+            return [
+                self.channel_schema.dump(channel_schema)
+                for channel_schema in raiden_service_result
+            ]
+
+        result = self.raiden_api.read_model.get(
+            key=("serialized_channel_list", registry_address, token_address, partner_address),
+            compute=serialized_channel_list,
         )
-        assert isinstance(raiden_service_result, list)
-        result = [
-            self.channel_schema.dump(channel_schema) for channel_schema in raiden_service_result
-        ]
         return api_response(result=result)
 
     def get_tokens_list(self, registry_address: typing.PaymentNetworkAddress):
@@ -760,6 +861,8 @@ class RestAPI:
         registry_address: typing.PaymentNetworkAddress,
         from_block: typing.BlockSpecification = GENESIS_BLOCK_NUMBER,
         to_block: typing.BlockSpecification = "latest",
+        limit: int = None,
+        offset: int = None,
     ):
         log.debug(
             "Getting network events",
@@ -767,21 +870,29 @@ class RestAPI:
             registry_address=to_checksum_address(registry_address),
             from_block=from_block,
             to_block=to_block,
+            limit=limit,
+            offset=offset,
         )
         try:
             raiden_service_result = self.raiden_api.get_blockchain_events_network(
-                registry_address=registry_address, from_block=from_block, to_block=to_block
+                registry_address=registry_address,
+                from_block=from_block,
+                to_block=to_block,
+                limit=limit,
+                offset=offset,
             )
-        except InvalidBlockNumberInput as e:
+        except (InvalidBlockNumberInput, InvalidNumberInput) as e:
             return api_error(str(e), status_code=HTTPStatus.CONFLICT)
 
-        return api_response(result=normalize_events_list(raiden_service_result))
+        return self._rows_response(iterate_normalized_events(raiden_service_result))
 
     def get_blockchain_events_token_network(
         self,
         token_address: typing.TokenAddress,
         from_block: typing.BlockSpecification = GENESIS_BLOCK_NUMBER,
         to_block: typing.BlockSpecification = "latest",
+        limit: int = None,
+        offset: int = None,
     ):
         log.debug(
             "Getting token network blockchain events",
@@ -789,15 +900,21 @@ class RestAPI:
             token_address=to_checksum_address(token_address),
             from_block=from_block,
             to_block=to_block,
+            limit=limit,
+            offset=offset,
         )
         try:
             raiden_service_result = self.raiden_api.get_blockchain_events_token_network(
-                token_address=token_address, from_block=from_block, to_block=to_block
+                token_address=token_address,
+                from_block=from_block,
+                to_block=to_block,
+                limit=limit,
+                offset=offset,
             )
-            return api_response(result=normalize_events_list(raiden_service_result))
+            return self._rows_response(iterate_normalized_events(raiden_service_result))
         except UnknownTokenAddress as e:
             return api_error(str(e), status_code=HTTPStatus.NOT_FOUND)
-        except (InvalidBlockNumberInput, InvalidAddress) as e:
+        except (InvalidBlockNumberInput, InvalidAddress, InvalidNumberInput) as e:
             return api_error(str(e), status_code=HTTPStatus.CONFLICT)
 
     def get_raiden_events_payment_history_with_timestamps(
@@ -816,7 +933,7 @@ class RestAPI:
             offset=offset,
         )
         try:
-            service_result = self.raiden_api.get_raiden_events_payment_history_with_timestamps(
+            service_result = self.raiden_api.iterate_raiden_events_payment_history_with_timestamps(
                 token_address=token_address,
                 target_address=target_address,
                 limit=limit,
@@ -825,8 +942,10 @@ class RestAPI:
         except (InvalidNumberInput, InvalidAddress) as e:
             return api_error(str(e), status_code=HTTPStatus.CONFLICT)
 
-        result = []
-        for event in service_result:
+        return self._rows_response(self._serialize_payment_events(service_result))
+
+    def _serialize_payment_events(self, events: Iterable[TimestampedEvent]) -> Iterator[Dict]:
+        for event in events:
             if isinstance(event.wrapped_event, EventPaymentSentSuccess):
                 serialized_event = self.sent_success_payment_schema.dump(event)
             elif isinstance(event.wrapped_event, EventPaymentSentFailed):
@@ -840,16 +959,13 @@ class RestAPI:
                     unexpected_event=event.wrapped_event,
                 )
 
-            result.append(serialized_event)
-        return api_response(result=result)
+            yield serialized_event
 
     def get_raiden_internal_events_with_timestamps(self, limit, offset):
-        return [
-            str(e)
-            for e in self.raiden_api.raiden.wal.storage.get_events_with_timestamps(
-                limit=limit, offset=offset
-            )
-        ]
+        events = self.raiden_api.raiden.wal.storage.iterate_events_with_timestamps(
+            limit=limit, offset=offset
+        )
+        return self._rows_response(str(e) for e in events)
 
     def get_blockchain_events_channel(
         self,
@@ -857,6 +973,8 @@ class RestAPI:
         partner_address: typing.Address = None,
         from_block: typing.BlockSpecification = GENESIS_BLOCK_NUMBER,
         to_block: typing.BlockSpecification = "latest",
+        limit: int = None,
+        offset: int = None,
     ):
         log.debug(
             "Getting channel blockchain events",
@@ -865,6 +983,8 @@ class RestAPI:
             partner_address=optional_address_to_string(partner_address),
             from_block=from_block,
             to_block=to_block,
+            limit=limit,
+            offset=offset,
         )
         try:
             raiden_service_result = self.raiden_api.get_blockchain_events_channel(
@@ -872,9 +992,11 @@ class RestAPI:
                 partner_address=partner_address,
                 from_block=from_block,
                 to_block=to_block,
+                limit=limit,
+                offset=offset,
             )
-            return api_response(result=normalize_events_list(raiden_service_result))
-        except (InvalidBlockNumberInput, InvalidAddress) as e:
+            return self._rows_response(iterate_normalized_events(raiden_service_result))
+        except (InvalidBlockNumberInput, InvalidAddress, InvalidNumberInput) as e:
             return api_error(str(e), status_code=HTTPStatus.CONFLICT)
         except UnknownTokenAddress as e:
             return api_error(str(e), status_code=HTTPStatus.NOT_FOUND)
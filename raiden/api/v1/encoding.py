@@ -191,6 +191,8 @@ class BaseListSchema(Schema):
 class BlockchainEventsRequestSchema(BaseSchema):
     from_block = fields.Integer(missing=None)
     to_block = fields.Integer(missing=None)
+    limit = fields.Integer(missing=None)
+    offset = fields.Integer(missing=None)
 
     class Meta:
         strict = True
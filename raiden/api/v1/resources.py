@@ -99,7 +99,7 @@ class BlockchainEventsNetworkResource(BaseResource):
     get_schema = BlockchainEventsRequestSchema()
 
     @use_kwargs(get_schema, locations=("query",))
-    def get(self, from_block, to_block):
+    def get(self, from_block, to_block, limit=None, offset=None):
         from_block = from_block or self.rest_api.raiden_api.raiden.query_start_block
         to_block = to_block or "latest"
 
@@ -107,6 +107,8 @@ class BlockchainEventsNetworkResource(BaseResource):
             registry_address=self.rest_api.raiden_api.raiden.default_registry.address,
             from_block=from_block,
             to_block=to_block,
+            limit=limit,
+            offset=offset,
         )
 
 
@@ -115,12 +117,16 @@ class BlockchainEventsTokenResource(BaseResource):
     get_schema = BlockchainEventsRequestSchema()
 
     @use_kwargs(get_schema, locations=("query",))
-    def get(self, token_address, from_block, to_block):
+    def get(self, token_address, from_block, to_block, limit=None, offset=None):
         from_block = from_block or self.rest_api.raiden_api.raiden.query_start_block
         to_block = to_block or "latest"
 
         return self.rest_api.get_blockchain_events_token_network(
-            token_address=token_address, from_block=from_block, to_block=to_block
+            token_address=token_address,
+            from_block=from_block,
+            to_block=to_block,
+            limit=limit,
+            offset=offset,
         )
 
 
@@ -129,7 +135,15 @@ class ChannelBlockchainEventsResource(BaseResource):
     get_schema = BlockchainEventsRequestSchema()
 
     @use_kwargs(get_schema, locations=("query",))
-    def get(self, token_address, partner_address=None, from_block=None, to_block=None):
+    def get(
+        self,
+        token_address,
+        partner_address=None,
+        from_block=None,
+        to_block=None,
+        limit=None,
+        offset=None,
+    ):
         from_block = from_block or self.rest_api.raiden_api.raiden.query_start_block
         to_block = to_block or "latest"
 
@@ -138,6 +152,8 @@ class ChannelBlockchainEventsResource(BaseResource):
             partner_address=partner_address,
             from_block=from_block,
             to_block=to_block,
+            limit=limit,
+            offset=offset,
         )
 
 
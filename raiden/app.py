@@ -10,6 +10,7 @@ from raiden.network.proxies.token_network_registry import TokenNetworkRegistry
 from raiden.network.proxies.user_deposit import UserDeposit
 from raiden.raiden_service import RaidenService
 from raiden.settings import (
+    DEFAULT_DATABASE_READERS,
     DEFAULT_NUMBER_OF_BLOCK_CONFIRMATIONS,
     DEFAULT_PATHFINDING_IOU_TIMEOUT,
     DEFAULT_PATHFINDING_MAX_FEE,
@@ -34,6 +35,7 @@ class App:  # pylint: disable=too-few-public-methods
         "settle_timeout": DEFAULT_SETTLE_TIMEOUT,
         "contracts_path": contracts_precompiled_path(RED_EYES_CONTRACT_VERSION),
         "database_path": "",
+        "database_readers": DEFAULT_DATABASE_READERS,
         "transport_type": "matrix",
         "blockchain": {"confirmation_blocks": DEFAULT_NUMBER_OF_BLOCK_CONFIRMATIONS},
         "transport": {
@@ -59,6 +61,9 @@ class App:  # pylint: disable=too-few-public-methods
             "pathfinding_iou_timeout": DEFAULT_PATHFINDING_IOU_TIMEOUT,
             "monitoring_enabled": False,
         },
+        "startup_profile": {"enabled": False, "output_path": None, "cprofile": False},
+        "archive_wal": False,
+        "eth_ipc_path": None,
     }
 
     def __init__(
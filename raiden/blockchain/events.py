@@ -1,12 +1,13 @@
 from collections import namedtuple
-from typing import Dict, List
+from typing import Dict, Iterator, List
 
-from eth_utils import to_canonical_address
+from eth_utils import encode_hex, to_canonical_address, to_checksum_address
 
 from raiden.constants import GENESIS_BLOCK_NUMBER, UINT64_MAX
 from raiden.exceptions import InvalidBlockNumberInput, UnknownEventType
 from raiden.network.blockchain_service import BlockChainService
 from raiden.network.proxies.secret_registry import SecretRegistry
+from raiden.storage.sqlite import SQLiteStorage
 from raiden.utils import pex, typing
 from raiden.utils.filters import (
     StatelessFilter,
@@ -15,6 +16,7 @@ from raiden.utils.filters import (
 )
 from raiden.utils.typing import (
     Address,
+    Any,
     BlockSpecification,
     ChannelID,
     Optional,
@@ -62,14 +64,33 @@ def get_contract_events(
         contract_address, topics=topics, from_block=from_block, to_block=to_block
     )
 
-    result = []
-    for event in events:
-        decoded_event = dict(decode_event(abi, event))
-        if event.get("blockNumber"):
-            decoded_event["block_number"] = event["blockNumber"]
-            del decoded_event["blockNumber"]
-        result.append(decoded_event)
-    return result
+    return [decode_event_to_json(abi, event) for event in events]
+
+
+def _encode_binary_values(value: Any) -> Any:
+    if isinstance(value, bytes):
+        return encode_hex(value)
+
+    if isinstance(value, dict):
+        return {key: _encode_binary_values(item) for key, item in value.items()}
+
+    return value
+
+
+def decode_event_to_json(abi: List[Dict], log_event: Dict) -> Dict[str, Any]:
+    """ Decode `log_event` for the blockchain events API.
+
+    The binary values are encoded as hex strings, so that the decoded event
+    can be stored and returned as JSON.
+    """
+    decoded_event = dict(decode_event(abi, log_event))
+    decoded_event["args"] = dict(decoded_event["args"])
+
+    if log_event.get("blockNumber"):
+        decoded_event["block_number"] = log_event["blockNumber"]
+        del decoded_event["blockNumber"]
+
+    return _encode_binary_values(decoded_event)
 
 
 def get_token_network_registry_events(
@@ -198,19 +219,46 @@ class Event:
 
 
 class BlockchainEvents:
-    """ Events polling. """
+    """ Events polling.
+
+    If `storage` is set, the polled events are also stored in the database
+    for the blockchain events API.
+    """
 
     def __init__(self):
         self.event_listeners = list()
+        self.storage: Optional[SQLiteStorage] = None
 
-    def poll_blockchain_events(self, block_number: typing.BlockNumber):
-        """ Poll for new blockchain events up to `block_number`. """
+    def poll_blockchain_events(self, block_number: typing.BlockNumber) -> Iterator[List[Event]]:
+        """ Poll for new blockchain events up to `block_number`.
+
+        The events are yielded in batches, one per contract. The listeners
+        added while a batch is handled, e.g. for a new token network, are
+        polled before this generator is exhausted.
+        """
 
         for event_listener in self.event_listeners:
             assert isinstance(event_listener.filter, StatelessFilter)
 
-            for log_event in event_listener.filter.get_new_entries(block_number):
-                yield decode_event_to_internal(event_listener.abi, log_event)
+            from_block = event_listener.filter.next_block_number()
+            log_events = event_listener.filter.get_new_entries(block_number)
+
+            if self.storage is not None and from_block <= block_number:
+                # Decoded before `decode_event_to_internal`, which pops the
+                # block and transaction fields from the log events
+                self.storage.write_blockchain_events(
+                    contract_address=str(event_listener.filter.filter_params["address"]),
+                    from_block=from_block,
+                    to_block=block_number,
+                    events=[
+                        decode_event_to_json(event_listener.abi, log_event)
+                        for log_event in log_events
+                    ],
+                )
+
+            yield [
+                decode_event_to_internal(event_listener.abi, log_event) for log_event in log_events
+            ]
 
     def uninstall_all_event_listeners(self):
         for listener in self.event_listeners:
@@ -256,6 +304,24 @@ class BlockchainEvents:
             contract_manager.get_contract_abi(CONTRACT_TOKEN_NETWORK),
         )
 
+    def add_synced_range_before_creation(
+        self,
+        contract_address: typing.Address,
+        from_block: typing.BlockNumber,
+        creation_block_number: typing.BlockNumber,
+    ) -> None:
+        """ Record that `contract_address` has no events from `from_block` up
+        to its creation, so that queries starting at `from_block` are served
+        from the database.
+        """
+        if self.storage is not None and from_block < creation_block_number:
+            self.storage.write_blockchain_events(
+                contract_address=to_checksum_address(contract_address),
+                from_block=from_block,
+                to_block=typing.BlockNumber(creation_block_number - 1),
+                events=[],
+            )
+
     def add_secret_registry_listener(
         self,
         secret_registry_proxy: SecretRegistry,
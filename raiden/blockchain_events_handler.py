@@ -1,11 +1,14 @@
+from dataclasses import dataclass, field
 from typing import TYPE_CHECKING
 
 import gevent
 import structlog
+from gevent.pool import Pool
 
 from raiden.blockchain.events import Event
 from raiden.blockchain.state import get_channel_state
 from raiden.connection_manager import ConnectionManager
+from raiden.constants import BLOCKCHAIN_EVENTS_PREFETCH_POOL_SIZE
 from raiden.network.proxies.utils import get_onchain_locksroots
 from raiden.storage.restore import (
     get_event_with_balance_proof_by_locksroot,
@@ -15,6 +18,7 @@ from raiden.transfer import views
 from raiden.transfer.architecture import StateChange
 from raiden.transfer.identifiers import CanonicalIdentifier
 from raiden.transfer.state import (
+    NettingChannelState,
     TokenNetworkGraphState,
     TokenNetworkState,
     TransactionChannelNewBalance,
@@ -32,6 +36,19 @@ from raiden.transfer.state_change import (
     ContractReceiveUpdateTransfer,
 )
 from raiden.utils import pex, typing
+from raiden.utils.typing import (
+    Any,
+    BlockHash,
+    BlockNumber,
+    Callable,
+    ChannelID,
+    Dict,
+    List,
+    Locksroot,
+    Optional,
+    TokenNetworkAddress,
+    Tuple,
+)
 from raiden_contracts.constants import (
     EVENT_SECRET_REVEALED,
     EVENT_TOKEN_NETWORK_CREATED,
@@ -45,6 +62,150 @@ if TYPE_CHECKING:
 
 log = structlog.get_logger(__name__)  # pylint: disable=invalid-name
 
+ChannelKey = Tuple[TokenNetworkAddress, ChannelID]
+
+
+@dataclass
+class PrefetchedOnchainData:
+    """ On-chain data needed by the handlers of a batch of blockchain events.
+
+    The data is fetched concurrently before the events are handled. A handler
+    queries the blockchain itself if its data is missing, e.g. because the
+    channel was opened in the same batch or the request failed.
+    """
+
+    channel_states: Dict[ChannelKey, NettingChannelState] = field(default_factory=dict)
+    settled_locksroots: Dict[Tuple[ChannelKey, BlockHash], Tuple[Locksroot, Locksroot]] = field(
+        default_factory=dict
+    )
+
+
+def fetch_new_channel_state(
+    raiden: "RaidenService",
+    token_network_address: TokenNetworkAddress,
+    channel_identifier: ChannelID,
+    opened_block_number: BlockNumber,
+) -> NettingChannelState:
+    """ Query the state of a new channel of this node. """
+    channel_proxy = raiden.chain.payment_channel(
+        canonical_identifier=CanonicalIdentifier(
+            chain_identifier=views.state_from_raiden(raiden).chain_id,
+            token_network_address=token_network_address,
+            channel_identifier=channel_identifier,
+        )
+    )
+    token_address = channel_proxy.token_address()
+    return get_channel_state(
+        token_address=typing.TokenAddress(token_address),
+        payment_network_address=raiden.default_registry.address,
+        token_network_address=token_network_address,
+        reveal_timeout=raiden.config["reveal_timeout"],
+        payment_channel_proxy=channel_proxy,
+        opened_block_number=opened_block_number,
+    )
+
+
+def fetch_settled_locksroots(
+    raiden: "RaidenService", channel_state: NettingChannelState, block_hash: BlockHash
+) -> Tuple[Locksroot, Locksroot]:
+    """ Query the locksroots of both participants of a settled channel.
+
+    Recover the locksroot from the blockchain to fix data races. Check
+    get_onchain_locksroots for details.
+    """
+    try:
+        # First try to query the unblinded state. This way the
+        # ContractReceiveChannelSettled's locksroots will  match the values
+        # provided during settle.
+        return get_onchain_locksroots(
+            chain=raiden.chain,
+            canonical_identifier=channel_state.canonical_identifier,
+            participant1=channel_state.our_state.address,
+            participant2=channel_state.partner_state.address,
+            block_identifier=block_hash,
+        )
+    except ValueError:
+        # State pruning handling. The block which generate the ChannelSettled
+        # event may have been pruned, because of this the RPC call will raises
+        # a ValueError.
+        #
+        # The solution is to query the channel's state from the latest block,
+        # this /may/ create a ContractReceiveChannelSettled with the wrong
+        # locksroot (i.e. not the locksroot used during the call to settle).
+        # However this is fine, because at this point the channel is settled,
+        # it is known that the locksroot can not be reverted without an unlock,
+        # and because the unlocks are fare it doesn't matter who called it,
+        # only if there are tokens locked in the settled channel.
+        return get_onchain_locksroots(
+            chain=raiden.chain,
+            canonical_identifier=channel_state.canonical_identifier,
+            participant1=channel_state.our_state.address,
+            participant2=channel_state.partner_state.address,
+            block_identifier="latest",
+        )
+
+
+def _prefetch(results: Dict, key: Any, fetch: Callable, *args: Any) -> None:
+    try:
+        results[key] = fetch(*args)
+    except Exception:  # pylint: disable=broad-except
+        # The handler repeats the query and handles the error
+        log.debug("Prefetching on-chain data failed", fetch=fetch.__name__, exc_info=True)
+
+
+def prefetch_onchain_data(raiden: "RaidenService", events: List[Event]) -> PrefetchedOnchainData:
+    """ Concurrently fetch the on-chain data which the handlers of `events`
+    will query.
+
+    Every handler would otherwise make its requests one after the other, so
+    that a batch with many new or settled channels would take a round trip
+    per request.
+    """
+    prefetched = PrefetchedOnchainData()
+    chain_state = views.state_from_raiden(raiden)
+    pool = Pool(BLOCKCHAIN_EVENTS_PREFETCH_POOL_SIZE)
+
+    for event in events:
+        data = event.event_data
+        args = data["args"]
+        token_network_address = event.originating_contract
+
+        if data["event"] == ChannelEvent.OPENED:
+            if raiden.address in (args["participant1"], args["participant2"]):
+                pool.spawn(
+                    _prefetch,
+                    prefetched.channel_states,
+                    (token_network_address, args["channel_identifier"]),
+                    fetch_new_channel_state,
+                    raiden,
+                    token_network_address,
+                    args["channel_identifier"],
+                    data["block_number"],
+                )
+
+        elif data["event"] == ChannelEvent.SETTLED:
+            channel_state = views.get_channelstate_by_canonical_identifier(
+                chain_state=chain_state,
+                canonical_identifier=CanonicalIdentifier(
+                    chain_identifier=chain_state.chain_id,
+                    token_network_address=token_network_address,
+                    channel_identifier=args["channel_identifier"],
+                ),
+            )
+            if channel_state is not None:
+                pool.spawn(
+                    _prefetch,
+                    prefetched.settled_locksroots,
+                    ((token_network_address, args["channel_identifier"]), data["block_hash"]),
+                    fetch_settled_locksroots,
+                    raiden,
+                    channel_state,
+                    data["block_hash"],
+                )
+
+    pool.join()
+    return prefetched
+
 
 def handle_tokennetwork_new(raiden: "RaidenService", event: Event):
     """ Handles a `TokenNetworkCreated` event. """
@@ -61,6 +222,12 @@ def handle_tokennetwork_new(raiden: "RaidenService", event: Event):
         contract_manager=raiden.contract_manager,
         from_block=block_number,
     )
+    # The events API queries start at the `query_start_block` by default
+    raiden.blockchain_events.add_synced_range_before_creation(
+        contract_address=token_network_address,
+        from_block=raiden.query_start_block,
+        creation_block_number=block_number,
+    )
 
     token_network_graph_state = TokenNetworkGraphState(token_network_address)
     token_network_state = TokenNetworkState(
@@ -81,7 +248,9 @@ def handle_tokennetwork_new(raiden: "RaidenService", event: Event):
     raiden.handle_and_track_state_change(new_token_network)
 
 
-def handle_channel_new(raiden: "RaidenService", event: Event):
+def handle_channel_new(
+    raiden: "RaidenService", event: Event, prefetched: Optional[PrefetchedOnchainData] = None
+):
     data = event.event_data
     block_number = data["block_number"]
     block_hash = data["block_hash"]
@@ -95,22 +264,13 @@ def handle_channel_new(raiden: "RaidenService", event: Event):
 
     # Raiden node is participant
     if is_participant:
-        channel_proxy = raiden.chain.payment_channel(
-            canonical_identifier=CanonicalIdentifier(
-                chain_identifier=views.state_from_raiden(raiden).chain_id,
-                token_network_address=token_network_address,
-                channel_identifier=channel_identifier,
+        channel_key = (token_network_address, channel_identifier)
+        if prefetched is not None and channel_key in prefetched.channel_states:
+            channel_state = prefetched.channel_states[channel_key]
+        else:
+            channel_state = fetch_new_channel_state(
+                raiden, token_network_address, channel_identifier, block_number
             )
-        )
-        token_address = channel_proxy.token_address()
-        channel_state = get_channel_state(
-            token_address=typing.TokenAddress(token_address),
-            payment_network_address=raiden.default_registry.address,
-            token_network_address=token_network_address,
-            reveal_timeout=raiden.config["reveal_timeout"],
-            payment_channel_proxy=channel_proxy,
-            opened_block_number=block_number,
-        )
 
         new_channel = ContractReceiveChannelNew(
             transaction_hash=transaction_hash,
@@ -274,7 +434,9 @@ def handle_channel_update_transfer(raiden: "RaidenService", event: Event):
         raiden.handle_and_track_state_change(channel_transfer_updated)
 
 
-def handle_channel_settled(raiden: "RaidenService", event: Event):
+def handle_channel_settled(
+    raiden: "RaidenService", event: Event, prefetched: Optional[PrefetchedOnchainData] = None
+):
     data = event.event_data
     token_network_address = event.originating_contract
     channel_identifier = data["args"]["channel_identifier"]
@@ -303,37 +465,12 @@ def handle_channel_settled(raiden: "RaidenService", event: Event):
     if not channel_state:
         return
 
-    # Recover the locksroot from the blockchain to fix data races. Check
-    # get_onchain_locksroots for details.
-    try:
-        # First try to query the unblinded state. This way the
-        # ContractReceiveChannelSettled's locksroots will  match the values
-        # provided during settle.
-        our_locksroot, partner_locksroot = get_onchain_locksroots(
-            chain=raiden.chain,
-            canonical_identifier=channel_state.canonical_identifier,
-            participant1=channel_state.our_state.address,
-            participant2=channel_state.partner_state.address,
-            block_identifier=block_hash,
-        )
-    except ValueError:
-        # State pruning handling. The block which generate the ChannelSettled
-        # event may have been pruned, because of this the RPC call will raises
-        # a ValueError.
-        #
-        # The solution is to query the channel's state from the latest block,
-        # this /may/ create a ContractReceiveChannelSettled with the wrong
-        # locksroot (i.e. not the locksroot used during the call to settle).
-        # However this is fine, because at this point the channel is settled,
-        # it is known that the locksroot can not be reverted without an unlock,
-        # and because the unlocks are fare it doesn't matter who called it,
-        # only if there are tokens locked in the settled channel.
-        our_locksroot, partner_locksroot = get_onchain_locksroots(
-            chain=raiden.chain,
-            canonical_identifier=channel_state.canonical_identifier,
-            participant1=channel_state.our_state.address,
-            participant2=channel_state.partner_state.address,
-            block_identifier="latest",
+    locksroots_key = ((token_network_address, channel_identifier), block_hash)
+    if prefetched is not None and locksroots_key in prefetched.settled_locksroots:
+        our_locksroot, partner_locksroot = prefetched.settled_locksroots[locksroots_key]
+    else:
+        our_locksroot, partner_locksroot = fetch_settled_locksroots(
+            raiden, channel_state, block_hash
         )
 
     channel_settled = ContractReceiveChannelSettled(
@@ -376,7 +513,9 @@ def handle_channel_batch_unlock(raiden: "RaidenService", event: Event):
         )
         return
 
-    channel_identifiers = token_network_state.partneraddresses_to_channelidentifiers[partner]
+    channel_identifiers = token_network_state.partneraddresses_to_channelidentifiers.get(
+        partner, []
+    )
     canonical_identifier = None
 
     for channel_identifier in channel_identifiers:
@@ -449,7 +588,9 @@ def handle_secret_revealed(raiden: "RaidenService", event: Event):
     raiden.handle_and_track_state_change(registeredsecret_state_change)
 
 
-def on_blockchain_event(raiden: "RaidenService", event: Event):
+def on_blockchain_event(
+    raiden: "RaidenService", event: Event, prefetched: Optional[PrefetchedOnchainData] = None
+):
     data = event.event_data
     log.debug(
         "Blockchain event",
@@ -463,7 +604,7 @@ def on_blockchain_event(raiden: "RaidenService", event: Event):
         handle_tokennetwork_new(raiden, event)
 
     elif event_name == ChannelEvent.OPENED:
-        handle_channel_new(raiden, event)
+        handle_channel_new(raiden, event, prefetched)
 
     elif event_name == ChannelEvent.DEPOSIT:
         handle_channel_new_balance(raiden, event)
@@ -475,7 +616,7 @@ def on_blockchain_event(raiden: "RaidenService", event: Event):
         handle_channel_closed(raiden, event)
 
     elif event_name == ChannelEvent.SETTLED:
-        handle_channel_settled(raiden, event)
+        handle_channel_settled(raiden, event, prefetched)
 
     elif event_name == EVENT_SECRET_REVEALED:
         handle_secret_revealed(raiden, event)
@@ -485,3 +626,12 @@ def on_blockchain_event(raiden: "RaidenService", event: Event):
 
     else:
         log.error("Unknown event type", event_name=data["event"], raiden_event=event)
+
+
+def on_blockchain_events(raiden: "RaidenService", events: List[Event]):
+    """ Handle a batch of blockchain events in order, after prefetching the
+    on-chain data their handlers need.
+    """
+    prefetched = prefetch_onchain_data(raiden, events)
+    for event in events:
+        on_blockchain_event(raiden, event, prefetched)
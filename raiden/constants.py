@@ -71,7 +71,19 @@ HTTP_PORT = 80
 HTTPS_PORT = 443
 
 START_QUERY_BLOCK_KEY = "DefaultStartBlock"
-SNAPSHOT_STATE_CHANGES_COUNT = 500
+SNAPSHOT_STATE_CHANGES_COUNT = 100
+SNAPSHOT_DELTAS_PER_BASE = 9
+SNAPSHOT_BASES_TO_KEEP = 10
+# Older full snapshots are thinned out to one per interval of state changes,
+# for the most recent intervals only. They bound the replay needed to restore
+# the state of an old channel, e.g. to unlock after the settlement.
+SNAPSHOT_OLD_BASES_INTERVAL = 10000
+SNAPSHOT_OLD_BASES_TO_KEEP = 20
+ARCHIVE_BATCH_SIZE = 1000
+ARCHIVE_INTERVAL = 60
+EVENTS_QUERY_BATCH_SIZE = 1000
+HISTORIC_CHANNEL_STATES_CACHE_SIZE = 128
+ROUTING_DISTANCES_CACHE_SIZE = 128
 
 # An arbitrary limit for transaction size in Raiden, added in PR #1990
 TRANSACTION_GAS_LIMIT_UPPER_BOUND = int(0.4 * 3_141_592)
@@ -79,6 +91,14 @@ TRANSACTION_GAS_LIMIT_UPPER_BOUND = int(0.4 * 3_141_592)
 # Used to add a 30% security margin to gas estimations in case the calculations are off
 GAS_FACTOR = 1.3
 
+# Transactions which are not mined after this many blocks are replaced by the
+# same transaction with a higher gas price. Geth requires the replacement to
+# pay at least 10% more, parity 12.5%. The gas price is never increased above
+# GAS_PRICE_BUMP_MAX_FACTOR times the initial gas price.
+GAS_PRICE_BUMP_AFTER_BLOCKS = 10
+GAS_PRICE_BUMP_FACTOR = 1.2
+GAS_PRICE_BUMP_MAX_FACTOR = 2
+
 # The more pending transfers there are, the more computationally complex
 # it becomes to unlock them. Lest an unlocking operation fails because
 # not enough gas is available, we define a gas limit for unlock calls
@@ -105,13 +125,27 @@ class RoutingMode(Enum):
 GAS_REQUIRED_FOR_CREATE_ERC20_TOKEN_NETWORK = 3_234_716
 GAS_REQUIRED_PER_SECRET_IN_BATCH = math.ceil(UNLOCK_TX_GAS_LIMIT / MAXIMUM_PENDING_TRANSFERS)
 GAS_LIMIT_FOR_TOKEN_CONTRACT_CALL = 100_000
+GAS_REQUIRED_FOR_VALUE_TRANSFER = 21_000
 
 CHECK_RDN_MIN_DEPOSIT_INTERVAL = 5 * 60
 CHECK_GAS_RESERVE_INTERVAL = 5 * 60
 CHECK_VERSION_INTERVAL = 3 * 60 * 60
 CHECK_NETWORK_ID_INTERVAL = 5 * 60
 
+# The latest block is polled every BLOCK_POLL_MIN_INTERVAL seconds once the
+# next block is expected, and at least every BLOCK_POLL_MAX_INTERVAL seconds
+# before.
+BLOCK_POLL_MIN_INTERVAL = 0.5
+BLOCK_POLL_MAX_INTERVAL = 2.0
+BLOCK_SUBSCRIPTION_RETRY_INTERVAL = 5.0
+
+# Concurrent requests to prefetch the on-chain data of a batch of blockchain
+# events
+BLOCKCHAIN_EVENTS_PREFETCH_POOL_SIZE = 8
+
 DEFAULT_HTTP_REQUEST_TIMEOUT = 1.0  # seconds
+PFS_PATHS_CACHE_SIZE = 256
+PFS_PATHS_CACHE_TTL = 5  # seconds
 
 DISCOVERY_DEFAULT_ROOM = "discovery"
 MONITORING_BROADCASTING_ROOM = "monitoring"
@@ -0,0 +1,297 @@
+import codecs
+import json
+import time
+
+import gevent
+import structlog
+from gevent import socket
+from gevent.event import Event
+from gevent.queue import Queue
+from web3.middleware.pythonic import block_formatter
+
+from raiden.constants import (
+    BLOCK_POLL_MAX_INTERVAL,
+    BLOCK_POLL_MIN_INTERVAL,
+    BLOCK_SUBSCRIPTION_RETRY_INTERVAL,
+)
+from raiden.utils.typing import Any, Dict, Iterator, NamedTuple, Optional
+
+log = structlog.get_logger(__name__)  # pylint: disable=invalid-name
+
+BlockData = Dict[str, Any]
+
+# Weight of the latest observed block time in the block time estimate
+BLOCK_TIME_SMOOTHING = 0.2
+
+
+class HeadChange(NamedTuple):
+    """ A new head of the chain.
+
+    `reorganized` is set if the new head does not descend from the previous
+    head, i.e. blocks which were already reported were replaced.
+    """
+
+    block: BlockData
+    reorganized: bool
+
+
+def is_reorganization(previous: BlockData, block: BlockData) -> bool:
+    """ True if `block` does not descend from `previous`.
+
+    If blocks were skipped the ancestry of `block` is unknown, it is assumed to
+    descend from `previous`.
+    """
+    if block["number"] <= previous["number"]:
+        return True
+    if block["number"] == previous["number"] + 1:
+        return block["parentHash"] != previous["hash"]
+    return False
+
+
+class BlockSource:
+    """ Reports the changes of the head of the chain. """
+
+    def __init__(self) -> None:
+        self.head: Optional[BlockData] = None
+        self._stop_event = Event()
+
+    def start(self) -> None:
+        """ Start reporting the new heads, the source may be restarted after
+        it was stopped.
+        """
+        self._stop_event.clear()
+
+    def stop(self) -> None:
+        """ Stop the source, a pending `wait_for_head` returns None. """
+        self._stop_event.set()
+
+    def get_latest_block(self) -> BlockData:
+        """ Fetch the latest block, which becomes the known head. """
+        raise NotImplementedError
+
+    def wait_for_head(self) -> Optional[HeadChange]:
+        """ Block until the head changes, returns None if the source was
+        stopped.
+        """
+        raise NotImplementedError
+
+    def _head_change(self, block: BlockData) -> Optional[HeadChange]:
+        """ Make `block` the head, returns None if it already is. """
+        previous = self.head
+        if previous is not None and block["hash"] == previous["hash"]:
+            return None
+
+        self.head = block
+        reorganized = previous is not None and is_reorganization(previous, block)
+        return HeadChange(block=block, reorganized=reorganized)
+
+
+class PollingBlockSource(BlockSource):
+    """ Polls the latest block of the ethereum node.
+
+    The block time is estimated from the observed heads. While the next block
+    is not expected yet the polling interval is doubled up to `max_interval`,
+    once it is expected the node is polled every `min_interval`. The block
+    intervals are random, a late block may arrive at any moment so polling
+    never slows down after the estimate.
+    """
+
+    def __init__(
+        self,
+        chain,
+        min_interval: float = BLOCK_POLL_MIN_INTERVAL,
+        max_interval: float = BLOCK_POLL_MAX_INTERVAL,
+    ) -> None:
+        super().__init__()
+        self.chain = chain
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.block_time = min_interval
+
+        self._head_received_at: Optional[float] = None
+        self._idle_polls = 0
+
+    def poll_delay(self, now: float) -> float:
+        """ Seconds to wait before polling the latest block at `now`. """
+        if self._head_received_at is not None:
+            expected_in = self._head_received_at + self.block_time - now
+
+            # Back off only well before the next block is expected, and
+            # resume polling every `min_interval` before the estimate
+            if expected_in > 2 * self.min_interval:
+                backoff = self.min_interval * 2 ** self._idle_polls
+                return min(backoff, expected_in - self.min_interval, self.max_interval)
+
+        return self.min_interval
+
+    def get_latest_block(self) -> BlockData:
+        block = self.chain.get_block(block_identifier="latest")
+        self._head_change(block)
+        return block
+
+    def wait_for_head(self) -> Optional[HeadChange]:
+        while not self._stop_event.wait(self.poll_delay(time.monotonic())):
+            head_change = self._head_change(self.chain.get_block(block_identifier="latest"))
+            if head_change is not None:
+                return head_change
+            self._idle_polls += 1
+
+        return None
+
+    def _head_change(self, block: BlockData) -> Optional[HeadChange]:
+        previous = self.head
+        head_change = super()._head_change(block)
+
+        if head_change is not None:
+            now = time.monotonic()
+            new_blocks = block["number"] - previous["number"] if previous else 0
+            if new_blocks > 0 and self._head_received_at is not None:
+                observed_block_time = (now - self._head_received_at) / new_blocks
+                self.block_time += BLOCK_TIME_SMOOTHING * (observed_block_time - self.block_time)
+
+            self._head_received_at = now
+            self._idle_polls = 0
+
+        return head_change
+
+
+def read_json_messages(connection: socket.socket) -> Iterator[Dict[str, Any]]:
+    """ Decode the stream of JSON messages received through `connection`. """
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder("utf8")()
+    buffer = ""
+
+    while True:
+        data = connection.recv(4096)
+        if not data:
+            raise ConnectionError("Connection closed by the ethereum node")
+
+        buffer += text_decoder.decode(data)
+        while True:
+            buffer = buffer.lstrip()
+            if not buffer:
+                break
+
+            try:
+                message, end = decoder.raw_decode(buffer)
+            except ValueError:
+                # The message is not complete yet
+                break
+
+            buffer = buffer[end:]
+            yield message
+
+
+class SubscriptionBlockSource(PollingBlockSource):
+    """ Receives the new heads through a `newHeads` subscription over the IPC
+    socket of the ethereum node.
+
+    While the subscription is not established, e.g. because the ethereum node
+    is restarting, the latest block is polled.
+    """
+
+    SUBSCRIPTION_REQUEST_ID = 1
+
+    def __init__(
+        self,
+        chain,
+        ipc_path: str,
+        retry_interval: float = BLOCK_SUBSCRIPTION_RETRY_INTERVAL,
+        **kwargs: Any,
+    ) -> None:
+        super().__init__(chain, **kwargs)
+        self.ipc_path = ipc_path
+        self.retry_interval = retry_interval
+
+        # Receives the headers of the new heads, None wakes up the waiting
+        # greenlet to check if the subscription is still active.
+        self._headers: Queue = Queue()
+        self._subscribed = Event()
+        self._greenlet: Optional[gevent.Greenlet] = None
+
+    @property
+    def is_subscribed(self) -> bool:
+        return self._subscribed.is_set()
+
+    def start(self) -> None:
+        super().start()
+
+        # The wake up of the previous run must not be received by this one
+        self._headers = Queue()
+        self._subscribed.clear()
+        self._greenlet = gevent.spawn(self._run)
+        self._greenlet.name = f"SubscriptionBlockSource._run ipc_path:{self.ipc_path}"
+
+    def stop(self) -> None:
+        super().stop()
+        self._headers.put(None)
+        if self._greenlet is not None:
+            self._greenlet.kill()
+
+    def wait_for_head(self) -> Optional[HeadChange]:
+        while not self._stop_event.is_set():
+            if not self.is_subscribed:
+                return super().wait_for_head()
+
+            # Heads queued while polling are outdated, only the newest is used
+            header = self._headers.get()
+            while not self._headers.empty():
+                header = self._headers.get() or header
+
+            if header is not None:
+                head_change = self._head_change(header)
+                if head_change is not None:
+                    return head_change
+
+        return None
+
+    def _run(self) -> None:
+        while not self._stop_event.is_set():
+            try:
+                self._subscribe()
+            except (OSError, ValueError) as e:
+                log.warning(
+                    "New heads subscription failed, polling for new blocks",
+                    ipc_path=self.ipc_path,
+                    error=str(e),
+                )
+
+            self._subscribed.clear()
+            self._headers.put(None)
+            self._stop_event.wait(self.retry_interval)
+
+    def _subscribe(self) -> None:
+        connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            connection.connect(self.ipc_path)
+            request = {
+                "jsonrpc": "2.0",
+                "id": self.SUBSCRIPTION_REQUEST_ID,
+                "method": "eth_subscribe",
+                "params": ["newHeads"],
+            }
+            connection.sendall(json.dumps(request).encode())
+
+            subscription_id = None
+            for message in read_json_messages(connection):
+                if message.get("id") == self.SUBSCRIPTION_REQUEST_ID:
+                    if "error" in message:
+                        raise ValueError(message["error"])
+
+                    subscription_id = message["result"]
+                    self._subscribed.set()
+                    log.debug("Subscribed to new heads", ipc_path=self.ipc_path)
+
+                elif (
+                    message.get("method") == "eth_subscription"
+                    and message["params"]["subscription"] == subscription_id
+                ):
+                    self._headers.put(block_formatter(message["params"]["result"]))
+        finally:
+            connection.close()
+
+
+def make_block_source(chain, ipc_path: Optional[str]) -> BlockSource:
+    if ipc_path:
+        return SubscriptionBlockSource(chain, ipc_path)
+    return PollingBlockSource(chain)
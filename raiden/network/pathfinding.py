@@ -6,12 +6,20 @@ from enum import IntEnum, unique
 from uuid import UUID
 
 import click
+import gevent
 import requests
 import structlog
+from cachetools import TTLCache
 from eth_utils import is_checksum_address, to_canonical_address, to_checksum_address, to_hex
 from web3 import Web3
 
-from raiden.constants import DEFAULT_HTTP_REQUEST_TIMEOUT, ZERO_TOKENS, RoutingMode
+from raiden.constants import (
+    DEFAULT_HTTP_REQUEST_TIMEOUT,
+    PFS_PATHS_CACHE_SIZE,
+    PFS_PATHS_CACHE_TTL,
+    ZERO_TOKENS,
+    RoutingMode,
+)
 from raiden.exceptions import ServiceRequestFailed, ServiceRequestIOURejected
 from raiden.network.proxies.service_registry import ServiceRegistry
 from raiden.utils.signer import LocalSigner
@@ -66,10 +74,48 @@ class PFSError(IntEnum):
 
 MAX_PATHS_QUERY_ATTEMPTS = 2
 
+# All requests to the PFS share this session, the connections are kept alive
+# so that a payment does not pay for a new TCP and TLS handshake
+session = requests.Session()
+
+
+class CachedPaths(NamedTuple):
+    value: PaymentAmount
+    paths: List[Dict[str, Any]]
+    feedback_token: UUID
+
+
+# Recent answers of the PFS, keyed by the query with the amount rounded to a
+# power of two bucket. An entry is only used for amounts up to the `value` it
+# was requested for.
+_paths_cache: TTLCache = TTLCache(maxsize=PFS_PATHS_CACHE_SIZE, ttl=PFS_PATHS_CACHE_TTL)
+
+# The IOUs for the next request to each PFS, keyed by (url, sender, receiver).
+# The values are the fee added by the IOU and the greenlet signing it.
+_presigned_ious: Dict[Tuple[str, Address, Address], Tuple[TokenAmount, gevent.Greenlet]] = dict()
+
+
+def invalidate_cached_paths(
+    token_network_address: TokenNetworkAddress,
+    route_from: InitiatorAddress,
+    route_to: TargetAddress,
+) -> None:
+    """ Drop the cached paths from `route_from` to `route_to`, e.g. after a
+    payment using them failed, so that a retry asks the PFS again.
+    """
+    for cache_key in list(_paths_cache.keys()):
+        _, key_token_network_address, key_route_from, key_route_to, _, _ = cache_key
+        if (key_token_network_address, key_route_from, key_route_to) == (
+            token_network_address,
+            route_from,
+            route_to,
+        ):
+            _paths_cache.pop(cache_key, None)
+
 
 def get_pfs_info(url: str) -> Optional[Dict]:
     try:
-        response = requests.get(f"{url}/api/v1/info", timeout=DEFAULT_HTTP_REQUEST_TIMEOUT)
+        response = session.get(f"{url}/api/v1/info", timeout=DEFAULT_HTTP_REQUEST_TIMEOUT)
         return response.json()
     except (json.JSONDecodeError, requests.exceptions.RequestException):
         return None
@@ -197,7 +243,7 @@ def get_last_iou(
 
     try:
         return (
-            requests.get(
+            session.get(
                 f"{url}/api/v1/{to_checksum_address(token_network_address)}/payment/iou",
                 params=dict(
                     sender=to_checksum_address(sender),
@@ -239,14 +285,8 @@ def make_iou(
     return iou
 
 
-def update_iou(
-    iou: Dict[str, Any],
-    privkey: bytes,
-    added_amount: TokenAmount = ZERO_TOKENS,
-    expiration_block: Optional[BlockNumber] = None,
-) -> Dict[str, Any]:
-
-    expected_signature = to_hex(
+def sign_iou(iou: Dict[str, Any], privkey: bytes) -> str:
+    return to_hex(
         sign_one_to_n_iou(
             privatekey=to_hex(privkey),
             expiration_block=iou["expiration_block"],
@@ -257,7 +297,16 @@ def update_iou(
             chain_id=iou["chain_id"],
         )
     )
-    if iou.get("signature") != expected_signature:
+
+
+def update_iou(
+    iou: Dict[str, Any],
+    privkey: bytes,
+    added_amount: TokenAmount = ZERO_TOKENS,
+    expiration_block: Optional[BlockNumber] = None,
+) -> Dict[str, Any]:
+
+    if iou.get("signature") != sign_iou(iou, privkey):
         raise ServiceRequestFailed(
             "Last IOU as given by the pathfinding service is invalid (signature does not match)"
         )
@@ -266,21 +315,50 @@ def update_iou(
     if expiration_block:
         iou["expiration_block"] = expiration_block
 
-    iou["signature"] = to_hex(
-        sign_one_to_n_iou(
-            privatekey=to_hex(privkey),
-            expiration_block=iou["expiration_block"],
-            sender=iou["sender"],
-            receiver=iou["receiver"],
-            amount=iou["amount"],
-            chain_id=iou["chain_id"],
-            one_to_n_address=iou["one_to_n_address"],
-        )
-    )
+    iou["signature"] = sign_iou(iou, privkey)
 
     return iou
 
 
+def presign_next_iou(url: str, iou: Dict[str, Any], privkey: bytes, added_amount: TokenAmount):
+    """ Sign the IOU for the next request to the PFS at `url` in the background.
+
+    Once the PFS accepted `iou` the next IOU is known, it is the same IOU with
+    `added_amount` added. Signing it right away removes the request for the
+    last IOU and the signing from the critical path of the next payment.
+    """
+
+    def sign_next_iou() -> Dict[str, Any]:
+        next_iou = dict(iou)
+        next_iou["amount"] += added_amount
+        next_iou["signature"] = sign_iou(next_iou, privkey)
+        return next_iou
+
+    key = (url, to_canonical_address(iou["sender"]), to_canonical_address(iou["receiver"]))
+    _presigned_ious[key] = (added_amount, gevent.spawn(sign_next_iou))
+
+
+def pop_presigned_iou(
+    url: str, sender: Address, receiver: Address, added_amount: TokenAmount
+) -> Optional[Dict[str, Any]]:
+    """ Return the pre-signed IOU for the next request to the PFS at `url`.
+
+    The IOU is removed, so that concurrent requests don't reuse it. None is
+    returned if there is no IOU or if it was signed for a different fee.
+    """
+    presigned = _presigned_ious.pop((url, sender, receiver), None)
+    if presigned is None:
+        return None
+
+    presigned_amount, greenlet = presigned
+    if presigned_amount != added_amount:
+        return None
+
+    # The signature is usually done by now, otherwise waiting for it is still
+    # faster than requesting the last IOU from the PFS
+    return greenlet.get()
+
+
 def create_current_iou(
     config: Dict[str, Any],
     token_network_address: TokenNetworkAddress,
@@ -294,14 +372,22 @@ def create_current_iou(
 ) -> Dict[str, Any]:
 
     url = config["pathfinding_service_address"]
+    receiver = to_canonical_address(config["pathfinding_eth_address"])
+    added_amount = offered_fee or config["pathfinding_max_fee"]
 
     latest_iou = None
     if not scrap_existing_iou:
+        presigned_iou = pop_presigned_iou(
+            url=url, sender=our_address, receiver=receiver, added_amount=added_amount
+        )
+        if presigned_iou is not None:
+            return presigned_iou
+
         latest_iou = get_last_iou(
             url=url,
             token_network_address=token_network_address,
             sender=our_address,
-            receiver=to_canonical_address(config["pathfinding_eth_address"]),
+            receiver=receiver,
             privkey=privkey,
         )
 
@@ -316,7 +402,6 @@ def create_current_iou(
             one_to_n_address=one_to_n_address,
         )
     else:
-        added_amount = offered_fee or config["pathfinding_max_fee"]
         return update_iou(iou=latest_iou, privkey=privkey, added_amount=added_amount)
 
 
@@ -324,7 +409,7 @@ def post_pfs_paths(
     url: str, token_network_address: TokenNetworkAddress, payload: Dict[str, Any]
 ) -> Tuple[List[Dict[str, Any]], UUID]:
     try:
-        response = requests.post(
+        response = session.post(
             f"{url}/api/v1/{to_checksum_address(token_network_address)}/paths",
             json=payload,
             timeout=DEFAULT_HTTP_REQUEST_TIMEOUT,
@@ -381,7 +466,9 @@ def query_paths(
     """ Query paths from the PFS.
 
     Send a request to the /paths endpoint of the PFS specified in service_config, and
-    retry in case of a failed request if it makes sense.
+    retry in case of a failed request if it makes sense. Paths received during the
+    last `PFS_PATHS_CACHE_TTL` seconds for the same route and a value at least as
+    high are reused without a request.
     """
 
     max_paths = service_config["pathfinding_max_paths"]
@@ -395,6 +482,17 @@ def query_paths(
     offered_fee = service_config["pathfinding_fee"]
     scrap_existing_iou = False
 
+    cache_key = (url, token_network_address, route_from, route_to, value.bit_length(), max_paths)
+    cached_paths = _paths_cache.get(cache_key)
+    if cached_paths is not None and cached_paths.value >= value:
+        log.debug(
+            "Using cached paths from PFS",
+            url=url,
+            token_network_address=token_network_address,
+            payload=payload,
+        )
+        return cached_paths.paths, cached_paths.feedback_token
+
     for retries in reversed(range(MAX_PATHS_QUERY_ATTEMPTS)):
         payload["iou"] = create_current_iou(
             config=service_config,
@@ -416,7 +514,7 @@ def query_paths(
         )
 
         try:
-            return post_pfs_paths(
+            paths, feedback_token = post_pfs_paths(
                 url=url, token_network_address=token_network_address, payload=payload
             )
         except ServiceRequestIOURejected as error:
@@ -429,6 +527,20 @@ def query_paths(
                 # TODO get info endpoint again and load config
                 raise
             log.info(f"PFS rejected our IOU, reason: {error}. Attempting again.")
+        else:
+            presign_next_iou(
+                url=url,
+                iou=payload["iou"],
+                privkey=privkey,
+                added_amount=offered_fee or service_config["pathfinding_max_fee"],
+            )
+
+            if paths:
+                _paths_cache[cache_key] = CachedPaths(
+                    value=value, paths=paths, feedback_token=feedback_token
+                )
+
+            return paths, feedback_token
 
     # If we got no results after MAX_PATHS_QUERY_ATTEMPTS return empty list of paths
     return list(), None
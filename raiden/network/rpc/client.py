@@ -6,6 +6,7 @@ from enum import Enum
 from typing import Any, Callable, Dict, List, Optional, Tuple
 
 import gevent
+import gevent.local
 import structlog
 from eth_utils import (
     decode_hex,
@@ -15,7 +16,6 @@ from eth_utils import (
     to_canonical_address,
     to_checksum_address,
 )
-from gevent.lock import Semaphore
 from hexbytes import HexBytes
 from requests.exceptions import ConnectTimeout
 from web3 import Web3
@@ -38,7 +38,9 @@ from raiden.network.rpc.middleware import (
     block_hash_cache_middleware,
     connection_test_middleware,
     http_retry_with_backoff_middleware,
+    rpc_metrics_middleware,
 )
+from raiden.network.rpc.pipeline import InFlightTransaction, TransactionPipeline, bump_gas_price
 from raiden.network.rpc.smartcontract_proxy import ContractProxy
 from raiden.utils import pex, privatekey_to_address
 from raiden.utils.ethereum_clients import is_supported_client
@@ -428,6 +430,10 @@ def monkey_patch_web3(web3, gas_price_strategy):
     if not hasattr(web3, "testing"):
         web3.middleware_stack.inject(connection_test_middleware, layer=0)
 
+    # Innermost, so only the requests sent to the ethereum node are measured
+    if rpc_metrics_middleware not in web3.middleware_stack:
+        web3.middleware_stack.inject(rpc_metrics_middleware, layer=0)
+
     # Temporary until next web3.py release (5.X.X)
     ContractFunction.estimateGas = patched_contractfunction_estimateGas
     Eth.estimateGas = patched_web3_eth_estimate_gas
@@ -506,8 +512,8 @@ class JSONRPCClient:
         self.web3 = web3
         self.default_block_num_confirmations = block_num_confirmations
 
-        self._available_nonce = available_nonce
-        self._nonce_lock = Semaphore()
+        self._transactions = TransactionPipeline(available_nonce)
+        self._greenlet_local = gevent.local.local()
         self._gas_estimate_correction = gas_estimate_correction
 
         log.debug(
@@ -520,6 +526,15 @@ class JSONRPCClient:
     def __repr__(self):
         return f"<JSONRPCClient node:{pex(self.address)} nonce:{self._available_nonce}>"
 
+    @property
+    def _available_nonce(self) -> Nonce:
+        return self._transactions.available_nonce
+
+    @property
+    def failed_nonce(self) -> Optional[Nonce]:
+        """ The nonce of the last transaction which this greenlet failed to send. """
+        return getattr(self._greenlet_local, "failed_nonce", None)
+
     def block_number(self):
         """ Return the most recent block. """
         return self.web3.eth.blockNumber
@@ -612,6 +627,7 @@ class JSONRPCClient:
         )
 
     def get_transaction_receipt(self, tx_hash: bytes):
+        tx_hash = self._transactions.resolve(TransactionHash(tx_hash))
         return self.web3.eth.getTransactionReceipt(encode_hex(tx_hash))
 
     def deploy_solidity_contract(
@@ -748,55 +764,98 @@ class JSONRPCClient:
         if to == to_canonical_address(constants.NULL_ADDRESS):
             warnings.warn("For contract creation the empty string must be used.")
 
-        with self._nonce_lock:
-            nonce = self._available_nonce
-            gas_price = self.gas_price()
-
-            transaction = {
-                "data": data,
-                "gas": startgas,
-                "nonce": nonce,
-                "value": value,
-                "gasPrice": gas_price,
-            }
-            node_gas_price = self.web3.eth.gasPrice
-            log.debug(
-                "Calculated gas price for transaction",
-                node=pex(self.address),
-                calculated_gas_price=gas_price,
-                node_gas_price=node_gas_price,
-            )
+        # Only the nonce is reserved under the lock, the transactions are
+        # signed and sent concurrently
+        gas_price = self.gas_price()
+        nonce = self._transactions.reserve()
 
-            # add the to address if not deploying a contract
-            if to != b"":
-                transaction["to"] = to_checksum_address(to)
+        transaction = {
+            "data": data,
+            "gas": startgas,
+            "nonce": nonce,
+            "value": value,
+            "gasPrice": gas_price,
+        }
 
-            signed_txn = self.web3.eth.account.signTransaction(transaction, self.privkey)
+        # add the to address if not deploying a contract
+        if to != b"":
+            transaction["to"] = to_checksum_address(to)
 
-            log_details = {
-                "node": pex(self.address),
-                "nonce": transaction["nonce"],
-                "gasLimit": transaction["gas"],
-                "gasPrice": transaction["gasPrice"],
-            }
-            log.debug("send_raw_transaction called", **log_details)
+        try:
+            tx_hash = self._send_raw_transaction(transaction)
+        except Exception:
+            self._greenlet_local.failed_nonce = nonce
+            self._recover_nonce(nonce)
+            raise
+
+        self._transactions.sent(nonce, transaction, tx_hash)
+        return tx_hash
+
+    def _send_raw_transaction(self, transaction: Dict[str, Any]) -> TransactionHash:
+        signed_txn = self.web3.eth.account.signTransaction(transaction, self.privkey)
+
+        log_details = {
+            "node": pex(self.address),
+            "nonce": transaction["nonce"],
+            "gasLimit": transaction["gas"],
+            "gasPrice": transaction["gasPrice"],
+        }
+        log.debug("send_raw_transaction called", **log_details)
+
+        tx_hash = self.web3.eth.sendRawTransaction(signed_txn.rawTransaction)
+
+        log.debug("send_raw_transaction returned", tx_hash=encode_hex(tx_hash), **log_details)
+        return TransactionHash(tx_hash)
+
+    def _recover_nonce(self, nonce: Nonce) -> None:
+        """ Release `nonce` after its transaction failed to be sent, and fill
+        the gap if it blocks transactions which were already sent.
+        """
+        try:
+            pending_nonce = self.web3.eth.getTransactionCount(
+                to_checksum_address(self.address), "pending"
+            )
+        except Exception:  # pylint: disable=broad-except
+            # Assume the transaction did not reach the node, if it did the
+            # reused nonce will be rejected and released again
+            pending_nonce = nonce
 
-            tx_hash = self.web3.eth.sendRawTransaction(signed_txn.rawTransaction)
-            self._available_nonce += 1
+        is_blocking = self._transactions.release(nonce, pending_nonce)
+        if not is_blocking:
+            return
 
-            log.debug("send_raw_transaction returned", tx_hash=encode_hex(tx_hash), **log_details)
-            return tx_hash
+        log.warning("Filling nonce gap", node=pex(self.address), nonce=nonce)
+        gap_nonce = self._transactions.reserve()
+        transaction = {
+            "to": to_checksum_address(self.address),
+            "gas": constants.GAS_REQUIRED_FOR_VALUE_TRANSFER,
+            "nonce": gap_nonce,
+            "value": 0,
+            "gasPrice": self.gas_price(),
+        }
+        try:
+            tx_hash = self._send_raw_transaction(transaction)
+        except Exception:  # pylint: disable=broad-except
+            log.exception("Filling nonce gap failed", node=pex(self.address), nonce=gap_nonce)
+            self._transactions.release(gap_nonce, gap_nonce)
+        else:
+            self._transactions.sent(gap_nonce, transaction, tx_hash)
 
     def poll(self, transaction_hash: bytes):
         """ Wait until the `transaction_hash` is applied or rejected.
 
+        A transaction which is still pending `GAS_PRICE_BUMP_AFTER_BLOCKS`
+        blocks after it was first seen is replaced with a higher gas price. The
+        replacements are followed by this method, and `get_transaction_receipt`
+        returns the receipt of the version which was mined.
+
         Args:
             transaction_hash: Transaction hash that we are waiting for.
         """
         if len(transaction_hash) != 32:
             raise ValueError("transaction_hash must be a 32 byte hash")
 
-        transaction_hash = encode_hex(transaction_hash)
+        transaction_hash = TransactionHash(transaction_hash)
 
         # used to check if the transaction was removed, this could happen
         # if gas price is too low:
@@ -808,17 +867,16 @@ class JSONRPCClient:
         last_result = None
 
         while True:
-            # Could return None for a short period of time, until the
-            # transaction is added to the pool
-            transaction = self.web3.eth.getTransaction(transaction_hash)
+            transaction, mined_hash = self._get_mined_transaction(transaction_hash)
 
-            # if the transaction was added to the pool and then removed
+            # if the transaction was mined and then removed
             if transaction is None and last_result is not None:
                 raise Exception("invalid transaction, check gas price")
 
             # the transaction was added to the pool and mined
-            if transaction and transaction["blockNumber"] is not None:
+            if transaction is not None:
                 last_result = transaction
+                self._transactions.mined(mined_hash)
 
                 # this will wait for both APPLIED and REVERTED transactions
                 transaction_block = transaction["blockNumber"]
@@ -828,9 +886,81 @@ class JSONRPCClient:
 
                 if block_number >= confirmation_block:
                     return transaction
+            else:
+                in_flight = self._transactions.get(transaction_hash)
+                if in_flight is not None:
+                    self._maybe_replace_transaction(in_flight)
 
             gevent.sleep(1.0)
 
+    def _get_mined_transaction(
+        self, transaction_hash: TransactionHash
+    ) -> Tuple[Optional[Dict[str, Any]], TransactionHash]:
+        """ Return the version of the transaction `transaction_hash` which was
+        mined, together with its hash, or None if no version was mined yet.
+        """
+        in_flight = self._transactions.get(transaction_hash)
+        if in_flight is not None:
+            # The most recent replacement is the most likely to be mined
+            candidates = list(reversed(in_flight.transaction_hashes))
+        else:
+            candidates = [self._transactions.resolve(transaction_hash)]
+
+        for candidate in candidates:
+            # Could return None for a short period of time, until the
+            # transaction is added to the pool
+            transaction = self.web3.eth.getTransaction(encode_hex(candidate))
+            if transaction and transaction["blockNumber"] is not None:
+                return transaction, candidate
+
+        return None, transaction_hash
+
+    def _maybe_replace_transaction(self, in_flight: InFlightTransaction) -> None:
+        """ Send `in_flight` again with a higher gas price if it is pending
+        for too long, e.g. because it is underpriced or was dropped from the
+        transaction pool.
+        """
+        block_number = self.block_number()
+        if in_flight.sent_at_block is None:
+            in_flight.sent_at_block = block_number
+            return
+
+        if block_number - in_flight.sent_at_block < constants.GAS_PRICE_BUMP_AFTER_BLOCKS:
+            return
+
+        gas_price = bump_gas_price(
+            in_flight.gas_price, self.gas_price(), constants.GAS_PRICE_BUMP_FACTOR
+        )
+        max_gas_price = in_flight.initial_gas_price * constants.GAS_PRICE_BUMP_MAX_FACTOR
+        if gas_price > max_gas_price:
+            in_flight.sent_at_block = block_number
+            return
+
+        transaction = dict(in_flight.transaction, gasPrice=gas_price)
+        try:
+            tx_hash = self._send_raw_transaction(transaction)
+        except ValueError as e:
+            # The replacement is rejected if a previous version was mined in
+            # the meantime, which will be found by the next poll
+            log.debug(
+                "Transaction replacement rejected",
+                node=pex(self.address),
+                nonce=in_flight.nonce,
+                error=str(e),
+            )
+            in_flight.sent_at_block = block_number
+            return
+
+        log.info(
+            "Replaced pending transaction",
+            node=pex(self.address),
+            nonce=in_flight.nonce,
+            previous_gas_price=in_flight.gas_price,
+            gas_price=gas_price,
+            tx_hash=encode_hex(tx_hash),
+        )
+        self._transactions.sent(in_flight.nonce, transaction, tx_hash)
+
     def new_filter(
         self,
         contract_address: Address,
@@ -9,6 +9,13 @@ from web3.middleware.cache import construct_simple_cache_middleware
 from web3.middleware.exception_retry_request import check_if_retry_on_failure
 
 from raiden.exceptions import EthNodeCommunicationError
+from raiden.utils.metrics import REGISTRY
+
+RPC_REQUEST_DURATION = REGISTRY.histogram(
+    "raiden_rpc_request_seconds",
+    "Time spent waiting for the JSON-RPC requests sent to the ethereum node.",
+    labelnames=("method",),
+)
 
 
 def make_connection_test_middleware():
@@ -35,6 +42,16 @@ def make_connection_test_middleware():
 connection_test_middleware = make_connection_test_middleware()
 
 
+def rpc_metrics_middleware(make_request, web3):  # pylint: disable=unused-argument
+    """ Measures the latency of the requests, per JSON-RPC method. """
+
+    def middleware(method, params):
+        with RPC_REQUEST_DURATION.labels(method).time():
+            return make_request(method, params)
+
+    return middleware
+
+
 BLOCK_HASH_CACHE_RPC_WHITELIST = {"eth_getBlockByHash"}
 
 
@@ -0,0 +1,150 @@
+import heapq
+from dataclasses import dataclass, field
+
+from gevent.lock import Semaphore
+
+from raiden.utils.typing import Any, BlockNumber, Dict, List, Nonce, Optional, Set, TransactionHash
+
+
+@dataclass
+class InFlightTransaction:
+    """ A transaction which was sent but is not known to be mined.
+
+    `transaction_hashes` has the original transaction first, followed by the
+    replacements sent with a higher gas price. Any of them can be mined.
+    `sent_at_block` is the block at which the last version was first seen
+    pending, it is set while polling for the transaction.
+    """
+
+    nonce: Nonce
+    transaction: Dict[str, Any]
+    initial_gas_price: int
+    transaction_hashes: List[TransactionHash] = field(default_factory=list)
+    sent_at_block: Optional[BlockNumber] = None
+
+    @property
+    def gas_price(self) -> int:
+        return self.transaction["gasPrice"]
+
+
+class TransactionPipeline:
+    """ Hands out the nonces of an account and tracks its transactions in
+    flight, so that several transactions can be sent without waiting for the
+    previous ones to be mined.
+
+    Nonces are reserved locally. When sending a transaction fails its nonce is
+    released and, if it was not used, handed out again before any new nonce,
+    otherwise the transactions with a higher nonce would never be mined.
+
+    Args:
+        available_nonce: The next nonce which was never used by the account.
+    """
+
+    def __init__(self, available_nonce: Nonce) -> None:
+        self.available_nonce = available_nonce
+        self._released_nonces: List[Nonce] = list()
+        self._reserved_nonces: Set[Nonce] = set()
+        self._lock = Semaphore()
+
+        self._in_flight: Dict[Nonce, InFlightTransaction] = dict()
+        self._hash_to_nonce: Dict[TransactionHash, Nonce] = dict()
+        self._mined_replacements: Dict[TransactionHash, TransactionHash] = dict()
+
+    def reserve(self) -> Nonce:
+        """ Return the nonce for the next transaction. """
+        with self._lock:
+            if self._released_nonces:
+                nonce = heapq.heappop(self._released_nonces)
+            else:
+                nonce = self.available_nonce
+                self.available_nonce = Nonce(nonce + 1)
+
+            self._reserved_nonces.add(nonce)
+            return nonce
+
+    def release(self, nonce: Nonce, pending_nonce: Nonce) -> bool:
+        """ Release the reserved `nonce` after its transaction failed to be sent.
+
+        Args:
+            nonce: The nonce of the failed transaction.
+            pending_nonce: The next nonce according to the ethereum node,
+                including the pending transactions.
+
+        Returns:
+            True if the nonce is a gap which blocks transactions with higher
+            nonces that are sent or being sent.
+        """
+        with self._lock:
+            self._reserved_nonces.discard(nonce)
+
+            if pending_nonce > self.available_nonce:
+                # The account was used by someone else
+                self.available_nonce = pending_nonce
+                self._released_nonces = [
+                    released for released in self._released_nonces if released >= pending_nonce
+                ]
+                heapq.heapify(self._released_nonces)
+
+            # The transaction reached the node, e.g. it was already known
+            if nonce < pending_nonce:
+                return False
+
+            heapq.heappush(self._released_nonces, nonce)
+            return any(reserved > nonce for reserved in self._reserved_nonces)
+
+    def sent(
+        self, nonce: Nonce, transaction: Dict[str, Any], transaction_hash: TransactionHash
+    ) -> InFlightTransaction:
+        """ Track the transaction, or its replacement, sent with `nonce`. """
+        with self._lock:
+            in_flight = self._in_flight.get(nonce)
+
+            if in_flight is None:
+                in_flight = InFlightTransaction(nonce, transaction, transaction["gasPrice"])
+                self._in_flight[nonce] = in_flight
+
+            in_flight.transaction = transaction
+            in_flight.sent_at_block = None
+            in_flight.transaction_hashes.append(transaction_hash)
+            self._hash_to_nonce[transaction_hash] = nonce
+
+            return in_flight
+
+    def get(self, transaction_hash: TransactionHash) -> Optional[InFlightTransaction]:
+        """ The transaction in flight which `transaction_hash` belongs to. """
+        nonce = self._hash_to_nonce.get(transaction_hash)
+        if nonce is None:
+            return None
+        return self._in_flight.get(nonce)
+
+    def mined(self, transaction_hash: TransactionHash) -> None:
+        """ Stop tracking the transaction after one of its versions, the one
+        with `transaction_hash`, was mined.
+        """
+        with self._lock:
+            nonce = self._hash_to_nonce.get(transaction_hash)
+            if nonce is None:
+                return
+
+            in_flight = self._in_flight.pop(nonce)
+            self._reserved_nonces.discard(nonce)
+            for sent_hash in in_flight.transaction_hashes:
+                del self._hash_to_nonce[sent_hash]
+                if sent_hash != transaction_hash:
+                    self._mined_replacements[sent_hash] = transaction_hash
+
+    def resolve(self, transaction_hash: TransactionHash) -> TransactionHash:
+        """ The hash of the version of the transaction which was mined, if it
+        was replaced, otherwise `transaction_hash`.
+        """
+        return self._mined_replacements.get(transaction_hash, transaction_hash)
+
+
+def bump_gas_price(previous_gas_price: int, gas_price: int, factor: float) -> int:
+    """ The gas price for a transaction replacing one sent with
+    `previous_gas_price`, if the current price is `gas_price`.
+
+    Ethereum nodes only accept a replacement if the gas price is increased
+    by a minimum percentage.
+    """
+    return max(int(previous_gas_price * factor) + 1, gas_price)
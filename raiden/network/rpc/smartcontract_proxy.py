@@ -111,7 +111,7 @@ class ContractProxy:
                 # transaction pool to retrieve the transaction hash
                 hex_address = to_checksum_address(self.jsonrpc_client.address)
                 txhash = self.jsonrpc_client.parity_get_pending_transaction_hash_by_nonce(
-                    address=hex_address, nonce=self.jsonrpc_client._available_nonce
+                    address=hex_address, nonce=self.jsonrpc_client.failed_nonce
                 )
                 if txhash:
                     raise TransactionAlreadyPending(
@@ -15,8 +15,36 @@ from matrix_client.room import Room as MatrixRoom
 from matrix_client.user import User
 from requests.adapters import HTTPAdapter
 
+from raiden.utils.metrics import DEFAULT_SIZE_BUCKETS, REGISTRY
+
 log = structlog.get_logger(__name__)
 
+SYNC_BATCH_SIZE = REGISTRY.histogram(
+    "raiden_matrix_sync_events",
+    "Number of events received in a single sync response.",
+    buckets=DEFAULT_SIZE_BUCKETS,
+).labels()
+SYNC_HANDLING_DURATION = REGISTRY.histogram(
+    "raiden_matrix_sync_handling_seconds", "Time spent handling a single sync response."
+).labels()
+
+
+def sync_batch_size(response: Dict[str, Any]) -> int:
+    """ Number of events in a /sync `response`. """
+    rooms = response["rooms"]
+    return (
+        len(response["presence"]["events"])
+        + len(response["to_device"]["events"])
+        + len(rooms["invite"])
+        + len(rooms["leave"])
+        + sum(
+            len(sync_room["state"]["events"])
+            + len(sync_room["timeline"]["events"])
+            + len(sync_room["ephemeral"]["events"])
+            for sync_room in rooms["join"].values()
+        )
+    )
+
 
 class Room(MatrixRoom):
     """ Matrix `Room` subclass that invokes listener callbacks in separate greenlets """
@@ -390,6 +418,12 @@ class GMatrixClient(MatrixClient):
             self._post_hook_func(self.sync_token)
 
     def _handle_response(self, response, first_sync=False):
+        SYNC_BATCH_SIZE.observe(sync_batch_size(response))
+
+        with SYNC_HANDLING_DURATION.time():
+            self._handle_response_events(response, first_sync)
+
+    def _handle_response_events(self, response, first_sync=False):
         # Handle presence after rooms
         for presence_update in response["presence"]["events"]:
             for callback in self.presence_listeners.values():
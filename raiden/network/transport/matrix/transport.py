@@ -2,6 +2,7 @@ import json
 import time
 from collections import defaultdict
 from urllib.parse import urlparse
+from weakref import WeakSet
 
 import gevent
 import structlog
@@ -55,6 +56,7 @@ from raiden.transfer.state_change import (
     ActionUpdateTransportAuthData,
 )
 from raiden.utils import pex
+from raiden.utils.metrics import REGISTRY
 from raiden.utils.runnable import Runnable
 from raiden.utils.typing import (
     Address,
@@ -76,6 +78,28 @@ from raiden.utils.typing import (
 
 log = structlog.get_logger(__name__)
 
+# The retry queues are only inspected when the metrics are scraped, sending
+# and acknowledging messages does not update any metric.
+_RUNNING_TRANSPORTS: "WeakSet[MatrixTransport]" = WeakSet()
+
+
+def _retry_queue_sizes() -> List[int]:
+    return [
+        size for transport in list(_RUNNING_TRANSPORTS) for size in transport.retry_queue_sizes()
+    ]
+
+
+REGISTRY.gauge(
+    "raiden_transport_retry_queues", "Number of partners with a message retry queue."
+).labels().set_function(lambda: len(_retry_queue_sizes()))
+REGISTRY.gauge(
+    "raiden_transport_retry_queue_messages", "Number of messages waiting in the retry queues."
+).labels().set_function(lambda: sum(_retry_queue_sizes()))
+REGISTRY.gauge(
+    "raiden_transport_retry_queue_max_messages",
+    "Number of messages waiting in the longest retry queue.",
+).labels().set_function(lambda: max(_retry_queue_sizes(), default=0))
+
 _RoomID = NewType("_RoomID", str)
 
 
@@ -363,28 +387,35 @@ class MatrixTransport(Runnable):
         else:
             prev_user_id = prev_access_token = None
 
-        login_or_register(
-            client=self._client,
-            signer=self._raiden_service.signer,
-            prev_user_id=prev_user_id,
-            prev_access_token=prev_access_token,
-        )
+        profiler = self._raiden_service.startup_profiler
+
+        with profiler.phase("transport_login"):
+            login_or_register(
+                client=self._client,
+                signer=self._raiden_service.signer,
+                prev_user_id=prev_user_id,
+                prev_access_token=prev_access_token,
+            )
         self.log = log.bind(current_user=self._user_id, node=pex(self._raiden_service.address))
 
         self.log.debug("Start: handle thread", handle_thread=self._client._handle_thread)
         if self._client._handle_thread:
             # wait on _handle_thread for initial sync
             # this is needed so the rooms are populated before we _inventory_rooms
-            self._client._handle_thread.get()
+            with profiler.phase("transport_initial_sync"):
+                self._client._handle_thread.get()
 
-        for suffix in self._config["global_rooms"]:
-            room_name = make_room_alias(self.network_id, suffix)  # e.g. raiden_ropsten_discovery
-            room = join_global_room(
-                self._client, room_name, self._config.get("available_servers") or ()
-            )
-            self._global_rooms[room_name] = room
+        with profiler.phase("transport_join_global_rooms"):
+            for suffix in self._config["global_rooms"]:
+                # e.g. raiden_ropsten_discovery
+                room_name = make_room_alias(self.network_id, suffix)
+                room = join_global_room(
+                    self._client, room_name, self._config.get("available_servers") or ()
+                )
+                self._global_rooms[room_name] = room
 
-        self._inventory_rooms()
+        with profiler.phase("transport_inventory_rooms"):
+            self._inventory_rooms()
 
         def on_success(greenlet):
             if greenlet in self.greenlets:
@@ -406,6 +437,7 @@ class MatrixTransport(Runnable):
         self.log.debug("Matrix started", config=self._config)
         super().start()  # start greenlet
         self._started = True
+        _RUNNING_TRANSPORTS.add(self)
 
     def _run(self):
         """ Runnable main method, perform wait on long-running subtasks """
@@ -435,6 +467,7 @@ class MatrixTransport(Runnable):
             return
         self._stop_event.set()
         self._global_send_event.set()
+        _RUNNING_TRANSPORTS.discard(self)
 
         for retrier in self._address_to_retrier.values():
             if retrier:
@@ -880,6 +913,10 @@ class MatrixTransport(Runnable):
             message=to_device,
         )
 
+    def retry_queue_sizes(self) -> List[int]:
+        """ Number of messages waiting to be acknowledged, per partner. """
+        return [len(retrier._message_queue) for retrier in self._address_to_retrier.values()]
+
     def _get_retrier(self, receiver: Address) -> _RetryQueue:
         """ Construct and return a _RetryQueue for receiver """
         if receiver not in self._address_to_retrier:
@@ -7,6 +7,7 @@ from eth_utils import to_checksum_address, to_hex
 from raiden.constants import EMPTY_BALANCE_HASH, EMPTY_HASH, EMPTY_MESSAGE_HASH, EMPTY_SIGNATURE
 from raiden.exceptions import ChannelOutdatedError, RaidenUnrecoverableError
 from raiden.messages import message_from_sendevent
+from raiden.network.pathfinding import invalidate_cached_paths
 from raiden.network.proxies.payment_channel import PaymentChannel
 from raiden.network.proxies.token_network import TokenNetwork
 from raiden.network.resolver.client import reveal_secret_with_resolver
@@ -51,7 +52,7 @@ from raiden.transfer.mediated_transfer.events import (
 from raiden.transfer.state import ChainState, NettingChannelEndState
 from raiden.transfer.views import get_channelstate_by_token_network_and_partner
 from raiden.utils import pex
-from raiden.utils.typing import MYPY_ANNOTATION, Address, Nonce
+from raiden.utils.typing import MYPY_ANNOTATION, Address, InitiatorAddress, Nonce
 
 if TYPE_CHECKING:
     # pylint: disable=unused-import
@@ -220,6 +221,13 @@ class RaidenEventHandler(EventHandler):
     ):
         target = payment_sent_failed_event.target
         payment_identifier = payment_sent_failed_event.identifier
+
+        # The paths used by the payment may be the reason it failed
+        invalidate_cached_paths(
+            token_network_address=payment_sent_failed_event.token_network_address,
+            route_from=InitiatorAddress(raiden.address),
+            route_to=target,
+        )
         payment_status = raiden.targets_to_identifiers_to_statuses[target].pop(
             payment_identifier, None
         )
@@ -370,9 +378,9 @@ class RaidenEventHandler(EventHandler):
                 locksroot=partner_locksroot,
                 sender=partner_address,
             )
-            state_change_identifier = state_change_record.state_change_identifier
+            partner_state_change_identifier = state_change_record.state_change_identifier
 
-            if not state_change_identifier:
+            if not partner_state_change_identifier:
                 raise RaidenUnrecoverableError(
                     f"Failed to find state that matches the current channel locksroots. "
                     f"chain_id:{raiden.chain.network_id} "
@@ -383,10 +391,41 @@ class RaidenEventHandler(EventHandler):
                     f"partner_locksroot:{to_hex(partner_locksroot)} "
                 )
 
+        if search_events:
+            event_record = get_event_with_balance_proof_by_locksroot(
+                storage=raiden.wal.storage,
+                canonical_identifier=canonical_identifier,
+                locksroot=our_locksroot,
+                recipient=partner_address,
+            )
+            our_state_change_identifier = event_record.state_change_identifier
+
+            if not our_state_change_identifier:
+                raise RaidenUnrecoverableError(
+                    f"Failed to find event that match current channel locksroots. "
+                    f"chain_id:{raiden.chain.network_id} "
+                    f"token_network:{to_checksum_address(token_network_address)} "
+                    f"channel:{channel_identifier} "
+                    f"participant:{to_checksum_address(participant)} "
+                    f"our_locksroot:{to_hex(our_locksroot)} "
+                    f"partner_locksroot:{to_hex(partner_locksroot)} "
+                )
+
+        # Restore both historic channel states with a single replay of the WAL
+        state_change_identifiers = list()
+        if search_state_changes:
+            state_change_identifiers.append(partner_state_change_identifier)
+        if search_events:
+            state_change_identifiers.append(our_state_change_identifier)
+        raiden.historic_channel_states.get_many(
+            [(canonical_identifier, identifier) for identifier in state_change_identifiers]
+        )
+
+        if search_state_changes:
             restored_channel_state = channel_state_until_state_change(
                 raiden=raiden,
                 canonical_identifier=canonical_identifier,
-                state_change_identifier=state_change_identifier,
+                state_change_identifier=partner_state_change_identifier,
             )
             assert restored_channel_state is not None
 
@@ -406,29 +445,10 @@ class RaidenEventHandler(EventHandler):
                 )
 
         if search_events:
-            event_record = get_event_with_balance_proof_by_locksroot(
-                storage=raiden.wal.storage,
-                canonical_identifier=canonical_identifier,
-                locksroot=our_locksroot,
-                recipient=partner_address,
-            )
-            state_change_identifier = event_record.state_change_identifier
-
-            if not state_change_identifier:
-                raise RaidenUnrecoverableError(
-                    f"Failed to find event that match current channel locksroots. "
-                    f"chain_id:{raiden.chain.network_id} "
-                    f"token_network:{to_checksum_address(token_network_address)} "
-                    f"channel:{channel_identifier} "
-                    f"participant:{to_checksum_address(participant)} "
-                    f"our_locksroot:{to_hex(our_locksroot)} "
-                    f"partner_locksroot:{to_hex(partner_locksroot)} "
-                )
-
             restored_channel_state = channel_state_until_state_change(
                 raiden=raiden,
                 canonical_identifier=canonical_identifier,
-                state_change_identifier=state_change_identifier,
+                state_change_identifier=our_state_change_identifier,
             )
             assert restored_channel_state is not None
 
@@ -13,7 +13,7 @@ from gevent.event import AsyncResult, Event
 
 from raiden import constants, routing
 from raiden.blockchain.events import BlockchainEvents
-from raiden.blockchain_events_handler import on_blockchain_event
+from raiden.blockchain_events_handler import on_blockchain_events
 from raiden.connection_manager import ConnectionManager
 from raiden.constants import (
     EMPTY_SECRET,
@@ -40,12 +40,15 @@ from raiden.messages import (
     lockedtransfersigned_from_message,
     message_from_sendevent,
 )
+from raiden.network.block_source import make_block_source
 from raiden.network.blockchain_service import BlockChainService
 from raiden.network.proxies.secret_registry import SecretRegistry
 from raiden.network.proxies.service_registry import ServiceRegistry
 from raiden.network.proxies.token_network_registry import TokenNetworkRegistry
 from raiden.settings import MEDIATION_FEE, MONITORING_MIN_CAPACITY, MONITORING_REWARD
 from raiden.storage import sqlite, wal
+from raiden.storage.archive import ArchiveTask, archive_path_from_database_path
+from raiden.storage.restore import HistoricChannelStates
 from raiden.storage.serialization import JSONSerializer
 from raiden.tasks import AlarmTask
 from raiden.transfer import channel, node, views
@@ -72,6 +75,7 @@ from raiden.transfer.state_change import (
     ContractReceiveNewPaymentNetwork,
 )
 from raiden.utils import create_default_identifier, lpex, pex, random_secret, sha3, to_rdn
+from raiden.utils.profiling import StartupProfiler
 from raiden.utils.runnable import Runnable
 from raiden.utils.signer import LocalSigner, Signer
 from raiden.utils.typing import (
@@ -89,6 +93,7 @@ from raiden.utils.typing import (
     TokenNetworkAddress,
 )
 from raiden.utils.upgrades import UpgradeManager
+from raiden.waiting import StateWaiters
 from raiden_contracts.contract_manager import ContractManager
 
 log = structlog.get_logger(__name__)  # pylint: disable=invalid-name
@@ -342,7 +347,7 @@ class RaidenService(Runnable):
         self.user_deposit = user_deposit
 
         self.blockchain_events = BlockchainEvents()
-        self.alarm = AlarmTask(chain)
+        self.alarm = AlarmTask(chain, make_block_source(chain, config["eth_ipc_path"]))
         self.raiden_event_handler = raiden_event_handler
         self.message_handler = message_handler
 
@@ -351,6 +356,10 @@ class RaidenService(Runnable):
         self.greenlets: List[Greenlet] = list()
 
         self.snapshot_group = 0
+        self.state_waiters = StateWaiters()
+        self.startup_profiler = StartupProfiler()
+        self.archive_task: Optional[ArchiveTask] = None
+        self.historic_channel_states: Optional[HistoricChannelStates] = None
 
         self.contract_manager = ContractManager(config["contracts_path"])
         self.database_path = config["database_path"]
@@ -409,55 +418,99 @@ class RaidenService(Runnable):
 
         self.ready_to_process_events = False  # set to False because of restarts
 
+        self.startup_profiler = StartupProfiler(**self.config["startup_profile"])
+        self.startup_profiler.start()
+        self.startup_profiler.instrument_web3(self.chain.client.web3)
+        profiler = self.startup_profiler
+
         if self.database_dir is not None:
             self.db_lock.acquire(timeout=0)
             assert self.db_lock.is_locked, f"Database not locked. node:{self!r}"
 
-        self.maybe_upgrade_db()
+        with profiler.phase("upgrade_db"):
+            self.maybe_upgrade_db()
 
-        storage = sqlite.SerializedSQLiteStorage(
-            database_path=self.database_path, serializer=JSONSerializer()
-        )
-        storage.update_version()
-        storage.log_run()
-        self.wal = wal.restore_to_state_change(
-            transition_function=node.state_transition,
-            storage=storage,
-            state_change_identifier="latest",
-        )
+        with profiler.phase("restore_state") as phase:
+            storage = sqlite.SerializedSQLiteStorage(
+                database_path=self.database_path,
+                serializer=JSONSerializer(),
+                readers=self.config["database_readers"],
+            )
+            profiler.instrument_storage(storage)
+            storage.update_version()
+            storage.log_run()
+
+            # The marker is removed before any new state change is written,
+            # otherwise a crash of this run would be mistaken for a clean
+            # shutdown on the next restart.
+            clean_shutdown_state_change_id = storage.get_clean_shutdown_marker()
+            storage.delete_clean_shutdown_marker()
+
+            # The archive must be attached if it exists, even if archiving is
+            # disabled, otherwise the historic state could not be restored.
+            archive_path = archive_path_from_database_path(self.database_path)
+            if self.database_dir is not None and (
+                self.config["archive_wal"] or os.path.exists(archive_path)
+            ):
+                storage.attach_archive(archive_path)
+
+            self.wal = wal.restore_to_state_change(
+                transition_function=node.state_transition,
+                storage=storage,
+                state_change_identifier="latest",
+            )
+            phase.state_changes_replayed = self.wal.replayed_state_changes
+            self.historic_channel_states = HistoricChannelStates(storage)
+            self.blockchain_events.storage = storage
+
+        if clean_shutdown_state_change_id is not None and self.wal.replayed_state_changes:
+            log.warning(
+                "State changes replayed after a clean shutdown",
+                node=pex(self.address),
+                clean_shutdown_state_change_id=clean_shutdown_state_change_id,
+                replayed_state_changes=self.wal.replayed_state_changes,
+            )
+        else:
+            log.debug(
+                "State restored",
+                node=pex(self.address),
+                clean_shutdown=clean_shutdown_state_change_id is not None,
+                replayed_state_changes=self.wal.replayed_state_changes,
+            )
 
         if self.wal.state_manager.current_state is None:
             log.debug(
                 "No recoverable state available, creating inital state.", node=pex(self.address)
             )
-            # On first run Raiden needs to fetch all events for the payment
-            # network, to reconstruct all token network graphs and find opened
-            # channels
-            last_log_block_number = self.query_start_block
-            last_log_block_hash = self.chain.client.blockhash_from_blocknumber(
-                last_log_block_number
-            )
+            with profiler.phase("initialize_chain_state"):
+                # On first run Raiden needs to fetch all events for the payment
+                # network, to reconstruct all token network graphs and find opened
+                # channels
+                last_log_block_number = self.query_start_block
+                last_log_block_hash = self.chain.client.blockhash_from_blocknumber(
+                    last_log_block_number
+                )
 
-            state_change = ActionInitChain(
-                pseudo_random_generator=random.Random(),
-                block_number=last_log_block_number,
-                block_hash=last_log_block_hash,
-                our_address=self.chain.node_address,
-                chain_id=self.chain.network_id,
-            )
-            self.handle_and_track_state_change(state_change)
+                state_change = ActionInitChain(
+                    pseudo_random_generator=random.Random(),
+                    block_number=last_log_block_number,
+                    block_hash=last_log_block_hash,
+                    our_address=self.chain.node_address,
+                    chain_id=self.chain.network_id,
+                )
+                self.handle_and_track_state_change(state_change)
 
-            payment_network = PaymentNetworkState(
-                self.default_registry.address,
-                [],  # empty list of token network states as it's the node's startup
-            )
-            state_change = ContractReceiveNewPaymentNetwork(
-                transaction_hash=constants.EMPTY_HASH,
-                payment_network=payment_network,
-                block_number=last_log_block_number,
-                block_hash=last_log_block_hash,
-            )
-            self.handle_and_track_state_change(state_change)
+                payment_network = PaymentNetworkState(
+                    self.default_registry.address,
+                    [],  # empty list of token network states as it's the node's startup
+                )
+                state_change = ContractReceiveNewPaymentNetwork(
+                    transaction_hash=constants.EMPTY_HASH,
+                    payment_network=payment_network,
+                    block_number=last_log_block_number,
+                    block_hash=last_log_block_hash,
+                )
+                self.handle_and_track_state_change(state_change)
         else:
             # The `Block` state change is dispatched only after all the events
             # for that given block have been processed, filters can be safely
@@ -481,14 +534,16 @@ class RaidenService(Runnable):
                 )
 
         # Restore the current snapshot group
-        state_change_qty = self.wal.storage.count_state_changes()
-        self.snapshot_group = state_change_qty // SNAPSHOT_STATE_CHANGES_COUNT
+        with profiler.phase("count_state_changes"):
+            state_change_qty = self.wal.storage.count_state_changes()
+            self.snapshot_group = state_change_qty // SNAPSHOT_STATE_CHANGES_COUNT
 
         # Install the filters using the latest confirmed from_block value,
         # otherwise blockchain logs can be lost.
-        self.install_all_blockchain_filters(
-            self.default_registry, self.default_secret_registry, last_log_block_number
-        )
+        with profiler.phase("install_blockchain_filters"):
+            self.install_all_blockchain_filters(
+                self.default_registry, self.default_secret_registry, last_log_block_number
+            )
 
         # Complete the first_run of the alarm task and synchronize with the
         # blockchain since the last run.
@@ -499,15 +554,21 @@ class RaidenService(Runnable):
         # - The alarm must complete its first run before the transport is started,
         #   to reject messages for closed/settled channels.
         self.alarm.register_callback(self._callback_new_block)
-        self.alarm.first_run(last_log_block_number)
+        with profiler.phase("alarm_first_run"):
+            self.alarm.first_run(last_log_block_number)
 
         chain_state = views.state_from_raiden(self)
 
-        self._initialize_payment_statuses(chain_state)
-        self._initialize_transactions_queues(chain_state)
-        self._initialize_messages_queues(chain_state)
-        self._initialize_whitelists(chain_state)
-        self._initialize_monitoring_services_queue(chain_state)
+        with profiler.phase("initialize_payment_statuses"):
+            self._initialize_payment_statuses(chain_state)
+        with profiler.phase("initialize_transactions_queues"):
+            self._initialize_transactions_queues(chain_state)
+        with profiler.phase("initialize_messages_queues"):
+            self._initialize_messages_queues(chain_state)
+        with profiler.phase("initialize_whitelists"):
+            self._initialize_whitelists(chain_state)
+        with profiler.phase("initialize_monitoring_services_queue"):
+            self._initialize_monitoring_services_queue(chain_state)
         self._initialize_ready_to_processed_events()
 
         # Start the side-effects:
@@ -517,8 +578,17 @@ class RaidenService(Runnable):
         # - Send pending message
         self.alarm.link_exception(self.on_error)
         self.transport.link_exception(self.on_error)
-        self._start_transport(chain_state)
-        self._start_alarm_task()
+        with profiler.phase("start_transport"):
+            self._start_transport(chain_state)
+        with profiler.phase("start_alarm_task"):
+            self._start_alarm_task()
+
+        if self.database_dir is not None and self.config["archive_wal"]:
+            self.archive_task = ArchiveTask(self.wal.storage)
+            self.archive_task.link_exception(self.on_error)
+            self.archive_task.start()
+
+        profiler.stop()
 
         log.debug("Raiden Service started", node=pex(self.address))
         super().start()
@@ -559,8 +629,17 @@ class RaidenService(Runnable):
 
         self.blockchain_events.uninstall_all_event_listeners()
 
+        if self.archive_task is not None:
+            self.archive_task.stop()
+
+        # Snapshot the latest state, so that the next start can restore it
+        # without replaying any state change.
+        self.wal.snapshot()
+        if self.wal.state_change_id is not None:
+            self.wal.storage.write_clean_shutdown_marker(self.wal.state_change_id)
+
         # Close storage DB to release internal DB lock
-        self.wal.storage.conn.close()
+        self.wal.storage.close()
 
         if self.db_lock is not None:
             self.db_lock.release()
@@ -657,12 +736,13 @@ class RaidenService(Runnable):
             state_change=_redact_secret(JSONSerializer.serialize(state_change)),
         )
 
-        old_state = views.state_from_raiden(self)
-        new_state, raiden_event_list = self.wal.log_and_dispatch(state_change)
+        old_state, new_state, raiden_event_list = self.wal.log_and_dispatch(state_change)
 
         for changed_balance_proof in views.detect_balance_proof_change(old_state, new_state):
             update_services_from_balance_proof(self, new_state, changed_balance_proof)
 
+        self.state_waiters.notify(new_state, raiden_event_list)
+
         log.debug(
             "Raiden events",
             node=pex(self.address),
@@ -682,7 +762,9 @@ class RaidenService(Runnable):
             new_snapshot_group = state_changes_count // SNAPSHOT_STATE_CHANGES_COUNT
             if new_snapshot_group > self.snapshot_group:
                 log.debug("Storing snapshot", snapshot_id=new_snapshot_group)
-                self.wal.snapshot()
+                snapshot_greenlet = self.wal.snapshot_async()
+                if snapshot_greenlet is not None:
+                    greenlets.append(snapshot_greenlet)
                 self.snapshot_group = new_snapshot_group
 
         return greenlets
@@ -776,8 +858,8 @@ class RaidenService(Runnable):
 
             # These state changes will be procesed with a block_number which is
             # /larger/ than the ChainState's block_number.
-            for event in self.blockchain_events.poll_blockchain_events(confirmed_block_number):
-                on_blockchain_event(self, event)
+            for events in self.blockchain_events.poll_blockchain_events(confirmed_block_number):
+                on_blockchain_events(self, events)
 
             # On restart the Raiden node will re-create the filters with the
             # ethereum node. These filters will have the from_block set to the
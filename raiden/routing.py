@@ -9,7 +9,12 @@ from eth_utils import to_canonical_address, to_checksum_address
 from raiden.exceptions import ServiceRequestFailed
 from raiden.network.pathfinding import query_paths
 from raiden.transfer import channel, views
-from raiden.transfer.state import CHANNEL_STATE_OPENED, ChainState, RouteState
+from raiden.transfer.state import (
+    CHANNEL_STATE_OPENED,
+    ChainState,
+    RouteState,
+    TokenNetworkGraphState,
+)
 from raiden.utils.typing import (
     Address,
     ChannelID,
@@ -105,6 +110,30 @@ def get_best_routes(
     )
 
 
+def get_distances_to(
+    network_graph: TokenNetworkGraphState, to_address: TargetAddress
+) -> Dict[Address, int]:
+    """ Return the length of the shortest path from every node of the graph
+    to `to_address`.
+
+    The result is cached until the graph changes.
+    """
+    key = (network_graph.version, to_address)
+    distances = network_graph.distances_cache.get(key)
+
+    if distances is None:
+        try:
+            distances = networkx.single_source_shortest_path_length(
+                network_graph.network, to_address
+            )
+        except networkx.NodeNotFound:
+            distances = dict()
+
+        network_graph.distances_cache[key] = distances
+
+    return distances
+
+
 class Neighbour(NamedTuple):
     length: int
     nonrefundable: bool
@@ -144,6 +173,10 @@ def get_best_routes_internal(
         # address
         return list()
 
+    # The graph is undirected, a single search from the target gives the
+    # path length from every neighbour
+    distances = get_distances_to(token_network.network_graph, to_address)
+
     for partner_address in all_neighbors:
         # don't send the message backwards
         if partner_address == previous_address:
@@ -169,10 +202,8 @@ def get_best_routes_internal(
             channel_state.partner_state, channel_state.our_state
         )
 
-        try:
-            length = networkx.shortest_path_length(
-                token_network.network_graph.network, partner_address, to_address
-            )
+        length = distances.get(partner_address)
+        if length is not None:
             neighbour = Neighbour(
                 length=length,
                 nonrefundable=nonrefundable,
@@ -180,8 +211,6 @@ def get_best_routes_internal(
                 channelid=channel_state.identifier,
             )
             heappush(neighbors_heap, neighbour)
-        except (networkx.NetworkXNoPath, networkx.NodeNotFound):
-            pass
 
     if not neighbors_heap:
         log.warning(
@@ -36,6 +36,9 @@ DEFAULT_CHANNEL_SYNC_TIMEOUT = 5
 
 DEFAULT_SHUTDOWN_TIMEOUT = 2
 
+# Read-only connections used by the history queries of the API
+DEFAULT_DATABASE_READERS = 2
+
 DEFAULT_PATHFINDING_MAX_PATHS = 3
 DEFAULT_PATHFINDING_MAX_FEE = 1000
 DEFAULT_PATHFINDING_IOU_TIMEOUT = 50000  # now the pfs has 200h to cash in
@@ -0,0 +1,60 @@
+import os
+
+import structlog
+from gevent.event import Event
+
+from raiden.constants import ARCHIVE_BATCH_SIZE, ARCHIVE_INTERVAL
+from raiden.storage.sqlite import SQLiteStorage
+from raiden.utils.runnable import Runnable
+from raiden.utils.typing import Any
+
+log = structlog.get_logger(__name__)  # pylint: disable=invalid-name
+
+
+def archive_path_from_database_path(database_path: str) -> str:
+    """ Return the path of the archive database of `database_path`. """
+    root, extension = os.path.splitext(database_path)
+    return f"{root}_archive{extension}"
+
+
+class ArchiveTask(Runnable):
+    """ Task to move the historic state changes and events to the archive.
+
+    State changes are archived in batches of `batch_size`, without waiting in
+    between while there is a backlog, and every `interval` seconds otherwise.
+    The write lock of the storage is only held for a single batch at a time.
+    """
+
+    def __init__(
+        self,
+        storage: SQLiteStorage,
+        batch_size: int = ARCHIVE_BATCH_SIZE,
+        interval: float = ARCHIVE_INTERVAL,
+    ) -> None:
+        super().__init__()
+
+        self.storage = storage
+        self.batch_size = batch_size
+        self.interval = interval
+        self._stop_event = Event()
+
+    def start(self) -> None:
+        log.debug("Archive task started")
+        self._stop_event.clear()
+        super().start()
+
+    def _run(self, *args: Any, **kwargs: Any) -> None:  # pylint: disable=method-hidden
+        timeout: float = 0
+        while not self._stop_event.wait(timeout):
+            processed = self.storage.archive_state_changes(self.batch_size)
+
+            if processed:
+                log.debug("State changes archived", num_state_changes=processed)
+                timeout = 0
+            else:
+                timeout = self.interval
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.join()
+        log.debug("Archive task stopped")
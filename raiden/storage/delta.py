@@ -0,0 +1,73 @@
+""" Structural deltas between JSON compatible snapshots.
+
+A delta describes how to transform a `base` dictionary into a `current`
+dictionary. Nested dictionaries are diffed recursively, so a change to a
+single channel of a token network is stored as the changed fields of that
+channel, and not as the whole `ChainState`. Any other value (lists, strings,
+numbers) is replaced as a whole.
+
+A delta is itself a JSON compatible dictionary with the format::
+
+    {
+        "updated": {key: new_value, ...},
+        "removed": [key, ...],
+        "nested": {key: delta, ...},
+    }
+
+Empty entries are omitted, an empty dictionary means there are no changes.
+"""
+from raiden.utils.typing import Any, Dict
+
+UPDATED = "updated"
+REMOVED = "removed"
+NESTED = "nested"
+
+
+def compute_delta(base: Dict[str, Any], current: Dict[str, Any]) -> Dict[str, Any]:
+    """ Return the delta which transforms `base` into `current`. """
+    updated = dict()
+    nested = dict()
+
+    for key, value in current.items():
+        if key not in base:
+            updated[key] = value
+            continue
+
+        base_value = base[key]
+        if base_value == value:
+            continue
+
+        if isinstance(base_value, dict) and isinstance(value, dict):
+            nested[key] = compute_delta(base_value, value)
+        else:
+            updated[key] = value
+
+    removed = [key for key in base if key not in current]
+
+    delta: Dict[str, Any] = dict()
+    if updated:
+        delta[UPDATED] = updated
+    if removed:
+        delta[REMOVED] = removed
+    if nested:
+        delta[NESTED] = nested
+
+    return delta
+
+
+def apply_delta(base: Dict[str, Any], delta: Dict[str, Any]) -> Dict[str, Any]:
+    """ Return a new dictionary with `delta` applied to `base`.
+
+    `base` is not modified, unchanged values are shared with the result.
+    """
+    result = dict(base)
+
+    for key in delta.get(REMOVED, list()):
+        del result[key]
+
+    result.update(delta.get(UPDATED, dict()))
+
+    for key, nested_delta in delta.get(NESTED, dict()).items():
+        result[key] = apply_delta(result[key], nested_delta)
+
+    return result
@@ -0,0 +1,60 @@
+from functools import wraps
+
+from gevent.monkey import get_original
+from gevent.threadpool import ThreadPool
+
+from raiden.utils.typing import Any, Callable, Optional, TypeVar
+
+# The thread identity, not the greenlet identity returned by the patched
+# function
+get_thread_ident = get_original("_thread", "get_ident")
+
+T = TypeVar("T")
+
+
+class StorageExecutor:
+    """ Runs the database work in a dedicated native thread.
+
+    `sqlite3` releases the GIL while a statement runs or a commit syncs the
+    database to the disk, and the greenlet waiting for the result yields to
+    the hub. Because of this the other greenlets keep running while the disk
+    is busy.
+
+    A single thread executes the work in the order it was submitted, so
+    writes are applied in the same order as the calls, and a caller only
+    continues once its write was committed. Work submitted from the executor
+    thread itself, i.e. nested storage calls, runs immediately.
+    """
+
+    def __init__(self) -> None:
+        self._pool: Optional[ThreadPool] = ThreadPool(1)
+        self._thread_ident: Optional[int] = None
+
+    def run(self, function: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        if self._pool is None or get_thread_ident() == self._thread_ident:
+            return function(*args, **kwargs)
+
+        return self._pool.apply(self._run_in_thread, (function, args, kwargs))
+
+    def close(self) -> None:
+        """ Stop the thread, later work runs in the calling thread. """
+        if self._pool is not None:
+            pool = self._pool
+            self._pool = None
+            pool.kill()
+
+    def _run_in_thread(self, function: Callable[..., T], args: Any, kwargs: Any) -> T:
+        self._thread_ident = get_thread_ident()
+        return function(*args, **kwargs)
+
+
+def executed(method: Callable[..., T]) -> Callable[..., T]:
+    """ Run the storage `method` with the storage's executor, if it has one. """
+
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self.executor is None:
+            return method(self, *args, **kwargs)
+        return self.executor.run(method, self, *args, **kwargs)
+
+    return wrapper
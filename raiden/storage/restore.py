@@ -1,31 +1,167 @@
+from cachetools import LRUCache
 from eth_utils import to_checksum_address, to_hex
+from gevent.lock import Semaphore
 
+from raiden.constants import HISTORIC_CHANNEL_STATES_CACHE_SIZE
 from raiden.exceptions import RaidenUnrecoverableError
-from raiden.storage.sqlite import EventRecord, SQLiteStorage, StateChangeRecord
+from raiden.storage.sqlite import (
+    EventRecord,
+    SerializedSQLiteStorage,
+    SQLiteStorage,
+    StateChangeRecord,
+)
 from raiden.storage.wal import restore_to_state_change
 from raiden.transfer import node, views
+from raiden.transfer.architecture import StateManager
 from raiden.transfer.identifiers import CanonicalIdentifier
-from raiden.transfer.state import NettingChannelState
-from raiden.utils.typing import Address, Any, BalanceHash, Dict, Locksroot, Optional
+from raiden.transfer.state import ChainState, NettingChannelState
+from raiden.utils.typing import (
+    MYPY_ANNOTATION,
+    Address,
+    Any,
+    BalanceHash,
+    Dict,
+    List,
+    Locksroot,
+    Optional,
+    Tuple,
+)
+
+HistoricChannelStateQuery = Tuple[CanonicalIdentifier, int]
+
+
+class HistoricChannelStates:
+    """ Restores the state of channels as it was after a given state change.
+
+    All the states requested with `get_many` are restored with a single
+    forward replay of the WAL, and the replay position is kept in between
+    calls. When many channels are settled together their unlocks query nearby
+    state changes, so the same segment of the WAL is not replayed over and
+    over again. The restored channel states are cached.
+
+    The replay jumps to a snapshot whenever the snapshot is closer to the
+    requested state change than the current replay position.
+
+    The storage queries yield to the other greenlets, the replay is guarded
+    by a lock because the replay position is shared.
+    """
+
+    def __init__(
+        self,
+        storage: SerializedSQLiteStorage,
+        cache_size: int = HISTORIC_CHANNEL_STATES_CACHE_SIZE,
+    ) -> None:
+        self.storage = storage
+        self.cache: LRUCache = LRUCache(maxsize=cache_size)
+
+        self._state_manager: Optional[StateManager[ChainState]] = None
+        self._state_change_id = 0
+        self._lock = Semaphore()
+
+    def get(
+        self, canonical_identifier: CanonicalIdentifier, state_change_identifier: int
+    ) -> Optional[NettingChannelState]:
+        return self.get_many([(canonical_identifier, state_change_identifier)])[0]
+
+    def get_many(
+        self, queries: List[HistoricChannelStateQuery]
+    ) -> List[Optional[NettingChannelState]]:
+        """ Return the channel states for the (canonical identifier, state
+        change identifier) pairs in `queries`, None for channels which did not
+        exist at that point.
+        """
+        with self._lock:
+            return self._get_many(queries)
+
+    def _get_many(
+        self, queries: List[HistoricChannelStateQuery]
+    ) -> List[Optional[NettingChannelState]]:
+        if any(state_change_identifier == "latest" for _, state_change_identifier in queries):
+            latest_state_change_id = self.storage.get_latest_state_change_identifier()
+            queries = [
+                (
+                    canonical_identifier,
+                    latest_state_change_id
+                    if state_change_identifier == "latest"
+                    else state_change_identifier,
+                )
+                for canonical_identifier, state_change_identifier in queries
+            ]
+
+        keys = [_cache_key(*query) for query in queries]
+        results = {key: self.cache[key] for key in keys if key in self.cache}
+
+        pending = sorted(
+            (query for query, key in zip(queries, keys) if key not in results),
+            key=lambda query: query[1],
+        )
+        for canonical_identifier, state_change_identifier in pending:
+            key = _cache_key(canonical_identifier, state_change_identifier)
+            if key in results:
+                continue
+
+            chain_state = self._replay_until(state_change_identifier)
+            channel_state = None
+            if chain_state is not None:
+                channel_state = views.get_channelstate_by_canonical_identifier(
+                    chain_state=chain_state, canonical_identifier=canonical_identifier
+                )
+
+            self.cache[key] = channel_state
+            results[key] = channel_state
+
+        return [results[key] for key in keys]
+
+    def _replay_until(self, state_change_identifier: int) -> Optional[ChainState]:
+        snapshot_state_change_id = self.storage.get_snapshot_state_change_identifier_closest_to(
+            state_change_identifier
+        )
+
+        must_restore = (
+            self._state_manager is None
+            or state_change_identifier < self._state_change_id
+            or snapshot_state_change_id > self._state_change_id
+        )
+
+        if must_restore:
+            wal = restore_to_state_change(
+                transition_function=node.state_transition,
+                storage=self.storage,
+                state_change_identifier=state_change_identifier,
+            )
+            self._state_manager = wal.state_manager
+        else:
+            assert self._state_manager, MYPY_ANNOTATION
+            state_changes = self.storage.get_statechanges_by_identifier(
+                from_identifier=self._state_change_id + 1, to_identifier=state_change_identifier
+            )
+            for state_change in state_changes:
+                self._state_manager.dispatch(state_change)
+
+        self._state_change_id = state_change_identifier
+
+        # `dispatch` never mutates the current state, so the returned state
+        # can be used after the replay continued
+        return self._state_manager.current_state
+
+
+def _cache_key(
+    canonical_identifier: CanonicalIdentifier, state_change_identifier: int
+) -> Tuple[Any, ...]:
+    return (
+        canonical_identifier.chain_identifier,
+        canonical_identifier.token_network_address,
+        canonical_identifier.channel_identifier,
+        state_change_identifier,
+    )
 
 
 def channel_state_until_state_change(
     raiden, canonical_identifier: CanonicalIdentifier, state_change_identifier: int
 ) -> Optional[NettingChannelState]:
     """ Go through WAL state changes until a certain balance hash is found. """
-    wal = restore_to_state_change(
-        transition_function=node.state_transition,
-        storage=raiden.wal.storage,
-        state_change_identifier=state_change_identifier,
-    )
-
-    msg = "There is a state change, therefore the state must not be None"
-    assert wal.state_manager.current_state is not None, msg
-
-    chain_state = wal.state_manager.current_state
-
-    channel_state = views.get_channelstate_by_canonical_identifier(
-        chain_state=chain_state, canonical_identifier=canonical_identifier
+    channel_state = raiden.historic_channel_states.get(
+        canonical_identifier=canonical_identifier, state_change_identifier=state_change_identifier
     )
 
     if not channel_state:
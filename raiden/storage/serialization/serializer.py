@@ -37,6 +37,24 @@ class SerializationBase:
     def deserialize(data: str):
         raise NotImplementedError
 
+    @staticmethod
+    def serialize_to_dict(obj: Any):
+        """ Serialize `obj` to the plain data which `encode` turns into a string. """
+        raise NotImplementedError
+
+    @staticmethod
+    def deserialize_from_dict(data: Any):
+        raise NotImplementedError
+
+    @staticmethod
+    def encode(data: Any) -> str:
+        """ Encode plain data, e.g. a serialized object or a delta of one. """
+        raise NotImplementedError
+
+    @staticmethod
+    def decode(data: str) -> Any:
+        raise NotImplementedError
+
 
 class DictSerializer(SerializationBase):
     @staticmethod
@@ -67,3 +85,19 @@ class JSONSerializer(SerializationBase):
     def deserialize(data):
         data = DictSerializer.deserialize(json.loads(data))
         return data
+
+    @staticmethod
+    def serialize_to_dict(obj):
+        return DictSerializer.serialize(obj)
+
+    @staticmethod
+    def deserialize_from_dict(data):
+        return DictSerializer.deserialize(data)
+
+    @staticmethod
+    def encode(data):
+        return json.dumps(data)
+
+    @staticmethod
+    def decode(data):
+        return json.loads(data)
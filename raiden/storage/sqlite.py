@@ -1,13 +1,44 @@
+import json
 import sqlite3
 import threading
 from contextlib import contextmanager
+from functools import wraps
+from pathlib import Path
 
-from raiden.constants import RAIDEN_DB_VERSION, SQLITE_MIN_REQUIRED_VERSION
+from gevent.queue import Queue
+
+from raiden.constants import (
+    EVENTS_QUERY_BATCH_SIZE,
+    RAIDEN_DB_VERSION,
+    SQLITE_MIN_REQUIRED_VERSION,
+)
 from raiden.exceptions import InvalidDBData, InvalidNumberInput
+from raiden.storage.delta import apply_delta
+from raiden.storage.executor import StorageExecutor, executed
 from raiden.storage.serialization import SerializationBase
-from raiden.storage.utils import DB_SCRIPT_CREATE_TABLES, TimestampedEvent
+from raiden.storage.utils import (
+    DB_CREATE_ALL_STATE_CHANGES_VIEW,
+    DB_SCRIPT_CREATE_ARCHIVE_TABLES,
+    DB_SCRIPT_CREATE_TABLES,
+    TimestampedEvent,
+)
 from raiden.utils import get_system_spec
-from raiden.utils.typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple, Union
+from raiden.utils.typing import (
+    Any,
+    BlockNumber,
+    Callable,
+    ChannelID,
+    Dict,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    TypeVar,
+    Union,
+)
+
+T = TypeVar("T")
 
 
 class EventRecord(NamedTuple):
@@ -27,6 +58,34 @@ class SnapshotRecord(NamedTuple):
     data: Any
 
 
+class BlockRange(NamedTuple):
+    from_block: BlockNumber
+    to_block: BlockNumber
+
+
+class SnapshotDeltaRecord(NamedTuple):
+    identifier: int
+    state_change_identifier: int
+    base_snapshot_identifier: int
+    data: Any
+
+
+# Events which are never archived, they are used by the payment history API
+ARCHIVE_RETAINED_EVENT_TYPES = (
+    "raiden.transfer.events.EventPaymentSentSuccess",
+    "raiden.transfer.events.EventPaymentSentFailed",
+    "raiden.transfer.events.EventPaymentReceivedSuccess",
+)
+
+# State changes and events with a balance proof are never archived, they are
+# used by the balance proof lookups of `raiden.storage.restore`.
+ARCHIVE_RETAINED_EVENT_CONDITION = (
+    "json_extract(data, '$.balance_proof') IS NOT NULL "
+    "OR json_extract(data, '$.transfer.balance_proof') IS NOT NULL "
+    f"OR json_extract(data, '$._type') IN ({', '.join('?' * len(ARCHIVE_RETAINED_EVENT_TYPES))})"
+)
+
+
 def assert_sqlite_version() -> bool:
     if sqlite3.sqlite_version_info < SQLITE_MIN_REQUIRED_VERSION:
         return False
@@ -59,32 +118,46 @@ def _filter_from_dict(current: Dict[str, Any]) -> Dict[str, Any]:
     return filter_
 
 
-class SQLiteStorage:
-    def __init__(self, database_path):
-        conn = sqlite3.connect(database_path, detect_types=sqlite3.PARSE_DECLTYPES)
-        conn.text_factory = str
-        conn.execute("PRAGMA foreign_keys=ON")
+def reads(method: Callable[..., T]) -> Callable[..., T]:
+    """ Run the query `method` with a reader connection, if the storage has
+    readers.
 
-        # Skip the acquire/release cycle for the exclusive write lock.
-        # References:
-        # https://sqlite.org/atomiccommit.html#_exclusive_access_mode
-        # https://sqlite.org/pragma.html#pragma_locking_mode
-        conn.execute("PRAGMA locking_mode=EXCLUSIVE")
+    Inside a transaction the writer connection is used, so that the query
+    sees the uncommitted writes.
+    """
+    executed_method = executed(method)
 
-        # Keep the journal around and skip inode updates.
-        # References:
-        # https://sqlite.org/atomiccommit.html#_persistent_rollback_journals
-        # https://sqlite.org/pragma.html#pragma_journal_mode
-        try:
-            conn.execute("PRAGMA journal_mode=PERSIST")
-        except sqlite3.DatabaseError:
-            raise InvalidDBData(
-                f"Existing DB {database_path} was found to be corrupt at Raiden startup. "
-                f"Manual user intervention required. Bailing."
-            )
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self.readers is None or self.in_transaction:
+            return executed_method(self, *args, **kwargs)
 
-        with conn:
-            conn.executescript(DB_SCRIPT_CREATE_TABLES)
+        with self.readers.reader() as reader:
+            return executed_method(reader, *args, **kwargs)
+
+    return wrapper
+
+
+class SQLiteStorage:
+    """ The node database.
+
+    Args:
+        database_path: Path of the database file, or ":memory:".
+        read_only: Open an existing database without writing to it, e.g. from
+            a tool while the node is running.
+        readers: Number of read-only connections used for the history
+            queries. With readers the database is opened in WAL mode, where
+            the readers see the last committed state without blocking the
+            writer, and other processes can read the database.
+    """
+
+    def __init__(self, database_path, read_only: bool = False, readers: int = 0):
+        is_file = database_path != ":memory:"
+
+        if read_only:
+            conn = self._open_read_only(database_path)
+        else:
+            conn = self._open_for_writing(database_path, wal=is_file and readers > 0)
 
         # When writting to a table where the primary key is the identifier and we want
         # to return said identifier we use cursor.lastrowid, which uses sqlite's last_insert_rowid
@@ -102,6 +175,73 @@ class SQLiteStorage:
         self.write_lock = threading.Lock()
         self.in_transaction = False
 
+        # Queries to a database file are executed in a native thread, so that
+        # the hub is not blocked while the disk syncs. An in-memory database
+        # does not wait for the disk.
+        self.executor: Optional[StorageExecutor] = None
+        if is_file:
+            self.executor = StorageExecutor()
+
+        # Table used to read the state changes, it includes the archived
+        # state changes once the archive is attached.
+        self.state_changes_table = "state_changes"
+
+        self.readers: Optional[ReaderPool] = None
+        if is_file and readers > 0 and not read_only:
+            self.readers = ReaderPool(database_path, readers)
+
+    @staticmethod
+    def _open_read_only(database_path):
+        # The connection is used by the executor thread
+        conn = sqlite3.connect(
+            Path(database_path).absolute().as_uri() + "?mode=ro",
+            uri=True,
+            detect_types=sqlite3.PARSE_DECLTYPES,
+            check_same_thread=False,
+        )
+        conn.text_factory = str
+        return conn
+
+    @staticmethod
+    def _open_for_writing(database_path, wal: bool):
+        # The connection is used by the executor thread
+        conn = sqlite3.connect(
+            database_path, detect_types=sqlite3.PARSE_DECLTYPES, check_same_thread=False
+        )
+        conn.text_factory = str
+        conn.execute("PRAGMA foreign_keys=ON")
+
+        try:
+            if wal:
+                # Readers use their own connections, the database can not be
+                # locked exclusively.
+                # References:
+                # https://sqlite.org/wal.html
+                conn.execute("PRAGMA journal_mode=WAL")
+            else:
+                # Skip the acquire/release cycle for the exclusive write lock.
+                # References:
+                # https://sqlite.org/atomiccommit.html#_exclusive_access_mode
+                # https://sqlite.org/pragma.html#pragma_locking_mode
+                conn.execute("PRAGMA locking_mode=EXCLUSIVE")
+
+                # Keep the journal around and skip inode updates.
+                # References:
+                # https://sqlite.org/atomiccommit.html#_persistent_rollback_journals
+                # https://sqlite.org/pragma.html#pragma_journal_mode
+                conn.execute("PRAGMA journal_mode=PERSIST")
+        except sqlite3.DatabaseError:
+            raise InvalidDBData(
+                f"Existing DB {database_path} was found to be corrupt at Raiden startup. "
+                f"Manual user intervention required. Bailing."
+            )
+
+        with conn:
+            conn.executescript(DB_SCRIPT_CREATE_TABLES)
+
+        return conn
+
+    @executed
     def update_version(self):
         cursor = self.conn.cursor()
         cursor.execute(
@@ -110,6 +250,7 @@ class SQLiteStorage:
         )
         self.maybe_commit()
 
+    @executed
     def log_run(self):
         """ Log timestamp and raiden version to help with debugging """
         version = get_system_spec()["raiden"]
@@ -117,6 +258,7 @@ class SQLiteStorage:
         cursor.execute("INSERT INTO runs(raiden_version) VALUES (?)", [version])
         self.maybe_commit()
 
+    @executed
     def get_version(self) -> int:
         cursor = self.conn.cursor()
         query = cursor.execute('SELECT value FROM settings WHERE name="version";')
@@ -127,9 +269,112 @@ class SQLiteStorage:
 
         return int(query[0][0])
 
+    @executed
+    def attach_archive(self, archive_path: str) -> None:
+        """ Attach the archive database, the historic state changes and events
+        are moved there by `archive_state_changes`.
+
+        Once attached the archived state changes are transparently read by
+        `get_statechanges_by_identifier`, so that any historic state can still
+        be restored.
+        """
+        self.conn.execute("ATTACH DATABASE ? AS archive", (archive_path,))
+        self.conn.executescript(DB_SCRIPT_CREATE_ARCHIVE_TABLES)
+        self.conn.execute(DB_CREATE_ALL_STATE_CHANGES_VIEW)
+        self.state_changes_table = "all_state_changes"
+
+    @executed
+    def archive_state_changes(self, batch_size: int) -> int:
+        """ Move the next `batch_size` state changes older than the latest
+        full snapshot, and the events they generated, to the archive database.
+
+        State changes and events with a balance proof, and the events used for
+        the payment history, are kept in the node database. So are the state
+        changes which have a kept event, and the state changes of the
+        remaining snapshots and deltas.
+
+        The batches are small so that the write lock is only held briefly,
+        call this function repeatedly until it returns 0 to archive all
+        historic state changes.
+
+        Returns:
+            The number of state changes which were processed.
+        """
+        assert self.state_changes_table == "all_state_changes", "archive not attached"
+
+        with self.write_lock:
+            cursor = self.conn.execute("SELECT MAX(statechange_id) FROM state_snapshot")
+            latest_snapshot_state_change_id = cursor.fetchone()[0]
+            if latest_snapshot_state_change_id is None:
+                return 0
+
+            cursor = self.conn.execute('SELECT value FROM settings WHERE name="archived_until"')
+            result = cursor.fetchone()
+            archived_until = int(result[0]) if result else 0
+
+            batch_end = min(archived_until + batch_size, latest_snapshot_state_change_id - 1)
+            if batch_end <= archived_until:
+                return 0
+
+            batch = (archived_until, batch_end)
+            not_retained_event = (
+                "source_statechange_id > ? AND source_statechange_id <= ? "
+                f"AND NOT ({ARCHIVE_RETAINED_EVENT_CONDITION})"
+            )
+            # Only the retained events, and the snapshots which reference
+            # them, keep their state change in the node database. The
+            # condition does not depend on whether the other events were
+            # moved already.
+            not_retained_state_change = (
+                "identifier > ? AND identifier <= ? "
+                "AND json_extract(data, '$.balance_proof') IS NULL "
+                "AND identifier NOT IN (SELECT statechange_id FROM state_snapshot) "
+                "AND identifier NOT IN (SELECT statechange_id FROM state_snapshot_delta) "
+                "AND identifier NOT IN ("
+                "   SELECT source_statechange_id FROM main.state_events "
+                "   WHERE source_statechange_id > ? AND source_statechange_id <= ? "
+                f"  AND ({ARCHIVE_RETAINED_EVENT_CONDITION})"
+                ")"
+            )
+            event_parameters = batch + ARCHIVE_RETAINED_EVENT_TYPES
+            state_change_parameters = batch + batch + ARCHIVE_RETAINED_EVENT_TYPES
+
+            # A commit is only atomic per database file in WAL mode. The rows
+            # are copied to the archive first and deleted once the copy was
+            # committed, if the node crashes in between the copy is repeated.
+            with self.transaction():
+                self.conn.execute(
+                    "INSERT OR IGNORE INTO archive.state_events "
+                    "SELECT identifier, source_statechange_id, log_time, data "
+                    f"FROM main.state_events WHERE {not_retained_event}",
+                    event_parameters,
+                )
+                self.conn.execute(
+                    "INSERT OR IGNORE INTO archive.state_changes "
+                    "SELECT identifier, data, log_time "
+                    f"FROM main.state_changes WHERE {not_retained_state_change}",
+                    state_change_parameters,
+                )
+
+            with self.transaction():
+                self.conn.execute(
+                    f"DELETE FROM main.state_events WHERE {not_retained_event}", event_parameters
+                )
+                self.conn.execute(
+                    f"DELETE FROM main.state_changes WHERE {not_retained_state_change}",
+                    state_change_parameters,
+                )
+                self.conn.execute(
+                    'INSERT OR REPLACE INTO settings(name, value) VALUES("archived_until", ?)',
+                    (str(batch_end),),
+                )
+
+        return batch_end - archived_until
+
+    @executed
     def count_state_changes(self) -> int:
         cursor = self.conn.cursor()
-        query = cursor.execute("SELECT COUNT(1) FROM state_changes")
+        query = cursor.execute(f"SELECT COUNT(1) FROM {self.state_changes_table}")
         query = query.fetchall()
 
         if len(query) == 0:
@@ -137,6 +382,51 @@ class SQLiteStorage:
 
         return int(query[0][0])
 
+    @executed
+    def get_latest_state_change_identifier(self) -> int:
+        """ Return the identifier of the most recent state change or 0. """
+        cursor = self.conn.execute(
+            "SELECT identifier FROM state_changes ORDER BY identifier DESC LIMIT 1"
+        )
+        result = cursor.fetchone()
+
+        if result:
+            return result[0]
+
+        return 0
+
+    @executed
+    def write_clean_shutdown_marker(self, state_change_identifier: int) -> None:
+        """ Record that the node was stopped cleanly, after a snapshot for
+        `state_change_identifier` was written.
+        """
+        cursor = self.conn.cursor()
+        cursor.execute(
+            'INSERT OR REPLACE INTO settings(name, value) VALUES("clean_shutdown", ?)',
+            (str(state_change_identifier),),
+        )
+        self.maybe_commit()
+
+    @executed
+    def get_clean_shutdown_marker(self) -> Optional[int]:
+        """ Return the state change identifier of the clean shutdown snapshot,
+        None if the previous run did not stop cleanly.
+        """
+        cursor = self.conn.execute('SELECT value FROM settings WHERE name="clean_shutdown"')
+        result = cursor.fetchone()
+
+        if result:
+            return int(result[0])
+
+        return None
+
+    @executed
+    def delete_clean_shutdown_marker(self) -> None:
+        cursor = self.conn.cursor()
+        cursor.execute('DELETE FROM settings WHERE name="clean_shutdown"')
+        self.maybe_commit()
+
+    @executed
     def write_state_change(self, state_change, log_time):
         with self.write_lock:
             cursor = self.conn.execute(
@@ -148,6 +438,7 @@ class SQLiteStorage:
             self.maybe_commit()
         return last_id
 
+    @executed
     def write_state_snapshot(self, statechange_id, snapshot):
         with self.write_lock:
             cursor = self.conn.execute(
@@ -159,6 +450,79 @@ class SQLiteStorage:
             self.maybe_commit()
         return last_id
 
+    @executed
+    def write_state_snapshot_delta(self, statechange_id, base_snapshot_identifier, delta):
+        """ Save a snapshot as the `delta` to the full snapshot `base_snapshot_identifier`.
+
+        The delta is computed with `raiden.storage.delta.compute_delta`.
+        """
+        with self.write_lock:
+            cursor = self.conn.execute(
+                "INSERT INTO state_snapshot_delta(statechange_id, base_snapshot_id, data) "
+                "VALUES(?, ?, ?)",
+                (statechange_id, base_snapshot_identifier, delta),
+            )
+            last_id = cursor.lastrowid
+
+            self.maybe_commit()
+        return last_id
+
+    @executed
+    def delete_superseded_snapshots(
+        self,
+        base_snapshots_to_keep: int,
+        old_base_snapshots_interval: int,
+        old_base_snapshots_to_keep: int,
+    ) -> None:
+        """ Delete the snapshots which are not used to restore the state.
+
+        The snapshots which are kept are:
+
+        - The `base_snapshots_to_keep` most recent full snapshots, with their
+          deltas.
+        - Of the older full snapshots, the first one of each interval of
+          `old_base_snapshots_interval` state changes, for the
+          `old_base_snapshots_to_keep` most recent intervals which have one.
+          Their deltas are deleted.
+
+        The old full snapshots bound the replay needed to restore the state at
+        an old state change, e.g. to unlock a settled channel. Older states
+        are restored by replaying the archived state changes. The state
+        changes of the kept snapshots are not archived.
+        """
+        assert base_snapshots_to_keep > 0, "the latest snapshot must be kept"
+        assert old_base_snapshots_interval > 0, "the interval must be positive"
+        assert old_base_snapshots_to_keep >= 0, "the number of old snapshots must not be negative"
+
+        with self.write_lock:
+            cursor = self.conn.execute(
+                "SELECT identifier FROM state_snapshot ORDER BY identifier DESC LIMIT 1 OFFSET ?",
+                (base_snapshots_to_keep - 1,),
+            )
+            result = cursor.fetchone()
+
+            if result:
+                oldest_kept = result[0]
+                self.conn.execute(
+                    "DELETE FROM state_snapshot_delta WHERE base_snapshot_id < ?", (oldest_kept,)
+                )
+                self.conn.execute(
+                    "DELETE FROM state_snapshot WHERE identifier < ? AND identifier NOT IN ("
+                    "   SELECT MIN(identifier) FROM state_snapshot WHERE identifier < ? "
+                    "   GROUP BY statechange_id / ? "
+                    "   ORDER BY statechange_id / ? DESC LIMIT ?"
+                    ")",
+                    (
+                        oldest_kept,
+                        oldest_kept,
+                        old_base_snapshots_interval,
+                        old_base_snapshots_interval,
+                        old_base_snapshots_to_keep,
+                    ),
+                )
+                self.maybe_commit()
+
+    @executed
     def write_events(self, events):
         """ Save events.
 
@@ -175,6 +539,116 @@ class SQLiteStorage:
             )
             self.maybe_commit()
 
+    @executed
+    def write_blockchain_events(
+        self,
+        contract_address: str,
+        from_block: BlockNumber,
+        to_block: BlockNumber,
+        events: List[Dict[str, Any]],
+    ) -> None:
+        """ Save the decoded `events` of `contract_address` polled for the
+        blocks `from_block` to `to_block`, inclusive.
+
+        The synced block range of the contract is extended if the new blocks
+        overlap or are adjacent to it, otherwise it is replaced. Events which
+        are already stored are ignored.
+
+        Args:
+            contract_address: The checksummed address of the contract.
+            events: The JSON compatible events, as returned by
+                `raiden.blockchain.events.decode_event_to_json`.
+        """
+        events_data = [
+            (
+                contract_address,
+                event["event"],
+                event["block_number"],
+                event["logIndex"],
+                event["transactionHash"],
+                event["args"].get("channel_identifier"),
+                json.dumps(event),
+            )
+            for event in events
+        ]
+
+        with self.write_lock, self.transaction():
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO blockchain_events("
+                "   contract_address, event_name, block_number, log_index, "
+                "   transaction_hash, channel_identifier, data"
+                ") VALUES(?, ?, ?, ?, ?, ?, ?)",
+                events_data,
+            )
+
+            synced_range = self.get_blockchain_events_synced_range(contract_address)
+            if (
+                synced_range
+                and from_block <= synced_range.to_block + 1
+                and to_block >= synced_range.from_block - 1
+            ):
+                from_block = min(from_block, synced_range.from_block)
+                to_block = max(to_block, synced_range.to_block)
+
+            self.conn.execute(
+                "INSERT OR REPLACE INTO blockchain_events_sync("
+                "   contract_address, from_block, to_block"
+                ") VALUES(?, ?, ?)",
+                (contract_address, from_block, to_block),
+            )
+
+    @reads
+    def get_blockchain_events_synced_range(self, contract_address: str) -> Optional[BlockRange]:
+        """ Return the block range for which all events of `contract_address`
+        are stored, None if the contract was not polled yet.
+        """
+        cursor = self.conn.execute(
+            "SELECT from_block, to_block FROM blockchain_events_sync WHERE contract_address = ?",
+            (contract_address,),
+        )
+        result = cursor.fetchone()
+
+        if result:
+            return BlockRange(*result)
+
+        return None
+
+    @reads
+    def get_blockchain_events(
+        self,
+        contract_address: str,
+        from_block: BlockNumber,
+        to_block: BlockNumber,
+        channel_identifiers: List[ChannelID] = None,
+        limit: int = None,
+        offset: int = None,
+    ) -> List[Dict[str, Any]]:
+        """ Return the stored events of `contract_address` in the blocks
+        `from_block` to `to_block`, inclusive, newest first.
+
+        If `channel_identifiers` is given only the events of these channels
+        are returned.
+        """
+        limit, offset = _sanitize_limit_and_offset(limit, offset)
+
+        query = (
+            "SELECT data FROM blockchain_events "
+            "WHERE contract_address = ? AND block_number >= ? AND block_number <= ? "
+        )
+        parameters: List[Any] = [contract_address, from_block, to_block]
+        if channel_identifiers is not None:
+            placeholders = ", ".join("?" * len(channel_identifiers))
+            query += f"AND channel_identifier IN ({placeholders}) "
+            parameters.extend(channel_identifiers)
+
+        cursor = self.conn.execute(
+            query + "ORDER BY block_number DESC, log_index DESC LIMIT ? OFFSET ?",
+            parameters + [limit, offset],
+        )
+
+        return [json.loads(row[0]) for row in cursor]
+
+    @executed
     def delete_state_changes(self, state_changes_to_delete: List[Tuple[int]]) -> None:
         """ Delete state changes.
 
@@ -187,6 +661,7 @@ class SQLiteStorage:
             )
             self.maybe_commit()
 
+    @executed
     def get_latest_state_snapshot(self) -> Optional[Tuple[int, Any]]:
         """ Return the tuple of (last_applied_state_change_id, snapshot) or None"""
         cursor = self.conn.execute(
@@ -202,42 +677,72 @@ class SQLiteStorage:
 
         return None
 
-    def get_snapshot_closest_to_state_change(
+    @executed
+    def get_snapshot_and_delta_closest_to_state_change(
         self, state_change_identifier: int
-    ) -> Tuple[int, Any]:
-        """ Get snapshots earlier than state_change with provided ID. """
+    ) -> Tuple[int, Any, Any]:
+        """ Get snapshots earlier than state_change with provided ID.
+
+        Returns:
+            The state change identifier of the snapshot, the full snapshot
+            and the delta to compose on top of it, the delta is None if the
+            full snapshot is the closest one.
+        """
 
         if not (state_change_identifier == "latest" or isinstance(state_change_identifier, int)):
             raise ValueError("from_identifier must be an integer or 'latest'")
 
-        cursor = self.conn.cursor()
         if state_change_identifier == "latest":
-            cursor.execute("SELECT identifier FROM state_changes ORDER BY identifier DESC LIMIT 1")
-            result = cursor.fetchone()
-
-            if result:
-                state_change_identifier = result[0]
-            else:
-                state_change_identifier = 0
+            state_change_identifier = self.get_latest_state_change_identifier()
 
         cursor = self.conn.execute(
-            "SELECT statechange_id, data FROM state_snapshot "
+            "SELECT identifier, statechange_id, data FROM state_snapshot "
             "WHERE statechange_id <= ? "
             "ORDER BY identifier DESC LIMIT 1",
             (state_change_identifier,),
         )
         rows = cursor.fetchall()
 
-        if rows:
-            assert len(rows) == 1, "LIMIT 1 must return one element"
-            last_applied_state_change_id = rows[0][0]
-            snapshot_state = rows[0][1]
-            result = (last_applied_state_change_id, snapshot_state)
-        else:
-            result = (0, None)
+        if not rows:
+            return (0, None, None)
 
-        return result
+        assert len(rows) == 1, "LIMIT 1 must return one element"
+        base_snapshot_identifier, last_applied_state_change_id, snapshot_state = rows[0]
 
+        # A delta of the same base which is closer to the requested state
+        # change must be composed on top of the full snapshot.
+        cursor = self.conn.execute(
+            "SELECT statechange_id, data FROM state_snapshot_delta "
+            "WHERE base_snapshot_id = ? AND statechange_id <= ? "
+            "ORDER BY identifier DESC LIMIT 1",
+            (base_snapshot_identifier, state_change_identifier),
+        )
+        delta_row = cursor.fetchone()
+
+        if delta_row and delta_row[0] > last_applied_state_change_id:
+            return (delta_row[0], snapshot_state, delta_row[1])
+
+        return (last_applied_state_change_id, snapshot_state, None)
+
+    @executed
+    def get_snapshot_state_change_identifier_closest_to(self, state_change_identifier: int) -> int:
+        """ Return the state change identifier of the snapshot which
+        `get_snapshot_and_delta_closest_to_state_change` returns, without loading
+        it. 0 if there is no snapshot.
+        """
+        cursor = self.conn.execute(
+            "SELECT MAX(statechange_id) FROM ("
+            "   SELECT statechange_id FROM state_snapshot WHERE statechange_id <= ? "
+            "   UNION ALL "
+            "   SELECT statechange_id FROM state_snapshot_delta WHERE statechange_id <= ?"
+            ")",
+            (state_change_identifier, state_change_identifier),
+        )
+        result = cursor.fetchone()[0]
+
+        return result or 0
+
+    @executed
     def get_latest_event_by_data_field(self, filters: Dict[str, Any]) -> EventRecord:
         """ Return all state changes filtered by a named field and value."""
         cursor = self.conn.cursor()
@@ -272,6 +777,7 @@ class SQLiteStorage:
 
         return result
 
+    @executed
     def _form_and_execute_json_query(
         self,
         query: str,
@@ -302,6 +808,7 @@ class SQLiteStorage:
         cursor.execute(query, args)
         return cursor
 
+    @executed
     def get_latest_state_change_by_data_field(self, filters: Dict[str, Any]) -> StateChangeRecord:
         """ Return all state changes filtered by a named field and value."""
         cursor = self.conn.cursor()
@@ -379,6 +886,7 @@ class SQLiteStorage:
             offset += result_length
             yield result
 
+    @executed
     def update_state_changes(self, state_changes_data: List[Tuple[str, int]]) -> None:
         """Given a list of identifier/data state tuples update them in the DB"""
         cursor = self.conn.cursor()
@@ -387,6 +895,7 @@ class SQLiteStorage:
         )
         self.maybe_commit()
 
+    @executed
     def get_statechanges_by_identifier(self, from_identifier, to_identifier):
         if not (from_identifier == "latest" or isinstance(from_identifier, int)):
             raise ValueError("from_identifier must be an integer or 'latest'")
@@ -404,12 +913,13 @@ class SQLiteStorage:
 
         if to_identifier == "latest":
             cursor.execute(
-                "SELECT data FROM state_changes WHERE identifier >= ? ORDER BY identifier ASC",
+                f"SELECT data FROM {self.state_changes_table} WHERE identifier >= ? "
+                "ORDER BY identifier ASC",
                 (from_identifier,),
             )
         else:
             cursor.execute(
-                "SELECT data FROM state_changes WHERE identifier "
+                f"SELECT data FROM {self.state_changes_table} WHERE identifier "
                 "BETWEEN ? AND ? ORDER BY identifier ASC",
                 (from_identifier, to_identifier),
             )
@@ -417,6 +927,7 @@ class SQLiteStorage:
         result = [entry[0] for entry in cursor]
         return result
 
+    @reads
     def _query_events(self, limit: int = None, offset: int = None):
         limit, offset = _sanitize_limit_and_offset(limit, offset)
         cursor = self.conn.cursor()
@@ -478,6 +989,7 @@ class SQLiteStorage:
             offset += result_length
             yield result
 
+    @executed
     def update_events(self, events_data: List[Tuple[str, int]]) -> None:
         """Given a list of identifier/data event tuples update them in the DB"""
         cursor = self.conn.cursor()
@@ -492,16 +1004,72 @@ class SQLiteStorage:
         entries = self._query_events(limit, offset)
         return [entry[0] for entry in entries]
 
+    def iterate_events_with_timestamps(
+        self, limit: int = None, offset: int = None, batch_size: int = EVENTS_QUERY_BATCH_SIZE
+    ) -> Iterator[TimestampedEvent]:
+        """ Like `get_events_with_timestamps`, but the events are read lazily
+        in batches of `batch_size`.
+
+        No statement is kept open in between the batches, so the iterator can
+        be consumed while other greenlets write to the database.
+        """
+        limit, offset = _sanitize_limit_and_offset(limit, offset)
+        return self._iterate_events(limit, offset, batch_size)
+
+    @reads
+    def _fetchall(self, query: str, parameters: Tuple) -> List[Tuple]:
+        return self.conn.execute(query, parameters).fetchall()
+
+    def _iterate_events(
+        self, limit: int, offset: int, batch_size: int
+    ) -> Iterator[TimestampedEvent]:
+        batch = self._fetchall(
+            """
+            SELECT identifier, data, log_time FROM state_events
+                ORDER BY identifier ASC LIMIT ? OFFSET ?
+            """,
+            (batch_size if limit < 0 else min(limit, batch_size), offset),
+        )
+
+        while batch:
+            for _, data, log_time in batch:
+                yield TimestampedEvent(data, log_time)
+
+            if limit >= 0:
+                limit -= len(batch)
+                if limit == 0:
+                    return
+
+            # Continue after the last identifier instead of using an offset,
+            # the offset would have to skip all previous rows again
+            batch = self._fetchall(
+                """
+                SELECT identifier, data, log_time FROM state_events
+                    WHERE identifier > ? ORDER BY identifier ASC LIMIT ?
+                """,
+                (batch[-1][0], batch_size if limit < 0 else min(limit, batch_size)),
+            )
+
     def get_state_changes(self, limit: int = None, offset: int = None):
         entries = self._get_state_changes(limit, offset)
         return [entry.data for entry in entries]
 
+    @executed
     def get_snapshots(self):
         cursor = self.conn.cursor()
         cursor.execute("SELECT identifier, statechange_id, data FROM state_snapshot")
 
         return [SnapshotRecord(snapshot[0], snapshot[1], snapshot[2]) for snapshot in cursor]
 
+    @executed
+    def get_snapshot_deltas(self) -> List[SnapshotDeltaRecord]:
+        cursor = self.conn.execute(
+            "SELECT identifier, statechange_id, base_snapshot_id, data FROM state_snapshot_delta"
+        )
+
+        return [SnapshotDeltaRecord(*delta) for delta in cursor]
+
+    @executed
     def update_snapshot(self, identifier, new_snapshot):
         cursor = self.conn.cursor()
         cursor.execute(
@@ -509,6 +1077,7 @@ class SQLiteStorage:
         )
         self.maybe_commit()
 
+    @executed
     def update_snapshots(self, snapshots_data: List[Tuple[str, int]]):
         """Given a list of snapshot data, update them in the DB
 
@@ -519,6 +1088,7 @@ class SQLiteStorage:
         cursor.executemany("UPDATE state_snapshot SET data=? WHERE identifier=?", snapshots_data)
         self.maybe_commit()
 
+    @executed
     def maybe_commit(self):
         if not self.in_transaction:
             self.conn.commit()
@@ -537,13 +1107,58 @@ class SQLiteStorage:
         finally:
             self.in_transaction = False
 
+    @executed
+    def _close_connection(self) -> None:
+        self.conn.close()
+
+    def close(self) -> None:
+        """ Close the database once the pending queries are done. """
+        if self.readers is not None:
+            self.readers.close()
+        self._close_connection()
+        if self.executor is not None:
+            self.executor.close()
+
     def __del__(self):
         self.conn.close()
 
 
+class ReaderPool:
+    """ Read-only connections to a database in WAL mode.
+
+    Every reader has its own executor thread, so the queries of the readers
+    run in parallel to each other and to the writes.
+    """
+
+    def __init__(self, database_path: str, size: int) -> None:
+        self._all_readers = [SQLiteStorage(database_path, read_only=True) for _ in range(size)]
+        self._idle_readers: Queue = Queue()
+        for reader in self._all_readers:
+            self._idle_readers.put(reader)
+
+    @contextmanager
+    def reader(self) -> Iterator[SQLiteStorage]:
+        """ Wait for an idle reader and hold it while the context is active. """
+        reader = self._idle_readers.get()
+        try:
+            yield reader
+        finally:
+            self._idle_readers.put(reader)
+
+    def close(self) -> None:
+        for reader in self._all_readers:
+            reader.close()
+
+
 class SerializedSQLiteStorage(SQLiteStorage):
-    def __init__(self, database_path, serializer: SerializationBase):
-        super().__init__(database_path)
+    def __init__(
+        self,
+        database_path,
+        serializer: SerializationBase,
+        read_only: bool = False,
+        readers: int = 0,
+    ):
+        super().__init__(database_path, read_only=read_only, readers=readers)
 
         self.serializer = serializer
 
@@ -555,6 +1170,10 @@ class SerializedSQLiteStorage(SQLiteStorage):
         serialized_data = self.serializer.serialize(snapshot)
         return super().write_state_snapshot(statechange_id, serialized_data)
 
+    def write_serialized_state_snapshot(self, statechange_id, serialized_snapshot):
+        """ Save a snapshot which was already serialized with `self.serializer`. """
+        return super().write_state_snapshot(statechange_id, serialized_snapshot)
+
     def write_events(self, state_change_identifier, events, log_time):
         """ Save events.
 
@@ -584,16 +1203,21 @@ class SerializedSQLiteStorage(SQLiteStorage):
     ) -> Tuple[int, Any]:
         """ Get snapshots earlier than state_change with provided ID. """
 
-        row = super().get_snapshot_closest_to_state_change(state_change_identifier)
+        row = super().get_snapshot_and_delta_closest_to_state_change(state_change_identifier)
+        last_applied_state_change_id, snapshot, delta = row
 
-        if row[1]:
-            last_applied_state_change_id = row[0]
-            snapshot_state = self.serializer.deserialize(row[1])
-            result = (last_applied_state_change_id, snapshot_state)
+        if not snapshot:
+            return (0, None)
+
+        if delta is None:
+            snapshot_state = self.serializer.deserialize(snapshot)
         else:
-            result = (0, None)
+            snapshot_data = apply_delta(
+                self.serializer.decode(snapshot), self.serializer.decode(delta)
+            )
+            snapshot_state = self.serializer.deserialize_from_dict(snapshot_data)
 
-        return result
+        return (last_applied_state_change_id, snapshot_state)
 
     def get_latest_event_by_data_field(self, filters: Dict[str, Any]) -> EventRecord:
         """ Return all state changes filtered by a named field and value."""
@@ -635,3 +1259,12 @@ class SerializedSQLiteStorage(SQLiteStorage):
     def get_events(self, limit: int = None, offset: int = None):
         events = super().get_events(limit, offset)
         return [self.serializer.deserialize(event) for event in events]
+
+    def iterate_events_with_timestamps(
+        self, limit: int = None, offset: int = None, batch_size: int = EVENTS_QUERY_BATCH_SIZE
+    ) -> Iterator[TimestampedEvent]:
+        events = super().iterate_events_with_timestamps(limit, offset, batch_size)
+        return (
+            TimestampedEvent(self.serializer.deserialize(event.wrapped_event), event.log_time)
+            for event in events
+        )
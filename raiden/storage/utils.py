@@ -30,6 +30,17 @@ CREATE TABLE IF NOT EXISTS state_snapshot (
 );
 """
 
+DB_CREATE_SNAPSHOT_DELTA = """
+CREATE TABLE IF NOT EXISTS state_snapshot_delta (
+    identifier INTEGER PRIMARY KEY,
+    statechange_id INTEGER,
+    base_snapshot_id INTEGER NOT NULL,
+    data JSON,
+    FOREIGN KEY(statechange_id) REFERENCES state_changes(identifier),
+    FOREIGN KEY(base_snapshot_id) REFERENCES state_snapshot(identifier)
+);
+"""
+
 DB_CREATE_STATE_EVENTS = """
 CREATE TABLE IF NOT EXISTS state_events (
     identifier INTEGER PRIMARY KEY,
@@ -40,6 +51,11 @@ CREATE TABLE IF NOT EXISTS state_events (
 );
 """
 
+DB_CREATE_STATE_EVENTS_SOURCE_INDEX = """
+CREATE INDEX IF NOT EXISTS state_events_source_statechange_id
+ON state_events(source_statechange_id);
+"""
+
 DB_CREATE_RUNS = """
 CREATE TABLE IF NOT EXISTS runs (
     started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP PRIMARY KEY,
@@ -47,16 +63,83 @@ CREATE TABLE IF NOT EXISTS runs (
 );
 """
 
+# Decoded events of the smart contracts the node listens to, and the block
+# range which was polled for each contract. The events are only used by the
+# blockchain events API, the node state is restored from the state changes.
+DB_CREATE_BLOCKCHAIN_EVENTS = """
+CREATE TABLE IF NOT EXISTS blockchain_events (
+    identifier INTEGER PRIMARY KEY,
+    contract_address TEXT NOT NULL,
+    event_name TEXT NOT NULL,
+    block_number INTEGER NOT NULL,
+    log_index INTEGER NOT NULL,
+    transaction_hash TEXT NOT NULL,
+    channel_identifier INTEGER,
+    data JSON,
+    UNIQUE(transaction_hash, log_index)
+);
+"""
+
+DB_CREATE_BLOCKCHAIN_EVENTS_INDEXES = """
+CREATE INDEX IF NOT EXISTS blockchain_events_contract_block
+ON blockchain_events(contract_address, block_number, log_index);
+CREATE INDEX IF NOT EXISTS blockchain_events_contract_name_block
+ON blockchain_events(contract_address, event_name, block_number);
+CREATE INDEX IF NOT EXISTS blockchain_events_channel_block
+ON blockchain_events(contract_address, channel_identifier, block_number, log_index);
+"""
+
+DB_CREATE_BLOCKCHAIN_EVENTS_SYNC = """
+CREATE TABLE IF NOT EXISTS blockchain_events_sync (
+    contract_address TEXT NOT NULL PRIMARY KEY,
+    from_block INTEGER NOT NULL,
+    to_block INTEGER NOT NULL
+);
+"""
+
 DB_SCRIPT_CREATE_TABLES = """
 PRAGMA foreign_keys=off;
 BEGIN TRANSACTION;
-{}{}{}{}{}
+{}{}{}{}{}{}{}{}{}{}
 COMMIT;
 PRAGMA foreign_keys=on;
 """.format(
     DB_CREATE_SETTINGS,
     DB_CREATE_STATE_CHANGES,
     DB_CREATE_SNAPSHOT,
+    DB_CREATE_SNAPSHOT_DELTA,
     DB_CREATE_STATE_EVENTS,
+    DB_CREATE_STATE_EVENTS_SOURCE_INDEX,
     DB_CREATE_RUNS,
+    DB_CREATE_BLOCKCHAIN_EVENTS,
+    DB_CREATE_BLOCKCHAIN_EVENTS_INDEXES,
+    DB_CREATE_BLOCKCHAIN_EVENTS_SYNC,
 )
+
+# The archive database is attached to the node database with the schema name
+# `archive`. It has no foreign keys, since the snapshots which reference the
+# state changes are not archived.
+DB_SCRIPT_CREATE_ARCHIVE_TABLES = """
+BEGIN TRANSACTION;
+CREATE TABLE IF NOT EXISTS archive.state_changes (
+    identifier INTEGER PRIMARY KEY,
+    data JSON,
+    log_time TEXT
+);
+CREATE TABLE IF NOT EXISTS archive.state_events (
+    identifier INTEGER PRIMARY KEY,
+    source_statechange_id INTEGER NOT NULL,
+    log_time TEXT,
+    data JSON
+);
+CREATE INDEX IF NOT EXISTS archive.state_events_source_statechange_id
+ON state_events(source_statechange_id);
+COMMIT;
+"""
+
+DB_CREATE_ALL_STATE_CHANGES_VIEW = """
+CREATE TEMP VIEW IF NOT EXISTS all_state_changes AS
+    SELECT identifier, data, log_time FROM archive.state_changes
+    UNION ALL
+    SELECT identifier, data, log_time FROM main.state_changes
+"""
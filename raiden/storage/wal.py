@@ -1,14 +1,43 @@
+import time
 from datetime import datetime
 
+import gevent
 import gevent.lock
 import structlog
+from gevent import Greenlet
 
+from raiden.constants import (
+    SNAPSHOT_BASES_TO_KEEP,
+    SNAPSHOT_DELTAS_PER_BASE,
+    SNAPSHOT_OLD_BASES_INTERVAL,
+    SNAPSHOT_OLD_BASES_TO_KEEP,
+)
+from raiden.storage.delta import compute_delta
 from raiden.storage.sqlite import SerializedSQLiteStorage
 from raiden.transfer.architecture import Event, State, StateChange, StateManager
-from raiden.utils.typing import Callable, Generic, List, Tuple, TypeVar
+from raiden.utils.metrics import REGISTRY
+from raiden.utils.typing import (
+    Any,
+    Callable,
+    Dict,
+    Generic,
+    List,
+    NamedTuple,
+    Optional,
+    Tuple,
+    TypeVar,
+)
 
 log = structlog.get_logger(__name__)  # pylint: disable=invalid-name
 
+LOG_AND_DISPATCH_DURATION = REGISTRY.histogram(
+    "raiden_wal_log_and_dispatch_seconds",
+    "Time spent writing a state change and its events and applying it.",
+).labels()
+SNAPSHOT_DURATION = REGISTRY.histogram(
+    "raiden_wal_snapshot_seconds", "Time spent serializing and writing a state snapshot."
+).labels()
+
 
 def restore_to_state_change(
     transition_function: Callable, storage: SerializedSQLiteStorage, state_change_identifier: int
@@ -16,6 +45,9 @@ def restore_to_state_change(
     msg = "state change identifier 'latest' or an integer greater than zero"
     assert state_change_identifier == "latest" or state_change_identifier > 0, msg
 
+    if state_change_identifier == "latest":
+        state_change_identifier = storage.get_latest_state_change_identifier()
+
     from_state_change_id, chain_state = storage.get_snapshot_closest_to_state_change(
         state_change_identifier=state_change_identifier
     )
@@ -32,8 +64,10 @@ def restore_to_state_change(
             to_state_change_id=state_change_identifier,
         )
 
+    # The snapshot already contains the effects of the state change it was
+    # taken at, only the state changes after it must be applied.
     unapplied_state_changes = storage.get_statechanges_by_identifier(
-        from_identifier=from_state_change_id, to_identifier=state_change_identifier
+        from_identifier=from_state_change_id + 1, to_identifier=state_change_identifier
     )
 
     state_manager = StateManager(transition_function, chain_state)
@@ -43,25 +77,71 @@ def restore_to_state_change(
     for state_change in unapplied_state_changes:
         wal.state_manager.dispatch(state_change)
 
+    wal.replayed_state_changes = len(unapplied_state_changes)
+    if state_change_identifier > 0:
+        wal.state_change_id = state_change_identifier
+    if chain_state is not None:
+        wal.snapshot_state_change_id = from_state_change_id
+
     return wal
 
 
 ST = TypeVar("ST", bound=State)
 
 
+class BaseSnapshot(NamedTuple):
+    """ The full snapshot used to compute the snapshot deltas. """
+
+    identifier: int
+    data: Dict[str, Any]
+    size: int
+
+
 class WriteAheadLog(Generic[ST]):
-    def __init__(self, state_manager: StateManager[ST], storage: SerializedSQLiteStorage) -> None:
+    def __init__(
+        self,
+        state_manager: StateManager[ST],
+        storage: SerializedSQLiteStorage,
+        snapshot_deltas_per_base: int = SNAPSHOT_DELTAS_PER_BASE,
+        base_snapshots_to_keep: int = SNAPSHOT_BASES_TO_KEEP,
+        old_base_snapshots_interval: int = SNAPSHOT_OLD_BASES_INTERVAL,
+        old_base_snapshots_to_keep: int = SNAPSHOT_OLD_BASES_TO_KEEP,
+    ) -> None:
         self.state_manager = state_manager
-        self.state_change_id = None
+        self.state_change_id: Optional[int] = None
         self.storage = storage
 
+        # Snapshots are written as deltas to the last full snapshot, a new
+        # full snapshot is written after `snapshot_deltas_per_base` deltas.
+        # The deltas of the full snapshots older than the
+        # `base_snapshots_to_keep` most recent ones are deleted, and these
+        # full snapshots are thinned out to one per
+        # `old_base_snapshots_interval` state changes, for the
+        # `old_base_snapshots_to_keep` most recent intervals.
+        self.snapshot_deltas_per_base = snapshot_deltas_per_base
+        self.base_snapshots_to_keep = base_snapshots_to_keep
+        self.old_base_snapshots_interval = old_base_snapshots_interval
+        self.old_base_snapshots_to_keep = old_base_snapshots_to_keep
+        self._base_snapshot: Optional[BaseSnapshot] = None
+        self._deltas_since_base = 0
+
+        # Number of state changes which were re-applied on top of the snapshot
+        # by `restore_to_state_change`.
+        self.replayed_state_changes = 0
+
+        # Identifier of the state change of the most recent snapshot, used to
+        # avoid writing the same snapshot twice.
+        self.snapshot_state_change_id: Optional[int] = None
+        self._snapshot_requested = False
+        self._snapshot_greenlet: Optional[Greenlet] = None
+
         # The state changes must be applied in the same order as they are saved
         # to the WAL. Because writing to the database context switches, and the
         # scheduling is undetermined, a lock is necessary to protect the
         # execution order.
         self._lock = gevent.lock.Semaphore()
 
-    def log_and_dispatch(self, state_change: StateChange) -> Tuple[ST, List[Event]]:
+    def log_and_dispatch(self, state_change: StateChange) -> Tuple[Optional[ST], ST, List[Event]]:
         """ Log and apply a state change.
 
         This function will first write the state change to the write-ahead-log,
@@ -69,18 +149,26 @@ class WriteAheadLog(Generic[ST]):
         to restore the node state.
 
         Events produced by applying state change are also saved.
+
+        Returns:
+            The state the state change was applied to, the new state and the
+            events. The writes context switch, so the state before the call
+            may not be the state the state change was applied to.
         """
 
         with self._lock:
+            start = time.monotonic()
             timestamp = datetime.utcnow().isoformat(timespec="milliseconds")
             state_change_id = self.storage.write_state_change(state_change, timestamp)
             self.state_change_id = state_change_id
 
+            old_state = self.state_manager.current_state
             state, events = self.state_manager.dispatch(state_change)
 
             self.storage.write_events(state_change_id, events, timestamp)
+            LOG_AND_DISPATCH_DURATION.observe(time.monotonic() - start)
 
-        return state, events
+        return old_state, state, events
 
     def snapshot(self) -> None:
         """ Snapshot the application state.
@@ -88,13 +176,111 @@ class WriteAheadLog(Generic[ST]):
         Snapshots are used to restore the application state, either after a
         restart or a crash.
         """
+        # The background snapshot must finish first, it takes the lock
+        self.wait_for_snapshot()
+
         with self._lock:
             current_state = self.state_manager.current_state
             state_change_id = self.state_change_id
 
             # otherwise no state change was dispatched
-            if state_change_id:
-                self.storage.write_state_snapshot(state_change_id, current_state)
+            if state_change_id and state_change_id != self.snapshot_state_change_id:
+                with SNAPSHOT_DURATION.time():
+                    snapshot_data, serialized, is_delta = self._serialize_snapshot(current_state)
+                    self._write_snapshot(state_change_id, snapshot_data, serialized, is_delta)
+
+    def snapshot_async(self) -> Optional[Greenlet]:
+        """ Snapshot the application state without blocking the caller.
+
+        The snapshot is serialized in a native thread of the hub's threadpool
+        and written by a background greenlet. Only one snapshot is written at
+        a time, requests done while a snapshot is in progress are coalesced
+        into a single snapshot of the latest state.
+
+        Returns:
+            The greenlet writing the snapshot if a new one was spawned, None
+            if the request was merged into a running one.
+        """
+        self._snapshot_requested = True
+
+        if self._snapshot_greenlet is not None and not self._snapshot_greenlet.ready():
+            return None
+
+        self._snapshot_greenlet = gevent.spawn(self._write_requested_snapshots)
+        self._snapshot_greenlet.name = "WriteAheadLog.snapshot_async"
+        return self._snapshot_greenlet
+
+    def wait_for_snapshot(self) -> None:
+        """ Wait for the background snapshot, if there is one, to be written. """
+        if self._snapshot_greenlet is not None:
+            self._snapshot_greenlet.join()
+
+    def _write_requested_snapshots(self) -> None:
+        while self._snapshot_requested:
+            self._snapshot_requested = False
+
+            # The state manager never mutates `current_state`, every dispatch
+            # works on a deep copy of it. Because of this the state below is a
+            # frozen copy which can be serialized without holding the lock,
+            # while new state changes are being applied. The views must not
+            # mutate it either, e.g. by indexing a defaultdict.
+            with self._lock:
+                current_state = self.state_manager.current_state
+                state_change_id = self.state_change_id
+
+            if not state_change_id or state_change_id == self.snapshot_state_change_id:
+                continue
+
+            with SNAPSHOT_DURATION.time():
+                snapshot_data, serialized, is_delta = gevent.get_hub().threadpool.apply(
+                    self._serialize_snapshot, (current_state,)
+                )
+                self._write_snapshot(state_change_id, snapshot_data, serialized, is_delta)
+
+    def _serialize_snapshot(self, state: Optional[ST]) -> Tuple[Dict[str, Any], str, bool]:
+        """ Serialize `state` as a delta to the current base snapshot, or as a
+        new base snapshot if the delta is not worth it.
+
+        This does not use the database, so it is safe to call from a native
+        thread.
+
+        Returns:
+            The snapshot as a dictionary, the serialized snapshot and whether
+            it is a delta.
+        """
+        serializer = self.storage.serializer
+        snapshot_data = serializer.serialize_to_dict(state)
+        base = self._base_snapshot
+
+        if base is not None and self._deltas_since_base < self.snapshot_deltas_per_base:
+            serialized_delta = serializer.encode(compute_delta(base.data, snapshot_data))
+
+            # Once most of the state changed the delta does not save space
+            if len(serialized_delta) * 2 < base.size:
+                return snapshot_data, serialized_delta, True
+
+        return snapshot_data, serializer.encode(snapshot_data), False
+
+    def _write_snapshot(
+        self, state_change_id: int, snapshot_data: Dict[str, Any], serialized: str, is_delta: bool
+    ) -> None:
+        if is_delta:
+            assert self._base_snapshot, "a delta requires a base snapshot"
+            self.storage.write_state_snapshot_delta(
+                state_change_id, self._base_snapshot.identifier, serialized
+            )
+            self._deltas_since_base += 1
+        else:
+            identifier = self.storage.write_serialized_state_snapshot(state_change_id, serialized)
+            self._base_snapshot = BaseSnapshot(identifier, snapshot_data, len(serialized))
+            self._deltas_since_base = 0
+            self.storage.delete_superseded_snapshots(
+                self.base_snapshots_to_keep,
+                self.old_base_snapshots_interval,
+                self.old_base_snapshots_to_keep,
+            )
+
+        self.snapshot_state_change_id = state_change_id
 
     @property
     def version(self):
@@ -1,4 +1,5 @@
 import re
+import time
 from json.decoder import JSONDecodeError
 
 import click
@@ -20,15 +21,31 @@ from raiden.constants import (
     SECURITY_EXPRESSION,
 )
 from raiden.exceptions import EthNodeCommunicationError
+from raiden.network.block_source import BlockSource, PollingBlockSource
 from raiden.network.proxies.user_deposit import UserDeposit
 from raiden.settings import MIN_REI_THRESHOLD
 from raiden.utils import gas_reserve, pex, to_rdn
+from raiden.utils.metrics import REGISTRY
 from raiden.utils.runnable import Runnable
-from raiden.utils.typing import Tuple
+from raiden.utils.typing import Callable, List, Optional, Tuple
 
 REMOVE_CALLBACK = object()
 log = structlog.get_logger(__name__)  # pylint: disable=invalid-name
 
+BLOCK_PROCESSING_DURATION = REGISTRY.histogram(
+    "raiden_alarm_block_processing_seconds", "Time spent running the callbacks for a new block."
+).labels()
+BLOCK_PROCESSING_LAG = REGISTRY.gauge(
+    "raiden_alarm_block_processing_lag_seconds",
+    "Time between the timestamp of the latest block and the end of its processing.",
+).labels()
+BLOCK_NUMBER = REGISTRY.gauge(
+    "raiden_alarm_block_number", "Number of the latest block processed by the node."
+).labels()
+CHAIN_REORGANIZATIONS = REGISTRY.counter(
+    "raiden_alarm_chain_reorganizations", "Number of new heads which replaced known blocks."
+).labels()
+
 
 def _do_check_version(current_version: Tuple[str, ...]):
     content = requests.get(LATEST).json()
@@ -131,19 +148,27 @@ def check_network_id(network_id, web3: Web3):
 
 
 class AlarmTask(Runnable):
-    """ Task to notify when a block is mined. """
+    """ Task to notify when a block is mined.
+
+    The new blocks are reported by `block_source`, by default the latest block
+    is polled.
+    """
 
-    def __init__(self, chain):
+    def __init__(self, chain, block_source: Optional[BlockSource] = None):
         super().__init__()
 
-        self.callbacks = list()
+        if block_source is None:
+            block_source = PollingBlockSource(chain)
+
+        self.callbacks: List[Callable] = list()
         self.chain = chain
+        self.block_source = block_source
         self.chain_id = None
         self.known_block_number = None
         self._stop_event = None
 
-        # TODO: Start with a larger sleep_time and decrease it as the
-        # probability of a new block increases.
+        # Used by the users of the alarm task as the interval to check for
+        # changes caused by a new block.
         self.sleep_time = 0.5
 
     def __repr__(self):
@@ -152,6 +177,7 @@ class AlarmTask(Runnable):
     def start(self):
         log.debug("Alarm task started", node=pex(self.chain.node_address))
         self._stop_event = AsyncResult()
+        self.block_source.start()
         super().start()
 
     def _run(self):  # pylint: disable=method-hidden
@@ -192,19 +218,33 @@ class AlarmTask(Runnable):
         msg = "Only start the AlarmTask after it has been primed with the first_run"
         assert self.is_primed(), msg
 
-        sleep_time = self.sleep_time
-        while self._stop_event.wait(sleep_time) is not True:
+        while not self._stop_event.ready():
             try:
-                latest_block = self.chain.get_block(block_identifier="latest")
+                head_change = self.block_source.wait_for_head()
             except JSONDecodeError as e:
                 raise EthNodeCommunicationError(str(e))
 
+            # The block source was stopped
+            if head_change is None:
+                break
+
+            latest_block = head_change.block
+            if head_change.reorganized:
+                CHAIN_REORGANIZATIONS.inc()
+                log.warning(
+                    "Chain reorganization detected",
+                    node=pex(self.chain.node_address),
+                    known_block_number=self.known_block_number,
+                    latest_block_number=latest_block["number"],
+                    latest_block_hash=to_hex(latest_block["hash"]),
+                )
+
             self._maybe_run_callbacks(latest_block)
 
     def first_run(self, known_block_number):
         """ Blocking call to update the local state, if necessary. """
         assert self.callbacks, "callbacks not set"
-        latest_block = self.chain.get_block(block_identifier="latest")
+        latest_block = self.block_source.get_latest_block()
 
         log.debug(
             "Alarm task first run",
@@ -252,18 +292,24 @@ class AlarmTask(Runnable):
             log.debug("Received new block", **log_details)
 
             remove = list()
-            for callback in self.callbacks:
-                result = callback(latest_block)
-                if result is REMOVE_CALLBACK:
-                    remove.append(callback)
+            with BLOCK_PROCESSING_DURATION.time():
+                for callback in self.callbacks:
+                    result = callback(latest_block)
+                    if result is REMOVE_CALLBACK:
+                        remove.append(callback)
 
             for callback in remove:
                 self.callbacks.remove(callback)
 
             self.known_block_number = latest_block_number
 
+            BLOCK_NUMBER.set(latest_block_number)
+            if "timestamp" in latest_block:
+                BLOCK_PROCESSING_LAG.set(time.time() - latest_block["timestamp"])
+
     def stop(self):
         self._stop_event.set(True)
+        self.block_source.stop()
         log.debug("Alarm task stopped", node=pex(self.chain.node_address))
         result = self.join()
         # Callbacks should be cleaned after join
@@ -0,0 +1,387 @@
+import random
+from copy import deepcopy
+
+from raiden.constants import EMPTY_MERKLE_ROOT
+from raiden.messages import LockedTransfer, _senders_cache
+from raiden.storage.serialization import JSONSerializer
+from raiden.storage.sqlite import SerializedSQLiteStorage
+from raiden.storage.wal import WriteAheadLog, restore_to_state_change
+from raiden.tests.benchmark.harness import Benchmark
+from raiden.tests.utils import factories
+from raiden.tests.utils.factories import UNIT_CHAIN_ID
+from raiden.transfer import node
+from raiden.transfer.architecture import StateChange, StateManager
+from raiden.transfer.mediated_transfer.state_change import ActionInitTarget, ReceiveSecretReveal
+from raiden.transfer.merkle_tree import compute_layers
+from raiden.transfer.state import (
+    ChainState,
+    PaymentNetworkState,
+    TokenNetworkGraphState,
+    TokenNetworkState,
+)
+from raiden.transfer.state_change import Block, ReceiveUnlock
+from raiden.transfer.token_network import update_channel_status
+from raiden.utils import privatekey_to_address, sha3
+from raiden.utils.signer import LocalSigner
+from raiden.utils.typing import List, NamedTuple, Optional
+
+TRANSFER_AMOUNT = 10
+BLOCKS_PER_ROUND = 10
+
+
+class TargetTransfer(NamedTuple):
+    """ The state changes received by the target of a mediated transfer. """
+
+    init: ActionInitTarget
+    reveal: ReceiveSecretReveal
+    unlock: ReceiveUnlock
+
+
+class TargetScenario(NamedTuple):
+    chain_state: ChainState
+    transfers: List[TargetTransfer]
+
+    @property
+    def state_changes(self) -> List[StateChange]:
+        return [
+            state_change
+            for transfer in self.transfers
+            for state_change in (transfer.init, transfer.reveal, transfer.unlock)
+        ]
+
+
+def make_target_scenario(number_of_transfers: int) -> TargetScenario:
+    """ A node with one channel per partner, every partner pays it once.
+
+    The private keys are derived from fixed seeds and the remaining values
+    come from the `random` module, so the scenario is reproducible if the
+    module is seeded.
+    """
+    our_address = privatekey_to_address(sha3(b"benchmark node"))
+    chain_state = ChainState(
+        pseudo_random_generator=random.Random(random.random()),
+        block_number=1,
+        block_hash=factories.make_block_hash(),
+        our_address=our_address,
+        chain_id=UNIT_CHAIN_ID,
+    )
+
+    payment_network_address = factories.make_payment_network_address()
+    token_network_address = factories.make_address()
+    token_address = factories.make_address()
+
+    token_network = TokenNetworkState(
+        address=token_network_address,
+        token_address=token_address,
+        network_graph=TokenNetworkGraphState(token_network_address),
+    )
+    payment_network = PaymentNetworkState(payment_network_address, [token_network])
+    chain_state.identifiers_to_paymentnetworks[payment_network_address] = payment_network
+    chain_state.tokennetworkaddresses_to_paymentnetworkaddresses[
+        token_network_address
+    ] = payment_network_address
+    chain_state.tokennetworkaddresses_to_tokennetworks[token_network_address] = token_network
+
+    transfers = list()
+    for index in range(number_of_transfers):
+        partner_key = sha3(b"benchmark partner %d" % index)
+        partner = privatekey_to_address(partner_key)
+        canonical_identifier = factories.make_canonical_identifier(
+            chain_identifier=UNIT_CHAIN_ID,
+            token_network_address=token_network_address,
+            channel_identifier=index + 1,
+        )
+        channel_state = factories.create(
+            factories.NettingChannelStateProperties(
+                our_state=factories.NettingChannelEndStateProperties(
+                    address=our_address, balance=0
+                ),
+                partner_state=factories.NettingChannelEndStateProperties(
+                    address=partner, balance=TRANSFER_AMOUNT * 100
+                ),
+                token_address=token_address,
+                payment_network_address=payment_network_address,
+                canonical_identifier=canonical_identifier,
+            )
+        )
+        channel_identifier = canonical_identifier.channel_identifier
+        token_network.partneraddresses_to_channelidentifiers[partner].append(channel_identifier)
+        token_network.channelidentifiers_to_channels[channel_identifier] = channel_state
+        update_channel_status(token_network, channel_state)
+
+        secret = sha3(b"benchmark secret %d" % index)
+        locked_transfer = factories.make_signed_transfer_for(
+            channel_state,
+            factories.LockedTransferSignedStateProperties(
+                amount=TRANSFER_AMOUNT,
+                expiration=chain_state.block_number
+                + channel_state.settle_timeout
+                - channel_state.reveal_timeout,
+                initiator=partner,
+                target=our_address,
+                payment_identifier=index + 1,
+                token=token_address,
+                secret=secret,
+                sender=partner,
+                pkey=partner_key,
+            ),
+            compute_locksroot=True,
+        )
+        balance_proof = factories.create(
+            factories.BalanceProofSignedStateProperties(
+                nonce=locked_transfer.balance_proof.nonce + 1,
+                transferred_amount=TRANSFER_AMOUNT,
+                locked_amount=0,
+                locksroot=EMPTY_MERKLE_ROOT,
+                canonical_identifier=canonical_identifier,
+                message_hash=factories.make_additional_hash(),
+                sender=partner,
+                pkey=partner_key,
+            )
+        )
+
+        transfers.append(
+            TargetTransfer(
+                init=ActionInitTarget(
+                    route=factories.make_route_from_channel(channel_state),
+                    transfer=locked_transfer,
+                    balance_proof=locked_transfer.balance_proof,
+                    sender=partner,
+                ),
+                reveal=ReceiveSecretReveal(secret=secret, sender=partner),
+                unlock=ReceiveUnlock(
+                    message_identifier=factories.make_message_identifier(),
+                    secret=secret,
+                    balance_proof=balance_proof,
+                    sender=partner,
+                ),
+            )
+        )
+
+    return TargetScenario(chain_state, transfers)
+
+
+def dispatch_all(chain_state: ChainState, state_changes: List[StateChange]) -> ChainState:
+    for state_change in state_changes:
+        chain_state = node.state_transition(chain_state, state_change).new_state
+    return chain_state
+
+
+class StateTransitionBenchmark(Benchmark):
+    """ Dispatch state changes to a copy of the node state, without storage. """
+
+    def __init__(self, size: int) -> None:
+        super().__init__(size)
+        self.scenario = make_target_scenario(size)
+        self.initial_state = dispatch_all(
+            deepcopy(self.scenario.chain_state), self.state_changes_before()
+        )
+        self.measured_state_changes = self.state_changes_measured()
+        self.chain_state: Optional[ChainState] = None
+
+    def state_changes_before(self) -> List[StateChange]:
+        return list()
+
+    def state_changes_measured(self) -> List[StateChange]:
+        raise NotImplementedError
+
+    @property
+    def operations(self) -> int:
+        return len(self.measured_state_changes)
+
+    def setup(self) -> None:
+        self.chain_state = deepcopy(self.initial_state)
+
+    def run(self) -> None:
+        assert self.chain_state is not None
+        dispatch_all(self.chain_state, self.measured_state_changes)
+
+
+class StateTransitionLockedTransfer(StateTransitionBenchmark):
+    name = "state_transition_locked_transfer"
+
+    def state_changes_measured(self) -> List[StateChange]:
+        return [transfer.init for transfer in self.scenario.transfers]
+
+
+class StateTransitionUnlock(StateTransitionBenchmark):
+    name = "state_transition_unlock"
+
+    def state_changes_before(self) -> List[StateChange]:
+        return [
+            state_change
+            for transfer in self.scenario.transfers
+            for state_change in (transfer.init, transfer.reveal)
+        ]
+
+    def state_changes_measured(self) -> List[StateChange]:
+        return [transfer.unlock for transfer in self.scenario.transfers]
+
+
+class StateTransitionBlock(StateTransitionBenchmark):
+    """ New blocks with `size` pending transfers, which are all checked for
+    their expiration.
+    """
+
+    name = "state_transition_block"
+
+    def state_changes_before(self) -> List[StateChange]:
+        return [transfer.init for transfer in self.scenario.transfers]
+
+    def state_changes_measured(self) -> List[StateChange]:
+        first_block = self.scenario.chain_state.block_number + 1
+        return [
+            Block(block_number=block_number, gas_limit=1, block_hash=factories.make_block_hash())
+            for block_number in range(first_block, first_block + BLOCKS_PER_ROUND)
+        ]
+
+
+class SerializerRoundTrip(Benchmark):
+    """ Serialize and deserialize a node state with `size` pending transfers. """
+
+    name = "json_serializer_round_trip"
+
+    def __init__(self, size: int) -> None:
+        super().__init__(size)
+        scenario = make_target_scenario(size)
+        self.chain_state = dispatch_all(
+            scenario.chain_state, [transfer.init for transfer in scenario.transfers]
+        )
+
+    def run(self) -> None:
+        JSONSerializer.deserialize(JSONSerializer.serialize(self.chain_state))
+
+
+class WriteAheadLogAppend(Benchmark):
+    """ Log and dispatch the state changes of `size` payments. """
+
+    name = "write_ahead_log_append"
+
+    def __init__(self, size: int) -> None:
+        super().__init__(size)
+        self.scenario = make_target_scenario(size)
+        self.state_changes = self.scenario.state_changes
+        self.wal: Optional[WriteAheadLog] = None
+
+    @property
+    def operations(self) -> int:
+        return len(self.state_changes)
+
+    def setup(self) -> None:
+        state_manager = StateManager(node.state_transition, deepcopy(self.scenario.chain_state))
+        storage = SerializedSQLiteStorage(":memory:", JSONSerializer)
+        self.wal = WriteAheadLog(state_manager, storage)
+
+    def run(self) -> None:
+        assert self.wal is not None
+        for state_change in self.state_changes:
+            self.wal.log_and_dispatch(state_change)
+
+
+class RestoreToStateChange(Benchmark):
+    """ Restore the node state from a snapshot and the state changes of
+    `size` payments written after it.
+    """
+
+    name = "restore_to_state_change"
+
+    def __init__(self, size: int) -> None:
+        super().__init__(size)
+        scenario = make_target_scenario(size)
+        self.storage = SerializedSQLiteStorage(":memory:", JSONSerializer)
+
+        block = Block(
+            block_number=scenario.chain_state.block_number,
+            gas_limit=1,
+            block_hash=scenario.chain_state.block_hash,
+        )
+        snapshot_state_change_id = self.storage.write_state_change(block, "")
+        self.storage.write_state_snapshot(snapshot_state_change_id, scenario.chain_state)
+
+        self.state_changes = scenario.state_changes
+        for state_change in self.state_changes:
+            self.storage.write_state_change(state_change, "")
+
+    @property
+    def operations(self) -> int:
+        return len(self.state_changes)
+
+    def run(self) -> None:
+        restore_to_state_change(node.state_transition, self.storage, "latest")
+
+
+class ComputeLayers(Benchmark):
+    """ Compute the merkle tree of `size` locks. """
+
+    name = "compute_layers"
+
+    def __init__(self, size: int) -> None:
+        super().__init__(size)
+        self.leaves = [sha3(b"benchmark lock %d" % index) for index in range(size)]
+
+    def run(self) -> None:
+        compute_layers(self.leaves)
+
+
+def make_locked_transfers(number_of_transfers: int) -> List[LockedTransfer]:
+    return [
+        factories.create(
+            factories.LockedTransferProperties(
+                payment_identifier=index + 1,
+                message_identifier=index + 1,
+                secret=sha3(b"benchmark secret %d" % index),
+            )
+        )
+        for index in range(number_of_transfers)
+    ]
+
+
+class MessageSign(Benchmark):
+    name = "message_sign"
+
+    def __init__(self, size: int) -> None:
+        super().__init__(size)
+        self.messages = make_locked_transfers(size)
+        self.signer = LocalSigner(factories.UNIT_TRANSFER_PKEY)
+
+    @property
+    def operations(self) -> int:
+        return len(self.messages)
+
+    def run(self) -> None:
+        for message in self.messages:
+            message.sign(self.signer)
+
+
+class MessageSenderRecovery(Benchmark):
+    """ Recover the sender of signed messages, which were not seen before. """
+
+    name = "message_sender_recovery"
+
+    def __init__(self, size: int) -> None:
+        super().__init__(size)
+        self.messages = make_locked_transfers(size)
+
+    @property
+    def operations(self) -> int:
+        return len(self.messages)
+
+    def setup(self) -> None:
+        _senders_cache.clear()
+
+    def run(self) -> None:
+        for message in self.messages:
+            assert message.sender is not None
+
+
+BENCHMARKS = [
+    StateTransitionLockedTransfer,
+    StateTransitionUnlock,
+    StateTransitionBlock,
+    SerializerRoundTrip,
+    WriteAheadLogAppend,
+    RestoreToStateChange,
+    ComputeLayers,
+    MessageSign,
+    MessageSenderRecovery,
+]
@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+""" Write the database of a synthetic hub, to test the node at scale.
+
+    python -m raiden.tests.benchmark.generate_hub hub.db --channels-per-token-network 2000
+
+The same options and seed always produce the same state changes.
+"""
+import os
+import time
+
+import click
+
+from raiden.log_config import configure_logging
+from raiden.tests.benchmark.harness import DEFAULT_SEED
+from raiden.tests.benchmark.hub import HubShape, write_hub_database
+
+DEFAULT_SHAPE = HubShape()
+
+
+@click.command()
+@click.argument("database-path", type=click.Path(dir_okay=False))
+@click.option("--token-networks", default=DEFAULT_SHAPE.token_networks, show_default=True)
+@click.option(
+    "--channels-per-token-network",
+    default=DEFAULT_SHAPE.channels_per_token_network,
+    show_default=True,
+)
+@click.option(
+    "--payments",
+    default=DEFAULT_SHAPE.payments,
+    show_default=True,
+    help="Completed payments received by the hub.",
+)
+@click.option(
+    "--pending-locks",
+    default=DEFAULT_SHAPE.pending_locks,
+    show_default=True,
+    help="Payments which are still pending at the end.",
+)
+@click.option(
+    "--state-changes-per-block", default=DEFAULT_SHAPE.state_changes_per_block, show_default=True
+)
+@click.option("--snapshot-interval", default=DEFAULT_SHAPE.snapshot_interval, show_default=True)
+@click.option("--seed", default=DEFAULT_SEED, show_default=True)
+def main(database_path, seed, **shape_options):
+    if os.path.exists(database_path):
+        raise click.BadParameter(f"{database_path} already exists", param_hint="DATABASE_PATH")
+
+    configure_logging({"": "WARNING"}, disable_debug_logfile=True)
+
+    shape = HubShape(**shape_options)
+    start = time.monotonic()
+    summary = write_hub_database(database_path, shape, seed)
+
+    print(
+        f"Wrote {summary.state_changes} state changes, {summary.events} events and "
+        f"{summary.snapshots} snapshots for {shape.channels} channels to {database_path} "
+        f"in {time.monotonic() - start:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()  # pylint: disable=no-value-for-parameter
@@ -0,0 +1,166 @@
+import gc
+import json
+import random
+import statistics
+import time
+from dataclasses import asdict, dataclass, field
+
+from raiden.utils.typing import Any, Dict, List, NamedTuple, Optional, Type
+
+DEFAULT_SEED = 0
+DEFAULT_ROUNDS = 10
+DEFAULT_WARMUP_ROUNDS = 2
+DEFAULT_TOLERANCE = 0.1
+
+
+class Benchmark:
+    """ A benchmark case.
+
+    The inputs are built once by `__init__`, `setup` prepares a single round,
+    e.g. copies a state which is modified by the round, and `run` is the
+    measured code. Only `run` is timed.
+
+    Args:
+        size: The scale of the inputs, e.g. the number of channels.
+    """
+
+    name = ""
+
+    def __init__(self, size: int) -> None:
+        self.size = size
+
+    @property
+    def operations(self) -> int:
+        """ Number of operations done by a single call to `run`. """
+        return 1
+
+    def setup(self) -> None:
+        pass
+
+    def run(self) -> None:
+        raise NotImplementedError
+
+
+@dataclass
+class BenchmarkResult:
+    """ Duration of one operation for every measured round, in seconds. """
+
+    name: str
+    size: int
+    operations: int
+    timings: List[float] = field(default_factory=list)
+
+    @property
+    def min(self) -> float:
+        return min(self.timings)
+
+    @property
+    def median(self) -> float:
+        return statistics.median(self.timings)
+
+    @property
+    def mean(self) -> float:
+        return statistics.mean(self.timings)
+
+    @property
+    def stdev(self) -> float:
+        if len(self.timings) < 2:
+            return 0.0
+        return statistics.stdev(self.timings)
+
+    @property
+    def operations_per_second(self) -> float:
+        return 1 / self.median
+
+    def to_dict(self) -> Dict[str, Any]:
+        result = asdict(self)
+        result.update(min=self.min, median=self.median, mean=self.mean, stdev=self.stdev)
+        return result
+
+
+class Comparison(NamedTuple):
+    name: str
+    baseline: float
+    current: float
+    regressed: bool
+
+    @property
+    def change(self) -> float:
+        """ The relative change of the median, positive if it got slower. """
+        return self.current / self.baseline - 1
+
+
+def run_benchmark(
+    benchmark_class: Type[Benchmark],
+    size: int,
+    rounds: int = DEFAULT_ROUNDS,
+    warmup_rounds: int = DEFAULT_WARMUP_ROUNDS,
+    seed: int = DEFAULT_SEED,
+) -> BenchmarkResult:
+    """ Measure `benchmark_class`, after `warmup_rounds` unmeasured rounds.
+
+    The inputs are generated from a fixed seed, and the garbage collector is
+    disabled while a round is measured, so that repeated executions on the
+    same machine are comparable.
+    """
+    random.seed(seed)
+    benchmark = benchmark_class(size)
+    result = BenchmarkResult(name=benchmark.name, size=size, operations=benchmark.operations)
+
+    for round_number in range(warmup_rounds + rounds):
+        benchmark.setup()
+
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            benchmark.run()
+            elapsed = time.perf_counter() - start
+        finally:
+            gc.enable()
+
+        if round_number >= warmup_rounds:
+            result.timings.append(elapsed / benchmark.operations)
+
+    return result
+
+
+def save_results(path: str, results: List[BenchmarkResult]) -> None:
+    with open(path, "w") as handler:
+        json.dump({result.name: result.to_dict() for result in results}, handler, indent=2)
+
+
+def load_results(path: str) -> Dict[str, Dict[str, Any]]:
+    with open(path) as handler:
+        return json.load(handler)
+
+
+def compare(
+    results: List[BenchmarkResult],
+    baseline: Dict[str, Dict[str, Any]],
+    tolerance: float = DEFAULT_TOLERANCE,
+) -> List[Comparison]:
+    """ Compare the medians of `results` with the ones of `baseline`.
+
+    A benchmark regressed if its median is more than `tolerance` slower than
+    the baseline. Results without a baseline measured with the same size are
+    not compared.
+    """
+    comparisons = list()
+
+    for result in results:
+        baseline_result: Optional[Dict[str, Any]] = baseline.get(result.name)
+        if baseline_result is None or baseline_result["size"] != result.size:
+            continue
+
+        baseline_median = baseline_result["median"]
+        comparisons.append(
+            Comparison(
+                name=result.name,
+                baseline=baseline_median,
+                current=result.median,
+                regressed=result.median > baseline_median * (1 + tolerance),
+            )
+        )
+
+    return comparisons
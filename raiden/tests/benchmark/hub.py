@@ -0,0 +1,375 @@
+""" Synthetic state of a hub: a node with many channels, payments and pending
+locks, to test the node at production scale offline.
+
+The state changes are generated from the test factories and applied to the
+node state while they are generated, so every state change is valid for the
+state before it. The same shape and seed always produce the same stream.
+"""
+import random
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from itertools import islice
+
+from raiden.constants import SNAPSHOT_STATE_CHANGES_COUNT
+from raiden.storage.serialization import JSONSerializer
+from raiden.storage.sqlite import SerializedSQLiteStorage
+from raiden.storage.wal import WriteAheadLog
+from raiden.tests.benchmark.harness import DEFAULT_SEED
+from raiden.tests.utils import factories
+from raiden.tests.utils.factories import UNIT_CHAIN_ID
+from raiden.transfer import channel, node, views
+from raiden.transfer.architecture import Event, StateChange, StateManager
+from raiden.transfer.identifiers import CanonicalIdentifier
+from raiden.transfer.mediated_transfer.state import LockedTransferSignedState
+from raiden.transfer.mediated_transfer.state_change import ActionInitTarget, ReceiveSecretReveal
+from raiden.transfer.merkle_tree import merkleroot
+from raiden.transfer.state import (
+    ChainState,
+    HashTimeLockState,
+    NettingChannelState,
+    PaymentNetworkState,
+    TokenNetworkGraphState,
+    TokenNetworkState,
+)
+from raiden.transfer.state_change import (
+    ActionInitChain,
+    Block,
+    ContractReceiveChannelNew,
+    ContractReceiveNewPaymentNetwork,
+    ContractReceiveNewTokenNetwork,
+    ReceiveUnlock,
+)
+from raiden.utils import privatekey_to_address, sha3
+from raiden.utils.typing import (
+    Address,
+    Dict,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    PaymentID,
+    Secret,
+    TokenAmount,
+)
+
+# Deposit of both participants, large enough for any number of payments
+CHANNEL_DEPOSIT = TokenAmount(10 ** 18)
+MAX_PAYMENT_AMOUNT = 1000
+
+# Time between the generated blocks, used for the log time of the rows
+BLOCK_TIME = timedelta(seconds=15)
+GENESIS_TIME = datetime(2019, 1, 1)
+
+
+@dataclass
+class HubShape:
+    """ The size of the generated node.
+
+    Args:
+        token_networks: Number of token networks, all have the same partners.
+        channels_per_token_network: Number of channels, and partners, of
+            every token network.
+        payments: Number of payments received by the node, each one is a
+            locked transfer, a secret reveal and an unlock.
+        pending_locks: Number of payments left pending at the end, their
+            locks are in the merkle trees of the partners.
+        state_changes_per_block: A new block is mined after this many state
+            changes.
+        snapshot_interval: A snapshot is written after this many state
+            changes. The node snapshots more often, but serializing the state
+            of a big node dominates the time to generate it.
+    """
+
+    token_networks: int = 3
+    channels_per_token_network: int = 1000
+    payments: int = 10_000
+    pending_locks: int = 200
+    state_changes_per_block: int = 10
+    snapshot_interval: int = 10 * SNAPSHOT_STATE_CHANGES_COUNT
+
+    @property
+    def channels(self) -> int:
+        return self.token_networks * self.channels_per_token_network
+
+
+class GeneratedStateChange(NamedTuple):
+    state_change: StateChange
+    events: List[Event]
+    log_time: str
+
+
+class HubSummary(NamedTuple):
+    state_changes: int
+    events: int
+    snapshots: int
+
+
+class HubGenerator:
+    """ Generates the state changes of a hub and applies them to `chain_state`.
+
+    The chain state is modified in place, it is the state after the last
+    generated state change.
+    """
+
+    def __init__(self, shape: HubShape, seed: int = DEFAULT_SEED) -> None:
+        self.shape = shape
+        self.seed = seed
+        self.our_address = privatekey_to_address(sha3(b"hub node"))
+        self.chain_state: Optional[ChainState] = None
+
+        self.partner_keys: Dict[Address, bytes] = dict()
+        self.canonical_identifiers: List[CanonicalIdentifier] = list()
+        self._state_changes_in_block = 0
+        self._payment_identifier = 0
+
+    @property
+    def block_number(self) -> int:
+        assert self.chain_state is not None
+        return self.chain_state.block_number
+
+    def state_changes(self) -> Iterator[GeneratedStateChange]:
+        """ The history of the node: the token networks are registered and
+        the channels opened, then the payments are received. The pending
+        locks are received last, so that they do not expire.
+        """
+        random.seed(self.seed)
+
+        yield from self._dispatch(
+            ActionInitChain(
+                pseudo_random_generator=random.Random(self.seed),
+                block_number=1,
+                block_hash=factories.make_block_hash(),
+                our_address=self.our_address,
+                chain_id=UNIT_CHAIN_ID,
+            )
+        )
+
+        payment_network_address = factories.make_payment_network_address()
+        yield from self._dispatch(
+            ContractReceiveNewPaymentNetwork(
+                transaction_hash=factories.make_transaction_hash(),
+                block_number=self.block_number,
+                block_hash=factories.make_block_hash(),
+                payment_network=PaymentNetworkState(payment_network_address, []),
+            )
+        )
+
+        partners = list()
+        for index in range(self.shape.channels_per_token_network):
+            partner_key = sha3(b"hub partner %d" % index)
+            partner = privatekey_to_address(partner_key)
+            self.partner_keys[partner] = partner_key
+            partners.append(partner)
+
+        for _ in range(self.shape.token_networks):
+            token_network_address = factories.make_address()
+            token_address = factories.make_address()
+            yield from self._dispatch(
+                ContractReceiveNewTokenNetwork(
+                    transaction_hash=factories.make_transaction_hash(),
+                    block_number=self.block_number,
+                    block_hash=factories.make_block_hash(),
+                    payment_network_address=payment_network_address,
+                    token_network=TokenNetworkState(
+                        address=token_network_address,
+                        token_address=token_address,
+                        network_graph=TokenNetworkGraphState(token_network_address),
+                    ),
+                )
+            )
+
+            for index, partner in enumerate(partners):
+                canonical_identifier = factories.make_canonical_identifier(
+                    chain_identifier=UNIT_CHAIN_ID,
+                    token_network_address=token_network_address,
+                    channel_identifier=index + 1,
+                )
+                self.canonical_identifiers.append(canonical_identifier)
+                channel_state = factories.create(
+                    factories.NettingChannelStateProperties(
+                        our_state=factories.NettingChannelEndStateProperties(
+                            address=self.our_address, balance=CHANNEL_DEPOSIT
+                        ),
+                        partner_state=factories.NettingChannelEndStateProperties(
+                            address=partner, balance=CHANNEL_DEPOSIT
+                        ),
+                        token_address=token_address,
+                        payment_network_address=payment_network_address,
+                        canonical_identifier=canonical_identifier,
+                    )
+                )
+                yield from self._dispatch(
+                    ContractReceiveChannelNew(
+                        transaction_hash=factories.make_transaction_hash(),
+                        block_number=self.block_number,
+                        block_hash=factories.make_block_hash(),
+                        channel_state=channel_state,
+                    )
+                )
+
+        for _ in range(self.shape.payments):
+            yield from self._payment(pending=False)
+
+        for _ in range(self.shape.pending_locks):
+            yield from self._payment(pending=True)
+
+    def _payment(self, pending: bool) -> Iterator[GeneratedStateChange]:
+        canonical_identifier = random.choice(self.canonical_identifiers)
+        amount = TokenAmount(random.randint(1, MAX_PAYMENT_AMOUNT))
+        self._payment_identifier += 1
+        secret = Secret(sha3(b"hub secret %d %d" % (self.seed, self._payment_identifier)))
+
+        channel_state = self._channel_state(canonical_identifier)
+        partner = channel_state.partner_state.address
+        transfer = self._locked_transfer(channel_state, amount, secret)
+        yield from self._dispatch(
+            ActionInitTarget(
+                route=factories.make_route_from_channel(channel_state),
+                transfer=transfer,
+                balance_proof=transfer.balance_proof,
+                sender=partner,
+            )
+        )
+
+        if pending:
+            return
+
+        yield from self._dispatch(ReceiveSecretReveal(secret=secret, sender=partner))
+
+        channel_state = self._channel_state(canonical_identifier)
+        balance_proof = channel_state.partner_state.balance_proof
+        merkletree = channel.compute_merkletree_without(
+            channel_state.partner_state.merkletree, transfer.lock.lockhash
+        )
+        assert balance_proof is not None and merkletree is not None
+        yield from self._dispatch(
+            ReceiveUnlock(
+                message_identifier=factories.make_message_identifier(),
+                secret=secret,
+                balance_proof=factories.create(
+                    factories.BalanceProofSignedStateProperties(
+                        nonce=balance_proof.nonce + 1,
+                        transferred_amount=balance_proof.transferred_amount + amount,
+                        locked_amount=balance_proof.locked_amount - amount,
+                        locksroot=merkleroot(merkletree),
+                        canonical_identifier=canonical_identifier,
+                        message_hash=factories.make_additional_hash(),
+                        sender=partner,
+                        pkey=self.partner_keys[partner],
+                    )
+                ),
+                sender=partner,
+            )
+        )
+
+    def _locked_transfer(
+        self, channel_state: NettingChannelState, amount: TokenAmount, secret: Secret
+    ) -> LockedTransferSignedState:
+        """ The next transfer of the partner, on top of its pending locks. """
+        partner_state = channel_state.partner_state
+        partner = partner_state.address
+        balance_proof = partner_state.balance_proof
+
+        expiration = (
+            self.block_number + channel_state.settle_timeout - channel_state.reveal_timeout
+        )
+        lock = HashTimeLockState(amount, expiration, sha3(secret))
+        merkletree = channel.compute_merkletree_with(partner_state.merkletree, lock.lockhash)
+        assert merkletree is not None
+
+        return factories.create(
+            factories.LockedTransferSignedStateProperties(
+                nonce=balance_proof.nonce + 1 if balance_proof else 1,
+                transferred_amount=balance_proof.transferred_amount if balance_proof else 0,
+                locked_amount=(balance_proof.locked_amount if balance_proof else 0) + amount,
+                locksroot=merkleroot(merkletree),
+                canonical_identifier=channel_state.canonical_identifier,
+                amount=amount,
+                expiration=expiration,
+                initiator=partner,
+                target=self.our_address,
+                payment_identifier=PaymentID(self._payment_identifier),
+                token=channel_state.token_address,
+                secret=secret,
+                sender=partner,
+                recipient=self.our_address,
+                pkey=self.partner_keys[partner],
+                message_identifier=factories.make_message_identifier(),
+            )
+        )
+
+    def _channel_state(self, canonical_identifier: CanonicalIdentifier) -> NettingChannelState:
+        channel_state = views.get_channelstate_by_canonical_identifier(
+            self.chain_state, canonical_identifier
+        )
+        assert channel_state is not None
+        return channel_state
+
+    def _dispatch(self, state_change: StateChange) -> Iterator[GeneratedStateChange]:
+        yield self._apply(state_change)
+
+        self._state_changes_in_block += 1
+        if self._state_changes_in_block >= self.shape.state_changes_per_block:
+            self._state_changes_in_block = 0
+            block = Block(
+                block_number=self.block_number + 1,
+                gas_limit=1,
+                block_hash=factories.make_block_hash(),
+            )
+            yield self._apply(block)
+
+    def _apply(self, state_change: StateChange) -> GeneratedStateChange:
+        iteration = node.state_transition(self.chain_state, state_change)
+        self.chain_state = iteration.new_state
+
+        log_time = GENESIS_TIME + BLOCK_TIME * self.block_number
+        return GeneratedStateChange(
+            state_change=state_change,
+            events=iteration.events,
+            log_time=log_time.isoformat(timespec="milliseconds"),
+        )
+
+
+def write_hub_database(
+    database_path: str, shape: HubShape, seed: int = DEFAULT_SEED
+) -> HubSummary:
+    """ Write the state changes, events and snapshots of a hub to a new
+    database, as a node stopped cleanly would have left it.
+    """
+    storage = SerializedSQLiteStorage(database_path, JSONSerializer())
+    storage.update_version()
+
+    state_manager: StateManager[ChainState] = StateManager(node.state_transition, None)
+    wal = WriteAheadLog(state_manager, storage)
+    generator = HubGenerator(shape, seed)
+
+    state_changes = generator.state_changes()
+    state_changes_count = events_count = snapshots_count = 0
+    while True:
+        # Every batch is written in a single transaction and followed by a
+        # snapshot, like the periodic snapshots of the node
+        batch = list(islice(state_changes, shape.snapshot_interval))
+        if not batch:
+            break
+
+        with storage.transaction():
+            for generated in batch:
+                state_change_id = storage.write_state_change(
+                    generated.state_change, generated.log_time
+                )
+                storage.write_events(state_change_id, generated.events, generated.log_time)
+                events_count += len(generated.events)
+
+        state_changes_count += len(batch)
+        state_manager.current_state = generator.chain_state
+        wal.state_change_id = state_change_id
+        wal.snapshot()
+        snapshots_count += 1
+
+    if wal.state_change_id is not None:
+        storage.write_clean_shutdown_marker(wal.state_change_id)
+    storage.close()
+
+    return HubSummary(
+        state_changes=state_changes_count, events=events_count, snapshots=snapshots_count
+    )
@@ -0,0 +1,666 @@
+""" Nodes running in a single process and exchanging the messages through an
+in-memory transport, to measure the throughput of mediated payments without
+a Matrix server or an Ethereum client.
+
+The nodes are `RaidenService` instances which use the node's state machine,
+event handler and message handler. The blockchain is replaced by stand-ins
+and the channels are opened by dispatching the contract state changes
+directly, so only the off-chain part of a payment is measured.
+"""
+import math
+import os
+import random
+import time
+from dataclasses import dataclass, field
+
+import gevent
+import structlog
+from gevent.event import AsyncResult, Event
+from gevent.pool import Pool
+from gevent.queue import Queue
+
+from raiden.app import App
+from raiden.constants import EMPTY_SIGNATURE, Environment
+from raiden.message_handler import MessageHandler
+from raiden.messages import Delivered, LockedTransfer, Message, SecretRequest
+from raiden.network.transport.matrix.utils import validate_and_parse_message
+from raiden.raiden_event_handler import RaidenEventHandler
+from raiden.raiden_service import RaidenService
+from raiden.storage.restore import HistoricChannelStates
+from raiden.storage.serialization import JSONSerializer
+from raiden.storage.sqlite import SerializedSQLiteStorage
+from raiden.storage.wal import WriteAheadLog
+from raiden.tests.benchmark.harness import DEFAULT_SEED
+from raiden.tests.utils import factories
+from raiden.tests.utils.factories import UNIT_CHAIN_ID
+from raiden.transfer import node
+from raiden.transfer.architecture import StateManager
+from raiden.transfer.events import EventPaymentReceivedSuccess
+from raiden.transfer.identifiers import QueueIdentifier
+from raiden.transfer.state import (
+    NODE_NETWORK_REACHABLE,
+    PaymentNetworkState,
+    TokenNetworkGraphState,
+    TokenNetworkState,
+)
+from raiden.transfer.state_change import (
+    ActionChangeNodeNetworkState,
+    ActionInitChain,
+    ContractReceiveChannelNew,
+    ContractReceiveNewPaymentNetwork,
+    ContractReceiveNewTokenNetwork,
+    ContractReceiveRouteNew,
+)
+from raiden.utils import pex, privatekey_to_address, sha3
+from raiden.utils.runnable import Runnable
+from raiden.utils.typing import (
+    Address,
+    Any,
+    BlockNumber,
+    Dict,
+    List,
+    NamedTuple,
+    Optional,
+    PaymentAmount,
+    PaymentID,
+    SecretHash,
+    Sequence,
+    Set,
+    TargetAddress,
+    TokenAmount,
+    TokenNetworkAddress,
+    Tuple,
+)
+
+log = structlog.get_logger(__name__)  # pylint: disable=invalid-name
+
+# The state machine does not accept payments before the first block
+START_BLOCK_NUMBER = BlockNumber(1)
+
+# Deposit of both participants, large enough for any number of payments
+CHANNEL_DEPOSIT = TokenAmount(10 ** 18)
+
+
+class SentMessage(NamedTuple):
+    sent_at: float
+    sender: Address
+    receiver: Address
+    message: Message
+
+
+class Delivery(NamedTuple):
+    deliver_at: float
+    sender: Address
+    data: str
+
+
+class LocalNetwork:
+    """ Delivers the messages among the transports of this process.
+
+    Every message is delivered once and in order, after `latency` seconds.
+    The sent messages are recorded to compute the latency of every hop of a
+    payment.
+    """
+
+    def __init__(self, latency: float = 0.0) -> None:
+        self.latency = latency
+        self.transports: Dict[Address, "LocalTransport"] = dict()
+        self.sent_messages: List[SentMessage] = list()
+
+    def send(self, sender: Address, receiver: Address, message: Message) -> None:
+        now = time.monotonic()
+        self.sent_messages.append(
+            SentMessage(sent_at=now, sender=sender, receiver=receiver, message=message)
+        )
+
+        transport = self.transports.get(receiver)
+        if transport is None:
+            # The acknowledgements in flight are lost when the nodes are stopped
+            log.debug("Message to stopped node dropped", receiver=pex(receiver), message=message)
+            return
+
+        transport.deliver(
+            Delivery(
+                deliver_at=now + self.latency,
+                sender=sender,
+                data=JSONSerializer.serialize(message),
+            )
+        )
+
+
+class LocalTransport(Runnable):
+    """ A transport with the interface of `MatrixTransport` which sends the
+    messages through a `LocalNetwork`.
+
+    The messages are serialized, parsed and acknowledged with `Delivered` like
+    the Matrix transport does, and the received messages are handled one at a
+    time. The local network does not lose messages, so they are not retried,
+    and every peer is reachable.
+    """
+
+    def __init__(self, network: LocalNetwork) -> None:
+        super().__init__()
+        self.network = network
+        self.whitelisted: Set[Address] = set()
+        self.global_messages = 0
+
+        self._raiden_service: Optional[RaidenService] = None
+        self._message_handler: Optional[MessageHandler] = None
+        self._inbox: Queue = Queue()
+        self._stop_event = Event()
+        self._stop_event.set()
+
+    def __repr__(self):
+        node = ""
+        if self._raiden_service is not None:
+            node = f" node:{pex(self._raiden_service.address)}"
+        return f"<{self.__class__.__name__}{node} id:{id(self)}>"
+
+    @property
+    def address(self) -> Address:
+        assert self._raiden_service is not None
+        return self._raiden_service.address
+
+    def start(  # type: ignore
+        self, raiden_service: RaidenService, message_handler: MessageHandler, prev_auth_data: str
+    ):
+        # pylint: disable=unused-argument
+        if not self._stop_event.ready():
+            raise RuntimeError(f"{self!r} already started")
+        self._stop_event.clear()
+        self._raiden_service = raiden_service
+        self._message_handler = message_handler
+
+        self.network.transports[self.address] = self
+        super().start()
+
+    def _run(self):  # pylint: disable=method-hidden
+        self.greenlet.name = f"LocalTransport._run node:{pex(self.address)}"
+        while not self._stop_event.ready():
+            delivery = self._inbox.get()
+            if delivery is None:
+                break
+
+            delay = delivery.deliver_at - time.monotonic()
+            if delay > 0:
+                gevent.sleep(delay)
+            self._receive(delivery)
+
+    def stop(self):
+        if self._stop_event.ready():
+            return
+        self._stop_event.set()
+        self._inbox.put(None)
+        self.network.transports.pop(self.address, None)
+
+    def whitelist(self, address: Address):
+        self.whitelisted.add(address)
+
+    def start_health_check(self, node_address):
+        """ Every node of the local network is online, the peer is reported
+        reachable like the Matrix transport does when it sees its presence.
+        """
+        if self._stop_event.ready() or node_address in self.whitelisted:
+            return
+
+        assert self._raiden_service is not None
+        self.whitelist(node_address)
+        self._raiden_service.handle_and_track_state_change(
+            ActionChangeNodeNetworkState(node_address, NODE_NETWORK_REACHABLE)
+        )
+
+    def send_async(self, queue_identifier: QueueIdentifier, message: Message):
+        if isinstance(message, Delivered):
+            raise ValueError(f"Do not use send_async for {message.__class__.__name__} messages")
+
+        self.network.send(self.address, queue_identifier.recipient, message)
+
+    def send_global(self, room: str, message: Message) -> None:
+        # pylint: disable=unused-argument
+        # No service listens in the local network
+        self.global_messages += 1
+
+    def deliver(self, delivery: Delivery) -> None:
+        self._inbox.put(delivery)
+
+    def _receive(self, delivery: Delivery) -> None:
+        assert self._raiden_service is not None
+
+        for message in validate_and_parse_message(delivery.data, delivery.sender):
+            if not isinstance(message, Delivered):
+                delivered_message = Delivered(
+                    delivered_message_identifier=message.message_identifier,
+                    signature=EMPTY_SIGNATURE,
+                )
+                self._raiden_service.sign(delivered_message)
+                self.network.send(self.address, delivery.sender, delivered_message)
+
+            self._raiden_service.on_message(message)
+
+
+class LocalClient:
+    def __init__(self, privkey: bytes) -> None:
+        self.privkey = privkey
+        self.address = privatekey_to_address(privkey)
+        self.web3 = None
+
+
+class LocalChain:
+    """ The part of `BlockChainService` used by a node to send payments. """
+
+    def __init__(self, privkey: bytes) -> None:
+        self.client = LocalClient(privkey)
+        self.node_address = self.client.address
+        self.network_id = UNIT_CHAIN_ID
+
+
+class LocalTokenNetworkRegistry:
+    def __init__(self, address: Address) -> None:
+        self.address = address
+
+
+class LocalSecretRegistry:
+    """ Registers the secrets in memory, the node is not informed about it. """
+
+    def __init__(self) -> None:
+        self.secrethashes: Set[SecretHash] = set()
+
+    def is_secret_registered(self, secrethash: SecretHash, block_identifier: Any) -> bool:
+        # pylint: disable=unused-argument
+        return secrethash in self.secrethashes
+
+    def register_secret(self, secret: bytes) -> None:
+        self.secrethashes.add(SecretHash(sha3(secret)))
+
+
+class LocalRaidenService(RaidenService):
+    """ A node started without a blockchain.
+
+    The state is initialized like on the first start of a node, but the
+    blockchain filters and the alarm task are not started, the channels are
+    opened by dispatching the contract state changes.
+    """
+
+    def start(self):
+        assert self.stop_event.ready(), f"Node already started. node:{self!r}"
+        self.stop_event.clear()
+        self.greenlets = list()
+
+        if self.db_lock is not None:
+            self.db_lock.acquire(timeout=0)
+
+        storage = SerializedSQLiteStorage(
+            database_path=self.database_path,
+            serializer=JSONSerializer(),
+            readers=self.config["database_readers"],
+        )
+        storage.update_version()
+        self.wal = WriteAheadLog(StateManager(node.state_transition, None), storage)
+        self.historic_channel_states = HistoricChannelStates(storage)
+
+        block_hash = factories.make_block_hash()
+        self.handle_and_track_state_change(
+            ActionInitChain(
+                pseudo_random_generator=random.Random(),
+                block_number=self.query_start_block,
+                block_hash=block_hash,
+                our_address=self.address,
+                chain_id=self.chain.network_id,
+            )
+        )
+        self.handle_and_track_state_change(
+            ContractReceiveNewPaymentNetwork(
+                transaction_hash=factories.make_transaction_hash(),
+                payment_network=PaymentNetworkState(self.default_registry.address, []),
+                block_number=self.query_start_block,
+                block_hash=block_hash,
+            )
+        )
+
+        self._initialize_ready_to_processed_events()
+        self.transport.link_exception(self.on_error)
+        self.transport.start(
+            raiden_service=self, message_handler=self.message_handler, prev_auth_data=None
+        )
+        log.debug("Local Raiden Service started", node=pex(self.address))
+        Runnable.start(self)
+
+    def stop(self):
+        if self.stop_event.ready():
+            return
+        self.stop_event.set()
+
+        self.transport.stop()
+        self.transport.join()
+
+        self.wal.wait_for_snapshot()
+        self.wal.storage.close()
+
+        if self.db_lock is not None:
+            self.db_lock.release()
+
+        log.debug("Local Raiden Service stopped", node=pex(self.address))
+
+
+@dataclass
+class Topology:
+    """ The nodes, their channels, and the payments of a workload.
+
+    The nodes are referred to by their index. The payments are sent from
+    the initiator to the target of the pairs in `payments` in turn.
+    """
+
+    name: str
+    nodes: int
+    channels: List[Tuple[int, int]]
+    payments: List[Tuple[int, int]]
+
+
+def hub_and_spoke(spokes: int) -> Topology:
+    """ Every spoke has a channel with the hub, node 0, and pays the next
+    spoke through it.
+    """
+    assert spokes >= 2, "There must be two spokes to mediate a payment"
+    return Topology(
+        name=f"hub_and_spoke_{spokes}",
+        nodes=spokes + 1,
+        channels=[(0, spoke) for spoke in range(1, spokes + 1)],
+        payments=[(spoke, spoke % spokes + 1) for spoke in range(1, spokes + 1)],
+    )
+
+
+def mediator_chain(mediators: int) -> Topology:
+    """ The first node pays the last one through `mediators` nodes. """
+    nodes = mediators + 2
+    return Topology(
+        name=f"mediator_chain_{mediators}",
+        nodes=nodes,
+        channels=[(index, index + 1) for index in range(nodes - 1)],
+        payments=[(0, nodes - 1)],
+    )
+
+
+TOPOLOGIES = {"hub": hub_and_spoke, "chain": mediator_chain}
+
+
+@dataclass
+class Workload:
+    """ The payments sent through a topology.
+
+    Args:
+        payments: Number of payments to send.
+        concurrency: Maximum number of payments in flight.
+        amount: Amount of every payment.
+        payment_timeout: A payment which is not received by the target
+            after this many seconds fails.
+        latency: Delay of every message in the local network, in seconds.
+    """
+
+    payments: int = 1000
+    concurrency: int = 10
+    amount: int = 1
+    payment_timeout: float = 30.0
+    latency: float = 0.0
+
+
+def percentile(values: Sequence[float], fraction: float) -> float:
+    """ The nearest-rank percentile of `values`. """
+    ordered = sorted(values)
+    index = max(0, math.ceil(fraction * len(ordered)) - 1)
+    return ordered[index]
+
+
+@dataclass
+class ThroughputReport:
+    """ The result of a workload.
+
+    `latencies` are the durations of the successful payments, from the
+    initiator starting it to the target receiving the unlock. `hop_latencies`
+    are, for every hop of the route, the durations from a node sending the
+    locked transfer to the next node forwarding it, or requesting the secret
+    if it is the target.
+    """
+
+    topology: str
+    nodes: int
+    concurrency: int
+    duration: float
+    failed: int = 0
+    latencies: List[float] = field(default_factory=list)
+    hop_latencies: List[List[float]] = field(default_factory=list)
+
+    @property
+    def completed(self) -> int:
+        return len(self.latencies)
+
+    @property
+    def payments_per_second(self) -> float:
+        return self.completed / self.duration
+
+    def summary(self) -> str:
+        lines = [
+            f"{self.topology}: {self.nodes} nodes, {self.concurrency} payments in flight",
+            f"{self.completed} payments in {self.duration:.2f}s, {self.failed} failed, "
+            f"{self.payments_per_second:.1f} payments/s",
+        ]
+        if self.latencies:
+            lines.append(
+                "latency "
+                + " ".join(
+                    f"p{round(fraction * 100)}={percentile(self.latencies, fraction) * 1000:.1f}ms"
+                    for fraction in (0.5, 0.9, 0.99)
+                )
+            )
+        for hop, latencies in enumerate(self.hop_latencies):
+            lines.append(
+                f"hop {hop + 1}: p50={percentile(latencies, 0.5) * 1000:.1f}ms "
+                f"p99={percentile(latencies, 0.99) * 1000:.1f}ms"
+            )
+        return "\n".join(lines)
+
+
+def hop_latencies(sent_messages: List[SentMessage]) -> List[List[float]]:
+    """ The latencies of every hop, see `ThroughputReport`. """
+    payment_hops: Dict[PaymentID, List[float]] = dict()
+    for sent in sent_messages:
+        if isinstance(sent.message, (LockedTransfer, SecretRequest)):
+            hops = payment_hops.setdefault(sent.message.payment_identifier, list())
+            hops.append(sent.sent_at)
+
+    latencies: List[List[float]] = list()
+    for sent_at in payment_hops.values():
+        for hop, (start, end) in enumerate(zip(sent_at, sent_at[1:])):
+            if hop == len(latencies):
+                latencies.append(list())
+            latencies[hop].append(end - start)
+    return latencies
+
+
+def is_payment_received(payment_identifier: PaymentID, events: List[Any]) -> bool:
+    return any(
+        isinstance(event, EventPaymentReceivedSuccess) and event.identifier == payment_identifier
+        for event in events
+    )
+
+
+class LocalNetworkHarness:
+    """ Runs the nodes of a topology and sends payments through them.
+
+    Args:
+        database_dir: The nodes write their databases to this directory, if
+            not given the databases are kept in memory.
+    """
+
+    def __init__(
+        self,
+        topology: Topology,
+        latency: float = 0.0,
+        database_dir: Optional[str] = None,
+        seed: int = DEFAULT_SEED,
+    ) -> None:
+        random.seed(seed)
+
+        self.topology = topology
+        self.network = LocalNetwork(latency)
+        self.token_network_address = TokenNetworkAddress(factories.make_address())
+        self.token_address = factories.make_address()
+        self.payment_network_address = factories.make_payment_network_address()
+        self.secret_registry = LocalSecretRegistry()
+
+        self.nodes = [self._make_node(index, database_dir) for index in range(topology.nodes)]
+        self._payment_identifier = 0
+
+    def _make_node(self, index: int, database_dir: Optional[str]) -> LocalRaidenService:
+        config = dict(App.DEFAULT_CONFIG)
+        config.update(
+            database_path=":memory:",
+            environment_type=Environment.DEVELOPMENT,
+            unrecoverable_error_should_crash=True,
+        )
+        if database_dir is not None:
+            config["database_path"] = os.path.join(database_dir, f"node{index}", "node.db")
+
+        return LocalRaidenService(
+            chain=LocalChain(sha3(b"local node %d" % index)),
+            query_start_block=START_BLOCK_NUMBER,
+            default_registry=LocalTokenNetworkRegistry(self.payment_network_address),
+            default_secret_registry=self.secret_registry,
+            default_service_registry=None,
+            default_one_to_n_address=None,
+            transport=LocalTransport(self.network),
+            raiden_event_handler=RaidenEventHandler(),
+            message_handler=MessageHandler(),
+            config=config,
+        )
+
+    def start(self) -> None:
+        for raiden in self.nodes:
+            raiden.start()
+
+        for raiden in self.nodes:
+            raiden.handle_and_track_state_change(
+                ContractReceiveNewTokenNetwork(
+                    transaction_hash=factories.make_transaction_hash(),
+                    block_number=START_BLOCK_NUMBER,
+                    block_hash=factories.make_block_hash(),
+                    payment_network_address=self.payment_network_address,
+                    token_network=TokenNetworkState(
+                        address=self.token_network_address,
+                        token_address=self.token_address,
+                        network_graph=TokenNetworkGraphState(self.token_network_address),
+                    ),
+                )
+            )
+
+        for channel_identifier, participants in enumerate(self.topology.channels, start=1):
+            self._open_channel(channel_identifier, participants)
+
+    def stop(self) -> None:
+        for raiden in self.nodes:
+            raiden.stop()
+
+    def _open_channel(self, channel_identifier: int, participants: Tuple[int, int]) -> None:
+        canonical_identifier = factories.make_canonical_identifier(
+            chain_identifier=UNIT_CHAIN_ID,
+            token_network_address=self.token_network_address,
+            channel_identifier=channel_identifier,
+        )
+        addresses = [self.nodes[index].address for index in participants]
+        block_hash = factories.make_block_hash()
+        transaction_hash = factories.make_transaction_hash()
+
+        for raiden in self.nodes:
+            if raiden.address not in addresses:
+                raiden.handle_and_track_state_change(
+                    ContractReceiveRouteNew(
+                        transaction_hash=transaction_hash,
+                        block_number=START_BLOCK_NUMBER,
+                        block_hash=block_hash,
+                        canonical_identifier=canonical_identifier,
+                        participant1=addresses[0],
+                        participant2=addresses[1],
+                    )
+                )
+                continue
+
+            partner = addresses[1] if raiden.address == addresses[0] else addresses[0]
+            channel_state = factories.create(
+                factories.NettingChannelStateProperties(
+                    our_state=factories.NettingChannelEndStateProperties(
+                        address=raiden.address, balance=CHANNEL_DEPOSIT
+                    ),
+                    partner_state=factories.NettingChannelEndStateProperties(
+                        address=partner, balance=CHANNEL_DEPOSIT
+                    ),
+                    token_address=self.token_address,
+                    payment_network_address=self.payment_network_address,
+                    canonical_identifier=canonical_identifier,
+                )
+            )
+            raiden.handle_and_track_state_change(
+                ContractReceiveChannelNew(
+                    transaction_hash=transaction_hash,
+                    block_number=START_BLOCK_NUMBER,
+                    block_hash=block_hash,
+                    channel_state=channel_state,
+                )
+            )
+            raiden.start_health_check_for(partner)
+
+    def run(self, workload: Workload) -> ThroughputReport:
+        """ Send the payments of `workload`, the nodes must be started. """
+        first_message = len(self.network.sent_messages)
+        report = ThroughputReport(
+            topology=self.topology.name,
+            nodes=self.topology.nodes,
+            concurrency=workload.concurrency,
+            duration=0.0,
+        )
+
+        pool = Pool(workload.concurrency)
+        started_at = time.monotonic()
+        for index in range(workload.payments):
+            initiator, target = self.topology.payments[index % len(self.topology.payments)]
+            pool.spawn(self._pay, initiator, target, workload, report)
+        pool.join()
+        report.duration = time.monotonic() - started_at
+
+        for raiden in self.nodes:
+            if raiden.greenlet.exception is not None:
+                raise raiden.greenlet.exception
+
+        report.hop_latencies = hop_latencies(self.network.sent_messages[first_message:])
+        return report
+
+    def _pay(
+        self, initiator: int, target: int, workload: Workload, report: ThroughputReport
+    ) -> None:
+        self._payment_identifier += 1
+        payment_identifier = PaymentID(self._payment_identifier)
+        target_node = self.nodes[target]
+
+        # Registered before the payment is started, so the unlock can not be
+        # missed
+        received: AsyncResult = target_node.state_waiters.register(
+            lambda _, events: is_payment_received(payment_identifier, events)
+        )
+        started_at = time.monotonic()
+        succeeded = False
+        try:
+            with gevent.Timeout(workload.payment_timeout, False):
+                payment_status = self.nodes[initiator].mediated_transfer_async(
+                    token_network_address=self.token_network_address,
+                    amount=PaymentAmount(workload.amount),
+                    target=TargetAddress(target_node.address),
+                    identifier=payment_identifier,
+                )
+                if payment_status.payment_done.get() is not False:
+                    received.get()
+                    succeeded = True
+        finally:
+            target_node.state_waiters.unregister(received)
+
+        if succeeded:
+            report.latencies.append(time.monotonic() - started_at)
+        else:
+            report.failed += 1
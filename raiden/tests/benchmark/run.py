@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+""" Run the benchmarks of the state machine and the storage.
+
+Save the results of a run as a baseline and compare later runs against it:
+
+    python -m raiden.tests.benchmark.run --save before.json
+    python -m raiden.tests.benchmark.run --baseline before.json
+
+The process exits with an error if any benchmark is slower than the baseline
+by more than the tolerance. Baselines are only comparable on the same
+machine.
+"""
+import sys
+
+import click
+
+from raiden.log_config import configure_logging
+from raiden.tests.benchmark.cases import BENCHMARKS
+from raiden.tests.benchmark.harness import (
+    DEFAULT_ROUNDS,
+    DEFAULT_SEED,
+    DEFAULT_TOLERANCE,
+    DEFAULT_WARMUP_ROUNDS,
+    compare,
+    load_results,
+    run_benchmark,
+    save_results,
+)
+
+
+@click.command()
+@click.option("--size", default=100, show_default=True, help="Scale of the benchmark inputs.")
+@click.option("--rounds", default=DEFAULT_ROUNDS, show_default=True)
+@click.option("--warmup-rounds", default=DEFAULT_WARMUP_ROUNDS, show_default=True)
+@click.option("--seed", default=DEFAULT_SEED, show_default=True)
+@click.option(
+    "-k",
+    "--select",
+    "selected",
+    multiple=True,
+    help="Only run the benchmarks whose name contains this text, can be repeated.",
+)
+@click.option("--save", type=click.Path(dir_okay=False), help="Write the results to this file.")
+@click.option(
+    "--baseline",
+    type=click.Path(exists=True, dir_okay=False),
+    help="Compare the results with the ones saved in this file.",
+)
+@click.option(
+    "--tolerance",
+    default=DEFAULT_TOLERANCE,
+    show_default=True,
+    help="Allowed slowdown of the median compared to the baseline.",
+)
+def main(size, rounds, warmup_rounds, seed, selected, save, baseline, tolerance):
+    configure_logging({"": "WARNING"}, disable_debug_logfile=True)
+
+    benchmarks = [
+        benchmark
+        for benchmark in BENCHMARKS
+        if not selected or any(text in benchmark.name for text in selected)
+    ]
+
+    results = list()
+    print(f"{'benchmark':<34} {'ops':>5} {'median':>11} {'min':>11} {'stdev':>8} {'ops/s':>10}")
+    for benchmark in benchmarks:
+        result = run_benchmark(benchmark, size, rounds, warmup_rounds, seed)
+        results.append(result)
+        print(
+            f"{result.name:<34} {result.operations:>5} {result.median * 1e6:>9.1f}us "
+            f"{result.min * 1e6:>9.1f}us {result.stdev / result.median:>7.1%} "
+            f"{result.operations_per_second:>10.1f}"
+        )
+
+    if save:
+        save_results(save, results)
+
+    if baseline:
+        comparisons = compare(results, load_results(baseline), tolerance)
+
+        print()
+        for comparison in comparisons:
+            status = "REGRESSED" if comparison.regressed else "ok"
+            print(f"{comparison.name:<34} {comparison.change:>+8.1%} {status}")
+
+        if any(comparison.regressed for comparison in comparisons):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()  # pylint: disable=no-value-for-parameter
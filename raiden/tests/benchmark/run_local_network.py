@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+""" Send payments through nodes running in this process and report the
+throughput and the latency of every hop.
+
+    python -m raiden.tests.benchmark.run_local_network --size 10 --concurrency 1 --concurrency 50
+
+Every concurrency is run in turn on the same nodes, the throughput saturates
+where adding payments in flight only increases the latency.
+"""
+# pylint: disable=wrong-import-position
+from gevent import monkey  # isort:skip # noqa
+
+monkey.patch_all()  # isort:skip # noqa
+
+import os
+
+import click
+
+from raiden.log_config import configure_logging
+from raiden.tests.benchmark.harness import DEFAULT_SEED
+from raiden.tests.benchmark.local_network import TOPOLOGIES, LocalNetworkHarness, Workload
+
+DEFAULT_WORKLOAD = Workload()
+
+
+@click.command()
+@click.option(
+    "--topology", type=click.Choice(sorted(TOPOLOGIES)), default="hub", show_default=True
+)
+@click.option(
+    "--size",
+    default=4,
+    show_default=True,
+    help="Number of spokes of the hub, or of mediators of the chain.",
+)
+@click.option("--payments", default=DEFAULT_WORKLOAD.payments, show_default=True)
+@click.option(
+    "--concurrency",
+    multiple=True,
+    type=int,
+    help="Payments in flight, can be repeated.  [default: 10]",
+)
+@click.option("--amount", default=DEFAULT_WORKLOAD.amount, show_default=True)
+@click.option("--payment-timeout", default=DEFAULT_WORKLOAD.payment_timeout, show_default=True)
+@click.option(
+    "--latency",
+    default=DEFAULT_WORKLOAD.latency,
+    show_default=True,
+    help="Delay of every message, in seconds.",
+)
+@click.option(
+    "--database-dir",
+    type=click.Path(file_okay=False),
+    help="Write the databases of the nodes to this new directory, instead of keeping them in "
+    "memory.",
+)
+@click.option("--seed", default=DEFAULT_SEED, show_default=True)
+def main(
+    topology, size, payments, concurrency, amount, payment_timeout, latency, database_dir, seed
+):
+    if database_dir is not None and os.path.exists(database_dir):
+        raise click.BadParameter(f"{database_dir} already exists", param_hint="--database-dir")
+
+    configure_logging({"": "WARNING"}, disable_debug_logfile=True)
+
+    harness = LocalNetworkHarness(
+        TOPOLOGIES[topology](size), latency=latency, database_dir=database_dir, seed=seed
+    )
+    harness.start()
+    try:
+        for payments_in_flight in concurrency or (DEFAULT_WORKLOAD.concurrency,):
+            workload = Workload(
+                payments=payments,
+                concurrency=payments_in_flight,
+                amount=amount,
+                payment_timeout=payment_timeout,
+                latency=latency,
+            )
+            print(harness.run(workload).summary())
+            print()
+    finally:
+        harness.stop()
+
+
+if __name__ == "__main__":
+    main()  # pylint: disable=no-value-for-parameter
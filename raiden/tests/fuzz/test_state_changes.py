@@ -187,6 +187,9 @@ class ChainStateStateMachine(RuleBasedStateMachine):
         self.chain_state.tokennetworkaddresses_to_paymentnetworkaddresses[
             self.token_network_address
         ] = self.payment_network_address
+        self.chain_state.tokennetworkaddresses_to_tokennetworks[
+            self.token_network_address
+        ] = self.token_network_state
         channels = [
             self.new_channel_with_transaction() for _ in range(self.initial_number_of_channels)
         ]
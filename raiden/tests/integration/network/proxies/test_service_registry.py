@@ -5,7 +5,7 @@ import requests
 from eth_utils import is_checksum_address, to_checksum_address
 
 from raiden.constants import RoutingMode
-from raiden.network.pathfinding import configure_pfs_or_exit, get_random_service
+from raiden.network.pathfinding import configure_pfs_or_exit, get_random_service, session
 from raiden.tests.utils.factories import HOP1
 from raiden.tests.utils.smartcontracts import deploy_service_registry_and_set_urls
 from raiden.utils import privatekey_to_address
@@ -70,7 +70,7 @@ def test_configure_pfs(service_registry_address, private_keys, web3, contract_ma
         )
 
     # Asking for auto address
-    with patch.object(requests, "get", return_value=response):
+    with patch.object(session, "get", return_value=response):
         config = configure_pfs_or_exit(
             pfs_address="auto", routing_mode=RoutingMode.PFS, service_registry=service_proxy
         )
@@ -79,7 +79,7 @@ def test_configure_pfs(service_registry_address, private_keys, web3, contract_ma
 
     # Configuring a given address
     given_address = "http://ourgivenaddress"
-    with patch.object(requests, "get", return_value=response):
+    with patch.object(session, "get", return_value=response):
         config = configure_pfs_or_exit(
             pfs_address=given_address, routing_mode=RoutingMode.PFS, service_registry=service_proxy
         )
@@ -92,7 +92,7 @@ def test_configure_pfs(service_registry_address, private_keys, web3, contract_ma
     response.configure_mock(status_code=400)
     bad_address = "http://badaddress"
     with pytest.raises(SystemExit):
-        with patch.object(requests, "get", side_effect=requests.RequestException()):
+        with patch.object(session, "get", side_effect=requests.RequestException()):
             # Configuring a given address
             config = configure_pfs_or_exit(
                 pfs_address=bad_address,
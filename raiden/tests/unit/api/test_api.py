@@ -1,5 +1,6 @@
-from raiden.api.python import transfer_tasks_view
+from raiden.api.python import RaidenAPI, transfer_tasks_view
 from raiden.tests.utils import factories
+from raiden.tests.utils.mocks import MockRaidenService
 from raiden.transfer.mediated_transfer.state import (
     InitiatorPaymentState,
     InitiatorTransferState,
@@ -10,6 +11,7 @@ from raiden.transfer.mediated_transfer.state import (
     WaitingTransferState,
 )
 from raiden.transfer.mediated_transfer.tasks import InitiatorTask, MediatorTask, TargetTask
+from raiden.transfer.state_change import Block
 from raiden.transfer.views import list_channelstate_for_tokennetwork
 from raiden.utils import sha3
 
@@ -154,3 +156,22 @@ def test_target_task_view():
     # pylint: disable=no-member
     assert pending_transfer.get("locked_amount") == str(transfer.balance_proof.locked_amount)
     assert pending_transfer.get("payment_identifier") == str(transfer.payment_identifier)
+
+
+def test_read_model_is_invalidated_by_state_changes():
+    raiden = MockRaidenService()
+    raiden_api = RaidenAPI(raiden)
+    registry_address = factories.make_payment_network_address()
+
+    channel_list = raiden_api.get_channel_list(registry_address)
+    pending_transfers = raiden_api.get_pending_transfers()
+    assert channel_list == [] and pending_transfers == []
+    assert raiden_api.get_channel_list(registry_address) is channel_list
+    assert raiden_api.get_pending_transfers() is pending_transfers
+
+    block = Block(block_number=1, gas_limit=1, block_hash=factories.make_block_hash())
+    raiden.wal.log_and_dispatch(block)
+
+    assert raiden_api.get_channel_list(registry_address) is not channel_list
+    assert raiden_api.get_pending_transfers() is not pending_transfers
+    assert raiden_api.read_model.version == raiden.wal.state_change_id
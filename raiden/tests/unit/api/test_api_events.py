@@ -1,12 +1,19 @@
+import json
+from unittest.mock import Mock, patch
+
 import pytest
+from eth_utils import encode_hex, to_checksum_address
+from flask import Flask
 
-from raiden.api.python import event_filter_for_payments
+from raiden.api.python import RaidenAPI, event_filter_for_payments
+from raiden.api.rest import NDJSON_MIMETYPE, STREAM_CHUNK_ROWS, api_stream_response
 from raiden.api.v1.encoding import EventPaymentSentFailedSchema
-from raiden.blockchain.events import get_contract_events
+from raiden.blockchain.events import BlockchainEvents, get_contract_events
 from raiden.exceptions import InvalidBlockNumberInput
 from raiden.storage.utils import TimestampedEvent
 from raiden.tests.utils import factories
 from raiden.tests.utils.factories import ADDR
+from raiden.tests.utils.mocks import MockRaidenService
 from raiden.transfer.events import (
     EventPaymentReceivedSuccess,
     EventPaymentSentFailed,
@@ -84,3 +91,126 @@ def test_event_filter_for_payments():
     assert event_filter_for_payments(event, token_network_address, None)
     assert event_filter_for_payments(event, token_network_address, target)
     assert not event_filter_for_payments(event, token_network_address, factories.make_address())
+
+
+@pytest.mark.parametrize("num_rows", [0, 1, STREAM_CHUNK_ROWS, STREAM_CHUNK_ROWS * 2 + 1])
+def test_api_stream_response(num_rows):
+    rows = [{"event": "Event", "index": index} for index in range(num_rows)]
+    app = Flask(__name__)
+
+    with app.test_request_context():
+        response = api_stream_response(iter(rows))
+        assert response.is_streamed
+        assert response.mimetype == "application/json"
+        assert json.loads(response.get_data()) == rows
+
+    with app.test_request_context(headers={"Accept": NDJSON_MIMETYPE}):
+        response = api_stream_response(iter(rows))
+        assert response.is_streamed
+        assert response.mimetype == NDJSON_MIMETYPE
+        lines = response.get_data(as_text=True).splitlines()
+        assert [json.loads(line) for line in lines] == rows
+
+
+def test_blockchain_events_are_read_from_the_database():
+    raiden = MockRaidenService()
+    raiden.contract_manager = None
+    raiden_api = RaidenAPI(raiden)
+    registry_address = factories.make_payment_network_address()
+
+    def make_event(block_number):
+        return dict(
+            event="TokenNetworkCreated",
+            args=dict(),
+            block_number=block_number,
+            logIndex=0,
+            transactionHash=encode_hex(factories.make_transaction_hash()),
+        )
+
+    stored_events = [make_event(block_number) for block_number in (14, 12, 11)]
+    raiden.wal.storage.write_blockchain_events(
+        to_checksum_address(registry_address), 10, 15, stored_events
+    )
+
+    queried_ranges = list()
+    newer_events = [make_event(block_number) for block_number in (17, 16)]
+
+    def get_token_network_registry_events(from_block, to_block, **kwargs):
+        # pylint: disable=unused-argument
+        queried_ranges.append((from_block, to_block))
+        return [event for event in newer_events if event["block_number"] >= from_block]
+
+    with patch(
+        "raiden.api.python.blockchain_events.get_token_network_registry_events",
+        side_effect=get_token_network_registry_events,
+    ):
+        events = raiden_api.get_blockchain_events_network(registry_address, from_block=11)
+        assert events == newer_events + stored_events
+        assert queried_ranges == [(16, "latest")]
+
+        events = raiden_api.get_blockchain_events_network(
+            registry_address, from_block=11, to_block=14
+        )
+        assert events == stored_events
+        assert queried_ranges == [(16, "latest")]
+
+        events = raiden_api.get_blockchain_events_network(
+            registry_address, from_block=11, limit=2, offset=1
+        )
+        assert events == [newer_events[1], stored_events[0]]
+
+        # Blocks before the synced range are queried from the ethereum node
+        queried_ranges.clear()
+        events = raiden_api.get_blockchain_events_network(registry_address, from_block=0)
+        assert events == newer_events
+        assert queried_ranges == [(0, "latest")]
+
+
+def test_blockchain_events_before_the_token_network_creation_are_not_queried():
+    raiden = MockRaidenService()
+    raiden.contract_manager = None
+    raiden.query_start_block = 10
+    token_network_address = factories.make_address()
+    raiden.default_registry = Mock()
+    raiden.default_registry.get_token_network.return_value = token_network_address
+    raiden_api = RaidenAPI(raiden)
+
+    # The token network was created at block 20, after the query start block
+    blockchain_events = BlockchainEvents()
+    blockchain_events.storage = raiden.wal.storage
+    blockchain_events.add_synced_range_before_creation(
+        contract_address=token_network_address,
+        from_block=raiden.query_start_block,
+        creation_block_number=20,
+    )
+    stored_events = [
+        dict(
+            event="ChannelOpened",
+            args=dict(channel_identifier=1),
+            block_number=21,
+            logIndex=0,
+            transactionHash=encode_hex(factories.make_transaction_hash()),
+        )
+    ]
+    raiden.wal.storage.write_blockchain_events(
+        to_checksum_address(token_network_address), 20, 25, stored_events
+    )
+
+    queried_ranges = list()
+
+    def get_token_network_events(from_block, to_block, **kwargs):
+        # pylint: disable=unused-argument
+        queried_ranges.append((from_block, to_block))
+        return []
+
+    # The REST API queries from the query start block by default
+    with patch(
+        "raiden.api.python.blockchain_events.get_token_network_events",
+        side_effect=get_token_network_events,
+    ):
+        events = raiden_api.get_blockchain_events_token_network(
+            factories.make_address(), from_block=raiden.query_start_block
+        )
+
+    assert events == stored_events
+    assert queried_ranges == [(26, "latest")]
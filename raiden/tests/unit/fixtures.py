@@ -4,6 +4,7 @@ import pytest
 
 from raiden.tests.utils import factories
 from raiden.tests.utils.factories import UNIT_CHAIN_ID
+from raiden.transfer import token_network
 from raiden.transfer.state import (
     ChainState,
     PaymentNetworkState,
@@ -76,6 +77,7 @@ def token_network_state(
 
     mapping = chain_state.tokennetworkaddresses_to_paymentnetworkaddresses
     mapping[token_network_address] = payment_network_address
+    chain_state.tokennetworkaddresses_to_tokennetworks[token_network_address] = token_network
 
     return token_network
 
@@ -101,5 +103,6 @@ def netting_channel_state(chain_state, token_network_state, payment_network_stat
     channel_id = canonical_identifier.channel_identifier
     token_network_state.partneraddresses_to_channelidentifiers[partner].append(channel_id)
     token_network_state.channelidentifiers_to_channels[channel_id] = channel_state
+    token_network.update_channel_status(token_network_state, channel_state)
 
     return channel_state
@@ -0,0 +1,123 @@
+import json
+
+import gevent
+
+from raiden.storage.archive import ArchiveTask, archive_path_from_database_path
+from raiden.storage.sqlite import SQLiteStorage
+
+PAYMENT_EVENT = "raiden.transfer.events.EventPaymentSentSuccess"
+
+
+def write_state_change(storage, data):
+    state_change_id = storage.write_state_change(json.dumps(data), "2019-01-01T00:00:00.000")
+    return state_change_id
+
+
+def write_event(storage, state_change_id, data):
+    storage.write_events([(None, state_change_id, "2019-01-01T00:00:00.000", json.dumps(data))])
+
+
+def test_archive_path_from_database_path():
+    assert archive_path_from_database_path("/data/v22_log.db") == "/data/v22_log_archive.db"
+
+
+def test_archive_state_changes(tmp_path):
+    database_path = str(tmp_path / "v22_log.db")
+    storage = SQLiteStorage(database_path)
+    storage.attach_archive(archive_path_from_database_path(database_path))
+
+    # Nothing is archived before the first snapshot
+    write_state_change(storage, {"_type": "Block", "block_number": "1"})
+    assert storage.archive_state_changes(batch_size=100) == 0
+
+    balance_proof_id = write_state_change(
+        storage, {"_type": "ReceiveUnlock", "balance_proof": {"balance_hash": "0x01"}}
+    )
+    payment_id = write_state_change(storage, {"_type": "ActionInitInitiator"})
+    write_event(storage, payment_id, {"_type": PAYMENT_EVENT})
+    write_event(storage, payment_id, {"_type": "SendLockedTransfer"})
+    for block_number in range(2, 7):
+        block_id = write_state_change(storage, {"_type": "Block", "block_number": block_number})
+
+    storage.write_state_snapshot(block_id, json.dumps({"_type": "ChainState"}))
+    write_state_change(storage, {"_type": "Block", "block_number": "7"})
+
+    state_changes_before = storage.get_statechanges_by_identifier(1, "latest")
+    count_before = storage.count_state_changes()
+
+    # The state change of the snapshot itself is not archived
+    assert storage.archive_state_changes(batch_size=3) == 3
+    assert storage.archive_state_changes(batch_size=100) == block_id - 1 - 3
+    assert storage.archive_state_changes(batch_size=100) == 0
+
+    main_state_changes = storage.conn.execute(
+        "SELECT identifier FROM main.state_changes ORDER BY identifier"
+    ).fetchall()
+    assert [row[0] for row in main_state_changes] == [
+        balance_proof_id,
+        payment_id,
+        block_id,
+        block_id + 1,
+    ]
+
+    main_events = storage.conn.execute("SELECT data FROM main.state_events").fetchall()
+    assert [json.loads(row[0])["_type"] for row in main_events] == [PAYMENT_EVENT]
+    archived_events = storage.conn.execute("SELECT data FROM archive.state_events").fetchall()
+    assert [json.loads(row[0])["_type"] for row in archived_events] == ["SendLockedTransfer"]
+
+    # The archived state changes are still readable
+    assert storage.get_statechanges_by_identifier(1, "latest") == state_changes_before
+    assert storage.count_state_changes() == count_before
+
+    record = storage.get_latest_state_change_by_data_field({"balance_proof.balance_hash": "0x01"})
+    assert record.state_change_identifier == balance_proof_id
+
+
+def test_archive_state_changes_past_the_old_snapshots(tmp_path):
+    database_path = str(tmp_path / "v22_log.db")
+    storage = SQLiteStorage(database_path)
+    storage.attach_archive(archive_path_from_database_path(database_path))
+
+    for block_number in range(1, 61):
+        block_id = write_state_change(storage, {"_type": "Block", "block_number": block_number})
+        if block_number % 5 == 0:
+            storage.write_state_snapshot(block_id, json.dumps({"_type": "ChainState"}))
+            storage.delete_superseded_snapshots(
+                base_snapshots_to_keep=2,
+                old_base_snapshots_interval=20,
+                old_base_snapshots_to_keep=3,
+            )
+
+    # The first snapshot is kept as an old base
+    snapshots = [snapshot.state_change_identifier for snapshot in storage.get_snapshots()]
+    assert snapshots == [5, 20, 40, 55, 60]
+
+    while storage.archive_state_changes(batch_size=10):
+        pass
+
+    # Only the state changes of the snapshots stay in the node database
+    main_state_changes = storage.conn.execute(
+        "SELECT identifier FROM main.state_changes ORDER BY identifier"
+    ).fetchall()
+    assert [row[0] for row in main_state_changes] == snapshots
+    assert storage.count_state_changes() == 60
+
+
+def test_archive_task(tmp_path):
+    database_path = str(tmp_path / "v22_log.db")
+    storage = SQLiteStorage(database_path)
+    storage.attach_archive(archive_path_from_database_path(database_path))
+
+    for block_number in range(10):
+        block_id = write_state_change(storage, {"_type": "Block", "block_number": block_number})
+    storage.write_state_snapshot(block_id, json.dumps({"_type": "ChainState"}))
+
+    task = ArchiveTask(storage, batch_size=2, interval=60)
+    task.start()
+    with gevent.Timeout(5):
+        while storage.conn.execute("SELECT COUNT(1) FROM main.state_changes").fetchone()[0] > 1:
+            gevent.sleep(0.01)
+    task.stop()
+
+    assert not task.exception
+    assert storage.count_state_changes() == 10
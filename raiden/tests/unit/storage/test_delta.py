@@ -0,0 +1,43 @@
+from raiden.storage.delta import apply_delta, compute_delta
+
+
+def test_delta_round_trip():
+    base = {
+        "block_number": "1",
+        "networks": {
+            "0x01": {"channels": {"1": {"balance": 10, "locks": []}, "2": {"balance": 5}}},
+            "0x02": {"channels": {}},
+        },
+        "pending_transactions": [],
+    }
+    current = {
+        "block_number": "2",
+        "networks": {
+            "0x01": {"channels": {"1": {"balance": 7, "locks": ["lock"]}, "3": {"balance": 1}}},
+            "0x02": {"channels": {}},
+        },
+        "pending_transactions": [{"_type": "ContractSendChannelClose"}],
+    }
+
+    delta = compute_delta(base, current)
+
+    assert apply_delta(base, delta) == current
+    assert "0x02" not in delta["nested"]["networks"].get("nested", {}), "unchanged network stored"
+    channels_delta = delta["nested"]["networks"]["nested"]["0x01"]["nested"]["channels"]
+    assert channels_delta["removed"] == ["2"]
+    assert channels_delta["updated"] == {"3": {"balance": 1}}
+
+
+def test_delta_does_not_modify_base():
+    base = {"a": {"b": 1}, "c": 2}
+    current = {"a": {"b": 2}}
+
+    delta = compute_delta(base, current)
+    assert apply_delta(base, delta) == current
+    assert base == {"a": {"b": 1}, "c": 2}
+
+
+def test_empty_delta():
+    base = {"a": {"b": [1, 2]}}
+    assert compute_delta(base, dict(base)) == dict()
+    assert apply_delta(base, dict()) == base
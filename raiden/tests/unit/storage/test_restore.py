@@ -0,0 +1,123 @@
+from unittest.mock import patch
+
+import gevent
+
+from raiden.storage.restore import HistoricChannelStates
+from raiden.storage.serialization import JSONSerializer
+from raiden.storage.sqlite import SerializedSQLiteStorage
+from raiden.storage.wal import WriteAheadLog, restore_to_state_change
+from raiden.tests.utils import factories
+from raiden.transfer import node
+from raiden.transfer.architecture import StateManager
+from raiden.transfer.state import TransactionChannelNewBalance
+from raiden.transfer.state_change import Block, ContractReceiveChannelNewBalance
+
+
+def test_historic_channel_states(chain_state, netting_channel_state):
+    storage = SerializedSQLiteStorage(":memory:", JSONSerializer)
+    wal = WriteAheadLog(StateManager(node.state_transition, chain_state), storage)
+
+    # The deposits below must be confirmed
+    block_number = chain_state.block_number + 100
+    wal.log_and_dispatch(
+        Block(block_number=block_number, gas_limit=1, block_hash=factories.make_block_hash())
+    )
+    wal.snapshot()
+
+    canonical_identifier = netting_channel_state.canonical_identifier
+    deposit_state_change_ids = dict()
+    for deposit in range(20, 30):
+        deposit_state_change = ContractReceiveChannelNewBalance(
+            transaction_hash=factories.make_transaction_hash(),
+            canonical_identifier=canonical_identifier,
+            deposit_transaction=TransactionChannelNewBalance(
+                participant_address=chain_state.our_address,
+                contract_balance=deposit,
+                deposit_block_number=chain_state.block_number,
+            ),
+            block_number=block_number,
+            block_hash=factories.make_block_hash(),
+        )
+        wal.log_and_dispatch(deposit_state_change)
+        deposit_state_change_ids[deposit] = wal.state_change_id
+
+    historic_channel_states = HistoricChannelStates(storage)
+    queries = [
+        (canonical_identifier, deposit_state_change_ids[deposit]) for deposit in (25, 21, 29)
+    ]
+
+    with patch(
+        "raiden.storage.restore.restore_to_state_change", wraps=restore_to_state_change
+    ) as restore:
+        channel_states = historic_channel_states.get_many(queries)
+        assert restore.call_count == 1, "the states must be restored with a single replay"
+
+        assert [channel.our_state.contract_balance for channel in channel_states] == [25, 21, 29]
+
+        # Cached states do not replay the WAL
+        historic_channel_states.get(canonical_identifier, deposit_state_change_ids[21])
+        assert restore.call_count == 1
+
+        # Going back in time restores from the snapshot
+        channel_state = historic_channel_states.get(
+            canonical_identifier, deposit_state_change_ids[20]
+        )
+        assert channel_state.our_state.contract_balance == 20
+        assert restore.call_count == 2
+
+        channel_state = historic_channel_states.get(canonical_identifier, "latest")
+        assert channel_state.our_state.contract_balance == 29
+        assert restore.call_count == 2
+
+    unknown_channel = factories.make_canonical_identifier()
+    assert historic_channel_states.get(unknown_channel, wal.state_change_id) is None
+
+
+def test_historic_channel_states_concurrent_replays(chain_state, netting_channel_state):
+    storage = SerializedSQLiteStorage(":memory:", JSONSerializer)
+    wal = WriteAheadLog(StateManager(node.state_transition, chain_state), storage)
+    block_number = chain_state.block_number + 100
+    wal.log_and_dispatch(
+        Block(block_number=block_number, gas_limit=1, block_hash=factories.make_block_hash())
+    )
+    wal.snapshot()
+
+    canonical_identifier = netting_channel_state.canonical_identifier
+    deposit_state_change_ids = dict()
+    for deposit in range(20, 26):
+        wal.log_and_dispatch(
+            ContractReceiveChannelNewBalance(
+                transaction_hash=factories.make_transaction_hash(),
+                canonical_identifier=canonical_identifier,
+                deposit_transaction=TransactionChannelNewBalance(
+                    participant_address=chain_state.our_address,
+                    contract_balance=deposit,
+                    deposit_block_number=chain_state.block_number,
+                ),
+                block_number=block_number,
+                block_hash=factories.make_block_hash(),
+            )
+        )
+        deposit_state_change_ids[deposit] = wal.state_change_id
+
+    historic_channel_states = HistoricChannelStates(storage)
+    historic_channel_states.get(canonical_identifier, deposit_state_change_ids[20])
+
+    # The storage queries of the node yield to the other greenlets
+    get_statechanges_by_identifier = storage.get_statechanges_by_identifier
+
+    def yielding_get_statechanges_by_identifier(*args, **kwargs):
+        gevent.sleep(0.01)
+        return get_statechanges_by_identifier(*args, **kwargs)
+
+    storage.get_statechanges_by_identifier = yielding_get_statechanges_by_identifier
+
+    greenlets = [
+        gevent.spawn(
+            historic_channel_states.get, canonical_identifier, deposit_state_change_ids[deposit]
+        )
+        for deposit in (25, 22)
+    ]
+    gevent.joinall(greenlets, raise_error=True)
+
+    assert [greenlet.value.our_state.contract_balance for greenlet in greenlets] == [25, 22]
@@ -0,0 +1,130 @@
+import pytest
+
+from raiden.storage.serialization import JSONSerializer
+from raiden.storage.sqlite import SerializedSQLiteStorage
+from raiden.storage.wal import restore_to_state_change
+from raiden.tests.benchmark.cases import BENCHMARKS, make_target_scenario
+from raiden.tests.benchmark.harness import BenchmarkResult, compare, run_benchmark
+from raiden.tests.benchmark.hub import HubGenerator, HubShape, write_hub_database
+from raiden.tests.benchmark.local_network import LocalNetworkHarness, Workload, mediator_chain
+from raiden.transfer import node, views
+from raiden.transfer.events import EventPaymentReceivedSuccess
+
+
+def test_target_scenario_completes_the_payments():
+    scenario = make_target_scenario(3)
+    chain_state = scenario.chain_state
+
+    for state_change in scenario.state_changes:
+        iteration = node.state_transition(chain_state, state_change)
+        chain_state = iteration.new_state
+        invalid_events = [
+            event for event in iteration.events if type(event).__name__.startswith("EventInvalid")
+        ]
+        assert not invalid_events
+
+    assert not chain_state.payment_mapping.secrethashes_to_task
+    for transfer in scenario.transfers:
+        channel_state = views.get_channelstate_by_canonical_identifier(
+            chain_state, transfer.init.balance_proof.canonical_identifier
+        )
+        assert channel_state.partner_state.balance_proof == transfer.unlock.balance_proof
+
+
+@pytest.mark.parametrize("benchmark", BENCHMARKS, ids=lambda benchmark: benchmark.name)
+def test_benchmarks_run(benchmark):
+    result = run_benchmark(benchmark, size=2, rounds=2, warmup_rounds=1)
+
+    assert result.name == benchmark.name
+    assert len(result.timings) == 2
+    assert result.min <= result.median
+
+
+def test_compare_with_baseline():
+    results = [
+        BenchmarkResult(name="faster", size=10, operations=1, timings=[0.5]),
+        BenchmarkResult(name="slower", size=10, operations=1, timings=[1.5]),
+        BenchmarkResult(name="other_size", size=20, operations=1, timings=[5.0]),
+        BenchmarkResult(name="new", size=10, operations=1, timings=[1.0]),
+    ]
+    baseline = {
+        name: BenchmarkResult(name=name, size=10, operations=1, timings=[1.0]).to_dict()
+        for name in ("faster", "slower", "other_size")
+    }
+
+    comparisons = {comparison.name: comparison for comparison in compare(results, baseline)}
+
+    assert set(comparisons) == {"faster", "slower"}
+    assert not comparisons["faster"].regressed
+    assert comparisons["slower"].regressed
+    assert comparisons["slower"].change == pytest.approx(0.5)
+
+
+def test_hub_database_is_restored_to_the_generated_state(tmp_path):
+    shape = HubShape(
+        token_networks=2,
+        channels_per_token_network=3,
+        payments=8,
+        pending_locks=4,
+        state_changes_per_block=5,
+        snapshot_interval=20,
+    )
+    database_path = str(tmp_path / "hub.db")
+    summary = write_hub_database(database_path, shape, seed=3)
+
+    # The stream only depends on the seed. The state changes are serialized
+    # before the next one is generated, since the state machine mutates e.g.
+    # the random generator of the chain state.
+    generator = HubGenerator(shape, seed=3)
+    generated = list()
+    serialized = list()
+    for item in generator.state_changes():
+        generated.append(item)
+        serialized.append(JSONSerializer.serialize(item.state_change))
+    assert serialized == [
+        JSONSerializer.serialize(item.state_change)
+        for item in HubGenerator(shape, seed=3).state_changes()
+    ]
+    assert summary.state_changes == len(generated)
+    assert summary.snapshots == -(-len(generated) // shape.snapshot_interval)
+
+    chain_state = generator.chain_state
+    assert len(chain_state.payment_mapping.secrethashes_to_task) == shape.pending_locks
+    received = [
+        event
+        for item in generated
+        for event in item.events
+        if isinstance(event, EventPaymentReceivedSuccess)
+    ]
+    assert len(received) == shape.payments
+
+    storage = SerializedSQLiteStorage(database_path, JSONSerializer())
+    assert storage.get_clean_shutdown_marker() == summary.state_changes
+    wal = restore_to_state_change(node.state_transition, storage, "latest")
+    for canonical_identifier in generator.canonical_identifiers:
+        assert views.get_channelstate_by_canonical_identifier(
+            wal.state_manager.current_state, canonical_identifier
+        ) == views.get_channelstate_by_canonical_identifier(chain_state, canonical_identifier)
+    storage.close()
+
+
+def test_local_network_completes_the_mediated_payments():
+    harness = LocalNetworkHarness(mediator_chain(1))
+    harness.start()
+    try:
+        report = harness.run(Workload(payments=4, concurrency=2, amount=3, payment_timeout=10))
+    finally:
+        harness.stop()
+
+    assert report.completed == 4
+    assert report.failed == 0
+    assert [len(latencies) for latencies in report.hop_latencies] == [4, 4]
+
+    # The target received the unlocks, the ones of the mediator may still be
+    # in flight
+    _, mediator, target = harness.nodes
+    channel_state = views.get_channelstate_by_token_network_and_partner(
+        views.state_from_raiden(target), harness.token_network_address, mediator.address
+    )
+    assert channel_state.partner_state.balance_proof.transferred_amount == 12
+    assert channel_state.partner_state.balance_proof.locked_amount == 0
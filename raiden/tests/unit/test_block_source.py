@@ -0,0 +1,228 @@
+import json
+import time
+
+import gevent
+import pytest
+from gevent import socket
+from gevent.server import StreamServer
+
+from raiden.network.block_source import (
+    PollingBlockSource,
+    SubscriptionBlockSource,
+    is_reorganization,
+)
+from raiden.tasks import AlarmTask
+from raiden.tests.utils.factories import make_address, make_block_hash
+from raiden.tests.utils.mocks import FakeBlockSource, MockChain
+
+
+class FakeChain:
+    def __init__(self, blocks):
+        self.blocks = blocks
+        self.requests = 0
+
+    def get_block(self, block_identifier):
+        assert block_identifier == "latest"
+        self.requests += 1
+        return self.blocks.pop(0) if len(self.blocks) > 1 else self.blocks[0]
+
+
+def make_block(number, parent=None):
+    return {
+        "number": number,
+        "hash": make_block_hash(),
+        "parentHash": parent["hash"] if parent else make_block_hash(),
+        "gasLimit": 1,
+    }
+
+
+def test_is_reorganization():
+    block = make_block(10)
+    child = make_block(11, parent=block)
+
+    assert not is_reorganization(block, child)
+    assert not is_reorganization(block, make_block(13))
+    assert is_reorganization(block, make_block(11))
+    assert is_reorganization(child, make_block(11, parent=block))
+    assert is_reorganization(child, make_block(9))
+
+
+def test_alarm_task_runs_callbacks_for_new_heads():
+    chain = MockChain(network_id=17, node_address=make_address())
+    chain.client.address = chain.node_address
+    block_source = FakeBlockSource()
+    alarm = AlarmTask(chain, block_source)
+
+    blocks = list()
+    alarm.register_callback(blocks.append)
+    alarm.first_run(known_block_number=0)
+    assert not blocks
+
+    alarm.start()
+    block_source.mine()
+    block_source.mine(2)
+    with gevent.Timeout(5):
+        while alarm.known_block_number != 3:
+            gevent.sleep(0.01)
+    assert [block["number"] for block in blocks] == [1, 3]
+
+    block_source.reorganize(2)
+    block_source.mine()
+    with gevent.Timeout(5):
+        while alarm.known_block_number != 4:
+            gevent.sleep(0.01)
+    assert blocks[-1] is block_source.blocks[-1]
+    assert blocks[-1]["parentHash"] == block_source.blocks[-2]["hash"]
+
+    alarm.stop()
+    assert not alarm.callbacks
+
+
+def test_alarm_task_restarts_after_stop():
+    chain = MockChain(network_id=17, node_address=make_address())
+    chain.client.address = chain.node_address
+    block_source = FakeBlockSource()
+    alarm = AlarmTask(chain, block_source)
+
+    blocks = list()
+    alarm.register_callback(blocks.append)
+    alarm.first_run(known_block_number=0)
+    alarm.start()
+    alarm.stop()
+
+    # The node registers its callback again before restarting the alarm task
+    alarm.register_callback(blocks.append)
+    alarm.start()
+    block_source.mine()
+    with gevent.Timeout(5):
+        while alarm.known_block_number != 1:
+            gevent.sleep(0.01)
+    assert [block["number"] for block in blocks] == [1]
+
+    with gevent.Timeout(5):
+        alarm.stop()
+    assert alarm.greenlet.dead
+
+
+def test_polling_block_source_backs_off_before_the_next_block_is_expected():
+    source = PollingBlockSource(FakeChain([make_block(1)]), min_interval=1, max_interval=4)
+    received_at = time.monotonic()
+    source.get_latest_block()
+    source.block_time = 15
+
+    assert source.poll_delay(received_at + 1) == 1
+    source._idle_polls = 1
+    assert source.poll_delay(received_at + 2) == 2
+    source._idle_polls = 10
+    assert source.poll_delay(received_at + 4) == 4
+
+    # Polling resumes every `min_interval` before the estimate
+    assert source.poll_delay(received_at + 12) == pytest.approx(2, abs=0.5)
+    assert source.poll_delay(received_at + 14) == 1
+
+
+def test_polling_block_source_polls_a_late_block_every_min_interval():
+    source = PollingBlockSource(FakeChain([make_block(1)]), min_interval=0.5, max_interval=5)
+    received_at = time.monotonic()
+    source.get_latest_block()
+    source.block_time = 15
+
+    # The worst case delay to notice a late block is `min_interval`, however
+    # long it has been waited for
+    for idle_polls in range(20):
+        source._idle_polls = idle_polls
+        for late_by in (0, 0.1, 1, 10, 100):
+            assert source.poll_delay(received_at + 15 + late_by) <= source.min_interval
+
+
+def test_polling_block_source_reports_new_heads():
+    block = make_block(1)
+    child = make_block(2, parent=block)
+    chain = FakeChain([block, block, block, child])
+    source = PollingBlockSource(chain, min_interval=0.001)
+    source.get_latest_block()
+
+    head_change = source.wait_for_head()
+
+    assert head_change.block is child
+    assert not head_change.reorganized
+    assert chain.requests == 4
+    assert source._idle_polls == 0
+
+
+def new_heads_server(path, headers):
+    """ Serve a newHeads subscription which sends `headers` in a single
+    write, and keeps the connection open.
+    """
+
+    def handle(connection, address):  # pylint: disable=unused-argument
+        request = json.loads(connection.recv(4096))
+        assert request["params"] == ["newHeads"]
+        response = {"jsonrpc": "2.0", "id": request["id"], "result": "0xcd0c"}
+        notifications = [
+            {
+                "jsonrpc": "2.0",
+                "method": "eth_subscription",
+                "params": {"subscription": "0xcd0c", "result": header},
+            }
+            for header in headers
+        ]
+        connection.sendall(
+            "\n".join(json.dumps(message) for message in [response] + notifications).encode()
+        )
+        gevent.sleep(10)
+
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(path)
+    listener.listen()
+    return StreamServer(listener, handle)
+
+
+def test_subscription_block_source_receives_new_heads(tmp_path):
+    ipc_path = str(tmp_path / "node.ipc")
+    latest_block = make_block(0x10)
+    header = {
+        "number": "0x11",
+        "hash": "0x" + "11" * 32,
+        "parentHash": "0x" + latest_block["hash"].hex(),
+        "gasLimit": "0x7a1200",
+        "timestamp": "0x5d3a6b2c",
+    }
+    server = new_heads_server(ipc_path, [header])
+    server.start()
+
+    source = SubscriptionBlockSource(FakeChain([latest_block]), ipc_path)
+    source.get_latest_block()
+    source.start()
+    try:
+        with gevent.Timeout(5):
+            while not source.is_subscribed:
+                gevent.sleep(0.01)
+            head_change = source.wait_for_head()
+    finally:
+        source.stop()
+        server.stop()
+
+    assert not head_change.reorganized
+    assert head_change.block["number"] == 0x11
+    assert head_change.block["hash"] == b"\x11" * 32
+    assert head_change.block["gasLimit"] == 8_000_000
+
+
+def test_subscription_block_source_falls_back_to_polling(tmp_path):
+    block = make_block(1)
+    child = make_block(2, parent=block)
+    chain = FakeChain([block, child])
+    source = SubscriptionBlockSource(
+        chain, str(tmp_path / "missing.ipc"), retry_interval=10, min_interval=0.001
+    )
+    source.get_latest_block()
+    source.start()
+    try:
+        with gevent.Timeout(5):
+            head_change = source.wait_for_head()
+    finally:
+        source.stop()
+
+    assert not source.is_subscribed
+    assert head_change.block is child
@@ -0,0 +1,89 @@
+import gevent
+
+from raiden import blockchain_events_handler
+from raiden.blockchain.events import Event
+from raiden.blockchain_events_handler import on_blockchain_events
+from raiden.tests.utils import factories
+from raiden.tests.utils.mocks import MockRaidenService
+from raiden.transfer import views
+from raiden_contracts.constants import ChannelEvent
+
+
+def make_settled_event(token_network_address, channel_identifier):
+    return Event(
+        originating_contract=token_network_address,
+        event_data={
+            "event": ChannelEvent.SETTLED,
+            "args": {"channel_identifier": channel_identifier},
+            "block_number": 10,
+            "block_hash": factories.make_block_hash(),
+            "transaction_hash": factories.make_transaction_hash(),
+        },
+    )
+
+
+def test_settled_locksroots_are_prefetched_concurrently(monkeypatch):
+    raiden = MockRaidenService()
+    state_changes = list()
+    raiden.handle_and_track_state_change = state_changes.append
+
+    token_network_address = factories.make_address()
+    channels = {
+        channel_identifier: factories.create(
+            factories.NettingChannelStateProperties(
+                canonical_identifier=factories.make_canonical_identifier(
+                    token_network_address=token_network_address,
+                    channel_identifier=channel_identifier,
+                )
+            )
+        )
+        for channel_identifier in (1, 2)
+    }
+    monkeypatch.setattr(
+        views,
+        "get_channelstate_by_canonical_identifier",
+        lambda chain_state, canonical_identifier: channels.get(
+            canonical_identifier.channel_identifier
+        ),
+    )
+
+    requests = list()
+    in_flight = list()
+    max_in_flight = 0
+
+    def get_onchain_locksroots(chain, canonical_identifier, block_identifier, **kwargs):
+        nonlocal max_in_flight
+        channel_identifier = canonical_identifier.channel_identifier
+        requests.append((channel_identifier, block_identifier))
+
+        in_flight.append(channel_identifier)
+        max_in_flight = max(max_in_flight, len(in_flight))
+        gevent.sleep(0.01)
+        in_flight.remove(channel_identifier)
+
+        if channel_identifier == 2 and block_identifier != "latest":
+            raise ValueError("The block was pruned")
+        return bytes([channel_identifier]) * 32, bytes(32)
+
+    monkeypatch.setattr(
+        blockchain_events_handler, "get_onchain_locksroots", get_onchain_locksroots
+    )
+
+    events = [
+        make_settled_event(token_network_address, 2),
+        make_settled_event(token_network_address, 3),
+        make_settled_event(token_network_address, 1),
+    ]
+    on_blockchain_events(raiden, events)
+
+    assert max_in_flight == 2
+    assert len(requests) == 3
+    assert [state_change.channel_identifier for state_change in state_changes] == [2, 1]
+    assert [state_change.our_onchain_locksroot for state_change in state_changes] == [
+        b"\x02" * 32,
+        b"\x01" * 32,
+    ]
+    assert [state_change.block_hash for state_change in state_changes] == [
+        events[0].event_data["block_hash"],
+        events[2].event_data["block_hash"],
+    ]
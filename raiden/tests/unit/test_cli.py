@@ -1,4 +1,6 @@
 import json
+import subprocess
+import sys
 from functools import partial
 
 import pytest
@@ -6,6 +8,7 @@ from click.testing import CliRunner
 
 from raiden.constants import EthClient
 from raiden.ui.cli import run
+from raiden.ui.import_profile import ImportProfiler
 from raiden.utils.ethereum_clients import is_supported_client
 
 
@@ -88,3 +91,40 @@ def test_check_json_rpc_parity():
     )
     assert not client
     assert not any([b1, b2, b3, b4, b5])
+
+
+def test_cli_imports_the_application_lazily():
+    code = (
+        "import sys; import raiden.ui.cli; "
+        "print(sorted(m for m in ('raiden.app', 'raiden.ui.runners', 'raiden.ui.startup', "
+        "'raiden.tests.utils.transport', 'mirakuru') if m in sys.modules))"
+    )
+    output = subprocess.check_output([sys.executable, "-c", code])
+    assert output.strip() == b"[]"
+
+
+def test_import_profiler_times_new_imports(tmp_path, monkeypatch):
+    package = tmp_path / "import_profile_package"
+    package.mkdir()
+    (package / "__init__.py").write_text("from . import child\n")
+    (package / "child.py").write_text("import json\n")
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    ticks = iter(range(100))
+    profiler = ImportProfiler(clock=lambda: next(ticks))
+    profiler.install()
+    try:
+        import import_profile_package  # noqa: F401 pylint: disable=unused-import,import-error
+        import json  # noqa: F401 pylint: disable=unused-import,reimported
+    finally:
+        profiler.uninstall()
+        sys.modules.pop("import_profile_package.child", None)
+        sys.modules.pop("import_profile_package", None)
+
+    timings = {timing.name: timing for timing in profiler.timings}
+    assert set(timings) == {"import_profile_package", "import_profile_package.child"}
+    assert timings["import_profile_package"].cumulative == 3
+    assert timings["import_profile_package"].own == 2
+    assert timings["import_profile_package.child"].own == 1
+    assert profiler.total == 3
+    assert "import_profile_package.child" in profiler.report()
@@ -0,0 +1,97 @@
+from raiden.api.python import RaidenAPI
+from raiden.api.rest import APIServer, RestAPI
+from raiden.network.transport.matrix.client import sync_batch_size
+from raiden.storage.serialization import JSONSerializer
+from raiden.storage.sqlite import SerializedSQLiteStorage
+from raiden.storage.wal import LOG_AND_DISPATCH_DURATION, WriteAheadLog
+from raiden.tests.utils import factories
+from raiden.tests.utils.mocks import MockRaidenService
+from raiden.transfer.architecture import DISPATCH_DURATION, State, StateManager, TransitionResult
+from raiden.transfer.state_change import Block
+from raiden.utils.metrics import PROMETHEUS_CONTENT_TYPE, MetricsRegistry
+
+
+def test_metrics_are_rendered_in_the_prometheus_format():
+    registry = MetricsRegistry()
+    requests = registry.counter("requests", "Number of requests.", labelnames=("method",))
+    queued = registry.gauge("queued", "Queued messages.").labels()
+    latency = registry.histogram("latency_seconds", "Latency.", buckets=(0.1, 1)).labels()
+
+    requests.labels("eth_call").inc()
+    requests.labels("eth_call").inc()
+    requests.labels('eth_"quoted"').inc(3)
+    queue = [1, 2, 3]
+    queued.set_function(lambda: len(queue))
+    for value in (0.05, 0.1, 0.5, 2):
+        latency.observe(value)
+
+    assert registry.counter("requests", "Number of requests.", labelnames=("method",)) is requests
+
+    assert registry.render().splitlines() == [
+        "# HELP latency_seconds Latency.",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{le="0.1"} 2',
+        'latency_seconds_bucket{le="1"} 3',
+        'latency_seconds_bucket{le="+Inf"} 4',
+        "latency_seconds_sum 2.65",
+        "latency_seconds_count 4",
+        "# HELP queued Queued messages.",
+        "# TYPE queued gauge",
+        "queued 3",
+        "# HELP requests Number of requests.",
+        "# TYPE requests counter",
+        'requests_total{method="eth_\\"quoted\\""} 3',
+        'requests_total{method="eth_call"} 2',
+    ]
+
+    queue.clear()
+    assert "queued 0" in registry.render().splitlines()
+
+
+def test_wal_dispatch_is_measured():
+    def state_transition(state, state_change):  # pylint: disable=unused-argument
+        return TransitionResult(state, list())
+
+    state_manager = StateManager(state_transition, State())
+    wal = WriteAheadLog(state_manager, SerializedSQLiteStorage(":memory:", JSONSerializer))
+    dispatched_before = DISPATCH_DURATION.count
+    committed_before = LOG_AND_DISPATCH_DURATION.count
+
+    block = Block(block_number=1, gas_limit=1, block_hash=factories.make_block_hash())
+    wal.log_and_dispatch(block)
+
+    assert DISPATCH_DURATION.count == dispatched_before + 1
+    assert LOG_AND_DISPATCH_DURATION.count == committed_before + 1
+
+
+def test_sync_batch_size():
+    def room(state=0, timeline=0, ephemeral=0):
+        return {
+            "state": {"events": [{}] * state},
+            "timeline": {"events": [{}] * timeline},
+            "ephemeral": {"events": [{}] * ephemeral},
+        }
+
+    response = {
+        "presence": {"events": [{}]},
+        "to_device": {"events": [{}, {}]},
+        "rooms": {
+            "invite": {"!a": {}},
+            "leave": {},
+            "join": {"!b": room(state=1, timeline=3), "!c": room(ephemeral=2)},
+        },
+    }
+    assert sync_batch_size(response) == 10
+
+
+def test_metrics_endpoint():
+    raiden = MockRaidenService()
+    api_server = APIServer(RestAPI(RaidenAPI(raiden)), config=dict())
+
+    response = api_server.flask_app.test_client().get("/metrics")
+
+    assert response.status_code == 200
+    assert response.content_type == PROMETHEUS_CONTENT_TYPE
+    body = response.get_data(as_text=True)
+    assert "# TYPE raiden_state_manager_dispatch_seconds histogram" in body
+    assert "# TYPE raiden_transport_retry_queue_messages gauge" in body
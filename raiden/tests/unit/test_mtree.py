@@ -1,9 +1,18 @@
+import random
+
 import pytest
 
 from raiden.constants import EMPTY_MERKLE_ROOT
 from raiden.exceptions import HashLengthNot32
-from raiden.transfer.merkle_tree import MERKLEROOT, compute_layers, merkleroot
-from raiden.transfer.state import MerkleTreeState
+from raiden.transfer.merkle_tree import (
+    MERKLEROOT,
+    compute_layers,
+    compute_layers_with,
+    compute_layers_without,
+    contains_leaf,
+    merkleroot,
+)
+from raiden.transfer.state import MerkleTreeState, make_empty_merkle_tree
 from raiden.utils import sha3
 
 
@@ -43,3 +52,40 @@ def test_compute_layers_single_entry():
 
     tree = MerkleTreeState(layers)
     assert merkleroot(tree) == hash_0
+
+
+def test_incremental_layers_match_compute_layers():
+    rng = random.Random(42)
+    layers = make_empty_merkle_tree().layers
+    elements = list()
+
+    for _ in range(200):
+        if elements and rng.random() < 0.4:
+            element = rng.choice(elements)
+            elements.remove(element)
+            if elements:
+                layers = compute_layers_without(layers, element)
+            else:
+                layers = make_empty_merkle_tree().layers
+        else:
+            element = sha3(rng.getrandbits(256).to_bytes(32, "big"))
+            elements.append(element)
+            layers = compute_layers_with(layers, element)
+
+        if elements:
+            assert layers == compute_layers(elements)
+        assert all(contains_leaf(layers, element) for element in elements)
+
+
+def test_incremental_layers_invalid_elements():
+    hash_0 = sha3(b"x")
+    layers = compute_layers([hash_0])
+
+    with pytest.raises(ValueError):
+        compute_layers_with(layers, hash_0)
+
+    with pytest.raises(HashLengthNot32):
+        compute_layers_with(layers, b"not32bytes")
+
+    with pytest.raises(ValueError):
+        compute_layers_without(layers, sha3(b"y"))
@@ -4,9 +4,17 @@ from uuid import UUID
 
 import pytest
 import requests
-from eth_utils import encode_hex, is_checksum_address, is_hex, is_hex_address, to_checksum_address
+from eth_utils import (
+    encode_hex,
+    is_checksum_address,
+    is_hex,
+    is_hex_address,
+    to_canonical_address,
+    to_checksum_address,
+)
 
 from raiden.exceptions import ServiceRequestFailed, ServiceRequestIOURejected
+from raiden.network import pathfinding
 from raiden.network.pathfinding import (
     MAX_PATHS_QUERY_ATTEMPTS,
     PFSError,
@@ -14,11 +22,13 @@ from raiden.network.pathfinding import (
     get_pfs_info,
     make_iou,
     query_paths,
+    session,
     update_iou,
 )
 from raiden.routing import get_best_routes
 from raiden.tests.utils import factories
 from raiden.tests.utils.mocks import patched_get_for_succesful_pfs_info
+from raiden.tests.utils.pfs import PFSStandIn
 from raiden.transfer.state import (
     NODE_NETWORK_REACHABLE,
     NODE_NETWORK_UNREACHABLE,
@@ -91,6 +101,18 @@ CONFIG = {
 PRIVKEY = b"privkeyprivkeyprivkeyprivkeypriv"
 
 
+def clear_pfs_client_state():
+    pathfinding._paths_cache.clear()  # pylint: disable=protected-access
+    pathfinding._presigned_ious.clear()  # pylint: disable=protected-access
+
+
+@pytest.fixture(autouse=True)
+def pfs_client_state():
+    clear_pfs_client_state()
+    yield
+    clear_pfs_client_state()
+
+
 def get_best_routes_with_iou_request_mocked(
     chain_state,
     token_network_state,
@@ -112,7 +134,7 @@ def get_best_routes_with_iou_request_mocked(
 
         return Mock(json=Mock(return_value=iou_json_data or {}), status_code=200)
 
-    with patch.object(requests, "get", side_effect=iou_side_effect) as patched:
+    with patch.object(session, "get", side_effect=iou_side_effect) as patched:
         best_routes, feedback_token = get_best_routes(
             chain_state=chain_state,
             token_network_address=token_network_state.address,
@@ -142,7 +164,7 @@ def test_get_pfs_info_success():
 
 
 def test_get_pfs_info_request_error():
-    with patch.object(requests, "get", side_effect=requests.RequestException()):
+    with patch.object(session, "get", side_effect=requests.RequestException()):
         pathfinding_service_info = get_pfs_info("url")
 
     assert pathfinding_service_info is None
@@ -189,7 +211,7 @@ def test_routing_mocked_pfs_happy_path(happy_path_fixture, one_to_n_address, our
     _, address2, _, address4 = addresses
     _, channel_state2 = channel_states
 
-    with patch.object(requests, "post", return_value=response) as patched:
+    with patch.object(session, "post", return_value=response) as patched:
         routes, feedback_token = get_best_routes_with_iou_request_mocked(
             chain_state=chain_state,
             token_network_state=token_network_state,
@@ -236,7 +258,7 @@ def test_routing_mocked_pfs_happy_path_with_updated_iou(
     )
     last_iou = copy(iou)
 
-    with patch.object(requests, "post", return_value=response) as patched:
+    with patch.object(session, "post", return_value=response) as patched:
         routes, feedback_token = get_best_routes_with_iou_request_mocked(
             chain_state=chain_state,
             token_network_state=token_network_state,
@@ -279,7 +301,7 @@ def test_routing_mocked_pfs_request_error(
         address3: NODE_NETWORK_REACHABLE,
     }
 
-    with patch.object(requests, "post", side_effect=requests.RequestException()):
+    with patch.object(session, "post", side_effect=requests.RequestException()):
         routes, feedback_token = get_best_routes_with_iou_request_mocked(
             chain_state=chain_state,
             token_network_state=token_network_state,
@@ -333,7 +355,7 @@ def test_routing_mocked_pfs_bad_http_code(
     response.configure_mock(status_code=400)
     response.json = Mock(return_value=json_data)
 
-    with patch.object(requests, "post", return_value=response):
+    with patch.object(session, "post", return_value=response):
         routes, feedback_token = get_best_routes_with_iou_request_mocked(
             chain_state=chain_state,
             token_network_state=token_network_state,
@@ -373,7 +395,7 @@ def test_routing_mocked_pfs_invalid_json(
     response.configure_mock(status_code=200)
     response.json = Mock(side_effect=ValueError())
 
-    with patch.object(requests, "post", return_value=response):
+    with patch.object(session, "post", return_value=response):
         routes, feedback_token = get_best_routes_with_iou_request_mocked(
             chain_state=chain_state,
             token_network_state=token_network_state,
@@ -413,7 +435,7 @@ def test_routing_mocked_pfs_invalid_json_structure(
     response.configure_mock(status_code=400)
     response.json = Mock(return_value={})
 
-    with patch.object(requests, "post", return_value=response):
+    with patch.object(session, "post", return_value=response):
         routes, feedback_token = get_best_routes_with_iou_request_mocked(
             chain_state=chain_state,
             token_network_state=token_network_state,
@@ -467,7 +489,7 @@ def test_routing_mocked_pfs_unavailable_peer(
     response = Mock()
     response.configure_mock(status_code=200)
     response.json = Mock(return_value=json_data)
-    with patch.object(requests, "post", return_value=response):
+    with patch.object(session, "post", return_value=response):
         routes, feedback_token = get_best_routes_with_iou_request_mocked(
             chain_state=chain_state,
             token_network_state=token_network_state,
@@ -494,7 +516,7 @@ def test_get_and_update_iou(one_to_n_address):
     )
     # RequestExceptions should be reraised as ServiceRequestFailed
     with pytest.raises(ServiceRequestFailed):
-        with patch.object(requests, "get", side_effect=requests.RequestException):
+        with patch.object(session, "get", side_effect=requests.RequestException):
             get_last_iou(**request_args)
 
     # invalid JSON should raise a ServiceRequestFailed
@@ -502,13 +524,13 @@ def test_get_and_update_iou(one_to_n_address):
     response.configure_mock(status_code=200)
     response.json = Mock(side_effect=ValueError)
     with pytest.raises(ServiceRequestFailed):
-        with patch.object(requests, "get", return_value=response):
+        with patch.object(session, "get", return_value=response):
             get_last_iou(**request_args)
 
     response = Mock()
     response.configure_mock(status_code=200)
     response.json = Mock(return_value={"other_key": "other_value"})
-    with patch.object(requests, "get", return_value=response):
+    with patch.object(session, "get", return_value=response):
         iou = get_last_iou(**request_args)
     assert iou is None, "get_pfs_iou should return None if pfs returns no iou."
 
@@ -527,7 +549,7 @@ def test_get_and_update_iou(one_to_n_address):
         chain_id=4,
     )
     response.json = Mock(return_value=dict(last_iou=last_iou))
-    with patch.object(requests, "get", return_value=response):
+    with patch.object(session, "get", return_value=response):
         iou = get_last_iou(**request_args)
     assert iou == last_iou
 
@@ -550,7 +572,7 @@ def test_get_pfs_iou(one_to_n_address):
     privkey = bytes([2] * 32)
     sender = privatekey_to_address(privkey)
     receiver = factories.make_address()
-    with patch("raiden.network.pathfinding.requests.get") as get_mock:
+    with patch("raiden.network.pathfinding.session.get") as get_mock:
         # No previous IOU
         get_mock.return_value.json.return_value = {"last_iou": None}
         assert (
@@ -674,9 +696,10 @@ def assert_failed_pfs_request(
             response["errors"] = "broken iou"
 
     path_mocks = [request_mock(*data) for data in zip(responses, status_codes)]
+    clear_pfs_client_state()
 
-    with patch.object(requests, "get", return_value=request_mock()) as get_iou:
-        with patch.object(requests, "post", side_effect=path_mocks) as post_paths:
+    with patch.object(session, "get", return_value=request_mock()) as get_iou:
+        with patch.object(session, "post", side_effect=path_mocks) as post_paths:
             if expected_success:
                 query_paths(**paths_args)
             else:
@@ -827,3 +850,75 @@ def test_query_paths_with_multiple_errors(query_paths_args):
     assert_failed_pfs_request(
         query_paths_args, different_recoverable_errors, exception_type=ServiceRequestIOURejected
     )
+
+
+def test_query_paths_with_pfs_stand_in(query_paths_args):
+    """ Consecutive queries reuse the connection, the pre-signed IOU and the
+    cached paths. """
+    service_config = query_paths_args["service_config"]
+    fee = service_config["pathfinding_fee"]
+
+    with PFSStandIn(payment_address=service_config["pathfinding_eth_address"], price=fee) as pfs:
+        service_config["pathfinding_service_address"] = pfs.url
+
+        paths, feedback_token = query_paths(**query_paths_args)
+        assert paths[0]["path"][-1] == to_checksum_address(query_paths_args["route_to"])
+        assert feedback_token is not None
+        assert pfs.requests == {"iou": 1, "paths": 1}
+
+        # The IOU was pre-signed, the last IOU is not requested again
+        query_paths_args["route_to"] = factories.make_address()
+        paths, _ = query_paths(**query_paths_args)
+        assert paths[0]["path"][-1] == to_checksum_address(query_paths_args["route_to"])
+        assert pfs.requests == {"iou": 1, "paths": 2}
+        last_iou = pfs.last_ious[
+            (to_checksum_address(query_paths_args["our_address"]), pfs.payment_address)
+        ]
+        assert last_iou["amount"] == 2 * fee
+
+        # A smaller amount in the same bucket uses the cached paths
+        query_paths_args["value"] -= 1
+        cached_paths, _ = query_paths(**query_paths_args)
+        assert cached_paths == paths
+        assert pfs.requests == {"iou": 1, "paths": 2}
+
+        # A bigger amount needs a new request
+        query_paths_args["value"] *= 2
+        query_paths(**query_paths_args)
+        assert pfs.requests == {"iou": 1, "paths": 3}
+
+        # The paths of a failed payment are requested again
+        pathfinding.invalidate_cached_paths(
+            token_network_address=query_paths_args["token_network_address"],
+            route_from=query_paths_args["route_from"],
+            route_to=query_paths_args["route_to"],
+        )
+        query_paths(**query_paths_args)
+        assert pfs.requests == {"iou": 1, "paths": 4}
+
+        assert len(pfs.connections) == 1, "the connection to the PFS must be kept alive"
+
+
+def test_presigned_iou_requires_same_fee(query_paths_args):
+    service_config = query_paths_args["service_config"]
+    iou = make_iou(
+        config=service_config,
+        our_address=query_paths_args["our_address"],
+        one_to_n_address=query_paths_args["one_to_n_address"],
+        privkey=PRIVKEY,
+        block_number=BlockNumber(10),
+        chain_id=query_paths_args["chain_id"],
+    )
+    url = service_config["pathfinding_service_address"]
+    sender = query_paths_args["our_address"]
+    receiver = to_canonical_address(service_config["pathfinding_eth_address"])
+
+    pathfinding.presign_next_iou(url=url, iou=iou, privkey=PRIVKEY, added_amount=5)
+    assert pathfinding.pop_presigned_iou(url, sender, receiver, added_amount=6) is None
+    assert pathfinding.pop_presigned_iou(url, sender, receiver, added_amount=5) is None
+
+    pathfinding.presign_next_iou(url=url, iou=iou, privkey=PRIVKEY, added_amount=5)
+    next_iou = pathfinding.pop_presigned_iou(url, sender, receiver, added_amount=5)
+    assert next_iou["amount"] == iou["amount"] + 5
+    assert next_iou["signature"] == pathfinding.sign_iou(next_iou, PRIVKEY)
+    assert pathfinding.pop_presigned_iou(url, sender, receiver, added_amount=5) is None
@@ -0,0 +1,64 @@
+import json
+import os
+
+from raiden.storage.serialization import JSONSerializer
+from raiden.storage.sqlite import SerializedSQLiteStorage
+from raiden.tests.utils import factories
+from raiden.transfer.state_change import Block
+from raiden.utils.profiling import StartupProfiler
+
+
+def make_storage_with_state_changes(number_of_state_changes):
+    storage = SerializedSQLiteStorage(":memory:", JSONSerializer())
+    for block_number in range(number_of_state_changes):
+        block = Block(
+            block_number=block_number, gas_limit=1, block_hash=factories.make_block_hash()
+        )
+        storage.write_state_change(block, "2019-01-01T00:00:00.000")
+    return storage
+
+
+def test_disabled_profiler_is_a_noop():
+    profiler = StartupProfiler()
+    storage = make_storage_with_state_changes(2)
+
+    profiler.start()
+    profiler.instrument_storage(storage)
+    with profiler.phase("restore"):
+        storage.get_statechanges_by_identifier(0, "latest")
+    profiler.stop()
+
+    assert storage.conn.row_factory is None
+    assert profiler.phases == []
+
+
+def test_profiler_counts_rows_per_phase(tmpdir):
+    output_path = os.path.join(tmpdir, "profile.json")
+    profiler = StartupProfiler(enabled=True, output_path=output_path)
+    storage = make_storage_with_state_changes(5)
+
+    profiler.start()
+    profiler.instrument_storage(storage)
+    with profiler.phase("outer"):
+        with profiler.phase("restore") as phase:
+            state_changes = storage.get_statechanges_by_identifier(0, "latest")
+            phase.state_changes_replayed = len(state_changes)
+        with profiler.phase("count"):
+            storage.count_state_changes()
+    profiler.stop()
+
+    assert storage.conn.row_factory is None, "instrumentation must be removed"
+
+    outer, restore, count = profiler.phases
+    assert (outer.depth, restore.depth, count.depth) == (0, 1, 1)
+    assert restore.db_rows_read == 5
+    assert restore.state_changes_replayed == 5
+    assert count.db_rows_read == 1
+    assert outer.db_rows_read == 6
+    assert outer.duration >= restore.duration + count.duration
+
+    with open(output_path) as handler:
+        report = json.load(handler)
+
+    assert [phase["name"] for phase in report["phases"]] == ["outer", "restore", "count"]
+    assert report["total_duration"] >= outer.duration
@@ -1,3 +1,6 @@
+from collections import defaultdict
+from unittest.mock import Mock, patch
+
 from raiden.constants import EMPTY_HASH, EMPTY_MERKLE_ROOT
 from raiden.network.proxies.token_network import ParticipantDetails, ParticipantsDetails
 from raiden.raiden_event_handler import RaidenEventHandler
@@ -8,7 +11,7 @@ from raiden.tests.utils.factories import (
     make_canonical_identifier,
 )
 from raiden.tests.utils.mocks import make_raiden_service_mock
-from raiden.transfer.events import ContractSendChannelBatchUnlock
+from raiden.transfer.events import ContractSendChannelBatchUnlock, EventPaymentSentFailed
 from raiden.transfer.utils import hash_balance_data
 from raiden.transfer.views import get_channelstate_by_token_network_and_partner, state_from_raiden
 
@@ -89,3 +92,27 @@ def test_handle_contract_send_channelunlock_already_unlocked():
     RaidenEventHandler().on_raiden_event(
         raiden=raiden, chain_state=raiden.wal.state_manager.current_state, event=event
     )
+
+
+def test_handle_paymentsentfailed_invalidates_the_cached_paths():
+    raiden = Mock(address=make_address(), targets_to_identifiers_to_statuses=defaultdict(dict))
+    payment_status = Mock()
+    target = make_address()
+    raiden.targets_to_identifiers_to_statuses[target][1] = payment_status
+    event = EventPaymentSentFailed(
+        payment_network_address=make_address(),
+        token_network_address=make_address(),
+        identifier=1,
+        target=target,
+        reason="route failed",
+    )
+
+    with patch("raiden.raiden_event_handler.invalidate_cached_paths") as invalidate_cached_paths:
+        RaidenEventHandler().handle_paymentsentfailed(raiden, event)
+
+    invalidate_cached_paths.assert_called_once_with(
+        token_network_address=event.token_network_address,
+        route_from=raiden.address,
+        route_to=target,
+    )
+    payment_status.payment_done.set.assert_called_once_with(False)
@@ -1,5 +1,16 @@
-from raiden.constants import EthClient
+from types import SimpleNamespace
+
+import gevent
+import gevent.local
+from eth_utils import decode_hex, keccak, to_checksum_address
+from hexbytes import HexBytes
+
+from raiden.constants import GAS_PRICE_BUMP_AFTER_BLOCKS, GAS_PRICE_BUMP_FACTOR, EthClient
+from raiden.network.rpc.client import JSONRPCClient
+from raiden.network.rpc.pipeline import TransactionPipeline, bump_gas_price
 from raiden.network.rpc.smartcontract_proxy import ClientErrorInspectResult, inspect_client_error
+from raiden.tests.utils.factories import make_address, make_privkey_address, make_transaction_hash
+from raiden.utils.typing import Nonce
 
 
 def test_inspect_client_error():
@@ -12,3 +23,157 @@ def test_inspect_client_error():
 
     result = inspect_client_error(exception, EthClient.PARITY)
     assert result == ClientErrorInspectResult.ALWAYS_FAIL
+
+
+def test_transaction_pipeline_reuses_unused_nonces():
+    pipeline = TransactionPipeline(available_nonce=Nonce(5))
+    assert [pipeline.reserve() for _ in range(3)] == [5, 6, 7]
+
+    pipeline.sent(Nonce(5), {"gasPrice": 1}, make_transaction_hash())
+    pipeline.sent(Nonce(7), {"gasPrice": 1}, make_transaction_hash())
+
+    # 6 did not reach the node and 7 waits for it
+    assert pipeline.release(Nonce(6), pending_nonce=Nonce(6)) is True
+    assert pipeline.reserve() == 6
+    assert pipeline.reserve() == 8
+
+    # 8 reached the node, e.g. it was already known
+    assert pipeline.release(Nonce(8), pending_nonce=Nonce(9)) is False
+    assert pipeline.reserve() == 9
+
+    # nonces used by someone else are skipped
+    assert pipeline.release(Nonce(9), pending_nonce=Nonce(20)) is False
+    assert pipeline.reserve() == 20
+
+
+def test_transaction_pipeline_follows_replacements():
+    pipeline = TransactionPipeline(available_nonce=Nonce(0))
+    nonce = pipeline.reserve()
+    original, replacement = make_transaction_hash(), make_transaction_hash()
+
+    pipeline.sent(nonce, {"gasPrice": 10}, original)
+    in_flight = pipeline.sent(nonce, {"gasPrice": 13}, replacement)
+    assert pipeline.get(original) is in_flight
+    assert in_flight.transaction_hashes == [original, replacement]
+    assert (in_flight.initial_gas_price, in_flight.gas_price) == (10, 13)
+
+    pipeline.mined(replacement)
+    assert pipeline.get(original) is None
+    assert pipeline.resolve(original) == replacement
+    assert pipeline.resolve(replacement) == replacement
+
+
+def test_bump_gas_price():
+    assert bump_gas_price(previous_gas_price=100, gas_price=50, factor=1.2) == 121
+    assert bump_gas_price(previous_gas_price=100, gas_price=500, factor=1.2) == 500
+
+
+class FakeEth:
+    """ Accepts the transactions, except the first one sent with a nonce in
+    `fail_nonces`, and mines them when `mine` is called.
+    """
+
+    def __init__(self):
+        self.blockNumber = 0
+        self.gasPrice = 10
+        self.account = self
+        self.sent = dict()
+        self.mined = dict()
+        self.fail_nonces = set()
+        self.signed = dict()
+
+    def generateGasPrice(self):
+        return self.gasPrice
+
+    def signTransaction(self, transaction, privkey):  # pylint: disable=unused-argument
+        raw_transaction = repr(sorted(transaction.items())).encode()
+        self.signed[raw_transaction] = transaction
+        return SimpleNamespace(rawTransaction=raw_transaction)
+
+    def sendRawTransaction(self, raw_transaction):
+        transaction = self.signed[raw_transaction]
+        gevent.sleep(0.01)
+        if transaction["nonce"] in self.fail_nonces:
+            self.fail_nonces.remove(transaction["nonce"])
+            raise ValueError({"code": -32000, "message": "connection reset"})
+
+        tx_hash = keccak(raw_transaction)
+        self.sent[tx_hash] = transaction
+        return HexBytes(tx_hash)
+
+    def getTransactionCount(self, address, block_identifier):  # pylint: disable=unused-argument
+        nonces = sorted(transaction["nonce"] for transaction in self.sent.values())
+        pending_nonce = 0
+        while pending_nonce in nonces:
+            pending_nonce += 1
+        return pending_nonce
+
+    def getTransaction(self, tx_hash):
+        tx_hash = decode_hex(tx_hash)
+        if tx_hash not in self.sent:
+            return None
+        return dict(self.sent[tx_hash], blockNumber=self.mined.get(tx_hash))
+
+    def mine(self, tx_hash):
+        self.mined[bytes(tx_hash)] = self.blockNumber
+
+
+def make_client(eth):
+    client = JSONRPCClient.__new__(JSONRPCClient)
+    client.web3 = SimpleNamespace(eth=eth)
+    client.privkey, client.address = make_privkey_address()
+    client.eth_node = EthClient.GETH
+    client.default_block_num_confirmations = 0
+    client._transactions = TransactionPipeline(available_nonce=Nonce(0))
+    client._greenlet_local = gevent.local.local()
+    return client
+
+
+def test_transactions_are_sent_concurrently_and_nonce_gaps_are_filled():
+    eth = FakeEth()
+    eth.fail_nonces.add(1)
+    client = make_client(eth)
+    recipient = make_address()
+
+    def send():
+        return client.send_transaction(to=recipient, startgas=100_000)
+
+    greenlets = [gevent.spawn(send) for _ in range(3)]
+    gevent.joinall(greenlets)
+
+    failed = [greenlet for greenlet in greenlets if not greenlet.successful()]
+    assert len(failed) == 1
+    assert isinstance(failed[0].exception, ValueError)
+
+    # The failed nonce was reused for a value transfer to ourselves, so the
+    # transaction sent with the following nonce can be mined
+    sent_nonces = sorted(transaction["nonce"] for transaction in eth.sent.values())
+    assert sent_nonces == [0, 1, 2]
+    gap_filler = next(
+        transaction for transaction in eth.sent.values() if transaction["nonce"] == 1
+    )
+    assert gap_filler["to"] == to_checksum_address(client.address)
+    assert gap_filler["value"] == 0
+
+
+def test_poll_replaces_stuck_transactions():
+    eth = FakeEth()
+    client = make_client(eth)
+
+    original = client.send_transaction(to=make_address(), startgas=100_000)
+
+    def mine_replacement():
+        while len(eth.sent) < 2:
+            eth.blockNumber += GAS_PRICE_BUMP_AFTER_BLOCKS
+            gevent.sleep(0.5)
+        replacement = next(tx_hash for tx_hash in eth.sent if tx_hash != original)
+        eth.mine(replacement)
+
+    miner = gevent.spawn(mine_replacement)
+    transaction = client.poll(original)
+    miner.get()
+
+    replacement = next(tx_hash for tx_hash in eth.sent if tx_hash != original)
+    assert transaction["nonce"] == 0
+    assert transaction["gasPrice"] == bump_gas_price(10, 10, GAS_PRICE_BUMP_FACTOR)
+    assert client._transactions.resolve(original) == replacement
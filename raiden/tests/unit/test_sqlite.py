@@ -1,10 +1,16 @@
 import itertools
 import json
+import sqlite3
 from datetime import datetime, timedelta
 from pathlib import Path
 from unittest.mock import patch
 
+import gevent
+import pytest
+from eth_utils import encode_hex, to_checksum_address
+
 from raiden.messages import Lock
+from raiden.storage.executor import get_thread_ident
 from raiden.storage.restore import (
     get_event_with_balance_proof_by_balance_hash,
     get_event_with_balance_proof_by_locksroot,
@@ -431,3 +437,156 @@ def test_batch_query_event_records():
     for events_batch in events_batch_query:
         events.extend(events_batch)
     assert len(events) == 2
+
+
+def test_iterate_events_with_timestamps():
+    storage = SQLiteStorage(":memory:")
+    state_change_identifier = storage.write_state_change(
+        state_change=json.dumps({}), log_time=datetime.utcnow().isoformat(timespec="milliseconds")
+    )
+    storage.write_events(
+        [
+            (None, state_change_identifier, f"2019-01-01T00:00:{index:02}.000", str(index))
+            for index in range(10)
+        ]
+    )
+
+    for limit, offset in itertools.product((None, 0, 1, 3, 4, 10, 20), (None, 0, 2, 9, 10)):
+        expected = storage.get_events_with_timestamps(limit=limit, offset=offset)
+        for batch_size in (1, 3, 100):
+            events = storage.iterate_events_with_timestamps(
+                limit=limit, offset=offset, batch_size=batch_size
+            )
+            assert list(events) == expected, (limit, offset, batch_size)
+
+    # Events written while iterating are included
+    events = storage.iterate_events_with_timestamps(batch_size=4)
+    assert [next(events).wrapped_event for _ in range(4)] == [0, 1, 2, 3]
+    storage.write_events([(None, state_change_identifier, "2019-01-01T00:01:00.000", "10")])
+    assert [event.wrapped_event for event in events][-1] == 10
+
+
+def make_blockchain_event(block_number, log_index=0, channel_identifier=None):
+    args = dict(channel_identifier=channel_identifier) if channel_identifier else dict()
+    return dict(
+        event="ChannelOpened",
+        args=args,
+        block_number=block_number,
+        logIndex=log_index,
+        transactionHash=encode_hex(factories.make_transaction_hash()),
+    )
+
+
+def test_blockchain_events_storage():
+    storage = SQLiteStorage(":memory:")
+    contract_address = to_checksum_address(factories.make_address())
+    assert storage.get_blockchain_events_synced_range(contract_address) is None
+
+    event1 = make_blockchain_event(block_number=12, channel_identifier=1)
+    event2 = make_blockchain_event(block_number=12, log_index=1, channel_identifier=2)
+    event3 = make_blockchain_event(block_number=15, channel_identifier=1)
+    storage.write_blockchain_events(contract_address, 10, 13, [event1, event2])
+    storage.write_blockchain_events(contract_address, 14, 20, [event3])
+    # Polling the same events again must not duplicate them
+    storage.write_blockchain_events(contract_address, 14, 20, [event3])
+
+    assert storage.get_blockchain_events_synced_range(contract_address) == (10, 20)
+    assert storage.get_blockchain_events(contract_address, 0, 20) == [event3, event2, event1]
+    assert storage.get_blockchain_events(contract_address, 13, 20) == [event3]
+    assert storage.get_blockchain_events(contract_address, 0, 14) == [event2, event1]
+    assert storage.get_blockchain_events(contract_address, 0, 20, limit=1, offset=1) == [event2]
+    assert storage.get_blockchain_events(contract_address, 0, 20, channel_identifiers=[1]) == [
+        event3,
+        event1,
+    ]
+    assert (
+        storage.get_blockchain_events(to_checksum_address(factories.make_address()), 0, 20) == []
+    )
+
+    # Blocks adjacent before the synced range extend it too
+    storage.write_blockchain_events(contract_address, 5, 9, [])
+    assert storage.get_blockchain_events_synced_range(contract_address) == (5, 20)
+
+    # A gap in the polled blocks restarts the synced range
+    storage.write_blockchain_events(contract_address, 30, 40, [])
+    assert storage.get_blockchain_events_synced_range(contract_address) == (30, 40)
+
+
+def test_file_database_is_queried_off_the_hub(tmp_path):
+    storage = SQLiteStorage(str(tmp_path / "node.db"))
+    assert storage.executor is not None
+
+    ticks = 0
+
+    def tick():
+        nonlocal ticks
+        while True:
+            ticks += 1
+            gevent.sleep(0.001)
+
+    ticker = gevent.spawn(tick)
+    gevent.sleep(0)
+    ticks = 0
+
+    # A slow query keeps the executor thread busy, the hub keeps running
+    storage._fetchall(
+        "WITH RECURSIVE numbers(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM numbers "
+        "WHERE x < 1000000) SELECT COUNT(*) FROM numbers",
+        (),
+    )
+    ticker.kill()
+    assert ticks > 1
+    assert storage.executor._thread_ident not in (None, get_thread_ident())
+
+    # Concurrent writers are executed in the order they were issued
+    greenlets = [
+        gevent.spawn(storage.write_state_change, json.dumps({"index": index}), "")
+        for index in range(20)
+    ]
+    gevent.joinall(greenlets, raise_error=True)
+    assert [greenlet.value for greenlet in greenlets] == list(range(1, 21))
+    assert [json.loads(data)["index"] for data in storage.get_state_changes()] == list(range(20))
+
+    storage.close()
+    assert storage.executor._pool is None
+
+
+def test_readers_query_the_committed_state(tmp_path):
+    database_path = str(tmp_path / "node.db")
+    storage = SQLiteStorage(database_path, readers=2)
+    contract_address = to_checksum_address(factories.make_address())
+    event = make_blockchain_event(block_number=12, channel_identifier=1)
+    storage.write_blockchain_events(contract_address, 10, 13, [event])
+
+    assert storage.get_blockchain_events(contract_address, 0, 20) == [event]
+
+    with storage.transaction():
+        storage.conn.execute("UPDATE blockchain_events_sync SET to_block = 20")
+
+        # The writer sees its uncommitted changes, the readers are not
+        # blocked by the transaction and see the last commit
+        assert storage.get_blockchain_events_synced_range(contract_address) == (10, 20)
+        with storage.readers.reader() as reader:
+            assert reader.get_blockchain_events_synced_range(contract_address) == (10, 13)
+
+    assert storage.get_blockchain_events_synced_range(contract_address) == (10, 20)
+
+    # The readers run the queries in parallel, in their own threads
+    slow_query = (
+        "WITH RECURSIVE numbers(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM numbers "
+        "WHERE x < 100000) SELECT COUNT(*) FROM numbers"
+    )
+    greenlets = [gevent.spawn(storage._fetchall, slow_query, ()) for _ in range(2)]
+    gevent.joinall(greenlets, raise_error=True)
+    reader_threads = {reader.executor._thread_ident for reader in storage.readers._all_readers}
+    assert len(reader_threads) == 2
+    assert storage.executor._thread_ident not in reader_threads
+
+    # Tools can read the database of a running node
+    tool_storage = SQLiteStorage(database_path, read_only=True)
+    assert tool_storage.get_blockchain_events(contract_address, 0, 20) == [event]
+    with pytest.raises(sqlite3.OperationalError):
+        tool_storage.write_blockchain_events(contract_address, 21, 30, [])
+
+    tool_storage.close()
+    storage.close()
@@ -1,4 +1,19 @@
-from raiden.transfer.state import TransactionChannelNewBalance, TransactionOrder
+import pickle
+from copy import deepcopy
+
+import pytest
+
+from raiden.storage.serialization import JSONSerializer
+from raiden.tests.utils import factories
+from raiden.transfer.state import (
+    HashTimeLockState,
+    MerkleTreeState,
+    RouteState,
+    TransactionChannelNewBalance,
+    TransactionOrder,
+    UnlockPartialProofState,
+)
+from raiden.utils import sha3
 
 
 def test_transaction_channel_new_balance_ordering():
@@ -45,3 +60,36 @@ def test_transaction_order_ordering():
     assert a != b
     assert a < b
     assert b > a
+
+
+def test_slotted_states_round_trip():
+    lock = HashTimeLockState(amount=10, expiration=20, secrethash=factories.make_keccak_hash())
+    states = [
+        lock,
+        UnlockPartialProofState(lock=lock, secret=factories.make_secret()),
+        RouteState(node_address=factories.make_address(), channel_identifier=1),
+        MerkleTreeState(layers=[[lock.lockhash], [lock.lockhash]]),
+        factories.create(factories.BalanceProofProperties()),
+        factories.create(factories.BalanceProofSignedStateProperties()),
+    ]
+
+    for state in states:
+        assert not hasattr(state, "__dict__")
+        with pytest.raises(AttributeError):
+            state.unknown_attribute = None
+
+        copied = deepcopy(state)
+        assert copied == state
+        assert copied is not state
+        assert pickle.loads(pickle.dumps(state)) == state
+        assert JSONSerializer.deserialize(JSONSerializer.serialize(state)) == state
+
+
+def test_lock_encoding_is_derived():
+    lock = HashTimeLockState(amount=10, expiration=20, secrethash=factories.make_keccak_hash())
+    unlock = UnlockPartialProofState(lock=lock, secret=factories.make_secret())
+
+    assert lock.lockhash == sha3(lock.encoded)
+    assert unlock.encoded == lock.encoded
+    assert unlock.lockhash == lock.lockhash
+    assert "encoded" not in JSONSerializer.serialize(lock)
@@ -1,15 +1,20 @@
 import copy
+from dataclasses import replace
 
 import pytest
 
 from raiden.constants import EMPTY_MERKLE_ROOT
-from raiden.routing import get_best_routes
+from raiden.routing import get_best_routes, get_distances_to
+from raiden.storage.serialization import JSONSerializer
 from raiden.tests.utils import factories
 from raiden.tests.utils.transfer import make_receive_transfer_mediated
 from raiden.transfer import node, token_network, views
 from raiden.transfer.mediated_transfer.state_change import ActionInitMediator, ActionInitTarget
 from raiden.transfer.merkle_tree import merkleroot
 from raiden.transfer.state import (
+    CHANNEL_STATE_CLOSED,
+    CHANNEL_STATE_CLOSING,
+    CHANNEL_STATE_OPENED,
     NODE_NETWORK_REACHABLE,
     NODE_NETWORK_UNREACHABLE,
     HashTimeLockState,
@@ -17,6 +22,7 @@ from raiden.transfer.state import (
     TokenNetworkState,
 )
 from raiden.transfer.state_change import (
+    ActionChannelClose,
     Block,
     ContractReceiveChannelBatchUnlock,
     ContractReceiveChannelClosed,
@@ -163,6 +169,98 @@ def test_channel_settle_must_properly_cleanup(channel_properties):
     assert channel_state.identifier not in ids_to_channels
 
 
+def test_channel_status_index_follows_channel_lifecycle(channel_properties):
+    block_number = 10
+    block_hash = factories.make_block_hash()
+
+    token_network_address = factories.make_address()
+    token_network_state = TokenNetworkState(
+        address=token_network_address,
+        token_address=factories.make_address(),
+        network_graph=TokenNetworkGraphState(token_network_address),
+    )
+
+    properties, _ = channel_properties
+    properties = replace(
+        properties, payment_network_address=factories.make_payment_network_address()
+    )
+    channel_state = factories.create(properties)
+    other_channel_state = factories.create(
+        replace(
+            properties,
+            canonical_identifier=factories.make_canonical_identifier(
+                token_network_address=token_network_address
+            ),
+        )
+    )
+    channel_identifier = channel_state.identifier
+
+    def statuses(state=token_network_state):
+        return {
+            status: list(channels)
+            for status, channels in state.statuses_to_channels.items()
+            if channels
+        }
+
+    def dispatch(state_change):
+        token_network.state_transition(
+            token_network_state=token_network_state,
+            state_change=state_change,
+            block_number=block_number,
+            block_hash=block_hash,
+        )
+
+    for new_channel in (channel_state, other_channel_state):
+        dispatch(
+            ContractReceiveChannelNew(
+                transaction_hash=factories.make_transaction_hash(),
+                channel_state=new_channel,
+                block_number=block_number,
+                block_hash=block_hash,
+            )
+        )
+    assert statuses() == {
+        CHANNEL_STATE_OPENED: [channel_identifier, other_channel_state.identifier]
+    }
+
+    dispatch(ActionChannelClose(canonical_identifier=channel_state.canonical_identifier))
+    assert statuses() == {
+        CHANNEL_STATE_OPENED: [other_channel_state.identifier],
+        CHANNEL_STATE_CLOSING: [channel_identifier],
+    }
+
+    dispatch(
+        ContractReceiveChannelClosed(
+            transaction_hash=factories.make_transaction_hash(),
+            transaction_from=channel_state.our_state.address,
+            canonical_identifier=channel_state.canonical_identifier,
+            block_number=block_number,
+            block_hash=block_hash,
+        )
+    )
+    assert statuses() == {
+        CHANNEL_STATE_OPENED: [other_channel_state.identifier],
+        CHANNEL_STATE_CLOSED: [channel_identifier],
+    }
+
+    # The index is not serialized, it is rebuilt from the channels
+    restored = JSONSerializer.deserialize(JSONSerializer.serialize(token_network_state))
+    assert "statuses_to_channels" not in JSONSerializer.serialize(token_network_state)
+    assert statuses(restored) == statuses()
+
+    dispatch(
+        ContractReceiveChannelSettled(
+            transaction_hash=factories.make_transaction_hash(),
+            canonical_identifier=channel_state.canonical_identifier,
+            block_number=block_number + channel_state.settle_timeout + 1,
+            block_hash=factories.make_block_hash(),
+            our_onchain_locksroot=EMPTY_MERKLE_ROOT,
+            partner_onchain_locksroot=EMPTY_MERKLE_ROOT,
+        )
+    )
+    assert statuses() == {CHANNEL_STATE_OPENED: [other_channel_state.identifier]}
+
+
 def test_channel_data_removed_after_unlock(
     chain_state, token_network_state, our_address, channel_properties
 ):
@@ -1052,3 +1150,69 @@ def test_routing_priority(chain_state, token_network_state, one_to_n_address, ou
     )
     assert routes[0].node_address == address2
     assert routes[1].node_address == address1
+
+
+def test_routing_distances_are_invalidated_by_graph_changes(token_network_state):
+    address1 = factories.make_address()
+    address2 = factories.make_address()
+    address3 = factories.make_address()
+    block_number = 10
+    block_hash = factories.make_block_hash()
+
+    def route_new(participant1, participant2, channel_identifier):
+        state_change = ContractReceiveRouteNew(
+            transaction_hash=factories.make_transaction_hash(),
+            canonical_identifier=factories.make_canonical_identifier(
+                token_network_address=token_network_state.address,
+                channel_identifier=channel_identifier,
+            ),
+            participant1=participant1,
+            participant2=participant2,
+            block_number=block_number,
+            block_hash=block_hash,
+        )
+        token_network.state_transition(token_network_state, state_change, block_number, block_hash)
+
+    route_new(address1, address2, 1)
+    route_new(address2, address3, 2)
+
+    network_graph = token_network_state.network_graph
+    distances = get_distances_to(network_graph, address3)
+    assert distances == {address3: 0, address2: 1, address1: 2}
+    assert get_distances_to(network_graph, address3) is distances, "distances must be cached"
+
+    route_new(address1, address3, 3)
+    assert get_distances_to(network_graph, address3)[address1] == 1
+
+    route_closed = ContractReceiveRouteClosed(
+        transaction_hash=factories.make_transaction_hash(),
+        canonical_identifier=factories.make_canonical_identifier(
+            token_network_address=token_network_state.address, channel_identifier=2
+        ),
+        block_number=block_number,
+        block_hash=block_hash,
+    )
+    token_network.state_transition(token_network_state, route_closed, block_number, block_hash)
+    assert get_distances_to(network_graph, address3) == {address3: 0, address1: 1, address2: 2}
+
+    assert get_distances_to(network_graph, factories.make_address()) == dict()
+
+
+def test_routing_distances_are_not_shared_by_the_nodes(token_network_state):
+    address1 = factories.make_address()
+    address2 = factories.make_address()
+
+    # Nodes running in the same process have graphs of the same token network
+    # and version, each node must use its own cache
+    network_graph = token_network_state.network_graph
+    network_graph.network.add_edge(address1, address2)
+    other_network_graph = JSONSerializer.deserialize(JSONSerializer.serialize(network_graph))
+    assert other_network_graph.version == network_graph.version
+    other_network_graph.network.remove_edge(address1, address2)
+
+    assert get_distances_to(network_graph, address1) == {address1: 0, address2: 1}
+    assert get_distances_to(other_network_graph, address1) == {address1: 0}
+
+    # The copies made by the state transitions share the cache
+    copied_network_graph = copy.deepcopy(network_graph)
+    assert copied_network_graph.distances_cache is network_graph.distances_cache
@@ -4,6 +4,7 @@ from pathlib import Path
 from unittest.mock import ANY, Mock, patch
 
 import raiden.utils.upgrades
+from raiden.storage.archive import archive_path_from_database_path
 from raiden.storage.serialization import JSONSerializer
 from raiden.storage.sqlite import SQLiteStorage
 from raiden.tests.utils import factories
@@ -73,6 +74,44 @@ def test_upgrade_executes_necessary_migration_functions(tmp_path, monkeypatch):
     assert upgrade_functions[3].function.call_count == 1
 
 
+def test_upgrade_migrates_the_archive(tmp_path, monkeypatch):
+    old_db_filename = tmp_path / Path("v18_log.db")
+
+    storage = SQLiteStorage(str(old_db_filename))
+    with patch("raiden.storage.sqlite.RAIDEN_DB_VERSION", new=18):
+        storage.update_version()
+    storage.attach_archive(archive_path_from_database_path(str(old_db_filename)))
+    storage.conn.execute(
+        "INSERT INTO archive.state_changes(identifier, data, log_time) VALUES(1, '{}', '')"
+    )
+    storage.conn.commit()
+    storage.conn.close()
+
+    migrated_state_changes = []
+
+    def migration(
+        storage, old_version, current_version, **kwargs
+    ):  # pylint: disable=unused-argument
+        cursor = storage.conn.execute("SELECT identifier FROM state_changes")
+        migrated_state_changes.append([row[0] for row in cursor])
+        return current_version
+
+    db_path = tmp_path / Path("v19_log.db")
+    with monkeypatch.context() as m:
+        m.setattr(
+            raiden.utils.upgrades,
+            "UPGRADES_LIST",
+            [UpgradeRecord(from_version=18, function=migration)],
+        )
+        m.setattr(raiden.utils.upgrades, "RAIDEN_DB_VERSION", 19)
+
+        UpgradeManager(db_filename=db_path).run()
+
+    # The archive is migrated before the database
+    assert migrated_state_changes == [[1], []]
+    assert get_db_version(Path(archive_path_from_database_path(str(db_path)))) == 19
+
+
 def test_upgrade_manager_restores_backup(tmp_path, monkeypatch):
     db_path = tmp_path / Path("v17_log.db")
 
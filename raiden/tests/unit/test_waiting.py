@@ -0,0 +1,66 @@
+import gevent
+import pytest
+
+from raiden import waiting
+from raiden.tests.utils import factories
+from raiden.tests.utils.mocks import MockRaidenService
+from raiden.transfer.state_change import Block
+
+
+def dispatch(raiden, state_change):
+    _, new_state, events = raiden.wal.log_and_dispatch(state_change)
+    raiden.state_waiters.notify(new_state, events)
+
+
+def make_block(block_number):
+    return Block(block_number=block_number, gas_limit=1, block_hash=factories.make_block_hash())
+
+
+def test_wait_for_block_is_woken_up_by_the_state_change():
+    raiden = MockRaidenService()
+    raiden.alarm = True
+
+    # The retry timeout only checks that the node is running, the waiting
+    # greenlet is woken up by the state change
+    waiter = gevent.spawn(waiting.wait_for_block, raiden, 10, retry_timeout=60)
+    gevent.sleep(0)
+    assert len(raiden.state_waiters.waiting) == 1
+
+    dispatch(raiden, make_block(5))
+    gevent.sleep(0)
+    assert not waiter.ready()
+
+    dispatch(raiden, make_block(10))
+    waiter.get(timeout=1)
+    assert not raiden.state_waiters.waiting
+
+    # The condition holds already, the state waiters are not used
+    waiting.wait_for_block(raiden, 10, retry_timeout=60)
+    assert not raiden.state_waiters.waiting
+
+
+def test_wait_for_state_checks_the_node_is_running():
+    raiden = MockRaidenService()
+    raiden.alarm = None
+
+    with pytest.raises(AssertionError):
+        waiting.wait_for_block(raiden, 10, retry_timeout=0.01)
+    assert not raiden.state_waiters.waiting
+
+
+def test_wait_for_state_raises_the_condition_errors():
+    raiden = MockRaidenService()
+    raiden.alarm = True
+
+    def condition(chain_state, events):  # pylint: disable=unused-argument
+        if chain_state.block_number > 1:
+            raise ValueError("condition failed")
+        return False
+
+    waiter = gevent.spawn(waiting.wait_for_state, raiden, condition, retry_timeout=60)
+    gevent.sleep(0)
+    dispatch(raiden, make_block(2))
+
+    with pytest.raises(ValueError):
+        waiter.get(timeout=1)
+    assert not raiden.state_waiters.waiting
@@ -2,6 +2,7 @@ import os
 import sqlite3
 from dataclasses import dataclass, field
 
+import gevent
 import pytest
 
 from raiden.constants import RAIDEN_DB_VERSION
@@ -15,7 +16,7 @@ from raiden.transfer.architecture import State, StateManager, TransitionResult
 from raiden.transfer.events import EventPaymentSentFailed
 from raiden.transfer.state_change import Block, ContractReceiveChannelBatchUnlock
 from raiden.utils import sha3
-from raiden.utils.typing import List
+from raiden.utils.typing import Dict, List
 
 
 class Empty(State):
@@ -37,6 +38,17 @@ def state_transtion_acc(state, state_change):
     return TransitionResult(state, list())
 
 
+@dataclass
+class BlocksState(State):
+    blocks: Dict[str, Block] = field(default_factory=dict)
+
+
+def state_transition_blocks(state, state_change):
+    state = state or BlocksState()
+    state.blocks[str(state_change.block_number)] = state_change
+    return TransitionResult(state, list())
+
+
 def new_wal(state_transition, state=None):
     serializer = JSONSerializer
 
@@ -221,3 +233,191 @@ def test_get_snapshot_closest_to_state_change():
 
     _, snapshot = wal.storage.get_snapshot_closest_to_state_change("latest")
     assert snapshot.state_changes == [block1, block2, block3]
+
+
+def test_restore_from_snapshot_does_not_replay_snapshot_state_change():
+    wal = new_wal(state_transtion_acc)
+
+    block1 = Block(block_number=5, gas_limit=1, block_hash=factories.make_transaction_hash())
+    wal.log_and_dispatch(block1)
+    block2 = Block(block_number=7, gas_limit=1, block_hash=factories.make_transaction_hash())
+    wal.log_and_dispatch(block2)
+    wal.snapshot()
+
+    newwal = restore_to_state_change(
+        transition_function=state_transtion_acc,
+        storage=wal.storage,
+        state_change_identifier="latest",
+    )
+
+    assert newwal.replayed_state_changes == 0
+    assert newwal.state_change_id == wal.state_change_id
+    assert newwal.snapshot_state_change_id == wal.state_change_id
+    assert newwal.state_manager.current_state.state_changes == [block1, block2]
+
+    block3 = Block(block_number=8, gas_limit=1, block_hash=factories.make_transaction_hash())
+    wal.log_and_dispatch(block3)
+
+    newwal = restore_to_state_change(
+        transition_function=state_transtion_acc,
+        storage=wal.storage,
+        state_change_identifier="latest",
+    )
+
+    assert newwal.replayed_state_changes == 1
+    assert newwal.state_manager.current_state.state_changes == [block1, block2, block3]
+
+
+def test_snapshot_async_coalesces_requests():
+    wal = new_wal(state_transtion_acc)
+
+    block1 = Block(block_number=5, gas_limit=1, block_hash=factories.make_transaction_hash())
+    wal.log_and_dispatch(block1)
+    greenlet = wal.snapshot_async()
+    assert greenlet is not None
+
+    block2 = Block(block_number=7, gas_limit=1, block_hash=factories.make_transaction_hash())
+    wal.log_and_dispatch(block2)
+    assert wal.snapshot_async() is None, "the request must be merged into the running snapshot"
+
+    wal.wait_for_snapshot()
+    assert greenlet.successful()
+    assert wal.snapshot_state_change_id == wal.state_change_id
+
+    snapshot_id, snapshot = wal.storage.get_snapshot_closest_to_state_change("latest")
+    assert snapshot_id == wal.state_change_id
+    assert snapshot.state_changes == [block1, block2]
+
+    # Nothing changed since the last snapshot, it must not be written again
+    wal.snapshot()
+    assert len(wal.storage.get_snapshots()) == 1
+
+
+def test_log_and_dispatch_returns_the_state_it_dispatched_on():
+    wal = new_wal(state_transition_blocks, BlocksState())
+
+    # Writing to the database context switches to the other dispatches
+    write_state_change = wal.storage.write_state_change
+
+    def yielding_write_state_change(*args, **kwargs):
+        gevent.sleep(0)
+        return write_state_change(*args, **kwargs)
+
+    wal.storage.write_state_change = yielding_write_state_change
+
+    blocks = [
+        Block(block_number=block_number, gas_limit=1, block_hash=factories.make_block_hash())
+        for block_number in range(1, 4)
+    ]
+    greenlets = [gevent.spawn(wal.log_and_dispatch, block) for block in blocks]
+    gevent.joinall(greenlets, raise_error=True)
+
+    for block, greenlet in zip(blocks, greenlets):
+        old_state, new_state, _ = greenlet.value
+        assert new_state.blocks == {**old_state.blocks, str(block.block_number): block}
+
+
+def test_clean_shutdown_marker():
+    wal = new_wal(state_transtion_acc)
+    storage = wal.storage
+
+    assert storage.get_clean_shutdown_marker() is None
+
+    storage.write_clean_shutdown_marker(10)
+    assert storage.get_clean_shutdown_marker() == 10
+
+    storage.delete_clean_shutdown_marker()
+    assert storage.get_clean_shutdown_marker() is None
+
+
+def test_delta_snapshots():
+    wal = new_wal(state_transition_blocks)
+    wal.snapshot_deltas_per_base = 2
+    wal.base_snapshots_to_keep = 2
+    wal.old_base_snapshots_interval = 100
+    wal.old_base_snapshots_to_keep = 1
+
+    def dispatch_blocks(start, end):
+        for block_number in range(start, end):
+            block = Block(
+                block_number=block_number,
+                gas_limit=1,
+                block_hash=factories.make_transaction_hash(),
+            )
+            wal.log_and_dispatch(block)
+
+    def restored_blocks(state_change_identifier="latest"):
+        newwal = restore_to_state_change(
+            transition_function=state_transition_blocks,
+            storage=wal.storage,
+            state_change_identifier=state_change_identifier,
+        )
+        assert newwal.replayed_state_changes == 0
+        return newwal.state_manager.current_state.blocks
+
+    dispatch_blocks(1, 20)
+    wal.snapshot()
+    assert len(wal.storage.get_snapshots()) == 1
+    assert not wal.storage.get_snapshot_deltas()
+
+    dispatch_blocks(20, 21)
+    wal.snapshot()
+    deltas = wal.storage.get_snapshot_deltas()
+    assert len(deltas) == 1
+    assert len(deltas[0].data) * 2 < len(wal.storage.get_snapshots()[0].data)
+    assert restored_blocks() == wal.state_manager.current_state.blocks
+
+    dispatch_blocks(21, 22)
+    wal.snapshot()
+    assert len(wal.storage.get_snapshot_deltas()) == 2
+    assert restored_blocks() == wal.state_manager.current_state.blocks
+    assert len(restored_blocks(wal.state_change_id - 1)) == 20
+
+    # after `snapshot_deltas_per_base` deltas a new base is written
+    dispatch_blocks(22, 23)
+    wal.snapshot()
+    assert len(wal.storage.get_snapshots()) == 2
+    assert restored_blocks() == wal.state_manager.current_state.blocks
+
+    # the deltas of the superseded base snapshots are deleted, and the
+    # superseded base snapshots are thinned out
+    for start in range(23, 29):
+        dispatch_blocks(start, start + 1)
+        wal.snapshot()
+
+    snapshots = wal.storage.get_snapshots()
+    assert [snapshot.state_change_identifier for snapshot in snapshots] == [19, 25, 28]
+    deltas = wal.storage.get_snapshot_deltas()
+    assert all(delta.base_snapshot_identifier >= snapshots[1].identifier for delta in deltas)
+    assert restored_blocks() == wal.state_manager.current_state.blocks
+
+    # the old state is restored from the kept base snapshot
+    newwal = restore_to_state_change(
+        transition_function=state_transition_blocks,
+        storage=wal.storage,
+        state_change_identifier=21,
+    )
+    assert newwal.replayed_state_changes == 2
+    assert len(newwal.state_manager.current_state.blocks) == 21
+
+
+def test_old_base_snapshots_are_capped():
+    storage = SerializedSQLiteStorage(":memory:", JSONSerializer)
+
+    for block_number in range(1, 101):
+        block = Block(
+            block_number=block_number, gas_limit=1, block_hash=factories.make_block_hash()
+        )
+        state_change_id = storage.write_state_change(block, "2019-01-01T00:00:00.000")
+        if block_number % 5 == 0:
+            storage.write_serialized_state_snapshot(state_change_id, "{}")
+            storage.delete_superseded_snapshots(
+                base_snapshots_to_keep=2,
+                old_base_snapshots_interval=20,
+                old_base_snapshots_to_keep=2,
+            )
+
+    # The first snapshot of the two most recent intervals before the
+    # recent snapshots are kept
+    snapshots = [snapshot.state_change_identifier for snapshot in storage.get_snapshots()]
+    assert snapshots == [60, 80, 95, 100]
@@ -1,10 +1,29 @@
+import json
+
 from raiden.constants import EMPTY_MERKLE_ROOT
-from raiden.tests.utils.factories import HOP1, HOP2, UNIT_SECRETHASH, make_block_hash
+from raiden.storage.serialization import JSONSerializer
+from raiden.tests.utils.factories import (
+    HOP1,
+    HOP2,
+    UNIT_SECRETHASH,
+    make_address,
+    make_block_hash,
+    make_payment_network_address,
+    make_transaction_hash,
+)
 from raiden.transfer.events import ContractSendChannelBatchUnlock
 from raiden.transfer.node import is_transaction_effect_satisfied, state_transition
+from raiden.transfer.state import CHANNEL_STATE_SETTLED, TokenNetworkGraphState, TokenNetworkState
 from raiden.transfer.state_change import (
     ContractReceiveChannelBatchUnlock,
     ContractReceiveChannelSettled,
+    ContractReceiveNewTokenNetwork,
+)
+from raiden.transfer.views import (
+    filter_channels_by_partneraddress,
+    get_channelstate_by_status,
+    get_channelstate_by_token_network_and_partner,
+    get_token_network_by_address,
 )
 
 
@@ -56,3 +75,58 @@ def test_is_transaction_effect_satisfied(
     iteration = state_transition(chain_state=chain_state, state_change=channel_settled)
 
     assert is_transaction_effect_satisfied(iteration.new_state, transaction, state_change)
+
+
+def test_token_network_index_is_maintained_and_restored(chain_state):
+    payment_network_address = make_payment_network_address()
+    token_network_address = make_address()
+    token_network_state = TokenNetworkState(
+        address=token_network_address,
+        token_address=make_address(),
+        network_graph=TokenNetworkGraphState(token_network_address),
+    )
+    assert get_token_network_by_address(chain_state, token_network_address) is None
+
+    new_token_network = ContractReceiveNewTokenNetwork(
+        transaction_hash=make_transaction_hash(),
+        payment_network_address=payment_network_address,
+        token_network=token_network_state,
+        block_number=1,
+        block_hash=make_block_hash(),
+    )
+    chain_state = state_transition(chain_state, new_token_network).new_state
+
+    assert get_token_network_by_address(chain_state, token_network_address) is token_network_state
+
+    # The index is not serialized, it is rebuilt from the payment networks
+    serialized = JSONSerializer.serialize(chain_state)
+    assert "tokennetworkaddresses_to_tokennetworks" not in json.loads(serialized)
+    restored = JSONSerializer.deserialize(serialized)
+    payment_network = restored.identifiers_to_paymentnetworks[payment_network_address]
+    assert (
+        get_token_network_by_address(restored, token_network_address)
+        is payment_network.tokennetworkaddresses_to_tokennetworks[token_network_address]
+    )
+
+
+def test_channel_views_do_not_mutate_the_state(
+    chain_state, payment_network_address, token_id, token_network_state
+):
+    # The snapshots serialize the state in a native thread, a view reading
+    # it concurrently must not add entries
+    partner = make_address()
+    assert (
+        get_channelstate_by_token_network_and_partner(
+            chain_state, token_network_state.address, partner
+        )
+        is None
+    )
+    assert not filter_channels_by_partneraddress(
+        chain_state, payment_network_address, token_id, [partner]
+    )
+    assert partner not in token_network_state.partneraddresses_to_channelidentifiers
+
+    assert not get_channelstate_by_status(
+        chain_state, payment_network_address, token_id, CHANNEL_STATE_SETTLED
+    )
+    assert CHANNEL_STATE_SETTLED not in token_network_state.statuses_to_channels
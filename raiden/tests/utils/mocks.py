@@ -1,8 +1,12 @@
 import random
 from unittest.mock import Mock, patch
 
-import requests
+from gevent.queue import Queue
 
+from raiden.constants import EMPTY_HASH, GENESIS_BLOCK_NUMBER
+from raiden.network.block_source import BlockSource, HeadChange
+from raiden.network.pathfinding import session
+from raiden.storage.restore import HistoricChannelStates
 from raiden.storage.serialization import JSONSerializer
 from raiden.storage.sqlite import SerializedSQLiteStorage
 from raiden.storage.wal import WriteAheadLog
@@ -12,15 +16,20 @@ from raiden.transfer.architecture import StateManager
 from raiden.transfer.identifiers import CanonicalIdentifier
 from raiden.transfer.state_change import ActionInitChain
 from raiden.utils import privatekey_to_address
+from raiden.utils.profiling import StartupProfiler
 from raiden.utils.signer import LocalSigner
 from raiden.utils.typing import (
     Address,
+    BlockHash,
+    BlockNumber,
     BlockSpecification,
     ChannelID,
     Dict,
+    Optional,
     PaymentNetworkAddress,
     TokenNetworkAddress,
 )
+from raiden.waiting import StateWaiters
 
 
 class MockJSONRPCClient:
@@ -106,6 +115,7 @@ class MockPaymentNetwork:
 class MockChainState:
     def __init__(self):
         self.identifiers_to_paymentnetworks = {}
+        self.tokennetworkaddresses_to_tokennetworks = {}
 
 
 class MockRaidenService:
@@ -122,6 +132,7 @@ class MockRaidenService:
         self.message_handler = message_handler
 
         self.user_deposit = Mock()
+        self.startup_profiler = StartupProfiler()
 
         if state_transition is None:
             state_transition = node.state_transition
@@ -130,6 +141,8 @@ class MockRaidenService:
         state_manager = StateManager(state_transition, None)
         storage = SerializedSQLiteStorage(":memory:", serializer)
         self.wal = WriteAheadLog(state_manager, storage)
+        self.historic_channel_states = HistoricChannelStates(storage)
+        self.state_waiters = StateWaiters()
 
         state_change = ActionInitChain(
             pseudo_random_generator=random.Random(),
@@ -176,6 +189,7 @@ def make_raiden_service_mock(
     tokennetworkaddresses_to_tokennetworks[token_network_address] = token_network
 
     chain_state.identifiers_to_paymentnetworks = {payment_network_address: payment_network}
+    chain_state.tokennetworkaddresses_to_tokennetworks = {token_network_address: token_network}
     return raiden_service
 
 
@@ -195,7 +209,7 @@ def patched_get_for_succesful_pfs_info():
     response = Mock()
     response.configure_mock(status_code=200)
     response.json = Mock(return_value=json_data)
-    return patch.object(requests, "get", return_value=response)
+    return patch.object(session, "get", return_value=response)
 
 
 class MockEth:
@@ -217,3 +231,51 @@ class MockWeb3:
     def __init__(self, netid):
         self.version = MockWeb3Version(netid)
         self.eth = MockEth()
+
+
+class FakeBlockSource(BlockSource):
+    """ A block source for tests, new blocks are created with `mine` and
+    `reorganize`.
+    """
+
+    def __init__(self, block_number: BlockNumber = GENESIS_BLOCK_NUMBER):
+        super().__init__()
+        self.blocks = [self._make_block(block_number, parent_hash=EMPTY_HASH)]
+        self._heads: Queue = Queue()
+
+    @staticmethod
+    def _make_block(block_number: BlockNumber, parent_hash: BlockHash) -> Dict:
+        return {
+            "number": block_number,
+            "hash": factories.make_block_hash(),
+            "parentHash": parent_hash,
+            "gasLimit": 1,
+        }
+
+    def mine(self, number_of_blocks: int = 1) -> None:
+        for _ in range(number_of_blocks):
+            head = self.blocks[-1]
+            self.blocks.append(self._make_block(head["number"] + 1, parent_hash=head["hash"]))
+        self._heads.put(self.blocks[-1])
+
+    def reorganize(self, depth: int) -> None:
+        """ Replace the latest `depth` blocks with a branch of the same length. """
+        del self.blocks[-depth:]
+        self.mine(depth)
+
+    def stop(self) -> None:
+        super().stop()
+        self._heads.put(None)
+
+    def get_latest_block(self) -> Dict:
+        self._head_change(self.blocks[-1])
+        return self.blocks[-1]
+
+    def wait_for_head(self) -> Optional[HeadChange]:
+        while not self._stop_event.is_set():
+            block = self._heads.get()
+            if block is not None:
+                head_change = self._head_change(block)
+                if head_change is not None:
+                    return head_change
+        return None
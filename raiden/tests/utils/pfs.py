@@ -0,0 +1,122 @@
+import json
+import re
+from collections import Counter
+from uuid import uuid4
+
+from eth_utils import to_checksum_address
+from gevent.pywsgi import WSGIServer
+
+from raiden.network.pathfinding import PFSError
+from raiden.utils.typing import Any, Dict, List, Optional, Set, Tuple
+
+PATHS_ROUTE = re.compile(r"^/api/v1/(0x[0-9a-fA-F]{40})/paths$")
+IOU_ROUTE = re.compile(r"^/api/v1/(0x[0-9a-fA-F]{40})/payment/iou$")
+
+
+class PFSStandIn:
+    """ Local HTTP server which answers like a pathfinding service.
+
+    Every path request is answered with the direct path from the source to
+    the target, the IOUs are checked to increase by at least `price`. This is
+    enough to exercise the PFS client, including its connection reuse, in
+    tests and benchmarks without a network connection.
+
+    Args:
+        payment_address: The checksummed address to be paid by the IOUs.
+        price: The fee expected for each path request.
+    """
+
+    def __init__(self, payment_address: str, price: int = 0) -> None:
+        self.payment_address = payment_address
+        self.price = price
+
+        self.requests: Counter = Counter()
+        self.connections: Set[Tuple[str, str]] = set()
+        self.last_ious: Dict[Tuple[str, str], Dict[str, Any]] = dict()
+
+        self.server = WSGIServer(("127.0.0.1", 0), self._application, log=None)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_port}"
+
+    def start(self) -> None:
+        self.server.start()
+
+    def stop(self) -> None:
+        self.server.stop()
+
+    def __enter__(self) -> "PFSStandIn":
+        self.start()
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        self.stop()
+
+    def _application(self, environ, start_response) -> List[bytes]:
+        self.connections.add((environ["REMOTE_ADDR"], environ["REMOTE_PORT"]))
+
+        path = environ["PATH_INFO"]
+        method = environ["REQUEST_METHOD"]
+
+        if method == "GET" and path == "/api/v1/info":
+            self.requests["info"] += 1
+            status, body = "200 OK", self._info()
+        elif method == "GET" and IOU_ROUTE.match(path):
+            self.requests["iou"] += 1
+            status, body = "200 OK", self._last_iou(environ)
+        elif method == "POST" and PATHS_ROUTE.match(path):
+            self.requests["paths"] += 1
+            length = int(environ.get("CONTENT_LENGTH") or 0)
+            status, body = self._paths(json.loads(environ["wsgi.input"].read(length)))
+        else:
+            status, body = "404 Not Found", {"errors": f"Unknown route {method} {path}"}
+
+        data = json.dumps(body).encode()
+        start_response(
+            status, [("Content-Type", "application/json"), ("Content-Length", str(len(data)))]
+        )
+        return [data]
+
+    def _info(self) -> Dict[str, Any]:
+        return {
+            "price_info": self.price,
+            "payment_address": self.payment_address,
+            "message": "Local pathfinding service stand-in",
+            "operator": "raiden tests",
+            "version": "0.0.0",
+            "network_info": {},
+        }
+
+    def _last_iou(self, environ) -> Dict[str, Any]:
+        query = dict(
+            parameter.split("=", 1)
+            for parameter in environ.get("QUERY_STRING", "").split("&")
+            if parameter
+        )
+        return {"last_iou": self.last_ious.get((query.get("sender"), query.get("receiver")))}
+
+    def _paths(self, payload: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+        error_code = self._check_iou(payload.get("iou"))
+        if error_code is not None:
+            return "400 Bad Request", {"errors": error_code.name, "error_code": error_code.value}
+
+        iou = payload["iou"]
+        self.last_ious[(iou["sender"], iou["receiver"])] = iou
+
+        path = [to_checksum_address(payload["from"]), to_checksum_address(payload["to"])]
+        return "200 OK", {"result": [{"path": path, "fees": 0}], "feedback_token": uuid4().hex}
+
+    def _check_iou(self, iou: Optional[Dict[str, Any]]) -> Optional[PFSError]:
+        if iou is None:
+            return PFSError.MISSING_IOU
+
+        if iou["receiver"] != self.payment_address:
+            return PFSError.WRONG_IOU_RECIPIENT
+
+        last_iou = self.last_ious.get((iou["sender"], iou["receiver"]))
+        last_amount = last_iou["amount"] if last_iou is not None else 0
+        if iou["amount"] < last_amount + self.price:
+            return PFSError.INSUFFICIENT_SERVICE_PAYMENT
+
+        return None
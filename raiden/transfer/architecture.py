@@ -1,10 +1,12 @@
 # pylint: disable=too-few-public-methods
+import time
 from copy import deepcopy
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, fields
 
 from raiden.constants import EMPTY_BALANCE_HASH, UINT64_MAX, UINT256_MAX
 from raiden.transfer.identifiers import CanonicalIdentifier, QueueIdentifier
 from raiden.transfer.utils import hash_balance_data
+from raiden.utils.metrics import REGISTRY
 from raiden.utils.typing import (
     AdditionalHash,
     Address,
@@ -16,6 +18,7 @@ from raiden.utils.typing import (
     Callable,
     ChainID,
     ChannelID,
+    Dict,
     Generic,
     List,
     Locksroot,
@@ -34,6 +37,7 @@ from raiden.utils.typing import (
     TokenNetworkAddress,
     TransactionHash,
     Tuple,
+    Type,
     TypeVar,
 )
 
@@ -76,7 +80,41 @@ class State:
     - This class is used as a marker for states.
     """
 
-    pass
+    # Allows the subclasses decorated with `slotted` to drop the instance
+    # dictionary
+    __slots__ = ()
+
+
+ST = TypeVar("ST", bound=State)
+
+
+def slotted(cls: Type[ST]) -> Type[ST]:
+    """ Rebuild the dataclass `cls` with a `__slots__` entry per field.
+
+    A hub keeps a lot of locks and balance proofs in memory, and the state is
+    deep copied for every state change. Without the instance dictionary these
+    objects are smaller and faster to copy. The dataclass decorator must be
+    applied first, and the class must not rely on the zero-argument `super()`.
+    """
+    names = tuple(state_field.name for state_field in fields(cls))
+
+    namespace = dict(cls.__dict__)
+    for name in names + ("__dict__", "__weakref__"):
+        namespace.pop(name, None)
+    namespace["__slots__"] = names
+
+    # The default copy protocol looks up the slot names on every copy, which
+    # is slower than copying an instance dictionary
+    def __deepcopy__(self: Any, memo: Dict[int, Any]) -> Any:
+        result = object.__new__(self.__class__)
+        memo[id(self)] = result
+        for name in names:
+            setattr(result, name, deepcopy(getattr(self, name), memo))
+        return result
+
+    namespace["__deepcopy__"] = __deepcopy__
+
+    return type(cls.__name__, cls.__bases__, namespace)
 
 
 @dataclass
@@ -194,7 +232,10 @@ class ContractReceiveStateChange(StateChange):
             raise ValueError("block_hash must be of type block_hash")
 
 
-ST = TypeVar("ST", bound=State)
+DISPATCH_DURATION = REGISTRY.histogram(
+    "raiden_state_manager_dispatch_seconds",
+    "Time spent applying a state change, including the copy of the state.",
+).labels()
 
 
 class StateManager(Generic[ST]):
@@ -235,6 +276,7 @@ class StateManager(Generic[ST]):
             these events.
         """
         assert isinstance(state_change, StateChange)
+        start = time.monotonic()
 
         # the state objects must be treated as immutable, so make a copy of the
         # current state and pass the copy to the state machine to be modified.
@@ -242,6 +284,7 @@ class StateManager(Generic[ST]):
 
         # update the current state by applying the change
         iteration = self.state_transition(next_state, state_change)
+        DISPATCH_DURATION.observe(time.monotonic() - start)
 
         assert isinstance(iteration, TransitionResult)
 
@@ -286,6 +329,7 @@ class TransitionResult(Generic[ST]):  # pylint: disable=unsubscriptable-object
         return not self.__eq__(other)
 
 
+@slotted
 @dataclass
 class BalanceProofUnsignedState(State):
     """ Balance proof from the local node without the signature. """
@@ -346,6 +390,7 @@ class BalanceProofUnsignedState(State):
         return self.canonical_identifier.channel_identifier
 
 
+@slotted
 @dataclass
 class BalanceProofSignedState(State):
     """ Proof of a channel balance that can be used on-chain to resolve
@@ -41,7 +41,13 @@ from raiden.transfer.mediated_transfer.state_change import (
     ReceiveLockExpired,
     ReceiveTransferRefund,
 )
-from raiden.transfer.merkle_tree import LEAVES, compute_layers, merkleroot
+from raiden.transfer.merkle_tree import (
+    LEAVES,
+    compute_layers_with,
+    compute_layers_without,
+    contains_leaf,
+    merkleroot,
+)
 from raiden.transfer.state import (
     CHANNEL_STATE_CLOSED,
     CHANNEL_STATE_CLOSING,
@@ -1043,11 +1049,8 @@ def compute_merkletree_with(
     # Use None to inform the caller the lockshash is already known
     result = None
 
-    leaves = merkletree.layers[LEAVES]
-    if lockhash not in leaves:
-        leaves = list(leaves)
-        leaves.append(Keccak256(lockhash))
-        result = MerkleTreeState(compute_layers(leaves))
+    if not contains_leaf(merkletree.layers, Keccak256(lockhash)):
+        result = MerkleTreeState(compute_layers_with(merkletree.layers, Keccak256(lockhash)))
 
     return result
 
@@ -1058,13 +1061,11 @@ def compute_merkletree_without(
     # Use None to inform the caller the lockhash is unknown
     result = None
 
-    leaves = merkletree.layers[LEAVES]
-    if lockhash in leaves:
-        leaves = list(leaves)
-        leaves.remove(Keccak256(lockhash))
-
-        if leaves:
-            result = MerkleTreeState(compute_layers(leaves))
+    if contains_leaf(merkletree.layers, Keccak256(lockhash)):
+        if len(merkletree.layers[LEAVES]) > 1:
+            result = MerkleTreeState(
+                compute_layers_without(merkletree.layers, Keccak256(lockhash))
+            )
         else:
             result = make_empty_merkle_tree()
 
@@ -1,4 +1,5 @@
 # the layers grow from the leaves to the root
+from bisect import bisect_left
 from typing import TYPE_CHECKING
 
 from raiden.exceptions import HashLengthNot32
@@ -64,6 +65,82 @@ def compute_layers(elements: List[Keccak256]) -> List[List[Keccak256]]:
     return tree
 
 
+def _update_layers(
+    layers: List[List[Keccak256]], leaves: List[Keccak256], first_changed: int
+) -> List[List[Keccak256]]:
+    """ Computes the layers of the merkletree for the new `leaves`, reusing
+    the hashes from `layers` which do not depend on the leaves at or after the
+    position `first_changed`.
+
+    Because the leaves are sorted, inserting or removing a leaf shifts the
+    pairs on its right, so those must be hashed again. The nodes on its left
+    are kept, which makes adding a leaf larger than all others O(log n).
+    """
+    tree = [leaves]
+
+    layer = leaves
+    level = 0
+    while len(layer) > 1:
+        # A node is unchanged if both its children are unchanged
+        first_changed //= 2
+        level += 1
+
+        reused = layers[level][:first_changed] if level < len(layers) else []
+        paired_items = split_in_pairs(layer[2 * len(reused) :])
+        layer = reused + [hash_pair(a, b) for a, b in paired_items]
+        tree.append(layer)
+
+    return tree
+
+
+def compute_layers_with(
+    layers: List[List[Keccak256]], element: Keccak256
+) -> List[List[Keccak256]]:
+    """ Computes the layers of the merkletree with `element` added.
+
+    `layers` must not be empty nor contain `element`.
+    """
+    leaves = layers[LEAVES]
+    if not leaves:
+        return compute_layers([element])
+
+    if len(element) != 32:
+        raise HashLengthNot32()
+
+    position = bisect_left(leaves, element)
+    if position < len(leaves) and leaves[position] == element:
+        raise ValueError("Duplicated element")
+
+    new_leaves = leaves[:position] + [element] + leaves[position:]
+    return _update_layers(layers, new_leaves, position)
+
+
+def compute_layers_without(
+    layers: List[List[Keccak256]], element: Keccak256
+) -> List[List[Keccak256]]:
+    """ Computes the layers of the merkletree with `element` removed.
+
+    `element` must be one of the leaves and not the only one.
+    """
+    leaves = layers[LEAVES]
+
+    position = bisect_left(leaves, element)
+    if position == len(leaves) or leaves[position] != element:
+        raise ValueError("Unknown element")
+
+    new_leaves = leaves[:position] + leaves[position + 1 :]
+    assert new_leaves, "Use make_empty_merkle_tree if there are no elements"
+
+    return _update_layers(layers, new_leaves, position)
+
+
+def contains_leaf(layers: List[List[Keccak256]], element: Keccak256) -> bool:
+    """ Binary search for `element` in the sorted leaves. """
+    leaves = layers[LEAVES]
+    position = bisect_left(leaves, element)
+    return position < len(leaves) and leaves[position] == element
+
+
 def merkleroot(merkletree: "MerkleTreeState") -> Locksroot:
     """ Return the root element of the merkle tree. """
     assert merkletree.layers, "the merkle tree layers are empty"
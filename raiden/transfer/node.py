@@ -111,23 +111,7 @@ def get_networks(
 def get_token_network_by_address(
     chain_state: ChainState, token_network_address: TokenNetworkAddress
 ) -> Optional[TokenNetworkState]:
-    payment_network_address = chain_state.tokennetworkaddresses_to_paymentnetworkaddresses.get(
-        token_network_address
-    )
-
-    payment_network_state = None
-    if payment_network_address:
-        payment_network_state = chain_state.identifiers_to_paymentnetworks.get(
-            payment_network_address
-        )
-
-    token_network_state = None
-    if payment_network_state:
-        token_network_state = payment_network_state.tokennetworkaddresses_to_tokennetworks.get(
-            token_network_address
-        )
-
-    return token_network_state
+    return chain_state.tokennetworkaddresses_to_tokennetworks.get(token_network_address)
 
 
 def subdispatch_to_all_channels(
@@ -147,6 +131,7 @@ def subdispatch_to_all_channels(
                     block_number=block_number,
                     block_hash=block_hash,
                 )
+                token_network.update_channel_status(token_network_state, channel_state)
                 events.extend(result.events)
 
     return TransitionResult(chain_state, events)
@@ -443,6 +428,9 @@ def maybe_add_tokennetwork(
 
         mapping = chain_state.tokennetworkaddresses_to_paymentnetworkaddresses
         mapping[token_network_address] = payment_network_address
+        chain_state.tokennetworkaddresses_to_tokennetworks[
+            token_network_address
+        ] = token_network_state
 
 
 def sanity_check(iteration: TransitionResult[ChainState]) -> None:
@@ -622,6 +610,9 @@ def handle_new_payment_network(
     payment_network_address = PaymentNetworkAddress(payment_network.address)
     if payment_network_address not in chain_state.identifiers_to_paymentnetworks:
         chain_state.identifiers_to_paymentnetworks[payment_network_address] = payment_network
+        chain_state.tokennetworkaddresses_to_tokennetworks.update(
+            payment_network.tokennetworkaddresses_to_tokennetworks
+        )
 
     return TransitionResult(chain_state, events)
 
@@ -1119,4 +1110,5 @@ def _get_channels_close_events(
                     block_hash=chain_state.block_hash,
                 )
             )
+            token_network.update_channel_status(token_network_state, channel_state)
     return events
@@ -6,11 +6,13 @@ from random import Random
 from typing import TYPE_CHECKING, Tuple
 
 import networkx
+from cachetools import LRUCache
 
 from raiden.constants import (
     EMPTY_LOCK_HASH,
     EMPTY_MERKLE_ROOT,
     EMPTY_SECRETHASH,
+    ROUTING_DISTANCES_CACHE_SIZE,
     UINT64_MAX,
     UINT256_MAX,
 )
@@ -23,6 +25,7 @@ from raiden.transfer.architecture import (
     SendMessageEvent,
     State,
     TransferTask,
+    slotted,
 )
 from raiden.transfer.identifiers import CanonicalIdentifier, QueueIdentifier
 from raiden.utils import lpex, pex, sha3
@@ -147,6 +150,17 @@ class PaymentMappingState(State):
     secrethashes_to_task: Dict[SecretHash, TransferTask] = field(repr=False, default_factory=dict)
 
 
+class DistancesCache(LRUCache):
+    """ Shortest path lengths of a graph, keyed by the version of the graph.
+
+    The copies of the graph made by the state transitions share the cache,
+    the entries of an older version are evicted as the cache fills up.
+    """
+
+    def __deepcopy__(self, memo: Dict[int, Any]) -> "DistancesCache":
+        return self
+
+
 # This is necessary for the routing only, maybe it should be transient state
 # outside of the state tree.
 @dataclass(repr=False)
@@ -160,12 +174,21 @@ class TokenNetworkGraphState(State):
     channel_identifier_to_participants: Dict[ChannelID, Tuple[Address, Address]] = field(
         repr=False, default_factory=dict
     )
+    # Incremented on every change of `network`, used to invalidate the
+    # routing caches.
+    version: int = field(repr=False, default=0)
+    # Routing cache of this node, it is not serialized.
+    distances_cache: DistancesCache = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self.distances_cache = DistancesCache(maxsize=ROUTING_DISTANCES_CACHE_SIZE)
 
     def __repr__(self):
         # pylint: disable=no-member
         return "TokenNetworkGraphState(num_edges:{})".format(len(self.network.edges))
 
 
+@slotted
 @dataclass
 class RouteState(State):
     """ A possible route provided by a routing service.
@@ -183,6 +206,7 @@ class RouteState(State):
             raise ValueError("node_address must be an address instance")
 
 
+@slotted
 @dataclass
 class HashTimeLockState(State):
     """ Represents a hash time lock. """
@@ -190,7 +214,6 @@ class HashTimeLockState(State):
     amount: PaymentWithFeeAmount
     expiration: BlockExpiration
     secrethash: SecretHash
-    encoded: EncodedData = field(init=False, repr=False)
     lockhash: LockHash = field(repr=False, default=EMPTY_LOCK_HASH)
 
     def __post_init__(self) -> None:
@@ -203,17 +226,25 @@ class HashTimeLockState(State):
         if not isinstance(self.secrethash, T_Keccak256):
             raise ValueError("secrethash must be a Keccak256 instance")
 
+        self.lockhash = LockHash(sha3(self.encoded))
+
+    @property
+    def encoded(self) -> EncodedData:
+        """ The packed lock, as used for the merkle tree leaves.
+
+        It is only needed to compute the lockhash and to unlock on-chain, so
+        it is packed on demand instead of being kept for every lock.
+        """
         packed = messages.Lock(buffer_for(messages.Lock))
         # pylint: disable=assigning-non-slot
         packed.amount = self.amount
         packed.expiration = self.expiration
         packed.secrethash = self.secrethash
 
-        self.encoded = EncodedData(packed.data)
-
-        self.lockhash = LockHash(sha3(self.encoded))
+        return EncodedData(packed.data)
 
 
+@slotted
 @dataclass
 class UnlockPartialProofState(State):
     """ Stores the lock along with its unlocking secret. """
@@ -223,7 +254,6 @@ class UnlockPartialProofState(State):
     amount: PaymentWithFeeAmount = field(repr=False, default=PaymentWithFeeAmount(0))
     expiration: BlockExpiration = field(repr=False, default=BlockExpiration(0))
     secrethash: SecretHash = field(repr=False, default=EMPTY_SECRETHASH)
-    encoded: EncodedData = field(init=False, repr=False)
     lockhash: LockHash = field(repr=False, default=EMPTY_LOCK_HASH)
 
     def __post_init__(self) -> None:
@@ -236,9 +266,12 @@ class UnlockPartialProofState(State):
         self.amount = self.lock.amount
         self.expiration = self.lock.expiration
         self.secrethash = self.lock.secrethash
-        self.encoded = self.lock.encoded
         self.lockhash = self.lock.lockhash
 
+    @property
+    def encoded(self) -> EncodedData:
+        return self.lock.encoded
+
 
 @dataclass
 class UnlockProofState(State):
@@ -285,6 +318,7 @@ class TransactionExecutionStatus(State):
             raise ValueError(f"result must be one of '{self.SUCCESS}', '{self.FAILURE}' or 'None'")
 
 
+@slotted
 @dataclass
 class MerkleTreeState(State):
     layers: List[List[Keccak256]]
@@ -443,6 +477,11 @@ class TokenNetworkState(State):
     partneraddresses_to_channelidentifiers: Dict[Address, List[ChannelID]] = field(
         repr=False, default_factory=lambda: defaultdict(list)
     )
+    # Index of the channels by their status, maintained by the token network
+    # state transitions. It is derived from the channels and not serialized.
+    statuses_to_channels: Dict[str, Dict[ChannelID, NettingChannelState]] = field(
+        init=False, repr=False, compare=False
+    )
 
     def __post_init__(self) -> None:
         if not isinstance(self.address, T_Address):
@@ -455,6 +494,16 @@ class TokenNetworkState(State):
             list, self.partneraddresses_to_channelidentifiers
         )
 
+        # Avoid a cyclic import, the channel module depends on this one
+        from raiden.transfer.channel import get_status
+
+        self.statuses_to_channels = defaultdict(dict)
+        channels = self.channelidentifiers_to_channels.items()  # pylint: disable=no-member
+        for channel_identifier, channel_state in channels:
+            self.statuses_to_channels[get_status(channel_state)][
+                channel_identifier
+            ] = channel_state
+
 
 @dataclass
 class PaymentNetworkState(State):
@@ -511,6 +560,11 @@ class ChainState(State):
     tokennetworkaddresses_to_paymentnetworkaddresses: Dict[
         TokenNetworkAddress, PaymentNetworkAddress
     ] = field(repr=False, default_factory=dict)
+    # Index of the token networks of all payment networks, maintained by the
+    # state transitions which add token networks. It is not serialized.
+    tokennetworkaddresses_to_tokennetworks: Dict[TokenNetworkAddress, TokenNetworkState] = field(
+        init=False, repr=False, compare=False
+    )
 
     def __post_init__(self) -> None:
         if not isinstance(self.block_number, T_BlockNumber):
@@ -522,6 +576,15 @@ class ChainState(State):
         if not isinstance(self.chain_id, T_ChainID):
             raise ValueError("chain_id must be of ChainID type")
 
+        self.tokennetworkaddresses_to_tokennetworks = {
+            token_network_address: token_network
+            # pylint: disable=no-member
+            for payment_network in self.identifiers_to_paymentnetworks.values()
+            for token_network_address, token_network in (
+                payment_network.tokennetworkaddresses_to_tokennetworks.items()
+            )
+        }
+
     def __repr__(self):
         return (
             "ChainState(block_number={} block_hash={} networks={} " "qty_transfers={} chain_id={})"
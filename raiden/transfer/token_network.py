@@ -1,6 +1,6 @@
 from raiden.transfer import channel
 from raiden.transfer.architecture import Event, StateChange, TransitionResult
-from raiden.transfer.state import TokenNetworkState
+from raiden.transfer.state import NettingChannelState, TokenNetworkState
 from raiden.transfer.state_change import (
     ActionChannelClose,
     ActionChannelSetFee,
@@ -13,7 +13,7 @@ from raiden.transfer.state_change import (
     ContractReceiveRouteNew,
     ContractReceiveUpdateTransfer,
 )
-from raiden.utils.typing import MYPY_ANNOTATION, BlockHash, BlockNumber, List, Union
+from raiden.utils.typing import MYPY_ANNOTATION, BlockHash, BlockNumber, ChannelID, List, Union
 
 # TODO: The proper solution would be to introduce a marker for state changes
 # that contains channel IDs and other specific channel attributes
@@ -27,6 +27,29 @@ StateChangeWithChannelID = Union[
 ]
 
 
+def update_channel_status(
+    token_network_state: TokenNetworkState, channel_state: NettingChannelState
+) -> None:
+    """ Update the status index of the token network after `channel_state`
+    changed.
+    """
+    status = channel.get_status(channel_state)
+    channel_identifier = channel_state.identifier
+
+    for other_status, channels in token_network_state.statuses_to_channels.items():
+        if other_status != status:
+            channels.pop(channel_identifier, None)
+
+    token_network_state.statuses_to_channels[status][channel_identifier] = channel_state
+
+
+def remove_channel_status(
+    token_network_state: TokenNetworkState, channel_identifier: ChannelID
+) -> None:
+    for channels in token_network_state.statuses_to_channels.values():
+        channels.pop(channel_identifier, None)
+
+
 def subdispatch_to_channel_by_id(
     token_network_state: TokenNetworkState,
     state_change: StateChangeWithChannelID,
@@ -55,8 +78,10 @@ def subdispatch_to_channel_by_id(
         if result.new_state is None:
             del ids_to_channels[channel_identifier]
             partner_to_channelids.remove(channel_identifier)
+            remove_channel_status(token_network_state, channel_identifier)
         else:
             ids_to_channels[channel_identifier] = result.new_state
+            update_channel_status(token_network_state, result.new_state)
 
         events.extend(result.events)
 
@@ -91,6 +116,7 @@ def handle_channelnew(
     token_network_state.network_graph.channel_identifier_to_participants[
         state_change.channel_identifier
     ] = (our_address, partner_address)
+    token_network_state.network_graph.version += 1
 
     # Ignore duplicated channelnew events. For this to work properly on channel
     # reopens the blockchain events ChannelSettled and ChannelOpened must be
@@ -100,6 +126,7 @@ def handle_channelnew(
         token_network_state.channelidentifiers_to_channels[channel_identifier] = channel_state
         addresses_to_ids = token_network_state.partneraddresses_to_channelidentifiers
         addresses_to_ids[partner_address].append(channel_identifier)
+        update_channel_status(token_network_state, channel_state)
 
     return TransitionResult(token_network_state, events)
 
@@ -136,6 +163,7 @@ def handle_closed(
         del token_network_state.network_graph.channel_identifier_to_participants[
             state_change.channel_identifier
         ]
+        token_network_state.network_graph.version += 1
 
     return subdispatch_to_channel_by_id(
         token_network_state=token_network_state,
@@ -199,6 +227,7 @@ def handle_batch_unlock(
             ].remove(channel_state.identifier)
 
             del token_network_state.channelidentifiers_to_channels[channel_state.identifier]
+            remove_channel_status(token_network_state, channel_state.identifier)
 
     return TransitionResult(token_network_state, events)
 
@@ -214,6 +243,7 @@ def handle_newroute(
     token_network_state.network_graph.channel_identifier_to_participants[
         state_change.channel_identifier
     ] = (state_change.participant1, state_change.participant2)
+    token_network_state.network_graph.version += 1
 
     return TransitionResult(token_network_state, events)
 
@@ -235,6 +265,7 @@ def handle_closeroute(
         del token_network_state.network_graph.channel_identifier_to_participants[
             state_change.channel_identifier
         ]
+        token_network_state.network_graph.version += 1
 
     return TransitionResult(token_network_state, events)
 
@@ -231,16 +231,7 @@ def get_token_network_by_token_address(
 def get_token_network_by_address(
     chain_state: ChainState, token_network_address: TokenNetworkAddress
 ) -> Optional[TokenNetworkState]:
-
-    token_network_state = None
-    for payment_network_state in chain_state.identifiers_to_paymentnetworks.values():
-        token_network_state = payment_network_state.tokennetworkaddresses_to_tokennetworks.get(
-            token_network_address
-        )
-        if token_network_state:
-            return token_network_state
-
-    return token_network_state
+    return chain_state.tokennetworkaddresses_to_tokennetworks.get(token_network_address)
 
 
 def get_channelstate_for(
@@ -258,7 +249,9 @@ def get_channelstate_for(
     if token_network:
         channels = [
             token_network.channelidentifiers_to_channels[channel_id]
-            for channel_id in token_network.partneraddresses_to_channelidentifiers[partner_address]
+            for channel_id in token_network.partneraddresses_to_channelidentifiers.get(
+                partner_address, []
+            )
         ]
         states = filter_channels_by_status(channels, [CHANNEL_STATE_UNUSABLE])
         # If multiple channel states are found, return the last one.
@@ -278,7 +271,9 @@ def get_channelstate_by_token_network_and_partner(
     if token_network:
         channels = [
             token_network.channelidentifiers_to_channels[channel_id]
-            for channel_id in token_network.partneraddresses_to_channelidentifiers[partner_address]
+            for channel_id in token_network.partneraddresses_to_channelidentifiers.get(
+                partner_address, []
+            )
         ]
         states = filter_channels_by_status(channels, [CHANNEL_STATE_UNUSABLE])
         if states:
@@ -326,17 +321,31 @@ def get_channelstate_filter(
     return result
 
 
+def get_channelstate_by_status(
+    chain_state: ChainState,
+    payment_network_address: PaymentNetworkAddress,
+    token_address: TokenAddress,
+    status: str,
+) -> List[NettingChannelState]:
+    """ Return the state of the channels with `status` in a token network. """
+    token_network = get_token_network_by_token_address(
+        chain_state, payment_network_address, token_address
+    )
+
+    if not token_network:
+        return []
+
+    return list(token_network.statuses_to_channels.get(status, {}).values())
+
+
 def get_channelstate_open(
     chain_state: ChainState,
     payment_network_address: PaymentNetworkAddress,
     token_address: TokenAddress,
 ) -> List[NettingChannelState]:
     """Return the state of open channels in a token network."""
-    return get_channelstate_filter(
-        chain_state,
-        payment_network_address,
-        token_address,
-        lambda channel_state: channel.get_status(channel_state) == CHANNEL_STATE_OPENED,
+    return get_channelstate_by_status(
+        chain_state, payment_network_address, token_address, CHANNEL_STATE_OPENED
     )
 
 
@@ -346,11 +355,8 @@ def get_channelstate_closing(
     token_address: TokenAddress,
 ) -> List[NettingChannelState]:
     """Return the state of closing channels in a token network."""
-    return get_channelstate_filter(
-        chain_state,
-        payment_network_address,
-        token_address,
-        lambda channel_state: channel.get_status(channel_state) == CHANNEL_STATE_CLOSING,
+    return get_channelstate_by_status(
+        chain_state, payment_network_address, token_address, CHANNEL_STATE_CLOSING
     )
 
 
@@ -360,11 +366,8 @@ def get_channelstate_closed(
     token_address: TokenAddress,
 ) -> List[NettingChannelState]:
     """Return the state of closed channels in a token network."""
-    return get_channelstate_filter(
-        chain_state,
-        payment_network_address,
-        token_address,
-        lambda channel_state: channel.get_status(channel_state) == CHANNEL_STATE_CLOSED,
+    return get_channelstate_by_status(
+        chain_state, payment_network_address, token_address, CHANNEL_STATE_CLOSED
     )
 
 
@@ -374,11 +377,8 @@ def get_channelstate_settling(
     token_address: TokenAddress,
 ) -> List[NettingChannelState]:
     """Return the state of settling channels in a token network."""
-    return get_channelstate_filter(
-        chain_state,
-        payment_network_address,
-        token_address,
-        lambda channel_state: channel.get_status(channel_state) == CHANNEL_STATE_SETTLING,
+    return get_channelstate_by_status(
+        chain_state, payment_network_address, token_address, CHANNEL_STATE_SETTLING
     )
 
 
@@ -388,11 +388,8 @@ def get_channelstate_settled(
     token_address: TokenAddress,
 ) -> List[NettingChannelState]:
     """Return the state of settled channels in a token network."""
-    return get_channelstate_filter(
-        chain_state,
-        payment_network_address,
-        token_address,
-        lambda channel_state: channel.get_status(channel_state) == CHANNEL_STATE_SETTLED,
+    return get_channelstate_by_status(
+        chain_state, payment_network_address, token_address, CHANNEL_STATE_SETTLED
     )
 
 
@@ -494,7 +491,7 @@ def filter_channels_by_partneraddress(
     for partner in partner_addresses:
         channels = [
             token_network.channelidentifiers_to_channels[channel_id]
-            for channel_id in token_network.partneraddresses_to_channelidentifiers[partner]
+            for channel_id in token_network.partneraddresses_to_channelidentifiers.get(partner, [])
         ]
         states = filter_channels_by_status(channels, [CHANNEL_STATE_UNUSABLE])
         # If multiple channel states are found, return the last one.
@@ -107,6 +107,7 @@ def run_app(
     keystore_path: str,
     gas_price: Callable,
     eth_rpc_endpoint: str,
+    eth_ipc_path: Optional[str],
     tokennetwork_registry_contract_address: Address,
     one_to_n_contract_address: Address,
     secret_registry_contract_address: Address,
@@ -130,6 +131,10 @@ def run_app(
     enable_monitoring: bool,
     resolver_endpoint: str,
     routing_mode: RoutingMode,
+    startup_profile: bool,
+    startup_profile_output: Optional[str],
+    startup_profile_cprofile: bool,
+    archive_wal: bool,
     config: Dict[str, Any],
     **kwargs: Any,  # FIXME: not used here, but still receives stuff in smoketest
 ):
@@ -166,6 +171,13 @@ def run_app(
     config["services"]["pathfinding_max_paths"] = pathfinding_max_paths
     config["services"]["monitoring_enabled"] = enable_monitoring
     config["chain_id"] = network_id
+    config["startup_profile"] = {
+        "enabled": startup_profile,
+        "output_path": startup_profile_output,
+        "cprofile": startup_profile_cprofile,
+    }
+    config["archive_wal"] = archive_wal
+    config["eth_ipc_path"] = eth_ipc_path
 
     setup_environment(config, environment_type)
 
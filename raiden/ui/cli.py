@@ -4,25 +4,17 @@ import sys
 import textwrap
 import traceback
 from tempfile import mktemp
-from typing import Any, AnyStr, Dict, List, Optional, Tuple
+from typing import TYPE_CHECKING, Any, AnyStr, Dict, List, Optional, Tuple
 
 import click
-import structlog
-import urllib3
-from mirakuru import ProcessExitedWithError
-from urllib3.exceptions import InsecureRequestWarning
 
 from raiden.constants import Environment, EthClient, RoutingMode
 from raiden.exceptions import ReplacementTransactionUnderpriced, TransactionAlreadyPending
-from raiden.log_config import configure_logging
-from raiden.network.utils import get_free_port
 from raiden.settings import (
     DEFAULT_PATHFINDING_IOU_TIMEOUT,
     DEFAULT_PATHFINDING_MAX_FEE,
     DEFAULT_PATHFINDING_MAX_PATHS,
 )
-from raiden.tests.utils.transport import ParsedURL
-from raiden.ui.startup import environment_type_to_contracts_version
 from raiden.utils import get_system_spec
 from raiden.utils.cli import (
     ADDRESS_TYPE,
@@ -39,9 +31,13 @@ from raiden.utils.cli import (
     validate_option_dependencies,
 )
 
-from .runners import EchoNodeRunner, MatrixRunner
+if TYPE_CHECKING:
+    # pylint: disable=unused-import
+    from raiden.tests.utils.transport import ParsedURL  # noqa: F401
 
-log = structlog.get_logger(__name__)
+# The modules needed to run a node, the smoketest or the echo node are only
+# imported by the command that uses them, so that `--help`, `version` and the
+# parsing of the options don't pay for importing the whole application.
 
 
 OPTION_DEPENDENCIES: Dict[str, List[Tuple[str, Any]]] = {
@@ -51,6 +47,8 @@ OPTION_DEPENDENCIES: Dict[str, List[Tuple[str, Any]]] = {
     "pathfinding-iou-timeout": [("transport", "matrix"), ("routing-mode", RoutingMode.PFS)],
     "enable-monitoring": [("transport", "matrix")],
     "matrix-server": [("transport", "matrix")],
+    "startup-profile-output": [("startup-profile", True)],
+    "startup-profile-cprofile": [("startup-profile", True)],
 }
 
 
@@ -190,6 +188,15 @@ def options(func):
             help="Show all configuration values used to control Raiden's behavior",
             is_flag=True,
         ),
+        option(
+            "--archive-wal",
+            help=(
+                "Move the state changes and events which are not needed anymore to "
+                "restore the node state to an archive database next to the node "
+                "database. This keeps the node database small for long running nodes."
+            ),
+            is_flag=True,
+        ),
         option_group(
             "Ethereum Node Options",
             option(
@@ -222,6 +229,15 @@ def options(func):
                 type=str,
                 show_default=True,
             ),
+            option(
+                "--eth-ipc-path",
+                help=(
+                    "Path to the IPC socket of the ethereum node. If given, new blocks "
+                    "are received through a subscription instead of polling the "
+                    "JSON-RPC server."
+                ),
+                type=click.Path(dir_okay=False),
+            ),
         ),
         option_group(
             "Raiden Services Options",
@@ -348,6 +364,15 @@ def options(func):
                 default=True,
                 show_default=True,
             ),
+            option(
+                "--api-stream-responses",
+                help=(
+                    "Stream the results of the event and payment history endpoints. "
+                    "Clients accepting application/x-ndjson receive newline delimited JSON."
+                ),
+                is_flag=True,
+                default=False,
+            ),
         ),
         option_group(
             "Debugging options",
@@ -361,6 +386,42 @@ def options(func):
                 is_flag=True,
                 default=False,
             ),
+            option(
+                "--startup-profile",
+                help=(
+                    "Measure the duration, the number of JSON-RPC requests, the database "
+                    "rows read and the state changes replayed for every phase of the "
+                    "node startup and write the results to the log."
+                ),
+                is_flag=True,
+                default=False,
+            ),
+            option(
+                "--startup-profile-output",
+                help="Write the startup profile as JSON to the given file.",
+                default=None,
+                type=click.Path(dir_okay=False, writable=True, resolve_path=True),
+            ),
+            option(
+                "--startup-profile-cprofile",
+                help=(
+                    "Additionally profile the startup with cProfile. The slowest "
+                    "functions are written to the log and, if an output file is given, "
+                    "the raw stats are stored next to it with a .pstats suffix."
+                ),
+                is_flag=True,
+                default=False,
+            ),
+            option(
+                "--import-profile",
+                help=(
+                    "Measure the time spent importing every module and write the "
+                    "slowest imports to stderr on exit. Only effective as a command "
+                    "line argument, the imports start before the options are parsed."
+                ),
+                is_flag=True,
+                default=False,
+            ),
         ),
         option_group(
             "Hash Resolver options",
@@ -399,6 +460,8 @@ def run(ctx, **kwargs):
         ctx.obj = kwargs
         return
 
+    from raiden.ui.runners import MatrixRunner
+
     if kwargs["transport"] == "matrix":
         runner = MatrixRunner(kwargs, ctx)
     else:
@@ -491,8 +554,15 @@ def version(short):
 @click.pass_context
 def smoketest(ctx, debug: bool, eth_client: EthClient, report_path: Optional[str]):
     """ Test, that the raiden installation is sane. """
+    import urllib3
+    from mirakuru import ProcessExitedWithError
+    from urllib3.exceptions import InsecureRequestWarning
+
+    from raiden.log_config import configure_logging
+    from raiden.network.utils import get_free_port
     from raiden.tests.utils.smoketest import setup_testchain_and_raiden, run_smoketest
     from raiden.tests.utils.transport import make_requests_insecure, matrix_server_starter
+    from raiden.ui.startup import environment_type_to_contracts_version
     from raiden.utils.debugging import enable_gevent_monitoring_signal
 
     enable_gevent_monitoring_signal()
@@ -573,7 +643,7 @@ def smoketest(ctx, debug: bool, eth_client: EthClient, report_path: Optional[str
         if args["transport"] == "matrix":
             print_step("Starting Matrix transport")
             try:
-                server_urls: List[ParsedURL]
+                server_urls: List["ParsedURL"]
                 with matrix_server_starter(free_port_generator=free_port_generator) as server_urls:
                     # Disable TLS verification so we can connect to the self signed certificate
                     make_requests_insecure()
@@ -617,4 +687,6 @@ def smoketest(ctx, debug: bool, eth_client: EthClient, report_path: Optional[str
 @click.pass_context
 def echonode(ctx, token_address):
     """ Start a raiden Echo Node that will send received transfers back to the initiator. """
+    from raiden.ui.runners import EchoNodeRunner
+
     EchoNodeRunner(ctx.obj, ctx, token_address).run()
@@ -0,0 +1,123 @@
+""" Measures how long the import of every module takes.
+
+The profiler has to be installed before the application is imported, so this
+module must only depend on the standard library.
+"""
+import builtins
+import sys
+import time
+from dataclasses import dataclass
+from importlib.util import resolve_name
+from typing import Any, Callable, Dict, List, Optional
+
+
+@dataclass
+class ImportTiming:
+    """ Time spent importing a module.
+
+    `cumulative` includes the modules imported while importing `name`,
+    `own` excludes them.
+    """
+
+    name: str
+    cumulative: float
+    own: float
+
+
+class ImportProfiler:
+    """ Times the imports by wrapping `builtins.__import__`.
+
+    An import is timed when the module, or a submodule in the `from` list, is
+    not loaded yet. A single import statement may load several modules, e.g.
+    the parent packages of the module, their time is attributed to the
+    imported module.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.perf_counter) -> None:
+        self.clock = clock
+        self.timings: List[ImportTiming] = list()
+
+        self._original_import: Optional[Callable[..., Any]] = None
+        self._nested_durations: List[float] = list()
+
+    def install(self) -> None:
+        self._original_import = builtins.__import__
+        builtins.__import__ = self._import
+
+    def uninstall(self) -> None:
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+
+    def _import(
+        self,
+        name: str,
+        globals: Optional[Dict[str, Any]] = None,  # pylint: disable=redefined-builtin
+        locals: Optional[Dict[str, Any]] = None,  # pylint: disable=redefined-builtin
+        fromlist: Any = (),
+        level: int = 0,
+    ) -> Any:
+        assert self._original_import is not None
+
+        module_name = name
+        if level > 0:
+            package = (globals or {}).get("__package__") or ""
+            try:
+                module_name = resolve_name("." * level + name, package)
+            except (ImportError, ValueError):
+                pass
+
+        if module_name not in sys.modules:
+            pending = [module_name]
+        else:
+            # `from package import module` loads the submodules in `fromlist`
+            module = sys.modules[module_name]
+            pending = [
+                f"{module_name}.{item}"
+                for item in fromlist or ()
+                if item != "*"
+                and f"{module_name}.{item}" not in sys.modules
+                and not hasattr(module, item)
+            ]
+
+        if not pending:
+            return self._original_import(name, globals, locals, fromlist, level)
+
+        self._nested_durations.append(0.0)
+        started_at = self.clock()
+        try:
+            return self._original_import(name, globals, locals, fromlist, level)
+        finally:
+            cumulative = self.clock() - started_at
+            nested = self._nested_durations.pop()
+            loaded = [pending_name for pending_name in pending if pending_name in sys.modules]
+
+            if loaded:
+                if self._nested_durations:
+                    self._nested_durations[-1] += cumulative
+
+                self.timings.append(
+                    ImportTiming(
+                        name=", ".join(loaded), cumulative=cumulative, own=cumulative - nested
+                    )
+                )
+
+    @property
+    def total(self) -> float:
+        """ Time spent importing, the nested imports are counted once. """
+        return sum(timing.own for timing in self.timings)
+
+    def report(self, limit: int = 30) -> str:
+        """ The `limit` slowest imports by their own time. """
+        slowest = sorted(self.timings, key=lambda timing: timing.own, reverse=True)[:limit]
+
+        lines = [
+            f"Imported {len(self.timings)} modules in {self.total:.3f}s, "
+            f"the {len(slowest)} slowest:",
+            f"{'own':>9} {'cumulative':>11}  module",
+        ]
+        lines.extend(
+            f"{timing.own * 1000:>7.1f}ms {timing.cumulative * 1000:>9.1f}ms  {timing.name}"
+            for timing in slowest
+        )
+        return "\n".join(lines)
@@ -122,6 +122,7 @@ class NodeRunner:
                 cors_domain_list=domain_list,
                 web_ui=self._options["web_ui"],
                 eth_rpc_endpoint=self._options["eth_rpc_endpoint"],
+                stream_responses=self._options["api_stream_responses"],
             )
 
             try:
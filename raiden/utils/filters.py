@@ -126,13 +126,17 @@ class StatelessFilter(LogFilter):
         self._last_block = block_specification_to_number(block=to_block, web3=self.web3)
         return result
 
+    def next_block_number(self) -> BlockNumber:
+        """ Return the first block which will be queried by `get_new_entries`. """
+        filter_from_number = block_specification_to_number(
+            block=self.filter_params.get("fromBlock", GENESIS_BLOCK_NUMBER), web3=self.web3
+        )
+        return BlockNumber(max(filter_from_number, self._last_block + 1))
+
     def get_new_entries(self, target_block_number: BlockNumber) -> List[Dict[str, Any]]:
         with self._lock:
             result: List[Dict[str, Any]] = []
-            filter_from_number = block_specification_to_number(
-                block=self.filter_params.get("fromBlock", GENESIS_BLOCK_NUMBER), web3=self.web3
-            )
-            from_block_number = max(filter_from_number, self._last_block + 1)
+            from_block_number: int = self.next_block_number()
 
             # Batch the filter queries in ranges of FILTER_MAX_BLOCK_RANGE
             # to avoid timeout problems
@@ -0,0 +1,257 @@
+""" In-process metrics exposed in the Prometheus text format.
+
+The metrics are updated from the hot paths of the node, so updating them must
+be cheap: counters and gauges are a single addition, histograms an additional
+bisection over the bucket bounds. Nothing is formatted or aggregated until
+the metrics are rendered for a scrape, and gauges whose value is already
+known by some other object are computed only then, through a callback.
+
+All updates happen in the greenlets of the main thread, so no locking is
+done.
+"""
+import math
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from raiden.utils.typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+)
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds, from a fast state transition to a slow JSON-RPC request
+DEFAULT_DURATION_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+DEFAULT_SIZE_BUCKETS = (0, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+Sample = Tuple[str, Tuple[Tuple[str, str], ...], float]
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape_label_value(value: str) -> str:
+    return value.replace("\\", r"\\").replace("\n", r"\n").replace('"', r"\"")
+
+
+class Counter:
+    """ A value which only increases, e.g. the number of requests. """
+
+    kind = "counter"
+
+    def __init__(self) -> None:
+        self.value = 0.0
+
+    def inc(self, amount: float = 1) -> None:
+        assert amount >= 0, "counters can only be increased"
+        self.value += amount
+
+    def samples(self) -> Iterator[Sample]:
+        yield "_total", (), self.value
+
+
+class Gauge:
+    """ A value which can go up and down, e.g. the size of a queue.
+
+    If a `function` is set it is called to compute the value when the metrics
+    are rendered, so the gauge does not have to be updated by the hot paths.
+    """
+
+    kind = "gauge"
+
+    def __init__(self) -> None:
+        self.value = 0.0
+        self.function: Optional[Callable[[], float]] = None
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def set_function(self, function: Optional[Callable[[], float]]) -> None:
+        self.function = function
+
+    def samples(self) -> Iterator[Sample]:
+        value = self.function() if self.function is not None else self.value
+        yield "", (), value
+
+
+class Histogram:
+    """ The distribution of observed values, e.g. the latency of a request.
+
+    `counts[i]` is the number of observations in the bucket `i` only, the
+    cumulative counts required by the Prometheus format are computed when
+    rendering.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_DURATION_BUCKETS) -> None:
+        self.upper_bounds = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.upper_bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.upper_bounds, value)] += 1
+        self.sum += value
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        """ Observe the wall time spent in the block, also if it raises. """
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.observe(time.monotonic() - start)
+
+    @property
+    def count(self) -> int:
+        return sum(self.counts)
+
+    def samples(self) -> Iterator[Sample]:
+        cumulative = 0
+        for upper_bound, count in zip(self.upper_bounds + (math.inf,), self.counts):
+            cumulative += count
+            yield "_bucket", (("le", _format_value(upper_bound)),), cumulative
+        yield "_sum", (), self.sum
+        yield "_count", (), cumulative
+
+
+class MetricFamily:
+    """ A named metric and its children, one per combination of label values.
+
+    Metrics without labels have a single child, returned by `labels()`.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        metric_class: Type,
+        labelnames: Sequence[str] = (),
+        **metric_kwargs: Any,
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.metric_class = metric_class
+        self.labelnames = tuple(labelnames)
+        self._metric_kwargs = metric_kwargs
+        self._children: Dict[Tuple[str, ...], Any] = dict()
+
+    @property
+    def kind(self) -> str:
+        return self.metric_class.kind
+
+    def labels(self, *labelvalues: str) -> Any:
+        child = self._children.get(labelvalues)
+
+        if child is None:
+            if len(labelvalues) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects the labels {self.labelnames}")
+
+            child = self.metric_class(**self._metric_kwargs)
+            self._children[labelvalues] = child
+
+        return child
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+
+        for labelvalues, child in sorted(self._children.items()):
+            labels = tuple(zip(self.labelnames, labelvalues))
+            for suffix, extra_labels, value in child.samples():
+                all_labels = labels + extra_labels
+                if all_labels:
+                    formatted_labels = ",".join(
+                        f'{label}="{_escape_label_value(str(label_value))}"'
+                        for label, label_value in all_labels
+                    )
+                    lines.append(
+                        f"{self.name}{suffix}{{{formatted_labels}}} {_format_value(value)}"
+                    )
+                else:
+                    lines.append(f"{self.name}{suffix} {_format_value(value)}")
+
+        return lines
+
+
+class MetricsRegistry:
+    """ The metrics of the process, rendered together for a scrape.
+
+    Registering a metric twice with the same name and type returns the
+    existing one, so modules can register their metrics at import time.
+    """
+
+    def __init__(self) -> None:
+        self._families: Dict[str, MetricFamily] = dict()
+
+    def _register(
+        self,
+        name: str,
+        documentation: str,
+        metric_class: Type,
+        labelnames: Sequence[str],
+        **metric_kwargs: Any,
+    ) -> MetricFamily:
+        family = self._families.get(name)
+
+        if family is None:
+            family = MetricFamily(name, documentation, metric_class, labelnames, **metric_kwargs)
+            self._families[name] = family
+        elif family.metric_class is not metric_class or family.labelnames != tuple(labelnames):
+            raise ValueError(f"Metric {name} is already registered with a different type")
+
+        return family
+
+    def counter(
+        self, name: str, documentation: str, labelnames: Sequence[str] = ()
+    ) -> MetricFamily:
+        return self._register(name, documentation, Counter, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> MetricFamily:
+        return self._register(name, documentation, Gauge, labelnames)
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_DURATION_BUCKETS,
+    ) -> MetricFamily:
+        return self._register(name, documentation, Histogram, labelnames, buckets=buckets)
+
+    def render(self) -> str:
+        """ Return all the metrics in the Prometheus text exposition format. """
+        lines: List[str] = list()
+        for name in sorted(self._families):
+            lines.extend(self._families[name].render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
@@ -0,0 +1,197 @@
+import cProfile
+import io
+import json
+import pstats
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+
+import structlog
+
+from raiden.utils.typing import Any, Dict, Iterator, List, Optional
+
+log = structlog.get_logger(__name__)  # pylint: disable=invalid-name
+
+
+@dataclass
+class PhaseTiming:
+    """ Measurements collected for a single startup phase.
+
+    `depth` is the nesting level of the phase, nested phases are included in
+    the measurements of their parents.
+    """
+
+    name: str
+    depth: int
+    duration: float = 0.0
+    rpc_calls: int = 0
+    db_rows_read: int = 0
+    state_changes_replayed: int = 0
+
+
+class StartupProfiler:
+    """ Records wall time, JSON-RPC requests, database rows read and replayed
+    state changes for each phase of the node startup.
+
+    A disabled profiler does not install any instrumentation and its phases
+    are no-ops, so it can be used unconditionally in the startup code.
+
+    Args:
+        enabled: Collect the measurements.
+        output_path: If given, the report is written as JSON to this file.
+        cprofile: Additionally run cProfile over the whole startup.
+    """
+
+    def __init__(
+        self, enabled: bool = False, output_path: Optional[str] = None, cprofile: bool = False
+    ) -> None:
+        self.enabled = enabled
+        self.output_path = output_path
+        self.cprofile = cprofile
+
+        self.phases: List[PhaseTiming] = list()
+        self.profile: Optional[cProfile.Profile] = None
+
+        self._depth = 0
+        self._started_at: Optional[float] = None
+        self._finished_at: Optional[float] = None
+        self._rpc_calls = 0
+        self._db_rows_read = 0
+        self._instrumented_web3: Any = None
+        self._instrumented_storage: Any = None
+
+    def start(self) -> None:
+        if not self.enabled:
+            return
+
+        self._started_at = time.monotonic()
+
+        if self.cprofile:
+            self.profile = cProfile.Profile()
+            self.profile.enable()
+
+    def stop(self) -> None:
+        """ Remove the instrumentation and publish the report. """
+        if not self.enabled or self._started_at is None:
+            return
+
+        self._finished_at = time.monotonic()
+
+        if self.profile is not None:
+            self.profile.disable()
+
+        if self._instrumented_web3 is not None:
+            self._instrumented_web3.middleware_stack.remove(self._request_counter_middleware)
+            self._instrumented_web3 = None
+
+        if self._instrumented_storage is not None:
+            self._instrumented_storage.conn.row_factory = None
+            self._instrumented_storage = None
+
+        self.log_report()
+
+        if self.output_path is not None:
+            self.dump_json(self.output_path)
+
+        if self.profile is not None:
+            self.log_cprofile_report()
+
+    def instrument_web3(self, web3) -> None:
+        """ Count the JSON-RPC requests sent through `web3`. """
+        if not self.enabled or self._instrumented_web3 is not None:
+            return
+
+        # Layer 0 is the innermost layer, so only the requests which are
+        # actually sent to the ethereum node are counted (e.g. cache hits of
+        # `block_hash_cache_middleware` are not)
+        web3.middleware_stack.inject(self._request_counter_middleware, layer=0)
+        self._instrumented_web3 = web3
+
+    def instrument_storage(self, storage) -> None:
+        """ Count the rows fetched from `storage`. """
+        if not self.enabled:
+            return
+
+        assert storage.conn.row_factory is None, "row_factory already in use"
+        storage.conn.row_factory = self._count_row
+        self._instrumented_storage = storage
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[PhaseTiming]:
+        timing = PhaseTiming(name=name, depth=self._depth)
+
+        if not self.enabled:
+            yield timing
+            return
+
+        self.phases.append(timing)
+        rpc_calls_before = self._rpc_calls
+        db_rows_read_before = self._db_rows_read
+        start = time.monotonic()
+        self._depth += 1
+
+        try:
+            yield timing
+        finally:
+            self._depth -= 1
+            timing.duration = time.monotonic() - start
+            timing.rpc_calls = self._rpc_calls - rpc_calls_before
+            timing.db_rows_read = self._db_rows_read - db_rows_read_before
+
+    def report(self) -> Dict[str, Any]:
+        total_duration = None
+        if self._started_at is not None and self._finished_at is not None:
+            total_duration = self._finished_at - self._started_at
+
+        return {
+            "total_duration": total_duration,
+            "phases": [asdict(timing) for timing in self.phases],
+        }
+
+    def log_report(self) -> None:
+        for timing in self.phases:
+            log.info(
+                "Startup phase",
+                phase=timing.name,
+                depth=timing.depth,
+                duration=round(timing.duration, 4),
+                rpc_calls=timing.rpc_calls,
+                db_rows_read=timing.db_rows_read,
+                state_changes_replayed=timing.state_changes_replayed,
+            )
+
+        log.info("Startup finished", total_duration=self.report()["total_duration"])
+
+    def dump_json(self, path: str) -> None:
+        with open(path, "w") as handler:
+            json.dump(self.report(), handler, indent=2)
+
+        log.info("Startup profile written", path=path)
+
+    def log_cprofile_report(self) -> None:
+        # Imported here because the benchmark helpers are only needed when the
+        # optional cProfile capture was requested
+        from raiden.tests.benchmark.utils import print_slow_function, print_slow_path
+
+        assert self.profile, "cProfile capture was not enabled"
+
+        stream = io.StringIO()
+        print_slow_path(pstats.Stats(self.profile, stream=stream))
+        print_slow_function(pstats.Stats(self.profile, stream=stream))
+        log.info("Startup cProfile report", report=stream.getvalue())
+
+        if self.output_path is not None:
+            pstats_path = f"{self.output_path}.pstats"
+            self.profile.dump_stats(pstats_path)
+            log.info("Startup cProfile stats written", path=pstats_path)
+
+    def _count_row(self, _cursor, row):
+        self._db_rows_read += 1
+        return row
+
+    def _request_counter_middleware(self, make_request, web3):  # pylint: disable=unused-argument
+        def middleware(method, params):
+            self._rpc_calls += 1
+            return make_request(method, params)
+
+        return middleware
@@ -8,9 +8,10 @@ import filelock
 import structlog
 
 from raiden.constants import RAIDEN_DB_VERSION
+from raiden.storage.archive import archive_path_from_database_path
 from raiden.storage.sqlite import SQLiteStorage
 from raiden.storage.versions import VERSION_RE, filter_db_names, latest_db_file
-from raiden.utils.typing import Callable, List, NamedTuple
+from raiden.utils.typing import Callable, List, NamedTuple, Union
 
 
 class UpgradeRecord(NamedTuple):
@@ -116,6 +117,9 @@ class UpgradeManager:
     - Copy the old file to the latest version (e.g. copy version v16 as v18).
     - In a transaction: Run every migration. Each migration must decide whether
       to proceed or not.
+
+    The archive of the old database, with the historic state changes and
+    events, is copied and migrated the same way before the database.
     """
 
     def __init__(self, db_filename: str, **kwargs):
@@ -174,30 +178,41 @@ class UpgradeManager:
 
     def _upgrade(self, target_file: Path, from_file: Path, from_version: int):
         with get_file_lock(from_file), get_file_lock(target_file):
+            # The archive is migrated first, the database is only complete
+            # once its archive is, otherwise it is deleted and the upgrade is
+            # run again on the next start.
+            from_archive = archive_path_from_database_path(str(from_file))
+            if os.path.exists(from_archive):
+                target_archive = archive_path_from_database_path(str(target_file))
+                _copy(from_archive, target_archive)
+                self._migrate(target_archive, from_version)
+
             _copy(from_file, target_file)
+            self._migrate(target_file, from_version)
 
-            storage = SQLiteStorage(target_file)
+    def _migrate(self, target_file: Union[str, Path], from_version: int):
+        storage = SQLiteStorage(target_file)
 
-            log.debug(f"Upgrading database from v{from_version} to v{RAIDEN_DB_VERSION}")
+        log.debug(f"Upgrading database {target_file} from v{from_version} to v{RAIDEN_DB_VERSION}")
 
-            try:
-                version_iteration = from_version
+        try:
+            version_iteration = from_version
 
-                with storage.transaction():
-                    for upgrade_record in UPGRADES_LIST:
-                        if upgrade_record.from_version < from_version:
-                            continue
+            with storage.transaction():
+                for upgrade_record in UPGRADES_LIST:
+                    if upgrade_record.from_version < from_version:
+                        continue
 
-                        version_iteration = upgrade_record.function(
-                            storage=storage,
-                            old_version=version_iteration,
-                            current_version=RAIDEN_DB_VERSION,
-                            **self._kwargs,
-                        )
+                    version_iteration = upgrade_record.function(
+                        storage=storage,
+                        old_version=version_iteration,
+                        current_version=RAIDEN_DB_VERSION,
+                        **self._kwargs,
+                    )
 
-                    update_version(storage, RAIDEN_DB_VERSION)
-            except BaseException as e:
-                log.error(f"Failed to upgrade database: {e}")
-                raise
+                update_version(storage, RAIDEN_DB_VERSION)
+        except BaseException as e:
+            log.error(f"Failed to upgrade database: {e}")
+            raise
 
-            storage.conn.close()
+        storage.close()
@@ -1,20 +1,24 @@
 from typing import TYPE_CHECKING, List, cast
 
-import gevent
 import structlog
+from gevent.event import AsyncResult
 
 from raiden.transfer import channel, views
+from raiden.transfer.architecture import Event
 from raiden.transfer.events import EventPaymentReceivedSuccess
 from raiden.transfer.identifiers import CanonicalIdentifier
 from raiden.transfer.state import (
     CHANNEL_AFTER_CLOSE_STATES,
     CHANNEL_STATE_SETTLED,
     NODE_NETWORK_REACHABLE,
+    ChainState,
 )
 from raiden.utils.typing import (
     Address,
     BlockNumber,
+    Callable,
     ChannelID,
+    NamedTuple,
     PaymentAmount,
     PaymentID,
     PaymentNetworkAddress,
@@ -31,15 +35,102 @@ log = structlog.get_logger(__name__)  # pylint: disable=invalid-name
 ALARM_TASK_ERROR_MSG = "Waiting relies on alarm task polling to update the node's internal state."
 TRANSPORT_ERROR_MSG = "Waiting for protocol messags requires a running transport."
 
+# Checked with the new state and the events of a state change
+StateCondition = Callable[[ChainState, List[Event]], bool]
+
+
+class StateWaiting(NamedTuple):
+    condition: StateCondition
+    async_result: AsyncResult
+
+
+class StateWaiters:
+    """ The conditions the greenlets are waiting for.
+
+    The node calls `notify` after each state change, the waiting greenlets
+    are woken up once their condition holds. This way a greenlet wakes up as
+    soon as the state changed, and the state is not read again by every
+    waiting greenlet while nothing changes.
+    """
+
+    def __init__(self) -> None:
+        self.waiting: List[StateWaiting] = list()
+
+    def register(self, condition: StateCondition) -> AsyncResult:
+        waiting = StateWaiting(condition=condition, async_result=AsyncResult())
+        self.waiting.append(waiting)
+        return waiting.async_result
+
+    def unregister(self, async_result: AsyncResult) -> None:
+        self.waiting = [
+            waiting for waiting in self.waiting if waiting.async_result is not async_result
+        ]
+
+    def notify(self, chain_state: ChainState, events: List[Event]) -> None:
+        pending = list()
+        for waiting in self.waiting:
+            try:
+                satisfied = waiting.condition(chain_state, events)
+            except Exception as e:  # pylint: disable=broad-except
+                # The error is raised in the waiting greenlet
+                waiting.async_result.set_exception(e)
+                continue
+
+            if satisfied:
+                waiting.async_result.set(True)
+            else:
+                pending.append(waiting)
+
+        self.waiting = pending
+
+
+def assert_alarm_running(raiden: "RaidenService") -> None:
+    assert raiden, ALARM_TASK_ERROR_MSG
+    assert raiden.alarm, ALARM_TASK_ERROR_MSG
+
+
+def assert_transport_running(raiden: "RaidenService") -> None:
+    assert raiden, TRANSPORT_ERROR_MSG
+    assert raiden.transport, TRANSPORT_ERROR_MSG
+
+
+def wait_for_state(
+    raiden: "RaidenService",
+    condition: StateCondition,
+    retry_timeout: float,
+    assert_running: Callable[["RaidenService"], None] = assert_alarm_running,
+) -> None:
+    """Wait until `condition` holds for the node's state.
+
+    The condition is checked with the current state, and afterwards with the
+    new state of every state change. The node is checked to be running every
+    `retry_timeout` seconds.
+
+    Note:
+        This does not time out, use gevent.Timeout.
+    """
+    if condition(views.state_from_raiden(raiden), []):
+        return
+
+    async_result = raiden.state_waiters.register(condition)
+    try:
+        while not async_result.ready():
+            async_result.wait(retry_timeout)
+            assert_running(raiden)
+    finally:
+        raiden.state_waiters.unregister(async_result)
+
+    async_result.get()
+
 
 def wait_for_block(
     raiden: "RaidenService", block_number: BlockNumber, retry_timeout: float
 ) -> None:
-    while raiden.get_block_number() < block_number:
-        assert raiden, ALARM_TASK_ERROR_MSG
-        assert raiden.alarm, ALARM_TASK_ERROR_MSG
-
-        gevent.sleep(retry_timeout)
+    wait_for_state(
+        raiden,
+        lambda chain_state, _: views.block_number(chain_state) >= block_number,
+        retry_timeout,
+    )
 
 
 def wait_for_newchannel(
@@ -54,21 +145,14 @@ def wait_for_newchannel(
     Note:
         This does not time out, use gevent.Timeout.
     """
-    channel_state = views.get_channelstate_for(
-        views.state_from_raiden(raiden), payment_network_address, token_address, partner_address
-    )
-
-    while channel_state is None:
-        assert raiden, ALARM_TASK_ERROR_MSG
-        assert raiden.alarm, ALARM_TASK_ERROR_MSG
-
-        gevent.sleep(retry_timeout)
-        channel_state = views.get_channelstate_for(
-            views.state_from_raiden(raiden),
-            payment_network_address,
-            token_address,
-            partner_address,
+    wait_for_state(
+        raiden,
+        lambda chain_state, _: views.get_channelstate_for(
+            chain_state, payment_network_address, token_address, partner_address
         )
+        is not None,
+        retry_timeout,
+    )
 
 
 def wait_for_participant_newbalance(
@@ -92,21 +176,16 @@ def wait_for_participant_newbalance(
     else:
         raise ValueError("target_address must be one of the channel participants")
 
-    channel_state = views.get_channelstate_for(
-        views.state_from_raiden(raiden), payment_network_address, token_address, partner_address
-    )
-
-    while balance(channel_state) < target_balance:
-        assert raiden, ALARM_TASK_ERROR_MSG
-        assert raiden.alarm, ALARM_TASK_ERROR_MSG
-
-        gevent.sleep(retry_timeout)
-        channel_state = views.get_channelstate_for(
-            views.state_from_raiden(raiden),
-            payment_network_address,
-            token_address,
-            partner_address,
+    wait_for_state(
+        raiden,
+        lambda chain_state, _: balance(
+            views.get_channelstate_for(
+                chain_state, payment_network_address, token_address, partner_address
+            )
         )
+        >= target_balance,
+        retry_timeout,
+    )
 
 
 def wait_for_payment_balance(
@@ -137,22 +216,16 @@ def wait_for_payment_balance(
     else:
         raise ValueError("target_address must be one of the channel participants")
 
-    channel_state = views.get_channelstate_for(
-        views.state_from_raiden(raiden), payment_network_address, token_address, partner_address
-    )
-
-    while balance(channel_state) < target_balance:
-        assert raiden, ALARM_TASK_ERROR_MSG
-        assert raiden.alarm, ALARM_TASK_ERROR_MSG
-
-        log.critical("wait", b=balance(channel_state), t=target_balance)
-        gevent.sleep(retry_timeout)
-        channel_state = views.get_channelstate_for(
-            views.state_from_raiden(raiden),
-            payment_network_address,
-            token_address,
-            partner_address,
+    wait_for_state(
+        raiden,
+        lambda chain_state, _: balance(
+            views.get_channelstate_for(
+                chain_state, payment_network_address, token_address, partner_address
+            )
         )
+        >= target_balance,
+        retry_timeout,
+    )
 
 
 def wait_for_channel_in_states(
@@ -196,25 +269,25 @@ def wait_for_channel_in_states(
         for channel_identifier in channel_ids
     ]
 
-    while list_cannonical_ids:
-        assert raiden, ALARM_TASK_ERROR_MSG
-        assert raiden.alarm, ALARM_TASK_ERROR_MSG
+    def channels_in_states(chain_state: ChainState, _: List[Event]) -> bool:
+        # A channel stays in the target states once it reached them, the
+        # channels are not checked again
+        while list_cannonical_ids:
+            channel_state = views.get_channelstate_by_canonical_identifier(
+                chain_state=chain_state, canonical_identifier=list_cannonical_ids[-1]
+            )
 
-        canonical_id = list_cannonical_ids[-1]
-        chain_state = views.state_from_raiden(raiden)
+            channel_is_settled = (
+                channel_state is None or channel.get_status(channel_state) in target_states
+            )
+            if not channel_is_settled:
+                return False
 
-        channel_state = views.get_channelstate_by_canonical_identifier(
-            chain_state=chain_state, canonical_identifier=canonical_id
-        )
+            list_cannonical_ids.pop()
 
-        channel_is_settled = (
-            channel_state is None or channel.get_status(channel_state) in target_states
-        )
+        return True
 
-        if channel_is_settled:
-            list_cannonical_ids.pop()
-        else:
-            gevent.sleep(retry_timeout)
+    wait_for_state(raiden, channels_in_states, retry_timeout)
 
 
 def wait_for_close(
@@ -245,17 +318,14 @@ def wait_for_payment_network(
     token_address: TokenAddress,
     retry_timeout: float,
 ) -> None:
-    token_network = views.get_token_network_by_token_address(
-        views.state_from_raiden(raiden), payment_network_address, token_address
-    )
-    while token_network is None:
-        assert raiden, ALARM_TASK_ERROR_MSG
-        assert raiden.alarm, ALARM_TASK_ERROR_MSG
-
-        gevent.sleep(retry_timeout)
-        token_network = views.get_token_network_by_token_address(
-            views.state_from_raiden(raiden), payment_network_address, token_address
+    wait_for_state(
+        raiden,
+        lambda chain_state, _: views.get_token_network_by_token_address(
+            chain_state, payment_network_address, token_address
         )
+        is not None,
+        retry_timeout,
+    )
 
 
 def wait_for_settle(
@@ -314,14 +384,13 @@ def wait_for_network_state(
     Note:
         This does not time out, use gevent.Timeout.
     """
-    network_statuses = views.get_networkstatuses(views.state_from_raiden(raiden))
-
-    while network_statuses.get(node_address) != network_state:
-        assert raiden, TRANSPORT_ERROR_MSG
-        assert raiden.transport, TRANSPORT_ERROR_MSG
-
-        gevent.sleep(retry_timeout)
-        network_statuses = views.get_networkstatuses(views.state_from_raiden(raiden))
+    wait_for_state(
+        raiden,
+        lambda chain_state, _: views.get_networkstatuses(chain_state).get(node_address)
+        == network_state,
+        retry_timeout,
+        assert_running=assert_transport_running,
+    )
 
 
 def wait_for_healthy(raiden: "RaidenService", node_address: Address, retry_timeout: float) -> None:
@@ -346,20 +415,29 @@ def wait_for_transfer_success(
     Note:
         This does not time out, use gevent.Timeout.
     """
-    found = False
-    while not found:
-        assert raiden, TRANSPORT_ERROR_MSG
-        assert raiden.wal, TRANSPORT_ERROR_MSG
-        assert raiden.transport, TRANSPORT_ERROR_MSG
-
-        state_events = raiden.wal.storage.get_events()
-        for event in state_events:
-            found = (
-                isinstance(event, EventPaymentReceivedSuccess)
-                and event.identifier == payment_identifier
-                and event.amount == amount
-            )
-            if found:
-                break
+    assert raiden.wal, TRANSPORT_ERROR_MSG
+    assert_transport_running(raiden)
+
+    def is_payment_received(event: Event) -> bool:
+        return (
+            isinstance(event, EventPaymentReceivedSuccess)
+            and event.identifier == payment_identifier
+            and event.amount == amount
+        )
+
+    # Registered before the stored events are read, reading the events
+    # switches to other greenlets which may receive the payment
+    async_result = raiden.state_waiters.register(
+        lambda _, events: any(is_payment_received(event) for event in events)
+    )
+    try:
+        if any(is_payment_received(event) for event in raiden.wal.storage.get_events()):
+            return
+
+        while not async_result.ready():
+            async_result.wait(retry_timeout)
+            assert_transport_running(raiden)
+    finally:
+        raiden.state_waiters.unregister(async_result)
 
-        gevent.sleep(retry_timeout)
+    async_result.get()
@@ -181,7 +181,7 @@ def main(db_file, token_network_address, partner_address, names_translator):
         translator = None
 
     replay_wal(
-        storage=sqlite.SerializedSQLiteStorage(db_file, JSONSerializer()),
+        storage=sqlite.SerializedSQLiteStorage(db_file, JSONSerializer(), read_only=True),
         token_network_address=token_network_address,
         partner_address=partner_address,
         translator=translator,